@@ -11,6 +11,12 @@ import a99
 SESSION_PREFIX_SINGULAR = 'session-'
 SESSION_PREFIX_PLURAL = 'session-'
 MULTISESSION_PREFIX = 'multi-session-'
+INPUT_STORE_DIR = 'input-store'
+# Fast (e.g. RAM-backed) filesystem for ScratchSessions
+SCRATCH_ROOT = '/dev/shm'
+RUN_CACHE_DIR = 'run-cache'
+# Consolidated output of Sweep
+SWEEP_FILENAME = 'sweep.npz'
 
 def get_custom_multisession_dirname(session_id):
     """This defines how custom directory name is made up"""
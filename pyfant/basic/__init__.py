@@ -11,4 +11,5 @@ from .errors import *
 from .constants import *
 from .conversion import *
 from .misc import *
+from .lrucache import *
 from .paths import *
@@ -0,0 +1,85 @@
+"""Bounded-size cache"""
+
+__all__ = ["LRUCache"]
+
+import collections
+import pickle
+import threading
+
+
+class LRUCache(object):
+    """
+    Dict-like cache of bounded size, discarding the least recently used items
+
+    Args:
+        maxsize: maximum number of items
+
+    Lookups with get() are counted in attributes "hits" and "misses"
+
+    Thread-safe: may be shared among runner threads
+    """
+
+    def __init__(self, maxsize=2**16):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        with self._lock:
+            ret = self.__dict__.copy()
+            ret["_data"] = self._data.copy()
+        del ret["_lock"]
+        return ret
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def clear(self):
+        """Removes all items and zeroes hits/misses"""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def get_info(self):
+        return "hits={}, misses={}, size={}/{}".format(self.hits, self.misses, len(self), self.maxsize)
+
+    def save(self, filename):
+        """Saves items to file (hits/misses are not saved)"""
+        with self._lock:
+            items = list(self._data.items())
+        with open(filename, "wb") as h:
+            pickle.dump(items, h, pickle.HIGHEST_PROTOCOL)
+
+    def load(self, filename):
+        """Adds items from file created by save()"""
+        with open(filename, "rb") as h:
+            for key, value in pickle.load(h):
+                self[key] = value
@@ -10,4 +10,5 @@ from .conv import *
 from .conv_plez import *
 # from .conv_hitran import *
 from .conv_hitran160 import *
-from .conv_brooke2014 import *
\ No newline at end of file
+from .conv_brooke2014 import *
+from .batch import *
@@ -0,0 +1,173 @@
+"""
+Headless conversion of several molecular lines files in parallel
+"""
+
+import concurrent.futures
+import os
+import a99
+import pyfant
+from .conv import ConvMode
+
+__all__ = ["ConvJob", "convert_many", "sum_conversion_logs", "CONVERTERS"]
+
+
+def _load_hitran160(filename):
+    import f311
+    return f311.load_with_classes(filename, [pyfant.FileHITRANHITRAN, pyfant.FileHITRANLi2015])
+
+
+def _load_brooke2014(filename):
+    f = pyfant.FileBrooke2014()
+    f.load(filename)
+    return f
+
+
+# {converter name: (Conv class name, loader function name), ...}
+# Names are resolved inside the worker processes (see _get_converter())
+CONVERTERS = {"kurucz": ("ConvKurucz", "load_kurucz_mol"),
+              "plez": ("ConvPlez", "load_plez_mol"),
+              "hitran160": ("ConvHITRAN160", "_load_hitran160"),
+              "brooke2014": ("ConvBrooke2014", "_load_brooke2014"),
+              }
+
+
+class ConvJob(object):
+    """
+    Specification of one conversion to be run by convert_many()
+
+    Args:
+        fn_input: input molecular lines file name
+        system_str: formula-and-system string, e.g. "OH [A 2 Sigma - X 2 Pi]" (see MolConsts.populate_parse_str())
+        converter: key of CONVERTERS, e.g. "kurucz"
+        fn_output: (optional) output file name. Defaults to "<input file name without extension>-pfant.dat"
+        options: (optional) dict of keyword arguments passed to the converter class, e.g.
+                 {"iso": 16, "flag_spinl": True}. "mode" may be given as a ConvMode name, e.g. "EINSTEIN"
+    """
+
+    def __init__(self, fn_input, system_str, converter, fn_output=None, options=None):
+        if converter not in CONVERTERS:
+            raise ValueError("Invalid converter: '{}' (must be in {})".format(converter, list(CONVERTERS)))
+        self.fn_input = fn_input
+        self.system_str = system_str
+        self.converter = converter
+        self.fn_output = fn_output if fn_output else os.path.splitext(fn_input)[0]+"-pfant.dat"
+        self.options = dict(options) if options else {}
+
+    def __repr__(self):
+        return "{}({!r}, {!r}, {!r}, {!r}, {!r})".format(self.__class__.__name__, self.fn_input,
+               self.system_str, self.converter, self.fn_output, self.options)
+
+
+def convert_many(jobs, max_workers=None, fn_moldb=None, fn_cache=None):
+    """Runs conversions in a process pool
+
+    Args:
+        jobs: list of ConvJob
+        max_workers: number of worker processes (default: number of processors)
+        fn_moldb: FileMolDB file name. If not passed, a default database is created for the
+                  duration of the conversions
+        fn_cache: (optional) file saved by pyfant.sj_cache.save(), loaded by each worker process
+
+    Returns:
+        list of (job, log, error), in the same order as jobs: log is the MolConversionLog of the
+        conversion (or None); error is an error message (or None)
+
+    Each worker process opens the molecular constants database once, and keeps the molecular
+    constants and Kovács toolboxes of the systems it converts.
+    """
+    flag_newdb = fn_moldb is None
+    if flag_newdb:
+        db = pyfant.FileMolDB()
+        db.init_default()
+        fn_moldb = db.filename
+        db.get_conn().close()
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers, initializer=_init_worker,
+                                                    initargs=(fn_cache,)) as executor:
+            results = list(executor.map(_convert_job, jobs, [fn_moldb]*len(jobs)))
+    finally:
+        if flag_newdb:
+            try:
+                os.unlink(fn_moldb)
+            except FileNotFoundError:
+                pass
+
+    return [(job, log, error) for job, (log, error) in zip(jobs, results)]
+
+
+def sum_conversion_logs(logs):
+    """Returns MolConversionLog summing up several logs (None's are skipped)"""
+    ret = pyfant.MolConversionLog()
+    for log in logs:
+        if log is None:
+            continue
+        ret.num_lines += log.num_lines
+        ret.cnt_in += log.cnt_in
+        ret.flag_ok = ret.flag_ok and log.flag_ok
+        ret.skip_reasons.update(log.skip_reasons)
+        ret.errors.extend(log.errors)
+    return ret
+
+
+# Per-process caches (see convert_many())
+_moldbs = {}
+_molconsts = {}
+_toolboxes = {}
+
+
+def _init_worker(fn_cache):
+    if fn_cache is not None and os.path.isfile(fn_cache):
+        pyfant.sj_cache.load(fn_cache)
+
+
+def _get_moldb(fn_moldb):
+    ret = _moldbs.get(fn_moldb)
+    if ret is None:
+        ret = _moldbs[fn_moldb] = pyfant.FileMolDB()
+        ret.load(fn_moldb)
+    return ret
+
+
+def _get_molconsts(db, fn_moldb, system_str):
+    key = (fn_moldb, system_str)
+    ret = _molconsts.get(key)
+    if ret is None:
+        ret = _molconsts[key] = db.get_molconsts(system_str)
+        ret.None_to_zero()
+    return ret
+
+
+def _get_converter(name):
+    cls_name, loader_name = CONVERTERS[name]
+    loader = globals().get(loader_name) or getattr(pyfant, loader_name)
+    return getattr(pyfant, cls_name), loader
+
+
+def _convert_job(job, fn_moldb):
+    """Runs one conversion. Returns (log, error message or None)"""
+    conv = None
+    try:
+        db = _get_moldb(fn_moldb)
+        molconsts = _get_molconsts(db, fn_moldb, job.system_str)
+        cls, loader = _get_converter(job.converter)
+
+        options = dict(job.options)
+        if isinstance(options.get("mode"), str):
+            options["mode"] = ConvMode[options["mode"]]
+        conv = cls(molconsts=molconsts, moldb=db, inputfilename=job.fn_input, **options)
+
+        key = (fn_moldb, job.system_str, conv.flag_norm_sj)
+        if conv.mode == ConvMode.HLF:
+            if key not in _toolboxes:
+                _toolboxes[key] = conv.kovacs_toolbox()
+            conv.mtools = _toolboxes[key]
+
+        lines = loader(job.fn_input)
+        f = conv.make_file_molecules(lines)
+        if conv.log.flag_ok:
+            f.save_as(job.fn_output)
+        return conv.log, None
+    except Exception as e:
+        a99.get_python_logger().exception("Conversion of '{}' failed".format(job.fn_input))
+        return conv.log if conv is not None else None, a99.str_exc(e)
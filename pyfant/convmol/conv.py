@@ -1,10 +1,13 @@
 from .calc_qgbd import *
 import datetime
-from collections import OrderedDict
+from collections import OrderedDict, Counter
 import math
+import operator
+import numpy as np
 import pyfant
 import a99
 from enum import Enum
+from ..basic import LRUCache
 
 __all__ = ["Conv", "ConvMode"]
 
@@ -102,6 +105,8 @@ class Conv(object):
         self.sols = None
         self.log = None
         self.mtools = None
+        # Line positions of errors logged by _log_errors() (errors are sorted by line at the end)
+        self._error_lines = None
 
     def make_file_molecules(self, lines):
         """
@@ -119,7 +124,11 @@ class Conv(object):
         # Runs specific conversor to SetOfLines
         self.sols = {}
         self.log = pyfant.MolConversionLog()
+        self._error_lines = []
         self._make_sols(lines)
+        if self._error_lines:
+            errors = self.log.errors
+            errors[:] = [errors[i] for i in np.argsort(self._error_lines, kind="stable")]
 
         sols_list = list(self.sols.values())
         sols_list.sort(key= lambda sol: sol.vl*1000+sol.v2l)
@@ -146,8 +155,13 @@ class Conv(object):
         return f
 
     def kovacs_toolbox(self):
-        """Wraps f311.physics.multiplicity.kovacs_toolbox()"""
-        return pyfant.kovacs_toolbox(self.molconsts, flag_normalize=self.flag_norm_sj)
+        """Wraps f311.physics.multiplicity.kovacs_toolbox()
+
+        The toolbox is created once and kept in self.mtools, which may also be assigned from outside
+        (e.g., to share the toolbox among conversions of the same system)"""
+        if self.mtools is None:
+            self.mtools = pyfant.kovacs_toolbox(self.molconsts, flag_normalize=self.flag_norm_sj)
+        return self.mtools
 
     def append_line(self, line, gf_pfant, branch):
         """Use to append line to object"""
@@ -177,6 +191,47 @@ class Conv(object):
 
         self.log.cnt_in += 1
 
+    def append_lines(self, vl, v2l, lambda_, sj, jj, branch, index=None):
+        """Columnar version of append_line2(): appends many lines at once
+
+        Args:
+            vl, v2l, lambda_, sj, jj, branch: sequences of same length (vl, v2l may be scalars)
+            index: (optional) position of each line in the input lines, used in error messages
+
+        Lines are grouped into sets-of-lines with a single sort, keeping their relative order.
+        Lines that cannot be appended (e.g. FCF not available) are logged as errors
+        """
+        n = len(lambda_)
+        if n == 0:
+            return
+        vl, v2l = np.broadcast_to(vl, n), np.broadcast_to(v2l, n)
+        if index is None:
+            index = np.arange(n)
+
+        uvl, ivl = np.unique(vl, return_inverse=True)
+        uv2l, iv2l = np.unique(v2l, return_inverse=True)
+        key = ivl*len(uv2l)+iv2l
+        order = np.argsort(key, kind="stable")
+        for ii in np.split(order, np.flatnonzero(np.diff(key[order]))+1):
+            sol_key = (vl[ii[0]].item(), v2l[ii[0]].item())
+            try:
+                if self.flag_fcf and sol_key not in self.fcfs:
+                    raise KeyError("FCF not available for (vl, v2l) = ({}, {})".format(*sol_key))
+
+                if sol_key not in self.sols:
+                    qv = self.fcfs[sol_key] if self.flag_fcf else 1.
+                    gbd = calc_gbd(self.molconsts, sol_key[1])
+                    self.sols[sol_key] = pyfant.SetOfLines(*sol_key, qv, gbd["gv"], gbd["bv"],
+                                                           gbd["dv"],
+                                                           fact=1. if self.fact is None else self.fact)
+            except Exception as e:
+                self._log_errors(index[ii], a99.str_exc(e))
+                continue
+
+            self.sols[sol_key].append_lines(lambda_[ii], sj[ii]*self.strengthfactor, jj[ii],
+                                            branch[ii])
+            self.log.cnt_in += len(ii)
+
     # Must reimplement this
     def _make_sols(self, lines):
         """Converts molecular lines into a list of SetOfLines object
@@ -208,6 +263,44 @@ class Conv(object):
 
         return sj
 
+    def get_hlf_array(self, vl, v2l, J2l, branch):
+        """Vectorized get_hlf(). Returns array of SJ's, which may be negative or NO_LINE_STRENGTH
+        where get_hlf() would raise"""
+
+        if self.mtools is None:
+            self.mtools = self.kovacs_toolbox()
+
+        return self.mtools.get_sj_array(vl, v2l, J2l, branch)
+
+    def get_hlf_error(self, vl, v2l, J2l, branch):
+        """Returns the exception raised by get_hlf(vl, v2l, J2l, branch), or None"""
+        try:
+            self.get_hlf(vl, v2l, J2l, branch)
+        except Exception as e:
+            return e
+
+    @staticmethod
+    def quanta_to_branch_array(mtools, Jl, J2l, spinl, spin2l):
+        """Vectorized mtools.quanta_to_branch(): calls the latter once per distinct
+        (Jl >/==/< J2l, spinl, spin2l) and returns array of branch labels. spinl may be None"""
+
+        Jl, J2l = np.asarray(Jl), np.asarray(J2l)
+        # 2: "R"; 1: "Q"; 0: "P"
+        key = 2*(Jl > J2l)+(Jl == J2l)
+        spins = [np.unique(x, return_inverse=True) for x in (spin2l, spinl) if x is not None]
+        for uspin, ispin in spins:
+            key = key*len(uspin)+ispin.reshape(-1)
+        ukey, inverse = np.unique(key, return_inverse=True)
+
+        labels = []
+        for k in ukey.tolist():
+            values = []
+            for uspin, _ in reversed(spins):
+                k, i = divmod(k, len(uspin))
+                values.append(uspin[i].item())
+            labels.append(mtools.quanta_to_branch(k, 1, *(values if spinl is not None else [None]+values)))
+        return np.array(labels, dtype=object)[inverse.reshape(-1)]
+
     @staticmethod
     def get_sj_einstein(A, Jl, J2l, S2l, deltak, nu):
         """Calculates SJ and wavelength using Einstein's coefficient "A"."""
@@ -220,6 +313,49 @@ class Conv(object):
         ret = 1/((2*S2l+1)*(2*J2l+1)*(2-deltak))
         return ret
 
+    def _skip_lines(self, keep, mask, reason, *columns):
+        """Takes lines out of the conversion, counting them in self.log.skip_reasons
+
+        Args:
+            keep: boolean array flagging lines still to be converted (updated in-place)
+            mask: boolean array flagging lines to skip (lines already out are not counted again)
+            reason: skip reason. May contain "{}" fields, which are filled with the values of
+                    columns at each line skipped, e.g. "Isotope {}"
+            *columns: sequences with one value per line
+        """
+        mask = keep & mask
+        if not mask.any():
+            return
+        if columns:
+            counter = Counter(zip(*[np.asarray(x)[mask].tolist() for x in columns]))
+            for values, count in counter.items():
+                self.log.skip_reasons[reason.format(*values)] += count
+        else:
+            self.log.skip_reasons[reason] += int(np.count_nonzero(mask))
+        keep &= ~mask
+
+    def _fail_lines(self, keep, mask, reason):
+        """Like _skip_lines(), but also logs one error per line, as converters do when a line
+        raises an exception
+
+        Args:
+            keep, mask: see _skip_lines()
+            reason: str, or callable taking the line position and returning str
+        """
+        mask = keep & mask
+        for i in np.flatnonzero(mask).tolist():
+            self._log_errors([i], reason(i) if callable(reason) else reason)
+        keep &= ~mask
+
+    def _log_errors(self, index, reason):
+        for i in np.asarray(index).tolist():
+            self.log.skip_reasons[reason] += 1
+            msg = "#{}{} line: {}".format(i+1, a99.ordinal_suffix(i+1), reason)
+            self.log.errors.append(msg)
+            self._error_lines.append(i)
+            if not self.flag_quiet:
+                a99.get_python_logger().error(msg)
+
     # (20230719) This is not used ATM
     def _get_fcf(self, vl, v2l):
         try:
@@ -236,6 +372,19 @@ class Conv(object):
 
 ########################################################################################################################
 
+def _get_columns(lines, names):
+    """Collects attributes of line objects into NumPy arrays
+
+    Args:
+        lines: sequence of objects, e.g. KuruczMolLine
+        names: list of attribute names
+
+    Returns:
+        dict: {name: array, ...}
+    """
+    return {name: np.array(list(map(operator.attrgetter(name), lines))) for name in names}
+
+
 def calc_gbd(molconsts, v_lo):
     """
     Calculates gv, bv, dv
@@ -269,6 +418,11 @@ def calc_gbd(molconsts, v_lo):
     if int(v_lo) != v_lo:
         raise ValueError("Argument 'v_lo' must be an integer")
 
+    key = (omega_e, omega_ex_e, omega_ey_e, B_e, D_e, alpha_e, beta_e, v_lo)
+    gbd = _gbd_cache.get(key)
+    if gbd is not None:
+        return dict(gbd)
+
     gzero = omega_e / 2.0 - omega_ex_e / 4.0 + omega_ey_e / 8.0
     v_lo5 = v_lo + 0.5
 
@@ -280,5 +434,10 @@ def calc_gbd(molconsts, v_lo):
     gv = omega_e * v_lo5 - omega_ex_e * v_lo5 ** 2 + omega_ey_e * v_lo5 ** 3 - gzero
 
     gbd = {"gv": gv, "bv": bv, "dv": dv, "gzero": gzero}
+    _gbd_cache[key] = gbd
+
+    return dict(gbd)
+
 
-    return gbd
+# Results of calc_gbd(), shared by all converters of the process
+_gbd_cache = LRUCache(2**12)
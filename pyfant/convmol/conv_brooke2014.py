@@ -3,8 +3,10 @@
 __all__ = ["ConvBrooke2014"]
 
 import a99, math
+import numpy as np
 import airvacuumvald as avv
 from .conv import *
+from .conv import _get_columns
 
 
 class ConvBrooke2014(Conv):
@@ -43,39 +45,40 @@ class ConvBrooke2014(Conv):
         STATEL = self.molconsts["from_label"]
         STATE2L = self.molconsts["to_label"]
 
-        for i, line in enumerate(f.lines):
-            try:
-                if self.flag_filter_labels and not (line.eSl == STATEL and line.eS2l == STATE2L):
-                    log.skip_reasons[f"Wrong system: {line.eSl}-{line.eS2l}"] += 1
-                    continue
+        names = ["vl", "v2l", "Jl", "J2l", "branch", "nu_obs", "nu_calc"]
+        if self.flag_filter_labels:
+            names.extend(["eSl", "eS2l"])
+        if self.mode != ConvMode.HLF:
+            names.append("A")
+        c = _get_columns(f.lines, names)
+        vl, v2l, J2l, branch = c["vl"], c["v2l"], c["J2l"], c["branch"]
 
-                vl = line.vl
-                v2l = line.v2l
-                Jl = line.Jl
-                J2l = line.J2l
-                branch = line.branch
-                nu = f.nu_obs_or_calc(i)
-                lambda_ = avv.vacuum_to_air(1e8/nu)
+        # Lines still in the conversion
+        keep = np.ones(log.n, dtype=bool)
 
-                if nu < 0:
-                    log.skip_reasons["Negative wavenumber"] += 1
-                    continue
+        if self.flag_filter_labels:
+            self._skip_lines(keep, (c["eSl"] != STATEL) | (c["eS2l"] != STATE2L),
+                             "Wrong system: {}-{}", c["eSl"], c["eS2l"])
 
-                if self.mode == ConvMode.HLF:
-                    sj = self.get_hlf(vl, v2l, J2l, branch)
-                else:
-                    A = line.A
-                    sj = self.get_sj_einstein(A, Jl, J2l, S2l, deltak, nu)
+        # Observed wavenumber preferred, calculated if not present
+        nu = np.where(np.isnan(c["nu_obs"]), c["nu_calc"], c["nu_obs"])
+        with np.errstate(all="ignore"):
+            lambda_ = avv.vacuum_to_air(1e8/nu)
+        self._skip_lines(keep, nu < 0, "Negative wavenumber")
 
-                self.append_line2(vl, v2l, lambda_, sj, J2l, branch)
+        sj = np.full(log.n, np.nan)
+        if self.mode == ConvMode.HLF:
+            sj[keep] = self.get_hlf_array(vl[keep], v2l[keep], J2l[keep], branch[keep])
+            self._fail_lines(keep, sj < 0, lambda i: a99.str_exc(self.get_hlf_error(
+                vl[i].item(), v2l[i].item(), J2l[i].item(), str(branch[i]))))
+        else:
+            with np.errstate(all="ignore"):
+                sj = self.get_sj_einstein(c["A"], c["Jl"], J2l, S2l, deltak, nu)
+            self._skip_lines(keep, ~np.isfinite(sj) | ~np.isfinite(lambda_), "Invalid SJ")
 
-            except Exception as e:
-                reason = a99.str_exc(e)
-                log.skip_reasons[reason] += 1
-                msg = "#{}{} line: {}".format(i+1, a99.ordinal_suffix(i+1), reason)
-                log.errors.append(msg)
-                if not self.flag_quiet:
-                    a99.get_python_logger().exception(msg)
+        index = np.flatnonzero(keep)
+        self.append_lines(vl[index], v2l[index], lambda_[index], sj[index], J2l[index], branch[index],
+                          index)
 
 
 # === SAMPLES ==========================================================================================================
@@ -2,8 +2,10 @@
 
 __all__ = ["ConvHITRAN160"]
 
-import a99, airvacuumvald as avv, sys
+import airvacuumvald as avv, sys
+import numpy as np
 from . import Conv
+from .conv import _get_columns
 
 class ConvHITRAN160(Conv):
     """Converts HITRAN molecular lines data to PFANT "sets of lines" using Einstein's coefficients
@@ -70,68 +72,53 @@ class ConvHITRAN160(Conv):
             ref_from_label = self.molconsts["from_label"]
             ref_to_label = self.molconsts["to_label"]
 
-        for i, line in enumerate(f.lines):
-            try:
-                if line.iso != self.isowant:
-                    log.skip_reasons[f"isotopologue {line.iso}"] += 1
-                    continue
-
-                if self.flag_filter_labels:
-                    if line.from_label != ref_from_label or line.to_label != ref_to_label:
-                        log.skip_reasons[f"Wrong system: {line.from_label}-{line.to_label}"] += 1
-                        continue
-
-                if flavor == HITRAN:
-                    J2l = line.J2l
-
-                    # The following code was based on Jorge Melendez's extraehitran.f
-                    # HITRAN does not have Jl
-                    # branch examples: two letters, e.g. "PP", "QP", "SR", "PP", "OP"
-                    if line.branch == "PP":
-                        Jl = J2l-1
-                    elif line.branch == "QQ":
-                        Jl = J2l
-                    elif line.branch == "RR":
-                        Jl = J2l+1
-                    else:
-                        log.skip_reasons[f"Unhandled branch: {line.branch}"] += 1
-                        continue
-                    
-                elif flavor == LI2015:
-                    # This conversion of gp, gpp into Jl, J2l was taken from Plez's conversor [2]
-                    # and seems to be correct for the Li 2015 CO file (I checked (vl=3, v2l=0) against the CO from 1998
-                    # and J2l matches)
-                    J2l = (line.gpp-1.)/2.
-
-                    if not self.flag_jl_from_branch:
-                        Jl = (line.gp-1.)/2.
-                    else:
-                        if line.branch == "P":
-                            Jl = J2l-1
-                        elif line.branch == "Q":
-                            Jl = J2l
-                        elif line.branch == "R":
-                            Jl = J2l+1
-                        else:
-                            log.skip_reasons[f"Unhandled branch: {line.branch}"] += 1
-                            continue
-
-                else:
-                    raise NotImplementedError()
-
-                lambda_ = avv.vacuum_to_air(1e8/line.nu)
-
-                SJ = self.get_sj_einstein(line.A, Jl, J2l, S2l, deltak, line.nu)
-
-                self.append_line2(line.vl, line.v2l, lambda_, SJ, J2l, line.branch)
-
-            except Exception as e:
-                reason = a99.str_exc(e)
-                log.skip_reasons[reason] += 1
-                msg = "#{}{} line: {}".format(i+1, a99.ordinal_suffix(i+1), reason)
-                log.errors.append(msg)
-                if not self.flag_quiet:
-                    a99.get_python_logger().exception(msg)
+        names = ["iso", "nu", "A", "vl", "v2l", "branch"]
+        if self.flag_filter_labels:
+            names.extend(["from_label", "to_label"])
+        names.extend(["J2l"] if flavor == HITRAN else ["gp", "gpp"])
+        c = _get_columns(f.lines, names)
+        branch = c["branch"]
+
+        # Lines still in the conversion
+        keep = np.ones(n, dtype=bool)
+
+        self._skip_lines(keep, c["iso"] != self.isowant, "isotopologue {}", c["iso"])
+
+        if self.flag_filter_labels:
+            self._skip_lines(keep, (c["from_label"] != ref_from_label) | (c["to_label"] != ref_to_label),
+                             "Wrong system: {}-{}", c["from_label"], c["to_label"])
+
+        if flavor == HITRAN:
+            J2l = c["J2l"]
+
+            # The following code was based on Jorge Melendez's extraehitran.f
+            # HITRAN does not have Jl
+            # branch examples: two letters, e.g. "PP", "QP", "SR", "PP", "OP"
+            deltaJ = {"PP": -1, "QQ": 0, "RR": 1}
+
+        elif flavor == LI2015:
+            # This conversion of gp, gpp into Jl, J2l was taken from Plez's conversor [2]
+            # and seems to be correct for the Li 2015 CO file (I checked (vl=3, v2l=0) against the CO from 1998
+            # and J2l matches)
+            J2l = (c["gpp"]-1.)/2.
+            deltaJ = {"P": -1, "Q": 0, "R": 1} if self.flag_jl_from_branch else None
+
+        else:
+            raise NotImplementedError()
+
+        if deltaJ is None:
+            Jl = (c["gp"]-1.)/2.
+        else:
+            self._skip_lines(keep, ~np.isin(branch, list(deltaJ)), "Unhandled branch: {}", branch)
+            Jl = J2l+np.select([branch == x for x in deltaJ], list(deltaJ.values()))
+
+        with np.errstate(all="ignore"):
+            lambda_ = avv.vacuum_to_air(1e8/c["nu"])
+            SJ = self.get_sj_einstein(c["A"], Jl, J2l, S2l, deltak, c["nu"])
+        self._skip_lines(keep, ~np.isfinite(SJ) | ~np.isfinite(lambda_), "Invalid SJ")
 
+        index = np.flatnonzero(keep)
+        self.append_lines(c["vl"][index], c["v2l"][index], lambda_[index], SJ[index], J2l[index],
+                          branch[index], index)
 
         return sols, log
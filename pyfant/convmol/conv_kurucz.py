@@ -1,6 +1,8 @@
 from .convlog import *
 from .conv import *
+import numpy as np
 import pyfant
+import a99
 
 __all__ = ["ConvKurucz"]
 
@@ -35,10 +37,6 @@ class ConvKurucz(Conv):
     def _make_sols(self, lines):
 
         log = self.log
-        sols = self.sols
-
-        def append_error(msg):
-            log.errors.append("#{}{} line: {}".format(i + 1, a99.ordinal_suffix(i + 1), str(msg)))
 
         if not isinstance(lines, pyfant.FileKuruczMoleculeBase):
             raise TypeError("Invalid type for argument 'fileobj': {}".format(type(lines).__name__))
@@ -54,8 +52,8 @@ class ConvKurucz(Conv):
             raise ValueError(f"mode=={self.mode} not implemented")
 
 
-        lines = lines.lines
-        log.n = len(lines)
+        c = lines.data
+        n = log.n = len(c)
         if log.n == 0:
             raise RuntimeError("Zero lines found")
 
@@ -65,36 +63,37 @@ class ConvKurucz(Conv):
 
         mtools = self.kovacs_toolbox()
 
-        for i, line in enumerate(lines):
-            if self.iso and line.iso != self.iso:
-                log.skip_reasons["Isotope {}".format(line.iso)] += 1
-                continue
-
-            if line.statel != STATEL or line.state2l != STATE2L:
-                log.skip_reasons["Transition {}-{}".format(line.statel, line.state2l)] += 1
-                continue
-
-            branch = mtools.quanta_to_branch(line.Jl, line.J2l,
-                spinl=(None if not self.flag_spinl else line.spinl), spin2l=line.spin2l)
-
-            # This was only a test, but filters like these may be useful if line.spin2l != line.spinl:
-            #     log.skip_reasons["Different spin"] += 1
-            #     continue
-
-            try:
-                if self.mode == ConvMode.HLF:
-                    sj = self.get_hlf(line.vl, line.v2l, line.J2l, branch)
-                else:
-                    k = 1/((2*S2l+1)*(2-deltak)*(2*line.J2l+1))
-                    sj = k*10**line.loggf
-
-                self.append_line(line, sj, branch)
-
-            except Exception as e:
-                reason = a99.str_exc(e)
-                log.skip_reasons[reason] += 1
-                msg = "#{}{} line: {}".format(i + 1, a99.ordinal_suffix(i + 1), reason)
-                log.errors.append(msg)
-                if not self.flag_quiet:
-                    a99.get_python_logger().exception(msg)
-                continue
+        vl, v2l, J2l = c["vl"], c["v2l"], c["J2l"]
+
+        # Lines still in the conversion
+        keep = np.ones(n, dtype=bool)
+
+        if self.iso:
+            self._skip_lines(keep, c["iso"] != self.iso, "Isotope {}", c["iso"])
+
+        self._skip_lines(keep, (c["statel"] != STATEL) | (c["state2l"] != STATE2L),
+                         "Transition {}-{}", c["statel"], c["state2l"])
+
+        branch = np.full(n, "", dtype=object)
+        branch[keep] = self.quanta_to_branch_array(mtools, c["Jl"][keep], J2l[keep],
+                                                   c["spinl"][keep] if self.flag_spinl else None,
+                                                   c["spin2l"][keep])
+
+        # This was only a test, but filters like these may be useful if line.spin2l != line.spinl:
+        #     log.skip_reasons["Different spin"] += 1
+        #     continue
+
+        sj = np.zeros(n)
+        if self.mode == ConvMode.HLF:
+            sj[keep] = self.get_hlf_array(vl[keep], v2l[keep], J2l[keep], branch[keep])
+            self._fail_lines(keep, sj < 0, lambda i: a99.str_exc(
+                             self.get_hlf_error(vl[i].item(), v2l[i].item(), J2l[i].item(), branch[i])))
+        else:
+            with np.errstate(all="ignore"):
+                k = 1/((2*S2l+1)*(2-deltak)*(2*J2l+1))
+                sj = k*10**c["loggf"]
+            self._skip_lines(keep, ~np.isfinite(sj), "Invalid SJ")
+
+        index = np.flatnonzero(keep)
+        self.append_lines(vl[index], v2l[index], c["lambda_"][index], sj[index], J2l[index],
+                          branch[index], index)
@@ -1,5 +1,7 @@
 from .convlog import *
 from .conv import *
+from .conv import _get_columns
+import numpy as np
 import pyfant
 
 __all__ = ["ConvPlez"]
@@ -26,9 +28,6 @@ class ConvPlez(Conv):
         log = self.log
         sols = self.sols
 
-        def append_error(msg):
-            log.errors.append("#{}{} line: {}".format(i + 1, a99.ordinal_suffix(i + 1), str(msg)))
-
         if not isinstance(file, pyfant.FilePlezLinelistBase):
             raise TypeError("Invalid type for argument 'fileobj': {}".format(type(file).__name__))
 
@@ -54,52 +53,41 @@ class ConvPlez(Conv):
             from_label = self.molconsts["from_label"]
             to_label = self.molconsts["to_label"]
 
-        for i, line in enumerate(lines):
-            branch = line.branch
-            sj = 1.
-
-            try:
-                if self.flag_filter_labels:
-                    if line.from_label != from_label or line.to_label != to_label:
-                        log.skip_reasons[f"Wrong system: {line.from_label}-{line.to_label}"] += 1
-                        continue
-
-                if self.mode == ConvMode.HLF:
-                    try:
-                        hlf = mtools.get_sj(line.vl, line.v2l, line.J2l, branch)
-                    except pyfant.NoLineStrength:
-                        log.skip_reasons["Cannot calculate HLF"] += 1
-                        continue
-
-                    if hlf < 0:
-                        log.skip_reasons["Negative SJ"] += 1
-                        continue
-
-                    sj *= hlf
-
-                else:
-                    if self.mode == ConvMode.EINSTEIN_MINIMAL:
-                        J = (line.gu-1.)/2.
-                        if J < 0:
-                            J = 0
-                        line.Jl = line.J2l = J
-                        line.vl = line.v2l = 0
-
-                    if not branch:
-                        branch = "-"
-
-                    normalizationfactor = self.get_normalizationfactor(line.J2l, S2l, deltak)
-                    sj *= normalizationfactor*10**line.loggf
-
-                self.append_line(line, sj, branch)
-
-            except Exception as e:
-                reason = a99.str_exc(e)
-                log.skip_reasons[reason] += 1
-                msg = "#{}{} line: {}".format(i + 1, a99.ordinal_suffix(i + 1), reason)
-                log.errors.append(msg)
-                if not self.flag_quiet:
-                    a99.get_python_logger().exception(msg)
-                continue
+        names = ["lambda_", "branch", "vl", "v2l", "J2l"]
+        if self.flag_filter_labels:
+            names.extend(["from_label", "to_label"])
+        if self.mode != ConvMode.HLF:
+            names.extend(["loggf", "gu"])
+        c = _get_columns(lines, names)
+        branch, vl, v2l, J2l = c["branch"], c["vl"], c["v2l"], c["J2l"]
+
+        # Lines still in the conversion
+        keep = np.ones(n, dtype=bool)
+
+        if self.flag_filter_labels:
+            self._skip_lines(keep, (c["from_label"] != from_label) | (c["to_label"] != to_label),
+                             "Wrong system: {}-{}", c["from_label"], c["to_label"])
+
+        if self.mode == ConvMode.HLF:
+            sj = np.zeros(n)
+            sj[keep] = mtools.get_sj_array(vl[keep], v2l[keep], J2l[keep], branch[keep])
+            self._skip_lines(keep, sj == pyfant.NO_LINE_STRENGTH, "Cannot calculate HLF")
+            self._skip_lines(keep, sj < 0, "Negative SJ")
+
+        else:
+            if self.mode == ConvMode.EINSTEIN_MINIMAL:
+                J2l = np.maximum((c["gu"]-1.)/2., 0)
+                vl = v2l = np.zeros(n, dtype=int)
+
+            branch = np.where(branch == "", "-", branch)
+
+            with np.errstate(all="ignore"):
+                normalizationfactor = self.get_normalizationfactor(J2l, S2l, deltak)
+                sj = normalizationfactor*10**c["loggf"]
+            self._skip_lines(keep, ~np.isfinite(sj), "Invalid SJ")
+
+        index = np.flatnonzero(keep)
+        self.append_lines(vl[index], v2l[index], c["lambda_"][index], sj[index], J2l[index],
+                          branch[index], index)
 
         return sols, log
@@ -23,4 +23,7 @@ from .fileplezlinelist import *
 from .filebrooke2014 import *
 from .filemollist import *
 from .filehitran160 import *
-from .filecojm1998 import *
\ No newline at end of file
+from .filecojm1998 import *
+from .linefilter import *
+from .cachedlines import *
+from .lineindex import *
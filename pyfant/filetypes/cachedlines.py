@@ -0,0 +1,193 @@
+"""Binary cache of parsed line lists, with wavelength index"""
+
+__all__ = ["LineCache", "LineCacheEntry", "get_line_cache", "set_line_cache"]
+
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import a99
+
+
+# Changing the binary layout of any cached class requires incrementing this
+_CACHE_VERSION = 1
+
+
+class LineCacheEntry(object):
+    """
+    Parsed line list as stored in the cache
+
+    Args:
+        arrays: {name: NumPy array}; in entries read from disk, arrays are copy-on-write memory maps
+        meta: JSON-serializable dict with whatever else the file class needs
+        lambda_: (optional) wavelengths sorted in ascending order
+        order: (optional) row numbers corresponding to lambda_, i.e., lambda_ = flat_wavelengths[order]
+    """
+
+    def __init__(self, arrays, meta, lambda_=None, order=None):
+        self.arrays = arrays
+        self.meta = meta
+        self.lambda_ = lambda_
+        self.order = order
+
+    def find(self, llzero=None, llfin=None):
+        """Returns row numbers (ascending) of the lines with llzero <= wavelength <= llfin (binary search)"""
+        i0 = 0 if llzero is None else np.searchsorted(self.lambda_, llzero, "left")
+        i1 = len(self.lambda_) if llfin is None else np.searchsorted(self.lambda_, llfin, "right")
+        return np.sort(self.order[i0:i1])
+
+    def find_filter(self, line_filter):
+        """Returns row numbers within the wavelength interval of line_filter, or None if no interval"""
+        if line_filter is None or not line_filter.uses("lambda_"):
+            return None
+        return self.find(line_filter.llzero, line_filter.llfin)
+
+
+class LineCache(object):
+    """
+    Directory where parsed line lists are stored in binary (NumPy .npy) format
+
+    Each cached file has a subdirectory, whose name depends on the file class and absolute path. The
+    entry is valid while the modification time and size of the original file remain the same.
+
+    Caching is disabled by default, as entries take about as much disk space as the original files.
+    It is enabled by setting environment variable PYFANT_LINE_CACHE (cache directory), or by calling
+    set_line_cache()
+
+    Args:
+        dirname=None: cache directory. Defaults to environment variable PYFANT_LINE_CACHE, or
+                      "~/.pyfant/linecache"
+        min_size=2**26: files smaller than this (bytes) are not cached, as parsing them is quick anyway
+    """
+
+    def __init__(self, dirname=None, min_size=2**26):
+        if dirname is None:
+            dirname = os.environ.get("PYFANT_LINE_CACHE") or \
+                      os.path.join(os.path.expanduser("~"), ".pyfant", "linecache")
+        self.dirname = dirname
+        self.min_size = min_size
+
+    def get_entry_dirname(self, filename, class_):
+        key = hashlib.sha1(os.path.abspath(filename).encode("utf8")).hexdigest()[:16]
+        return os.path.join(self.dirname, "{}-{}".format(class_.__name__, key))
+
+    def get(self, filename, class_):
+        """Returns LineCacheEntry, or None if file is not in cache or entry is stale"""
+        dirname = self.get_entry_dirname(filename, class_)
+        try:
+            with open(os.path.join(dirname, "meta.json"), "r") as h:
+                meta = json.load(h)
+        except (OSError, ValueError):
+            return None
+        if meta.get("_key") != _get_key(filename):
+            return None
+        try:
+            arrays = {name: np.load(os.path.join(dirname, name+".npy"), mmap_mode="c")
+                      for name in meta["_arrays"]}
+        except (OSError, ValueError, KeyError):
+            # incomplete or damaged entry
+            return None
+        lambda_, order = arrays.pop("_lambda"), arrays.pop("_order")
+        return LineCacheEntry(arrays, meta, lambda_, order)
+
+    def put(self, filename, obj):
+        """Stores parsed file object in cache; returns LineCacheEntry
+
+        obj must implement _get_cache_data(), see load_lines()
+        """
+        arrays, meta, lambda_ = obj._get_cache_data()
+        order = np.argsort(lambda_, kind="stable")
+        entry = LineCacheEntry(arrays, meta, lambda_[order], order)
+
+        dirname = self.get_entry_dirname(filename, obj.__class__)
+        tmpdirname = "{}.tmp{}".format(dirname, os.getpid())
+        a99.get_python_logger().info("Writing line cache for '{}' to '{}'".format(filename, dirname))
+        try:
+            os.makedirs(tmpdirname, exist_ok=True)
+            meta = dict(meta, _key=_get_key(filename), _path=os.path.abspath(filename),
+                        _arrays=list(arrays.keys())+["_lambda", "_order"])
+            for name, array in list(arrays.items())+[("_lambda", entry.lambda_), ("_order", order)]:
+                np.save(os.path.join(tmpdirname, name+".npy"), array)
+            # meta.json goes last: entry is only recognized when complete
+            with open(os.path.join(tmpdirname, "meta.json"), "w") as h:
+                json.dump(meta, h)
+            if os.path.isdir(dirname):
+                shutil.rmtree(dirname)
+            os.rename(tmpdirname, dirname)
+        except OSError as e:
+            a99.get_python_logger().warning("Could not write line cache for '{}': {}".format(
+                filename, a99.str_exc(e)))
+            shutil.rmtree(tmpdirname, ignore_errors=True)
+        return entry
+
+    def clear(self):
+        """Deletes all entries"""
+        if os.path.isdir(self.dirname):
+            for name in os.listdir(self.dirname):
+                shutil.rmtree(os.path.join(self.dirname, name), ignore_errors=True)
+
+
+_line_cache = LineCache() if os.environ.get("PYFANT_LINE_CACHE") else None
+
+
+def get_line_cache():
+    """Returns LineCache used when loading line lists, or None if caching is disabled"""
+    return _line_cache
+
+
+def set_line_cache(cache):
+    """Sets LineCache used when loading line lists. Pass None to disable caching"""
+    global _line_cache
+    _line_cache = cache
+
+
+def load_lines(obj, filename):
+    """Loads line list file into obj, using the line cache if enabled and file is large enough
+
+    obj must implement:
+
+        - _do_load_uncached(filename): parses file
+        - _get_cache_data(): returns (arrays, meta, lambda_) to create LineCacheEntry. lambda_ contains
+          the wavelengths of all rows of the tables in arrays (which are "flat", e.g. all atoms together)
+        - _set_from_cache(entry): populates object from LineCacheEntry, applying its line filter if any
+
+    On a cache miss without line filter, the parsed object is used to create the cache entry. With a
+    line filter, the file is parsed uncached (filtering as it goes) and no entry is created, so that
+    the full file is never materialized only to be filtered afterwards.
+    """
+    cache = _line_cache
+    if cache is None or os.path.getsize(filename) < cache.min_size:
+        obj._do_load_uncached(filename)
+        return
+    entry = cache.get(filename, obj.__class__)
+    if entry is None:
+        obj._do_load_uncached(filename)
+        if getattr(obj, "line_filter", None) is None:
+            cache.put(filename, obj)
+        return
+    obj._set_from_cache(entry)
+
+
+def _get_key(filename):
+    st = os.stat(filename)
+    return [_CACHE_VERSION, st.st_mtime_ns, st.st_size]
+
+
+def _split_rows(table, counts, index=None):
+    """Splits "flat" table into consecutive groups of rows (e.g., one per atom)
+
+    Args:
+        table: NumPy structured array
+        counts: number of rows of each group
+        index: (optional) ascending row numbers to keep (see LineCacheEntry.find())
+
+    Returns:
+        list of NumPy arrays. Without index, these are views of table
+    """
+    offsets = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+    table = table.view(np.ndarray)
+    if index is None:
+        return [table[offsets[i]:offsets[i+1]] for i in range(len(counts))]
+    bounds = np.searchsorted(index, offsets)
+    return [table[index[bounds[i]:bounds[i+1]]] for i in range(len(counts))]
@@ -1,11 +1,71 @@
 __all__ = ["FileAtoms", "Atom", "AtomicLine"]
 
 import sys
+import itertools
 import numpy as np
 import tabulate
 import a99
 from f311 import DataFile
 import pyfant
+from .cachedlines import load_lines, _split_rows
+
+
+# Fields of the atomic lines table (one record per line)
+_FIELDS = ["lambda_", "kiex", "algf", "ch", "gr", "ge", "zinf", "abondr"]
+_DTYPE = np.dtype([(name, np.float64) for name in _FIELDS])
+
+
+def _column_property(name, doc=None):
+    """Read-only view of column of Atom lines table (no copying involved)"""
+    def getter(self):
+        ret = self.rows[name]
+        ret.flags.writeable = False
+        return ret
+    return property(getter, doc=doc)
+
+
+def _line_property(name):
+    """AtomicLine attribute that reads/writes the corresponding table cell"""
+    def getter(self):
+        return float(self._get_table()[name][self._index])
+    def setter(self, x):
+        self._get_table()[name][self._index] = x
+    return property(getter, setter)
+
+
+class _AtomLines(object):
+    """List-like interface to the lines of an Atom: items are AtomicLine views of the table rows"""
+
+    def __init__(self, atom):
+        self.__atom = atom
+
+    def __len__(self):
+        return len(self.__atom)
+
+    def __getitem__(self, item):
+        n = len(self.__atom)
+        if isinstance(item, slice):
+            return [AtomicLine(self.__atom, i) for i in range(*item.indices(n))]
+        if item < 0:
+            item += n
+        if not 0 <= item < n:
+            raise IndexError("line index out of range")
+        return AtomicLine(self.__atom, item)
+
+    def __iter__(self):
+        return (AtomicLine(self.__atom, i) for i in range(len(self.__atom)))
+
+    def __delitem__(self, item):
+        mask = np.ones(len(self.__atom), dtype=bool)
+        mask[item] = False
+        self.__atom._keep(mask)
+
+    def append(self, line):
+        self.__atom._append(line)
+
+    def extend(self, lines):
+        for line in lines:
+            self.__atom._append(line)
 
 
 @a99.froze_it
@@ -14,53 +74,70 @@ class Atom(a99.AttrsPart):
     Element with its atomic lines
 
     Atom is identified by key symbol+ionization
+
+    Lines are stored in a NumPy structured array (see rows); AtomicLine objects returned by
+    self.lines are views of its rows. **Note** such views get invalidated by cut/filter/sort
     """
     attrs = ["elem", "ioni"]
 
     @property
     def llzero(self):
         """Minimum wavelength"""
-        return min([x.lambda_ for x in self.lines])
+        return float(np.min(self.rows["lambda_"]))
 
     @property
     def llfin(self):
         """Maximum wavelength"""
-        return max([x.lambda_ for x in self.lines])
+        return float(np.max(self.rows["lambda_"]))
 
-    # Properties that iterate through the AtomicLine objects to mount vectors
-    @property
-    def lambda_(self):
-        return np.array([x.lambda_ for x in self.lines])
-    @property
-    def kiex(self):
-        return np.array([x.kiex for x in self.lines])
-    @property
-    def algf(self):
-        return np.array([x.algf for x in self.lines])
-    @property
-    def ch(self):
-        return np.array([x.ch for x in self.lines])
-    @property
-    def gr(self):
-        return np.array([x.gr for x in self.lines])
-    @property
-    def ge(self):
-        return np.array([x.ge for x in self.lines])
     @property
-    def zinf(self):
-        return np.array([x.zinf for x in self.lines])
+    def rows(self):
+        """Lines table: structured array with fields "lambda_", "kiex", "algf", "ch", "gr",
+        "ge", "zinf", "abondr" """
+        return self.__buf[:self.__n]
+
     @property
-    def abondr(self):
-        return np.array([x.abondr for x in self.lines])
+    def lines(self):
+        """List-like sequence of AtomicLine objects, which are views of the table rows"""
+        return _AtomLines(self)
+
+    @lines.setter
+    def lines(self, lines):
+        rows = np.array([tuple(getattr(line, name) for name in _FIELDS) for line in lines],
+                        dtype=_DTYPE)
+        self._set_rows(rows)
+        # standalone lines become views of the new rows
+        for i, line in enumerate(lines):
+            if isinstance(line, AtomicLine) and line._owner is None:
+                line._bind(self, i)
+
+    # Per-column vectors (read-only views)
+    lambda_ = _column_property("lambda_")
+    kiex = _column_property("kiex")
+    algf = _column_property("algf")
+    ch = _column_property("ch")
+    gr = _column_property("gr")
+    ge = _column_property("ge")
+    zinf = _column_property("zinf")
+    abondr = _column_property("abondr")
 
     def __init__(self):
         a99.AttrsPart.__init__(self)
-        self.lines = []  # list of AtomicLine
         self.elem = None
         self.ioni = None
+        # lines table: first self.__n rows of self.__buf; extra rows are room to append lines
+        self.__buf = np.zeros(0, dtype=_DTYPE)
+        self.__n = 0
 
     def __len__(self):
-        return len(self.lines)
+        return self.__n
+
+    def __copy__(self):
+        ret = Atom()
+        ret.elem = self.elem
+        ret.ioni = self.ioni
+        ret._set_rows(self.rows.copy())
+        return ret
 
     def __str__(self):
         return "'{} {}' ({} lines)".format(self.elem, self.ioni, len(self))
@@ -71,29 +148,73 @@ class Atom(a99.AttrsPart):
     def __repr__(self):
         return "'%s%s'" % (self.elem, self.ioni)
 
+    def sort(self, key="lambda_"):
+        """Sorts lines by column *key* (stable)"""
+        self._set_rows(self.rows[np.argsort(self.rows[key], kind="stable")])
+
     def _cut(self, llzero, llfin):
         """Keeps only the lines with their llzero <= lambda_ <= llfin."""
-        for i in reversed(list(range(len(self)))):
-            if not (llzero <= self.lines[i].lambda_ <= llfin):
-                del self.lines[i]
+        lambda_ = self.rows["lambda_"]
+        self._keep((lambda_ >= llzero) & (lambda_ <= llfin))
+
+    def _keep(self, mask):
+        """Keeps only the lines where boolean mask is True"""
+        self._set_rows(self.rows[mask])
+
+    def _set_rows(self, rows):
+        """Replaces the lines table. *rows* is used as-is (may be a view of a larger array)"""
+        assert rows.dtype == _DTYPE
+        self.__buf = rows
+        self.__n = len(rows)
+
+    def _append(self, line):
+        if self.__n == len(self.__buf):
+            # amortized growth
+            buf = np.zeros(max(8, 2*self.__n), dtype=_DTYPE)
+            buf[:self.__n] = self.__buf[:self.__n]
+            self.__buf = buf
+        self.__buf[self.__n] = tuple(getattr(line, name) for name in _FIELDS)
+        self.__n += 1
+        if isinstance(line, AtomicLine) and line._owner is None:
+            line._bind(self, self.__n-1)
 
 
 @a99.froze_it
 class AtomicLine(a99.AttrsPart):
-    attrs = ["lambda_", "kiex", "algf", "ch", "gr", "ge", "zinf", "abondr"]
+    """
+    Atomic line: either standalone, or a view of a row of an Atom lines table
 
-    def __init__(self):
+    A standalone line becomes a view when it is appended to an Atom, so that setting its
+    attributes after appending still works.
+    """
+
+    attrs = _FIELDS
+
+    lambda_ = _line_property("lambda_")
+    kiex = _line_property("kiex")
+    algf = _line_property("algf")
+    ch = _line_property("ch")
+    gr = _line_property("gr")
+    ge = _line_property("ge")
+    zinf = _line_property("zinf")
+    abondr = _line_property("abondr")
+
+    def __init__(self, _owner=None, _index=0):
         a99.AttrsPart.__init__(self)
 
-        # all scalars
-        self.lambda_ = None
-        self.kiex = None
-        self.algf = None
-        self.ch = None
-        self.gr = None
-        self.ge = None
-        self.zinf = None
-        self.abondr = None
+        # Atom object whose row self._index this line is a view of, or None (standalone)
+        self._owner = _owner
+        self._index = _index
+        # own storage if standalone
+        self._row = np.zeros(1, dtype=_DTYPE) if _owner is None else None
+
+    def _get_table(self):
+        return self._row if self._owner is None else self._owner.rows
+
+    def _bind(self, owner, index):
+        self._owner = owner
+        self._index = index
+        self._row = None
 
     def filter(self, lzero, lfin):
         """Reduces the number of lines to only the ones whose lambda is inside [lzero, lfin]"""
@@ -103,6 +224,12 @@ class AtomicLine(a99.AttrsPart):
 class FileAtoms(DataFile):
     """
     PFANT Atomic Lines
+
+    Args:
+        line_filter=None: LineFilter instance. If passed, only the lines accepted by the filter are kept
+                          (only the wavelength and gf criteria apply)
+
+    Large files are loaded through the line cache, if enabled (see LineCache)
     """
 
     default_filename = "atoms.dat"
@@ -112,58 +239,51 @@ class FileAtoms(DataFile):
     @property
     def llzero(self):
         """Minimum wavelength"""
-        return min([a.llzero for a in self.atoms])
+        return min([a.llzero for a in self.atoms if len(a) > 0])
 
     @property
     def llfin(self):
         """Maximum wavelength"""
-        return max([a.llfin for a in self.atoms])
+        return max([a.llfin for a in self.atoms if len(a) > 0])
 
     @property
     def num_lines(self):
         ret = sum(map(len, self.atoms))
         return ret
 
-    # Properties that iterate through the AtomicLine objects to mount vectors
     @property
     def lines(self):
-        """Merges all AtomicLine objects. Returns a list."""
+        """Merges all AtomicLine objects (views of the tables of the atoms). Returns a list."""
         ret = []
         for a in self.atoms:
             ret.extend(a.lines)
         return ret
+
     @property
-    def lambda_(self):
-        return np.hstack([np.array([x.lambda_ for x in a.lines]) for a in self.atoms])
-    @property
-    def kiex(self):
-        return np.hstack([np.array([x.kiex for x in a.lines]) for a in self.atoms])
-    @property
-    def algf(self):
-        return np.hstack([np.array([x.algf for x in a.lines]) for a in self.atoms])
-    @property
-    def ch(self):
-        return np.hstack([np.array([x.ch for x in a.lines]) for a in self.atoms])
-    @property
-    def gr(self):
-        return np.hstack([np.array([x.gr for x in a.lines]) for a in self.atoms])
-    @property
-    def ge(self):
-        return np.hstack([np.array([x.ge for x in a.lines]) for a in self.atoms])
-    @property
-    def zinf(self):
-        return np.hstack([np.array([x.zinf for x in a.lines]) for a in self.atoms])
-    @property
-    def abondr(self):
-        return np.hstack([np.array([x.abondr for x in a.lines]) for a in self.atoms])
+    def rows(self):
+        """Lines of all atoms concatenated into one structured array (see Atom.rows)"""
+        if len(self.atoms) == 0:
+            return np.zeros(0, dtype=_DTYPE)
+        return np.concatenate([a.rows for a in self.atoms])
+
+    # Per-column vectors
+    lambda_ = _column_property("lambda_")
+    kiex = _column_property("kiex")
+    algf = _column_property("algf")
+    ch = _column_property("ch")
+    gr = _column_property("gr")
+    ge = _column_property("ge")
+    zinf = _column_property("zinf")
+    abondr = _column_property("abondr")
 
     def __len__(self):
         """Length of FileAtoms object is defined as number of elements."""
         return len(self.atoms)
 
-    def __init__(self):
+    def __init__(self, line_filter=None):
         DataFile.__init__(self)
 
+        self.line_filter = line_filter
         # list of Atom objects
         self.atoms = []
 
@@ -191,7 +311,7 @@ class FileAtoms(DataFile):
             if len(atom) == 0:
                 del self.atoms[i]
 
-    def filter(self, function):
+    def filter(self, function, flag_vectorized=False):
         """
         Filters atomic lines for which function(line) is true.
 
@@ -201,14 +321,29 @@ class FileAtoms(DataFile):
                 - receives an AtomicLine object as argument,
                 - must return True or False (meaning whether or not you want that atomic line)
 
+            flag_vectorized: if set, function receives the lines table of each atom instead
+                (structured array, see Atom.rows) and must return a boolean mask
+
         "function" example: ``lambda line: line.algf >= -7``
+
+        Vectorized example: ``f.filter(lambda rows: rows["algf"] >= -7, True)``
         """
         for i in reversed(list(range(len(self)))):
             atom = self.atoms[i]
-            atom.lines = list(filter(function, atom.lines))
+            if flag_vectorized:
+                mask = np.asarray(function(atom.rows), dtype=bool)
+            else:
+                mask = np.fromiter((bool(function(line)) for line in atom.lines), dtype=bool,
+                                   count=len(atom))
+            atom._keep(mask)
             if len(atom) == 0:
                 del self.atoms[i]
 
+    def sort(self, key="lambda_"):
+        """Sorts lines within each atom by column *key*"""
+        for atom in self.atoms:
+            atom.sort(key)
+
     filter_lines = filter
 
     def filter_atoms(self, function):
@@ -235,53 +370,168 @@ class FileAtoms(DataFile):
 
     def _do_load(self, filename):
         """Clears internal lists and loads from file."""
+        load_lines(self, filename)
 
+    def _do_load_uncached(self, filename):
         with open(filename, "r") as h:
-
-            r = 0 # counts rows of file
-            edict = {}  # links atomic symbols with Atom objects created (key is atomic symbol)
-            try:
-                while True:
-                    line = AtomicLine()
-
-                    # (EE)(I) --whitespace-- (float) --ignored...--
-                    temp = a99.str_vector(h)
-                    elem, s_ioni = temp[0][:-1], temp[0][-1]
-                    line.lambda_ = float(temp[1])
-                    elem = pyfant.adjust_atomic_symbol(elem)
-                    key = elem+s_ioni  # will gb.py elements by this key
-                    if key in edict:
-                        a = edict[key]
-                    else:
-                        a = edict[key] = Atom()
-                        a.elem = elem
-                        a.ioni = int(s_ioni)
-                        self.atoms.append(a)
-                    a.lines.append(line)
-                    r += 1
-
-                    [line.kiex, line.algf, line.ch, line.gr, line.ge, line.zinf, line.abondr, finrai] = \
-                        a99.float_vector(h)
-                    r += 1
-                    # last element is end-of-file flag "finrai"
-                    if finrai == 1:
-                        break
-            except Exception as e:
-                raise type(e)(("Error around %d%s row of file '%s'" %
-                               (r+1, a99.ordinal_suffix(r+1), filename))+": "+str(e)).with_traceback(sys.exc_info()[2])
+            rows = h.read().splitlines()
+
+        try:
+            self.atoms = _parse_bulk(rows)
+        except Exception:
+            # Falls back to row-by-row parsing, which reports where the problem is
+            self.atoms = _parse_rows(rows, filename)
+        self._apply_line_filter()
+
+    def _get_cache_data(self):
+        rows = self.rows
+        meta = {"atoms": [[a.elem, a.ioni, len(a)] for a in self.atoms]}
+        return {"rows": rows}, meta, rows["lambda_"]
+
+    def _set_from_cache(self, entry):
+        meta = entry.meta["atoms"]
+        tables = _split_rows(entry.arrays["rows"], [n for _, _, n in meta], entry.find_filter(self.line_filter))
+        self.atoms = []
+        for (elem, ioni, _), rows in zip(meta, tables):
+            a = Atom()
+            a.elem = elem
+            a.ioni = ioni
+            a._set_rows(rows)
+            self.atoms.append(a)
+        self._apply_line_filter()
+
+    def _apply_line_filter(self):
+        if self.line_filter is not None:
+            self.filter(lambda rows: self.line_filter.get_mask(lambda_=rows["lambda_"], loggf=rows["algf"]), True)
 
     def _do_save_as(self, filename):
         with open(filename, "w") as h:
             n = len(self.atoms)
             for i, e in enumerate(self.atoms):
-                p = len(e)
-                for j, a in enumerate(e.lines):
-                    finrai = 1 if i == n-1 and j == p-1 else 0
-                    a99.write_lf(h, "%2s%1d %10.3f" % (e.elem, e.ioni, a.lambda_))
-                    # Writing floating-point numbers with %.7g format creates a more compact
-                    # file. In Fortran it is read with '*' format, so it understands as
-                    # long as there is a space between numbers.
-                    a99.write_lf(h, "%.7g %.7g %.7g %.7g %.7g %.7g %.7g %1d" % \
-                             (a.kiex, a.algf, a.ch, a.gr, a.ge, a.zinf, a.abondr, finrai))
-                    # old way write_lf(h, "%8.3f %.7g %8.3f %8.3f %8.3f %6.1f %3.1f %1d" % \
-                    #     (a.kiex, a.algf, a.ch, a.gr, a.ge, a.zinf, a.abondr, finrai))
+                # Writing floating-point numbers with %.7g format creates a more compact
+                # file. In Fortran it is read with '*' format, so it understands as
+                # long as there is a space between numbers.
+                # old way "%8.3f %.7g %8.3f %8.3f %8.3f %6.1f %3.1f %1d"
+                fmt = ("%2s%1d" % (e.elem, e.ioni)).replace("%", "%%")+" %10.3f\n" \
+                      "%.7g %.7g %.7g %.7g %.7g %.7g %.7g 0\n"
+                values = e.rows.tolist()
+                if i == n-1 and len(values) > 0:
+                    # last line has end-of-file flag "finrai" set
+                    last = values.pop()
+                _write_chunked(h, fmt, values)
+                if i == n-1 and len(e) > 0:
+                    h.write((fmt[:-2]+"1\n") % last)
+
+
+# Number of lines formatted in one go by _write_chunked()
+_CHUNK_SIZE = 2000
+
+
+def _write_chunked(h, fmt, values):
+    """Writes fmt % record for record in values, formatting whole chunks with a single % operation"""
+    for k in range(0, len(values), _CHUNK_SIZE):
+        chunk = values[k:k+_CHUNK_SIZE]
+        h.write((fmt*len(chunk)) % tuple(itertools.chain.from_iterable(chunk)))
+
+
+def _parse_bulk(rows):
+    """Parses atoms.dat rows all at once. Returns list of Atom objects.
+
+    The atoms' tables are views of one contiguous table, ordered by atom (atoms appear in the order
+    of first occurrence in file, lines keep file order).
+
+    Raises some exception if the file does not follow the format exactly; the caller should then
+    fall back to _parse_rows()
+    """
+    m = len(rows)//2
+    values = rows[1:2*m:2]
+    tokens = " ".join(values).split()
+    if len(tokens) != 8*m:
+        raise ValueError("Wrong number of values")
+    data = np.array(tokens, dtype=float).reshape(m, 8)
+    # last element is end-of-file flag "finrai"
+    ends = np.flatnonzero(data[:, 7] == 1)
+    if len(ends) == 0:
+        raise ValueError("End-of-file flag not found")
+    m = ends[0]+1
+    data = data[:m]
+
+    # (EE)(I) --whitespace-- (float) --ignored...--
+    headers = rows[0:2*m:2]
+    tokens = " ".join(headers).split()
+    if len(tokens) == 2*m:
+        keys, lambda_ = np.array(tokens[0::2]), np.array(tokens[1::2], dtype=float)
+    else:
+        # some header row has extra (ignored) text
+        headers = [row.split(None, 2) for row in headers]
+        keys = np.array([x[0] for x in headers])
+        lambda_ = np.array([x[1] for x in headers], dtype=float)
+
+    # groups lines by atom, atoms in order of first occurrence
+    ukeys, first, inv = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    ii = np.argsort(rank[inv], kind="stable")
+    table = np.empty(m, dtype=_DTYPE)
+    table["lambda_"] = lambda_[ii]
+    for j, name in enumerate(_FIELDS[1:]):
+        table[name] = data[ii, j]
+
+    counts = np.bincount(rank[inv], minlength=len(ukeys))
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    ret = []
+    edict = {}  # Atom objects by adjusted key (files may have, e.g., both "C1" and " C1")
+    for j, key in enumerate(ukeys[order]):
+        key = str(key)
+        elem = pyfant.adjust_atomic_symbol(key[:-1])
+        rows_ = table[offsets[j]:offsets[j+1]]
+        if elem+key[-1] in edict:
+            a = edict[elem+key[-1]]
+            a._set_rows(np.concatenate((a.rows, rows_)))
+            continue
+        a = edict[elem+key[-1]] = Atom()
+        a.elem = elem
+        a.ioni = int(key[-1])
+        a._set_rows(rows_)
+        ret.append(a)
+    return ret
+
+
+def _parse_rows(rows, filename):
+    """Parses atoms.dat rows one by one. Returns list of Atom objects."""
+    ret = []
+    r = 0 # counts rows of file
+    edict = {}  # links atomic symbols with Atom objects created (key is atomic symbol)
+    rdict = {}  # lists of table rows for each atom (same key)
+    try:
+        while True:
+            # (EE)(I) --whitespace-- (float) --ignored...--
+            temp = rows[r].split()
+            elem, s_ioni = temp[0][:-1], temp[0][-1]
+            lambda_ = float(temp[1])
+            elem = pyfant.adjust_atomic_symbol(elem)
+            key = elem+s_ioni  # will gb.py elements by this key
+            if key in edict:
+                rows_ = rdict[key]
+            else:
+                a = edict[key] = Atom()
+                a.elem = elem
+                a.ioni = int(s_ioni)
+                ret.append(a)
+                rows_ = rdict[key] = []
+            r += 1
+
+            [kiex, algf, ch, gr, ge, zinf, abondr, finrai] = [float(x) for x in rows[r].split()]
+            rows_.append((lambda_, kiex, algf, ch, gr, ge, zinf, abondr))
+            r += 1
+            # last element is end-of-file flag "finrai"
+            if finrai == 1:
+                break
+    except Exception as e:
+        raise type(e)(("Error around %d%s row of file '%s'" %
+                       (r+1, a99.ordinal_suffix(r+1), filename))+": "+str(e)).with_traceback(sys.exc_info()[2])
+
+    for key, a in edict.items():
+        a._set_rows(np.array(rdict[key], dtype=_DTYPE))
+    return ret
@@ -2,7 +2,7 @@
 
 __all__ = ["FileHITRAN160", "FileHITRANHITRAN", "FileHITRANLi2015"]
 
-import a99, math
+import a99, math, airvacuumvald as avv
 from f311 import DataFile
 from dataclasses import dataclass
 
@@ -44,10 +44,15 @@ class FileHITRAN160(DataFile):
     HITRAN 160-column format
 
     Note: there was the HAPI, but I stopped trusting it at some point
+
+    Args:
+        line_filter=None: LineFilter instance. Its wavelength interval (air) is converted to a wavenumber
+                          interval, against which field "nu" is compared. The gf criterion is not applied
     """
 
-    def __init__(self):
+    def __init__(self, line_filter=None):
         DataFile.__init__(self)
+        self.line_filter = line_filter
         self.lines = []
 
     def __len__(self):
@@ -71,6 +76,9 @@ class FileHITRAN160(DataFile):
 # 0123456789012345678901234567890123456789012345678901234567890123456789012345678901234567890123456789012345678901234567890123456789012345678901234567890123456789
 # 0         1         2         3         4         5         6         7         8         9        10        11        12        13        14        15
 
+    # Whether _process_further() fills in J2l
+    _flag_J2l = True
+
     def _process_further(self, line):
         raise NotImplementedError()
 
@@ -80,9 +88,22 @@ class FileHITRAN160(DataFile):
             if not s: return None
             return s
 
+        line_filter = self.line_filter
+        numin, numax = 0., math.inf
+        if line_filter is not None:
+            if line_filter.llfin is not None:
+                numin = 1e8/avv.air_to_vacuum(line_filter.llfin)
+            if line_filter.llzero is not None:
+                numax = 1e8/avv.air_to_vacuum(line_filter.llzero)
+
         with open(filename, "r") as h:
             for i, s in enumerate(h):
                 try:
+                    if line_filter is not None:
+                        nu = float(s[3:15])
+                        if not (numin <= nu <= numax and line_filter.accepts(iso=int(s[2]))):
+                            continue
+
                     line = HITRANLine(molid=int(s[0:2]),
                                       iso=int(s[2]),
                                       nu=float(s[3:15]),
@@ -93,10 +114,15 @@ class FileHITRAN160(DataFile):
                                       local_lower_quanta=s[112:127],
                                       gp=float(s[145:153]),
                                       gpp=float(s[153:160]), )
-                    self.lines.append(line)
-
                     self._process_further(line)
 
+                    if line_filter is not None and not line_filter.accepts(
+                            from_label=line.from_label or None, to_label=line.to_label or None, vl=line.vl,
+                            v2l=line.v2l, J2l=line.J2l if self._flag_J2l else None):
+                        continue
+
+                    self.lines.append(line)
+
                 except Exception as e:
                     raise RuntimeError("Error around %d%s row of file '%s': \"%s\""%
                                        (i+1, a99.ordinal_suffix(i+1), filename, a99.str_exc(e))) from e
@@ -123,6 +149,8 @@ class FileHITRANHITRAN(FileHITRAN160):
         line.J2l = float(q[3:8])
 
 class FileHITRANLi2015(FileHITRAN160):
+    _flag_J2l = False
+
     def _process_further(self, line):
         # "             41"      "             41"      "               "      "     R  0      "
         #  012345678901234        012345678901234        012345678901234        012345678901234
@@ -5,12 +5,24 @@ import a99
 from f311 import DataFile
 import io
 import os
+import numpy as np
 from dataclasses import dataclass
 from typing import Any
+from .fileatoms import _write_chunked
+from .filemod import _LazyRecords
+from .cachedlines import load_lines
 
 
-# Will update progress status every time the following number of lines is read from file
-_PROGRESS_INDICATOR_PERIOD = 1030 * 5
+# Approximate number of bytes of file read and parsed in one go
+_CHUNK_SIZE = 2**22
+
+
+def _int0(s):
+    """int() that returns zero if s cannot be converted"""
+    try:
+        return int(s)
+    except ValueError:
+        return 0
 
 
 @dataclass
@@ -78,22 +90,56 @@ def load_kurucz_mol(filename):
 
 
 class FileKuruczMoleculeBase(DataFile):
-    """Base class for the two types of Kurucz molecular lines file"""
+    """Base class for the two types of Kurucz molecular lines file
+
+    Lines are stored in a NumPy structured array (attribute "data"), whose fields are the ones of the
+    line class (e.g. KuruczMolLine). Attribute "lines" gives a read-only sequence of line objects, which
+    are created on demand.
+
+    Descendants describe their fixed-width row format in _fields, which is used both by the bulk parser
+    and by the row-by-row one (used to pinpoint the row where some problem is).
+
+    Args:
+        line_filter=None: LineFilter instance. If passed, only the lines accepted by the filter are loaded
+
+    Large files are loaded through the line cache, if enabled (see LineCache)
+    """
 
     attrs = ["num_lines"]
 
+    # Line class, whose fields must match _fields
+    _line_class = None
+    # Fixed-width fields of a row: (name, first column, last column (exclusive, or None), type). type is
+    # float, int, str, or _int0 (integer, becomes zero if cannot be converted)
+    _fields = []
+    # Typical size of a row in bytes, used to estimate the number of rows in a file
+    _row_size = 70
+    # {LineFilter field name: name in _fields}; names missing from _fields are ignored
+    _filter_fields = {"lambda_": "lambda_", "iso": "iso", "from_label": "statel", "to_label": "state2l",
+                      "vl": "vl", "v2l": "v2l", "J2l": "J2l", "loggf": "loggf"}
+
     @property
     def num_lines(self):
         return len(self)
 
+    @property
+    def lines(self):
+        return _LazyRecords(self.data, self._make_line)
+
+    @lines.setter
+    def lines(self, lines):
+        values = [tuple(getattr(line, name) for name, _, _, _ in self._fields) for line in lines]
+        self.data = np.array(values, dtype=self._get_dtype(self._get_str_len(values)))
+
     def __len__(self):
-        return len(self.lines)
+        return len(self.data)
 
-    def __init__(self):
+    def __init__(self, line_filter=None):
         DataFile.__init__(self)
 
-        # list of KuruczMolLine objects
-        self.lines = []
+        self.line_filter = line_filter
+        # NumPy structured array, one element per line
+        self.data = np.zeros(0, dtype=self._get_dtype())
 
     def __iter__(self):
         return iter(self.lines)
@@ -101,247 +147,297 @@ class FileKuruczMoleculeBase(DataFile):
     def __getitem__(self, item):
         return self.lines.__getitem__(item)
 
-
-@a99.froze_it
-class FileKuruczMolecule(FileKuruczMoleculeBase):
-    """
-    Kurucz molecular lines file
-
-    **Note** Kurucz file so far refers to one molecule only.
-
-    **Note** Load only
-    """
-
     def _do_load(self, filename):
+        load_lines(self, filename)
 
-        # **note** Kurucz puts always the "double-line" values before the "line" values
-        #
-        #   Wl(nm)   loggf   J"    E(cm-1)  J'   E(cm-1)   H
-        #   |        |       |     |        |    |         |O
-        #   |        |       |     |        |    |         || electronic state
-        #   |        |       |     |        |    |         || |v"=00
-        #   |        |       |     |        |    |         || || lambda-doubling component
-        #   |        |       |     |        |    |         || || |spin2l
-        #   |        |       |     |        |    |         || || ||
-        #
-        #   204.5126 -7.917  2.5    83.925  2.5  48964.990 108X00f1   A07e1   16
-        #   204.7561 -7.745  3.5   202.380  3.5  49025.320 108X00f1   A07e1   16
-        #   204.9400 -7.883  5.5   543.596  6.5  49322.740 108X00e1   A07e1   16
-        #   205.0076 -7.931  3.5   201.931  2.5  48964.990 108X00e1   A07e1   16
-        #   205.0652 -7.621  4.5   355.915  4.5  49105.280 108X00f1   A07e1   16
-        #   205.0652 -7.621  4.5   355.915  4.5  49105.280 108X00f1   A07e1   16
-        #
-        # Another sample from file cnax12brookek.asc
-        #  1500.0057 -3.734  7.5-35901.223  6.5 -42566.043 607X20f2   A22f2   12 617 K
-        #  1500.0122 -1.704100.5-34572.316101.5 -41237.107 607X09 2   A10f2   12 617 K
-        #  1500.0307 -2.220 84.5-33050.728 85.5 -39715.437 607X11f2   A12f2   12 617 K
-        #  1500.0701 -5.367 56.5-29897.673 57.5 -36562.207 607X13f2   A14f1   12 617 K
-        #  1500.0896 -3.745 95.5-22615.737 96.5  29280.184 607X03f2   A03f1   12 617 K BR
-        #
-        # 1         11     18   23        33   38         49          61      69 1-based
-        # 0         10     17   22        32   37         48          60      68 0-based
-        # 01234567890123456789012345678901234567890123456789012345678901234567890123456789
-        #
-        # FORMAT(F10.4.F7.3,F5.1,F10.3,F5.1,F11.3,I4,A1,I2,A1,I1,3X,A1,I2,A1,I1,3X,I2)
-        # "
-        # The code for the diatomic molecules is two 2-digit element numbers in
-        # ascending order.  The labels consist of the electronic state, the vibrational
-        # level, the lambda-doubling component, and the spin state.  Sometimes two
-        # characters are required for the electronic state and the format becomes
-        # ,A2,I2,A1,i1,2X,.  Negative energies are predicted or extrapolated"
-        #
-        # http://kurucz.harvard.edu/linelists/0linelists.readme
-
-        filesize = os.path.getsize(filename)
-        num_lines = int(filesize/70)
-
+    def _do_load_uncached(self, filename):
+        num_lines = int(os.path.getsize(filename)/self._row_size)
         with open(filename, "r") as h:
             self._do_load_h(h, filename, num_lines)
 
+    def _get_cache_data(self):
+        return {"data": self.data}, {}, self.data["lambda_"]
+
+    def _set_from_cache(self, entry):
+        data = entry.arrays["data"]
+        index = entry.find_filter(self.line_filter)
+        if index is not None:
+            data = data[index]
+        if self.line_filter is not None:
+            data = data[self._get_filter_mask(data, self.line_filter)]
+        self.data = data.view(np.ndarray)
+
     def _do_load_h(self, h, filename, num_lines=0):
+        self.data = _concatenate(list(self._iter_chunks_h(h, filename, num_lines, line_filter=self.line_filter)),
+                                 self._get_dtype)
+
+    @classmethod
+    def iter_chunks(cls, filename, chunk_size=_CHUNK_SIZE, line_filter=None):
+        """Reads file piece by piece, so that the whole file never needs to be in memory
+
+        Args:
+            filename: path to file
+            chunk_size: approximate number of bytes of file read each time
+            line_filter: (optional) LineFilter instance
+
+        Returns:
+            generator of NumPy structured arrays (like the "data" attribute)
+        """
+        num_lines = int(os.path.getsize(filename)/cls._row_size)
+        with open(filename, "r") as h:
+            yield from cls._iter_chunks_h(h, filename, num_lines, chunk_size, line_filter)
+
+    @classmethod
+    def _iter_chunks_h(cls, h, filename, num_lines=0, chunk_size=_CHUNK_SIZE, line_filter=None):
         r = 0  # counts rows of file
-        ii = 0
+        while True:
+            rows = h.readlines(chunk_size)
+            if len(rows) == 0:
+                break
+            rows = [s.strip("\n") for s in rows]
+            # stops at first empty row
+            try:
+                rows = rows[:rows.index("")]
+                flag_end = True
+            except ValueError:
+                flag_end = False
+            if len(rows) == 0:
+                break
+
+            kept = rows if line_filter is None else cls._filter_rows(rows, line_filter)
+            try:
+                data = cls._parse_bulk(kept)
+            except Exception:
+                data = cls._parse_rows(rows, r, filename)
+            cls._post_process(data)
+            if line_filter is not None:
+                data = data[cls._get_filter_mask(data, line_filter)]
+
+            r += len(rows)
+            a99.get_python_logger().info("Loading '{}': {}".format(filename, a99.format_progress(r, num_lines)))
+            yield data
+            if flag_end:
+                break
+
+    @classmethod
+    def _parse_bulk(cls, rows):
+        """Converts all rows at once, slicing columns out of a character matrix"""
+        if len(rows) == 0:
+            return np.zeros(0, dtype=cls._get_dtype())
+        m = _get_char_matrix(rows)
+        data = np.empty(len(rows), dtype=cls._get_dtype(m.shape[1]-cls._fields[-1][1]))
+        for name, i0, i1, type_ in cls._fields:
+            data[name] = _convert_column(m[:, i0:i1], type_)
+        return data
+
+    @classmethod
+    def _filter_rows(cls, rows, line_filter):
+        """Returns rows accepted by line_filter, converting only the columns that the filter needs
+
+        If these columns fail to convert, returns all rows, leaving errors to the parsers.
+        """
+        fields = {name: (i0, i1, type_) for name, i0, i1, type_ in cls._fields}
+        names = [name for key, name in cls._filter_fields.items() if name in fields and line_filter.uses(key)]
+        if len(names) == 0:
+            return rows
+        try:
+            m = _get_char_matrix(rows)
+            # only the filter columns are filled, but _post_process() must see all fields
+            probe = np.zeros(len(rows), dtype=cls._get_dtype())
+            for name in names:
+                i0, i1, type_ = fields[name]
+                probe[name] = _convert_column(m[:, i0:i1], type_)
+        except Exception:
+            return rows
+        cls._post_process(probe)
+        mask = cls._get_filter_mask(probe, line_filter)
+        return [s for s, flag in zip(rows, mask) if flag]
+
+    @classmethod
+    def _get_filter_mask(cls, data, line_filter):
+        names = data.dtype.names
+        return line_filter.get_mask(**{key: data[name] for key, name in cls._filter_fields.items()
+                                       if name in names})
+
+    @classmethod
+    def _parse_rows(cls, rows, r, filename):
+        """Row-by-row version of _parse_bulk(). Raises error pointing to first row that fails"""
+        values = []
         try:
-            self.lines = []
-            while True:
-                s = h.readline().strip("\n")
-                if len(s) == 0:
-                    break
-
-                # Kurucz: "negative energies are predicted or extrapolated" ...
-                # (http: // kurucz.harvard.edu / linelists.html)
-                E2l = float(s[22:32])
-                # (20230720) ... but it doesn't mean that I need to invert the value: loader should be as impartial as
-                #            possible
-                # if E2l < 0:
-                #     E2l = -E2l
-                El = float(s[37:48])
-                # if El < 0:
-                #     El = -El
-
-                try:
-                    spin2l = int(s[56:57])
-                except ValueError:
-                    spin2l = 0
-
-                try:
-                    spinl = int(s[64:65])
-                except ValueError:
-                    spinl = 0
-
-                line = KuruczMolLine(
-                    lambda_=float(s[0:10]) * 10,
-                    loggf=float(s[10:17]),
-                    J2l=float(s[17:22]),
-                    E2l=E2l,
-                    Jl=float(s[32:37]),
-                    El=El,
-                    atomn0=int(s[48:50]),
-                    atomn1=int(s[50:52]),
-                    state2l=s[52:53],
-                    v2l=int(s[53:55]),
-                    lambda_doubling2l=s[55:56],
-                    spin2l=spin2l,
-                    statel=s[60:61],
-                    vl=int(s[61:63]),
-                    lambda_doublingl=s[63:64],
-                    spinl=spinl,
-                    iso=int(s[68:70]),
-                    rest=s[70:])
-
-
-                self.lines.append(line)
+            for s in rows:
+                values.append(tuple(type_(s[i0:i1]) for _, i0, i1, type_ in cls._fields))
                 r += 1
-                ii += 1
-                if ii == _PROGRESS_INDICATOR_PERIOD:
-                    a99.get_python_logger().info(
-                        "Loading '{}': {}".format(filename, a99.format_progress(r, num_lines)))
-                    ii = 0
-
-
         except Exception as e:
-            # f = type(e)(("Error around %d%s row of file '%s'" %
-            #              (r + 1, a99.ordinal_suffix(r + 1), filename)) + ": " + str(
-            #     e)).with_traceback(sys.exc_info()[2])
             raise RuntimeError("Error around %d%s row of file '%s': \"%s\"" %
                                (r + 1, a99.ordinal_suffix(r + 1), filename, a99.str_exc(e))) from e
+        return np.array(values, dtype=cls._get_dtype(cls._get_str_len(values)))
 
+    @classmethod
+    def _post_process(cls, data):
+        """Corrections applied to parsed data, in-place"""
 
-    def _do_save_as(self, filename):
-        with open(filename, "w") as h:
-            for l in self.lines:
-                #  1500.0896 -3.745 95.5-22615.737 96.5  29280.184 607X03f2   A03f1   12 617 K BR
-                a99.write_lf(h, f"{l.lambda_/10:10.4f}{l.loggf:7.3f}{l.J2l:5.1f}{l.E2l:10.3f}{l.Jl:5.1f}{l.El:11.3f}"
-                                f"{l.atomn0:2d}{l.atomn1:02d}{l.state2l:1s}{l.v2l:02d}{l.lambda_doubling2l:1s}"
-                                f"{l.spin2l:1d}   {l.statel:1s}{l.vl:02d}{l.lambda_doublingl:1s}{l.spinl:1d}"
-                                f"   {l.iso:2d}{l.rest}")
+    @classmethod
+    def _get_dtype(cls, str_len=0):
+        """Returns dtype of the "data" attribute. str_len is the length of "open-ended" str field"""
+        return np.dtype([(name, {float: np.float64, int: np.int32, _int0: np.int32}.get(type_, None) or
+                          "U{}".format(max(1, str_len if i1 is None else i1-i0)))
+                         for name, i0, i1, type_ in cls._fields])
 
+    @classmethod
+    def _get_str_len(cls, values):
+        """Returns length of "open-ended" str field given values (sequence of tuples)"""
+        if cls._fields and cls._fields[-1][2] is None:
+            return max([len(x[-1]) for x in values], default=0)
+        return 0
 
- # 15000.896 -3.745 95.5 22615.737 96.5  29280.184 607X 3f2   A 3f112 617 K BR
- # 1500.0896 -3.745 95.5-22615.737 96.5  29280.184 607X03f2   A03f1   12 617 K BR
+    def _make_line(self, data, i):
+        return self._line_class(*data[i].tolist())
 
 
 @a99.froze_it
-class FileKuruczMolecule1(FileKuruczMoleculeBase):
-    """
-    Kurucz molecular lines file following format of file "c2dabrookek.asc"
+class FileKuruczMolecule(FileKuruczMoleculeBase):
     """
+    Kurucz molecular lines file
 
-    def _do_load(self, filename):
-
-        # **note** Kurucz puts always the "double-line" values before the "line" values
-        #
-        #     Wl(nm) loggf    J"   E(cm-1)   J'    E(cm-1) C C
-        #          |      |    |         |    |          | | |multiplicity
-        #          |      |    |         |    |          | | ||electronic state
-        #          |      |    |         |    |          | | |||v"=00
-        #          |      |    |         |    |          | | |||| lambda-doubling component
-        #          |      |    |         |    |          | | |||| |spin2l
-        #          |      |    |         |    |          | | |||| ||
-        #   287.7558-14.533 23.0  2354.082 24.0 -37095.578 6063a00e1  3d10e3  12 677  34741.495
-        #   287.7564-14.955 22.0  2282.704 23.0 -37024.124 6063a00f1  3d10f3  12 677  34741.419
-        #   287.7582-14.490 21.0  2214.696 22.0 -36955.900 6063a00e1  3d10e3  12 677  34741.205
-        #   287.7613-15.004 24.0  2428.453 25.0 -37169.280 6063a00f1  3d10f3  12 677  34740.828
-        #   287.7650-14.899 20.0  2149.765 21.0 -36890.147 6063a00f1  3d10f3  12 677  34740.382
-        #   287.7671-14.573 25.0  2506.275 26.0 -37246.411 6063a00e1  3d10e3  12 677  34740.136
-        #   287.7739-14.442 19.0  2088.132 20.0 -36827.442 6063a00e1  3d10e3  12 677  34739.310
-        # 0         1         2         3         4         5         6         7         8
-        # 012345678901234567890123456789012345678901234567890123456789012345678901234567890123456789
-        #   205.0652 -7.621  4.5   355.915  4.5  49105.280 108X00f1   A07e1   16
-
-        filesize = os.path.getsize(filename)
-        num_lines = int(filesize/84)
+    **Note** Kurucz file so far refers to one molecule only.
+    """
 
-        with open(filename, "r") as h:
-            self._do_load_h(h, filename, num_lines)
+    # **note** Kurucz puts always the "double-line" values before the "line" values
+    #
+    #   Wl(nm)   loggf   J"    E(cm-1)  J'   E(cm-1)   H
+    #   |        |       |     |        |    |         |O
+    #   |        |       |     |        |    |         || electronic state
+    #   |        |       |     |        |    |         || |v"=00
+    #   |        |       |     |        |    |         || || lambda-doubling component
+    #   |        |       |     |        |    |         || || |spin2l
+    #   |        |       |     |        |    |         || || ||
+    #
+    #   204.5126 -7.917  2.5    83.925  2.5  48964.990 108X00f1   A07e1   16
+    #   204.7561 -7.745  3.5   202.380  3.5  49025.320 108X00f1   A07e1   16
+    #   204.9400 -7.883  5.5   543.596  6.5  49322.740 108X00e1   A07e1   16
+    #   205.0076 -7.931  3.5   201.931  2.5  48964.990 108X00e1   A07e1   16
+    #   205.0652 -7.621  4.5   355.915  4.5  49105.280 108X00f1   A07e1   16
+    #   205.0652 -7.621  4.5   355.915  4.5  49105.280 108X00f1   A07e1   16
+    #
+    # Another sample from file cnax12brookek.asc
+    #  1500.0057 -3.734  7.5-35901.223  6.5 -42566.043 607X20f2   A22f2   12 617 K
+    #  1500.0122 -1.704100.5-34572.316101.5 -41237.107 607X09 2   A10f2   12 617 K
+    #  1500.0307 -2.220 84.5-33050.728 85.5 -39715.437 607X11f2   A12f2   12 617 K
+    #  1500.0701 -5.367 56.5-29897.673 57.5 -36562.207 607X13f2   A14f1   12 617 K
+    #  1500.0896 -3.745 95.5-22615.737 96.5  29280.184 607X03f2   A03f1   12 617 K BR
+    #
+    # 1         11     18   23        33   38         49          61      69 1-based
+    # 0         10     17   22        32   37         48          60      68 0-based
+    # 01234567890123456789012345678901234567890123456789012345678901234567890123456789
+    #
+    # FORMAT(F10.4.F7.3,F5.1,F10.3,F5.1,F11.3,I4,A1,I2,A1,I1,3X,A1,I2,A1,I1,3X,I2)
+    # "
+    # The code for the diatomic molecules is two 2-digit element numbers in
+    # ascending order.  The labels consist of the electronic state, the vibrational
+    # level, the lambda-doubling component, and the spin state.  Sometimes two
+    # characters are required for the electronic state and the format becomes
+    # ,A2,I2,A1,i1,2X,.  Negative energies are predicted or extrapolated"
+    #
+    # http://kurucz.harvard.edu/linelists/0linelists.readme
+    #
+    # Kurucz: "negative energies are predicted or extrapolated" (http: // kurucz.harvard.edu / linelists.html)
+    # (20230720) ... but it doesn't mean that I need to invert the value: loader should be as impartial as
+    #            possible
+
+    _line_class = KuruczMolLine
+    _fields = [("lambda_", 0, 10, float),
+               ("loggf", 10, 17, float),
+               ("J2l", 17, 22, float),
+               ("E2l", 22, 32, float),
+               ("Jl", 32, 37, float),
+               ("El", 37, 48, float),
+               ("atomn0", 48, 50, int),
+               ("atomn1", 50, 52, int),
+               ("state2l", 52, 53, str),
+               ("v2l", 53, 55, int),
+               ("lambda_doubling2l", 55, 56, str),
+               ("spin2l", 56, 57, _int0),
+               ("statel", 60, 61, str),
+               ("vl", 61, 63, int),
+               ("lambda_doublingl", 63, 64, str),
+               ("spinl", 64, 65, _int0),
+               ("iso", 68, 70, int),
+               ("rest", 70, None, str)]
+
+    @classmethod
+    def _post_process(cls, data):
+        # nm to angstrom
+        data["lambda_"] *= 10
 
-    def _do_load_h(self, h, filename, num_lines=0):
-        r = 0  # counts rows of file
-        ii = 0
-        try:
-            self.lines = []
-            while True:
-                s = h.readline().strip("\n")
-                if len(s) == 0:
-                    break
-
-                # Kurucz: "negative energies are predicted or extrapolated"
-                # (http: // kurucz.harvard.edu / linelists.html)
-                E2l = float(s[22:32])
-                if E2l < 0:
-                    E2l = -E2l
-                El = float(s[37:48])
-                if El < 0:
-                    El = -El
-
-                try:
-                    spin2l = int(s[57:58])
-                except ValueError:
-                    spin2l = 0
-
-                try:
-                    spinl = int(s[65:66])
-                except ValueError:
-                    spinl = 0
-
-                line = KuruczMolLine(
-                    float(s[0:10]) * 10,
-                    float(s[10:17]),
-                    float(s[17:22]),
-                    E2l,
-                    float(s[32:37]),
-                    El,
-                    int(s[48:50]),
-                    int(s[50:52]),
-                    s[53:54],
-                    int(s[54:56]),
-                    s[56:57],
-                    spin2l,
-                    s[61:62],
-                    int(s[62:64]),
-                    s[64:65],
-                    spinl,
-                    int(s[68:70]), )
-
-
-                self.lines.append(line)
-                r += 1
-                ii += 1
-                if ii == _PROGRESS_INDICATOR_PERIOD:
-                    a99.get_python_logger().info(
-                        "Loading '{}': {}".format(filename, a99.format_progress(r, num_lines)))
-                    ii = 0
+    def _do_save_as(self, filename):
+        d = self.data
+        #  1500.0896 -3.745 95.5-22615.737 96.5  29280.184 607X03f2   A03f1   12 617 K BR
+        values = zip(*[(d["lambda_"]/10).tolist()]+[d[name].tolist() for name, _, _, _ in self._fields[1:]])
+        with open(filename, "w") as h:
+            _write_chunked(h, "%10.4f%7.3f%5.1f%10.3f%5.1f%11.3f%2d%02d%1s%02d%1s%1d   %1s%02d%1s%1d   %2d%s\n",
+                           list(values))
 
 
-        except Exception as e:
-            # f = type(e)(("Error around %d%s row of file '%s'" %
-            #              (r + 1, a99.ordinal_suffix(r + 1), filename)) + ": " + str(
-            #     e)).with_traceback(sys.exc_info()[2])
-            raise RuntimeError("Error around %d%s row of file '%s': \"%s\"" %
-                               (r + 1, a99.ordinal_suffix(r + 1), filename, a99.str_exc(e))) from e
+ # 15000.896 -3.745 95.5 22615.737 96.5  29280.184 607X 3f2   A 3f112 617 K BR
+ # 1500.0896 -3.745 95.5-22615.737 96.5  29280.184 607X03f2   A03f1   12 617 K BR
 
 
+@a99.froze_it
+class FileKuruczMolecule1(FileKuruczMoleculeBase):
+    """
+    Kurucz molecular lines file following format of file "c2dabrookek.asc"
+    """
 
+    # **note** Kurucz puts always the "double-line" values before the "line" values
+    #
+    #     Wl(nm) loggf    J"   E(cm-1)   J'    E(cm-1) C C
+    #          |      |    |         |    |          | | |multiplicity
+    #          |      |    |         |    |          | | ||electronic state
+    #          |      |    |         |    |          | | |||v"=00
+    #          |      |    |         |    |          | | |||| lambda-doubling component
+    #          |      |    |         |    |          | | |||| |spin2l
+    #          |      |    |         |    |          | | |||| ||
+    #   287.7558-14.533 23.0  2354.082 24.0 -37095.578 6063a00e1  3d10e3  12 677  34741.495
+    #   287.7564-14.955 22.0  2282.704 23.0 -37024.124 6063a00f1  3d10f3  12 677  34741.419
+    #   287.7582-14.490 21.0  2214.696 22.0 -36955.900 6063a00e1  3d10e3  12 677  34741.205
+    #   287.7613-15.004 24.0  2428.453 25.0 -37169.280 6063a00f1  3d10f3  12 677  34740.828
+    #   287.7650-14.899 20.0  2149.765 21.0 -36890.147 6063a00f1  3d10f3  12 677  34740.382
+    #   287.7671-14.573 25.0  2506.275 26.0 -37246.411 6063a00e1  3d10e3  12 677  34740.136
+    #   287.7739-14.442 19.0  2088.132 20.0 -36827.442 6063a00e1  3d10e3  12 677  34739.310
+    # 0         1         2         3         4         5         6         7         8
+    # 012345678901234567890123456789012345678901234567890123456789012345678901234567890123456789
+    #   205.0652 -7.621  4.5   355.915  4.5  49105.280 108X00f1   A07e1   16
+
+    _line_class = KuruczMolLine
+    _fields = [("lambda_", 0, 10, float),
+               ("loggf", 10, 17, float),
+               ("J2l", 17, 22, float),
+               ("E2l", 22, 32, float),
+               ("Jl", 32, 37, float),
+               ("El", 37, 48, float),
+               ("atomn0", 48, 50, int),
+               ("atomn1", 50, 52, int),
+               ("state2l", 53, 54, str),
+               ("v2l", 54, 56, int),
+               ("lambda_doubling2l", 56, 57, str),
+               ("spin2l", 57, 58, _int0),
+               ("statel", 61, 62, str),
+               ("vl", 62, 64, int),
+               ("lambda_doublingl", 64, 65, str),
+               ("spinl", 65, 66, _int0),
+               ("iso", 68, 70, int),
+               ("rest", 70, None, str)]
+    _row_size = 84
+
+    @classmethod
+    def _post_process(cls, data):
+        # nm to angstrom
+        data["lambda_"] *= 10
+        # Kurucz: "negative energies are predicted or extrapolated"
+        # (http: // kurucz.harvard.edu / linelists.html)
+        for name in ("E2l", "El"):
+            x = data[name]
+            x[x < 0] *= -1
 
 
 @a99.froze_it
@@ -354,66 +450,33 @@ class FileKuruczMoleculeOld(FileKuruczMoleculeBase):
     One example of file is: ATMOS/wrk4/bruno/Mole/CH/ch36.txt
     """
 
-    def _do_load(self, filename):
-
-        # **Note** The variable names below are the ones found in ATMOS/wrk4/bruno/Mole/CH/selech.f
-        #
-        #       lamb   j2   j1     v2l
-        #          |    |    |      | d2l s1l
-        #          |    |    |      | |   |
-        #          |    |    |      | |   | v1l
-        #          |    |    |      | |   | | d1l
-        #          |    |    |      | |   | | |
-        #   3001.028 16.5 17.5 106X02F2   C03F2
-        # 0         1         2         3
-        # 0123456789012345678901234567890123456
-
-
-        filesize = os.path.getsize(filename)
-        num_lines = int(filesize / 37)
-
-        with open(filename, "r") as h:
-            self._do_load_h(h, filename, num_lines)
-
-    def _do_load_h(self, h, filename, num_lines=0):
-        r = 0  # counts rows of file
-        ii = 0
-        try:
-            self.lines = []
-            while True:
-                s = h.readline().strip("\n")
-                if len(s) == 0:
-                    break
-
-                line = KuruczMolLineOld(
-                    float(s[0:10]),
-                    float(s[10:15]),
-                    float(s[15:20]),
-                    int(s[20:22]),
-                    int(s[22:24]),
-                    s[24:25],
-                    int(s[25:27]),
-                    s[27:28],
-                    int(s[28:29]),
-                    s[32:33],
-                    int(s[33:35]),
-                    s[35:36],
-                    int(s[36:37]),
-                )
-
-                self.lines.append(line)
-                r += 1
-                ii += 1
-                if ii == _PROGRESS_INDICATOR_PERIOD:
-                    a99.get_python_logger().info(
-                        "Loading '{}': {}".format(filename,
-                                                  a99.format_progress(r, num_lines)))
-                    ii = 0
-
-        except Exception as e:
-            raise RuntimeError("Error around %d%s row of file '%s': \"%s\"" %
-                               (r + 1, a99.ordinal_suffix(r + 1), filename,
-                                a99.str_exc(e))) from e
+    # **Note** The variable names below are the ones found in ATMOS/wrk4/bruno/Mole/CH/selech.f
+    #
+    #       lamb   j2   j1     v2l
+    #          |    |    |      | d2l s1l
+    #          |    |    |      | |   |
+    #          |    |    |      | |   | v1l
+    #          |    |    |      | |   | | d1l
+    #          |    |    |      | |   | | |
+    #   3001.028 16.5 17.5 106X02F2   C03F2
+    # 0         1         2         3
+    # 0123456789012345678901234567890123456
+
+    _line_class = KuruczMolLineOld
+    _fields = [("lambda_", 0, 10, float),
+               ("J2l", 10, 15, float),
+               ("Jl", 15, 20, float),
+               ("atomn0", 20, 22, int),
+               ("atomn1", 22, 24, int),
+               ("state2l", 24, 25, str),
+               ("v2l", 25, 27, int),
+               ("lambda_doubling2l", 27, 28, str),
+               ("spin2l", 28, 29, int),
+               ("statel", 32, 33, str),
+               ("vl", 33, 35, int),
+               ("lambda_doublingl", 35, 36, str),
+               ("spinl", 36, 37, int)]
+    _row_size = 37
 
 
 @a99.froze_it
@@ -425,62 +488,96 @@ class FileKuruczMoleculeOld1(FileKuruczMoleculeBase):
     ATMOS/wrk4/bruno/Mole/CN/cnbx36.txt
     """
 
-    def _do_load(self, filename):
+    # **Note** The variable names below are the ones found in ATMOS/wrk4/bruno/Mole/CN/selecn.f
+    #
+    #      lamb   j2l   j1l v2l d2l
+    #         |     |     |   | |   v1l
+    #         |     |     |   | |   | d1l
+    #         |     |     |   | |   | |
+    #  3601.583 149.5 150.5 X00 2 B00 2
 
-        # **Note** The variable names below are the ones found in ATMOS/wrk4/bruno/Mole/CN/selecn.f
-        #
-        #      lamb   j2l   j1l v2l d2l
-        #         |     |     |   | |   v1l
-        #         |     |     |   | |   | d1l
-        #         |     |     |   | |   | |
-        #  3601.583 149.5 150.5 X00 2 B00 2
+    # 0         1         2         3
+    # 0123456789012345678901234567890123456
 
-        # 0         1         2         3
-        # 0123456789012345678901234567890123456
+    _line_class = KuruczMolLineOld1
+    _fields = [("lambda_", 0, 9, float),
+               ("J2l", 9, 15, float),
+               ("Jl", 15, 21, float),
+               ("state2l", 22, 23, str),
+               ("v2l", 23, 25, int),
+               ("spin2l", 26, 27, int),
+               ("statel", 28, 29, str),
+               ("vl", 29, 31, int),
+               ("spinl", 32, 33, int)]
+    _row_size = 33
 
 
-        filesize = os.path.getsize(filename)
-        num_lines = int(filesize/33)
+def _get_char_matrix(rows):
+    """Returns matrix with one byte per cell; short rows are padded with zero bytes, which do not convert"""
+    a = np.array(rows, dtype=bytes)
+    return a.view("S1").reshape(len(a), a.dtype.itemsize)
 
-        with open(filename, "r") as h:
-            self._do_load_h(h, filename, num_lines)
-
-    def _do_load_h(self, h, filename, num_lines=0):
-        r = 0  # counts rows of file
-        ii = 0
-        try:
-            self.lines = []
-            while True:
-                s = h.readline().strip("\n")
-                if len(s) == 0:
-                    break
 
+def _convert_column(m, type_):
+    """Converts column slice of character matrix (NumPy "S1" array with one row per line) into 1D array
 
+    Raises if some value cannot be converted, except for type_ _int0
+    """
+    n, w = m.shape
+    if w == 0:
+        if type_ is str:
+            return np.full(n, "", dtype="U1")
+        if type_ is _int0:
+            return np.zeros(n, dtype=int)
+        raise ValueError("Column beyond end of rows")
+    if type_ is str:
+        # rows are ASCII, so UCS4 code is the byte value
+        return np.ascontiguousarray(m).view(np.uint8).astype(np.uint32).view("U{}".format(w)).ravel()
+    s = np.ascontiguousarray(m).view("S{}".format(w)).ravel()
+    if type_ is float:
+        return s.astype(float)
+    ret = _digits_to_int(m.view(np.uint8), type_ is _int0)
+    if ret is None:
+        ret = np.array(list(map(type_, s.tolist())), dtype=int)
+    return ret
+
+
+def _digits_to_int(b, flag_blank):
+    """Fast path for integer columns: converts values made of leading spaces followed by digits
+
+    Args:
+        b: uint8 matrix (one row per line)
+        flag_blank: whether blank values are accepted (and converted to zero)
+
+    Returns: integer array, or None if some value does not follow the pattern above
+    """
+    is_digit = (b >= 48) & (b <= 57)
+    if not (np.all(is_digit | (b == 32)) and np.all(is_digit[:, 1:] >= is_digit[:, :-1]) and
+            (flag_blank or np.all(is_digit[:, -1]))):
+        return None
+    ret = np.zeros(len(b), dtype=int)
+    for j in range(b.shape[1]):
+        ret = ret*10+np.where(is_digit[:, j], b[:, j]-48, 0)
+    return ret
 
 
-                line = KuruczMolLineOld1(
-                    float(s[0:9]),
-                    float(s[9:15]),
-                    float(s[15:21]),
-                    s[22:23],
-                    int(s[23:25]),
-                    int(s[26:27]),
-                    s[28:29],
-                    int(s[29:31]),
-                    int(s[32:33]),
-                    )
+def _concatenate(chunks, get_dtype):
+    """Concatenates structured arrays returned by parsers, which may differ in the length of the last field
 
-                self.lines.append(line)
-                r += 1
-                ii += 1
-                if ii == _PROGRESS_INDICATOR_PERIOD:
-                    a99.get_python_logger().info(
-                        "Loading '{}': {}".format(filename, a99.format_progress(r, num_lines)))
-                    ii = 0
-
-        except Exception as e:
-            raise RuntimeError("Error around %d%s row of file '%s': \"%s\"" %
-                               (r + 1, a99.ordinal_suffix(r + 1), filename, a99.str_exc(e))) from e
+    **Note** empties list chunks, so that memory is released as chunks are copied
+    """
+    if len(chunks) == 0:
+        return np.zeros(0, dtype=get_dtype())
+    if len(chunks) == 1:
+        return chunks.pop()
+    ret = np.empty(sum(len(x) for x in chunks), dtype=max((x.dtype for x in chunks), key=lambda x: x.itemsize))
+    i = 0
+    chunks.reverse()
+    while chunks:
+        x = chunks.pop()
+        ret[i:i+len(x)] = x
+        i += len(x)
+    return ret
 
 
 def _fake_file():
@@ -1,3 +1,4 @@
+import io
 import struct
 import numpy as np
 import os
@@ -47,9 +48,157 @@ class ModRecord(a99.AttrsPart):
 
 
 MOD_REC_SIZE = 1200
+# Maximum number of layers that fits in a 1200-byte record
+MOD_MAX_NTOT = (MOD_REC_SIZE-64)//20
 
+# Record layout of binary ".mod" files (see _decode_mod_record())
+_MOD_FIELDS = [("ntot", "<i4"), ("teff", "<f4"), ("glog", "<f4"), ("asalog", "<f4"),
+               ("asalalf", "<f4"), ("nhe", "<f4"), ("tit", "S20"), ("tiabs", "S20"),
+               # (nh, teta, pe, pg, log_tau_ross) for each layer; only first ntot layers are used
+               ("layers", "<f4", (MOD_MAX_NTOT, 5)),
+               ("_fill", "V{}".format(MOD_REC_SIZE-64-MOD_MAX_NTOT*20))]
+MOD_DTYPE = np.dtype(_MOD_FIELDS)
+assert MOD_DTYPE.itemsize == MOD_REC_SIZE
 
-class FileModBin(DataFile):
+
+class _LazyRecords(object):
+    """Read-only sequence of records created on demand from memory-mapped file
+
+    Args:
+        rows: NumPy structured array (memmap), one element per record
+        make_record: callable(rows, i) that creates record object from rows[i]
+    """
+
+    def __init__(self, rows, make_record):
+        self.__rows = rows
+        self.__make_record = make_record
+
+    def __len__(self):
+        return len(self.__rows)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("record index out of range")
+        return self.__make_record(self.__rows, item)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class _ModelGrid(object):
+    """Grid functionality common to FileModBin and FileMoo
+
+    Descendants must set self.records, and self._rows if lazy-loaded
+    """
+
+    @property
+    def rows(self):
+        """Memory-mapped records (NumPy structured array), or None if not lazy-loaded"""
+        return self._rows
+
+    @property
+    def index(self):
+        """Structured array with fields "teff", "glog", "asalog", one element per record
+
+        If file is lazy-loaded, this only reads the headers of the records."""
+        if self._index is None:
+            self._index = np.zeros(len(self.records), dtype=[("teff", "f8"), ("glog", "f8"),
+                                                            ("asalog", "f8")])
+            for name in ("teff", "glog", "asalog"):
+                if self._rows is not None:
+                    self._index[name] = self._rows[name]
+                else:
+                    self._index[name] = [getattr(rec, name) for rec in self.records]
+        return self._index
+
+    def find_record(self, teff, glog, asalog, tolerance=1e-3):
+        """Returns index of record with given (teff, glog, asalog); raises ValueError if not found"""
+        index = self.index
+        ii = np.flatnonzero((np.abs(index["teff"]-teff) <= tolerance) &
+                            (np.abs(index["glog"]-glog) <= tolerance) &
+                            (np.abs(index["asalog"]-asalog) <= tolerance))
+        if len(ii) == 0:
+            raise ValueError("Model (teff={}, glog={}, asalog={}) not found".format(teff, glog,
+                                                                                     asalog))
+        return int(ii[0])
+
+    def find_bracket(self, teff, glog, asalog, tolerance=1e-3):
+        """Finds models surrounding (teff, glog, asalog) for interpolation
+
+        Brackets asalog first; then teff among the models having each asalog found; then glog
+        among the models having each (asalog, teff) found. Values within tolerance of a grid
+        value are taken as that value (as in find_record())
+
+        Returns: list of (up to 8) record indexes, in (asalog, teff, glog) order
+
+        Raises ValueError if point is outside the grid
+        """
+        index = self.index
+        ret = []
+        for a in _bracket(index["asalog"], asalog, "asalog", tolerance):
+            mask_a = index["asalog"] == a
+            for t in _bracket(index["teff"][mask_a], teff, "teff", tolerance):
+                mask_t = mask_a & (index["teff"] == t)
+                for g in _bracket(index["glog"][mask_t], glog, "glog", tolerance):
+                    i = int(np.flatnonzero(mask_t & (index["glog"] == g))[0])
+                    if i not in ret:
+                        ret.append(i)
+        return ret
+
+    def _check_loaded(self):
+        if self.records is None:
+            raise RuntimeError("File not loaded yet, len() is undefined")
+
+
+def _bracket(values, x, name, tolerance):
+    """Returns [lower, upper] values surrounding x (only one value if x is within tolerance of a
+    value)"""
+    u = np.unique(values)
+    i = np.searchsorted(u, x)
+    # grid values come from float32 fields, e.g. 0.1 is stored as 0.10000000149011612
+    for j in (i-1, i):
+        if 0 <= j < len(u) and abs(u[j]-x) <= tolerance:
+            return [u[j]]
+    if i == 0 or i == len(u):
+        raise ValueError("{}={} outside grid range [{}, {}]".format(name, x, u[0], u[-1]))
+    return [u[i-1], u[i]]
+
+
+def _memmap(filename, dtype, num_rec):
+    if num_rec == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(filename, dtype=dtype, mode="r", shape=(num_rec,))
+
+
+def _check_mod_rows(rows):
+    """Vectorized version of the range checks in _decode_mod_record()"""
+    ii = np.flatnonzero((rows["ntot"] <= 1) | (rows["ntot"] > MOD_MAX_NTOT))
+    if len(ii) > 0:
+        raise RuntimeError("record #{0:d}: ntot invalid: {1:d}".format(ii[0]+1, rows["ntot"][ii[0]]))
+    ii = np.flatnonzero((rows["teff"] <= 100) | (rows["teff"] >= 100000))
+    if len(ii) > 0:
+        raise RuntimeError("record #{0:d}: teff invalid {1:g}".format(ii[0]+1, rows["teff"][ii[0]]))
+
+
+def _make_mod_record(rows, i, rec=None):
+    """Creates ModRecord from rows[i] (zero-copy: vectors are views of rows)"""
+    if rec is None:
+        rec = ModRecord()
+    row = rows[i:i+1]
+    rec.ntot = ntot = int(row["ntot"][0])
+    for name in ("teff", "glog", "asalog", "asalalf", "nhe"):
+        setattr(rec, name, float(row[name][0]))
+    rec.tit, rec.tiabs = bytes(row["tit"][0]), bytes(row["tiabs"][0])
+    layers = row["layers"][0, :ntot]
+    rec.nh, rec.teta, rec.pe, rec.pg, rec.log_tau_ross = [layers[:, j] for j in range(5)]
+    return rec
+
+
+class FileModBin(DataFile, _ModelGrid):
   """
   PFANT Atmospheric Model (binary file)
 
@@ -60,18 +209,25 @@ class FileModBin(DataFile):
   Imitates the logic of reader_modeles.f90::read_modele().
 
   Attributes match reader_modeles.f90:modeles_* (minus the "modeles_" prefix)
+
+  Args:
+      flag_lazy: if set, load() maps the file into memory (numpy.memmap) instead of reading it;
+                 records are then created on demand and their vectors are views of the file
+                 contents (read-only). See also: rows, index, find_bracket()
   """
   default_filename = "modeles.mod"
   attrs = ["records"]
   flag_txt = False
 
-  def __init__(self):
+  def __init__(self, flag_lazy=False):
     DataFile.__init__(self)
+    self.flag_lazy = flag_lazy
     self.records = None
+    self._rows = None
+    self._index = None
 
   def __len__(self):
-    if self.records is None:
-      raise RuntimeError("File not loaded yet, len() is undefined")
+    self._check_loaded()
     return len(self.records)
 
   def _do_load(self, filename):
@@ -85,6 +241,13 @@ class FileModBin(DataFile):
         raise RuntimeError("File too small")
 
     num_rec = int(b/MOD_REC_SIZE)-1
+    self._index = None
+    if self.flag_lazy:
+        self._rows = _memmap(filename, MOD_DTYPE, num_rec)
+        _check_mod_rows(self._rows)
+        self.records = _LazyRecords(self._rows, _make_mod_record)
+        return
+
     self.records = []
     with open(filename, "rb") as h:
 
@@ -100,8 +263,10 @@ class FileModBin(DataFile):
       """Saves to file."""
 
       with open(filename, "wb") as h:
-          for i, rec in enumerate(self.records):
-              _encode_mod_record(rec, h)
+          row = np.zeros(1, dtype=MOD_DTYPE)
+          for rec in self.records:
+              _encode_mod_record(rec, row)
+              h.write(row.data)
           h.write(struct.pack("<i", 9999))
           h.write(b"\x00"*1196)
 
@@ -257,8 +422,6 @@ class FileOpa(DataFile):
         Based on http://marcs.astro.uu.se/documents/auxiliary/readopa.f
         """
 
-
-
         with open(filename, "rb") as h:
             self.mcode, self.ndp, self.swave = struct.unpack("1x 4s 5s 10s", h.readline().strip(b"\n"))
 
@@ -275,27 +438,59 @@ class FileOpa(DataFile):
 
             self.nwav = int(h.readline())
 
-            v, n_rows = a99.multirow_str_vector(h, self.nwav)
-            self.wav = np.array(list(map(float, v)))
+            text = h.read()
 
-            self.rad, self.tau, self.t, self.pe, self.pg, self.rho, self.xi, \
-            self.ops = np.zeros(self.ndp), np.zeros(self.ndp), np.zeros(self.ndp), \
-                       np.zeros(self.ndp), np.zeros(self.ndp), np.zeros(self.ndp), \
-                       np.zeros(self.ndp), np.zeros(self.ndp)
-            self.abs = np.zeros((self.nwav, self.ndp))
-            self.sca = np.zeros((self.nwav, self.ndp))
-            for k in range(self.ndp):
-                self.rad[k], self.tau[k], self.t[k], self.pe[k], self.pg[k], \
-                self.rho[k], self.xi[k], self.ops[k] = a99.float_vector(h)
-                v, n_rows = a99.multirow_str_vector(h, 2*self.nwav)
-                abs_sca = np.array(list(map(float, v)))
-                # This multiplication is performed as in original readopa.f
-                self.abs[:, k] = abs_sca[0::2]*self.ops[k]
-                self.sca[:, k] = abs_sca[1::2]*self.ops[k]
+        try:
+            _parse_opa_bulk(self, text)
+        except ValueError:
+            # Falls back to row-by-row parsing, which tolerates rows with extra values
+            _parse_opa_rows(self, io.BytesIO(text))
 
-            v, n_rows = a99.multirow_str_vector(h, 92)
-            self.abund = np.array(list(map(float, v)))
 
+def _parse_opa_bulk(opa, text):
+    """Parses numbers of ".opa" file (text after the nwav row) into FileOpa object, all at once.
+
+    Raises ValueError if the number of values does not match exactly
+    """
+    nwav, ndp = opa.nwav, opa.ndp
+    n_depth = 8+2*nwav  # per depth point: 8 values of model structure, then (abs, sca) pairs
+    tokens = text.split()
+    if len(tokens) != nwav+ndp*n_depth+92:
+        raise ValueError("Wrong number of values")
+    v = np.array(tokens, dtype=float)
+
+    opa.wav = v[:nwav]
+    block = v[nwav:nwav+ndp*n_depth].reshape((ndp, n_depth))
+    opa.rad, opa.tau, opa.t, opa.pe, opa.pg, opa.rho, opa.xi, opa.ops = \
+        [block[:, i].copy() for i in range(8)]
+    # This multiplication is performed as in original readopa.f
+    opa.abs = np.ascontiguousarray((block[:, 8::2]*opa.ops[:, np.newaxis]).T)
+    opa.sca = np.ascontiguousarray((block[:, 9::2]*opa.ops[:, np.newaxis]).T)
+    opa.abund = v[-92:]
+
+
+def _parse_opa_rows(opa, h):
+    """Row-by-row version of _parse_opa_bulk() reading from open file h"""
+    v, n_rows = a99.multirow_str_vector(h, opa.nwav)
+    opa.wav = np.array(list(map(float, v)))
+
+    opa.rad, opa.tau, opa.t, opa.pe, opa.pg, opa.rho, opa.xi, \
+    opa.ops = np.zeros(opa.ndp), np.zeros(opa.ndp), np.zeros(opa.ndp), \
+               np.zeros(opa.ndp), np.zeros(opa.ndp), np.zeros(opa.ndp), \
+               np.zeros(opa.ndp), np.zeros(opa.ndp)
+    opa.abs = np.zeros((opa.nwav, opa.ndp))
+    opa.sca = np.zeros((opa.nwav, opa.ndp))
+    for k in range(opa.ndp):
+        opa.rad[k], opa.tau[k], opa.t[k], opa.pe[k], opa.pg[k], \
+        opa.rho[k], opa.xi[k], opa.ops[k] = a99.float_vector(h)
+        v, n_rows = a99.multirow_str_vector(h, 2*opa.nwav)
+        abs_sca = np.array(list(map(float, v)))
+        # This multiplication is performed as in original readopa.f
+        opa.abs[:, k] = abs_sca[0::2]*opa.ops[k]
+        opa.sca[:, k] = abs_sca[1::2]*opa.ops[k]
+
+    v, n_rows = a99.multirow_str_vector(h, 92)
+    opa.abund = np.array(list(map(float, v)))
 
 
 class MooRecord(a99.AttrsPart):
@@ -373,23 +568,51 @@ MOG_REC_SIZE = MOD_REC_SIZE+OPA_REC_SIZE
 NTOT = 56    # must be 56
 NWAV = 1071  # must be 1071
 
-class FileMoo(DataFile):
+# Record layout of ".moo" files: ".mod" record followed by opacity part
+MOO_DTYPE = np.dtype(_MOD_FIELDS+[("swave", "<f4"), ("nwav", "<i4"), ("ops", "<f4", (NTOT,)),
+                                  ("wav", "<f4", (NWAV,)), ("abs", "<f4", (NTOT, NWAV)),
+                                  ("sca", "<f4", (NTOT, NWAV)), ("abund", "<f4", (92,))])
+assert MOO_DTYPE.itemsize == MOG_REC_SIZE
+
+
+def _make_moo_record(rows, i):
+    """Creates MooRecord from rows[i] (zero-copy: vectors are views of rows)"""
+    rec = _make_mod_record(rows, i, MooRecord())
+    row = rows[i:i+1]
+    rec.swave = float(row["swave"][0])
+    rec.nwav = int(row["nwav"][0])
+    rec.ops = row["ops"][0]
+    rec.wav = row["wav"][0]
+    rec.abs = row["abs"][0].T
+    rec.sca = row["sca"][0].T
+    rec.abund = row["abund"][0]
+    return rec
+
+
+class FileMoo(DataFile, _ModelGrid):
     """
     Atmospheric model or grid of models (with opacities included)
 
     This file contains all the fields in modeles.mod, plus the opacity information
+
+    Args:
+        flag_lazy: if set, load() maps the file into memory (numpy.memmap) instead of reading it;
+                   records are then created on demand and their vectors are views of the file
+                   contents (read-only). See also: rows, index, find_bracket()
     """
     default_filename = "grid.moo"
     attrs = ["records"]
     flag_txt = False
 
-    def __init__(self):
+    def __init__(self, flag_lazy=False):
         DataFile.__init__(self)
+        self.flag_lazy = flag_lazy
         self.records = None
+        self._rows = None
+        self._index = None
 
     def __len__(self):
-        if self.records is None:
-            raise RuntimeError("File not loaded yet, len() is undefined")
+        self._check_loaded()
         return len(self.records)
 
     def _do_load(self, filename):
@@ -404,6 +627,19 @@ class FileMoo(DataFile):
                                MOG_REC_SIZE))
 
         num_rec = int(b/MOG_REC_SIZE)
+        self._index = None
+        if self.flag_lazy:
+            rows = self._rows = _memmap(filename, MOO_DTYPE, num_rec)
+            _check_mod_rows(rows)
+            ii = np.flatnonzero(rows["ntot"] != NTOT)
+            if len(ii) > 0:
+                raise RuntimeError("Number of layers be {0:d}, not {1:d}".format(NTOT, rows["ntot"][ii[0]]))
+            ii = np.flatnonzero(rows["nwav"] != NWAV)
+            if len(ii) > 0:
+                raise RuntimeError("Number of wavelengths must be {0:d}, not {1:d}".format(NWAV, rows["nwav"][ii[0]]))
+            self.records = _LazyRecords(rows, _make_moo_record)
+            return
+
         self.records = []
         with open(filename, "rb") as h:
             for inum in range(1, num_rec+1):
@@ -439,31 +675,28 @@ class FileMoo(DataFile):
                 self.records.append(rec)
 
     def _do_save_as(self, filename):
-        """Saves to file."""
+        """Saves to file.
+
+        Each record is assembled in a NumPy structured array (MOO_DTYPE), whose buffer is written
+        directly to file."""
 
         with open(filename, "wb") as h:
-            for i, rec in enumerate(self.records):
+            row = np.zeros(1, dtype=MOO_DTYPE)
+            for rec in self.records:
                 if rec.ntot != NTOT:
                     raise RuntimeError("Number of layers be {0:d}, not {1:d}".format(NTOT, rec.ntot))
                 if rec.nwav != NWAV:
                     raise RuntimeError("Number of wavelengths must be {0:d}, not {1:d}".format(NWAV, rec.nwav))
 
-                _encode_mod_record(rec, h)
-
-                ostr = struct.Struct('<f i')
-                h.write(ostr.pack(rec.swave, rec.nwav))
-                try:
-                    h.write(struct.pack("<"+"f"*rec.ntot, *rec.ops))
-                except:
-                    print("OOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOOLHA")
-                    raise
-                s_temp ="<"+"f"*(rec.nwav*rec.ntot)
-
-
-                h.write(struct.pack("<"+"f"*rec.nwav, *rec.wav))
-                h.write(struct.pack(s_temp, *rec.abs.T.flatten()))
-                h.write(struct.pack(s_temp, *rec.sca.T.flatten()))
-                h.write(struct.pack("<"+"f"*92, *rec.abund))
+                _encode_mod_record(rec, row)
+                row["swave"] = rec.swave
+                row["nwav"] = rec.nwav
+                row["ops"][0] = rec.ops
+                row["wav"][0] = rec.wav
+                row["abs"][0] = rec.abs.T
+                row["sca"][0] = rec.sca.T
+                row["abund"][0] = rec.abund
+                h.write(row.data)
 
 
     def init_default(self):
@@ -496,19 +729,18 @@ def _decode_mod_record(x, rec, inum):
 
     rec.nh, rec.teta, rec.pe, rec.pg, rec.log_tau_ross = [w[:, i] for i in range(5)]
 
-def _encode_mod_record(rec, h):
-    """Encodes record into open file."""
+def _encode_mod_record(rec, row):
+    """Encodes record into row, a 1-element array whose dtype has the MOD_DTYPE fields."""
     assert isinstance(rec, (ModRecord, MooRecord))
 
     tit = rec.tit if isinstance(rec.tit, bytes) else rec.tit.encode("ascii")
-    tiabs = rec.tit if isinstance(rec.tiabs, bytes) else rec.tiabs.encode("ascii")
-
-    s = _ostr.pack(rec.ntot, rec.teff, rec.glog, rec.asalog,
-                       rec.asalalf, rec.nhe, tit, tiabs)
-    h.write(s)
-    ny = 5 * rec.ntot
-    y = np.reshape(np.vstack([rec.nh, rec.teta, rec.pe, rec.pg, rec.log_tau_ross]).T,
-                   ny)
-    h.write(struct.pack("<" + "f" * ny, *y))
-    h.write(b"\x00" * (MOD_REC_SIZE-ny*4-64))  # fills record with \x0 to have 1200 bytes
-
+    tiabs = rec.tiabs if isinstance(rec.tiabs, bytes) else rec.tiabs.encode("ascii")
+
+    for name in ("ntot", "teff", "glog", "asalog", "asalalf", "nhe"):
+        row[name] = getattr(rec, name)
+    row["tit"] = tit
+    row["tiabs"] = tiabs
+    layers = row["layers"][0]
+    for j, v in enumerate((rec.nh, rec.teta, rec.pe, rec.pg, rec.log_tau_ross)):
+        layers[:rec.ntot, j] = v
+    layers[rec.ntot:] = 0  # fills record with \x0 to have 1200 bytes
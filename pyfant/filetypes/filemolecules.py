@@ -1,22 +1,77 @@
-__all__ = ["FileMolecules", "Molecule", "SetOfLines", "molconsts_to_molecule"]
+__all__ = ["FileMolecules", "Molecule", "SetOfLines", "molconsts_to_molecule", "read_molecules_header",
+           "iter_molecule_blocks", "write_molecule_blocks", "MoleculeBlock"]
 
 
 import sys
+import threading
 import numpy as np
 import a99
 from f311 import DataFile
 from .. import basic
+from .fileatoms import _write_chunked
+from .cachedlines import load_lines, _split_rows
 import re
 
 # TODO figure out state_from, state_to
 
+
+# Fields of the molecular lines table (one record per line). "branch" is a code (see _branch_code())
+_DTYPE = np.dtype([("lmbdam", np.float64), ("sj", np.float64), ("jj", np.float64),
+                   ("branch", np.uint16)])
+
+# Branch registry. Codes of the usual branches are fixed; new branch labels found in files get
+# the next code available. Codes are valid within the process only (SetOfLines pickles labels).
+_BRANCHES = ["P", "Q", "R", "P1", "P2", "P12", "P21", "Q1", "Q2", "Q12", "Q21",
+             "R1", "R2", "R12", "R21", "PP", "QQ", "RR", "-"]
+_BRANCH_CODES = {b: i for i, b in enumerate(_BRANCHES)}
+_branch_lock = threading.Lock()
+_branch_array = np.array(_BRANCHES)
+
+
+def _branch_code(branch):
+    """Returns code of branch label, registering new label if needed"""
+    global _branch_array
+    branch = str(branch)
+    try:
+        return _BRANCH_CODES[branch]
+    except KeyError:
+        with _branch_lock:
+            if branch not in _BRANCH_CODES:
+                if len(_BRANCHES) > np.iinfo(np.uint16).max:
+                    raise RuntimeError("Too many distinct branch labels")
+                _BRANCH_CODES[branch] = len(_BRANCHES)
+                _BRANCHES.append(branch)
+                _branch_array = np.array(_BRANCHES)
+            return _BRANCH_CODES[branch]
+
+
+def _branch_codes(branches):
+    """Converts sequence of branch labels to array of codes"""
+    if not isinstance(branches, list) or len(branches) > 0 and not isinstance(branches[0], str):
+        branches = list(map(str, branches))
+    for branch in set(branches):
+        _branch_code(branch)
+    return np.fromiter(map(_BRANCH_CODES.__getitem__, branches), dtype=np.uint16,
+                       count=len(branches))
+
+
+def _column_property(name, doc=None):
+    """Read-only view of column of SetOfLines table (no copying involved)"""
+    def getter(self):
+        ret = self.rows[name]
+        ret.flags.writeable = False
+        return ret
+    return property(getter, doc=doc)
+
+
 @a99.froze_it
 class SetOfLines(a99.AttrsPart):
     """
     Represents a "Set-Of-Lines" (vibrational transition with unique (vl, v2l))
 
-    **Attention** Some properties return numpy arrays despite internally the data is stored as lists.
-                  This was a bad idea but I won't change this anymore to avoid breaking client code
+    Lines are stored in a NumPy structured array (see rows); properties lmbdam, sj, jj are
+    read-only views of its columns; branch is an array of branch labels (strings) assembled from
+    the branch codes stored in the table.
 
     Args:
         vl=None: upper vibrational state (v')
@@ -35,13 +90,27 @@ class SetOfLines(a99.AttrsPart):
     @property
     def llzero(self):
         """Minimum wavelength"""
-        return min(self.lmbdam)
+        return float(np.min(self.rows["lmbdam"]))
 
     @property
     def llfin(self):
         """Maximum wavelength"""
-        return max(self.lmbdam)
+        return float(np.max(self.rows["lmbdam"]))
 
+    @property
+    def rows(self):
+        """Lines table: structured array with fields "lmbdam", "sj", "jj", "branch" (branch code)"""
+        return self.__buf[:self.__n]
+
+    lmbdam = _column_property("lmbdam")
+    sj = _column_property("sj")
+    jj = _column_property("jj")
+    branch_code = _column_property("branch")
+
+    @property
+    def branch(self):
+        """Branch labels (array of strings)"""
+        return _branch_array[self.rows["branch"]]
 
     def __init__(self, vl=-1, v2l=-1, qqv=0, ggv=0, bbv=0, ddv=0, fact=0,
                  state_from="", state_to=""):
@@ -59,18 +128,16 @@ class SetOfLines(a99.AttrsPart):
         self.state_from = state_from
         self.state_to = state_to
 
-        # Vectors are keps as lists in order to .append_line() to work
-        self.lmbdam = []
-        self.sj = []
-        self.jj = []
-        self.branch = []
+        # lines table: first self.__n rows of self.__buf; extra rows are room to append lines
+        self.__buf = np.zeros(0, dtype=_DTYPE)
+        self.__n = 0
 
     @property
     def num_lines(self):
         return len(self)
 
     def __len__(self):
-        return len(self.lmbdam)
+        return self.__n
 
     def __repr__(self):
         return "{}({}, {}, {}, {}, {}, {}, {})".format(self.__class__.__name__,
@@ -79,37 +146,64 @@ class SetOfLines(a99.AttrsPart):
     def __iter__(self):
         """Creates MyDBRow objects to represent each molecular line"""
         fieldnames = ["lmbdam", "sj", "jj", "branch"]
-        for t in zip(self.lmbdam, self.sj, self.jj, self.branch):
+        for t in zip(self.lmbdam.tolist(), self.sj.tolist(), self.jj.tolist(),
+                     self.branch.tolist()):
             obj = a99.MyDBRow()
             for fieldname, value in zip(fieldnames, t):
                 obj[fieldname] = value
             yield obj
 
+    def __getstate__(self):
+        # Branch codes are only valid within the process, so the registry goes along
+        state = self.__dict__.copy()
+        state["_SetOfLines__buf"] = self.rows.copy()
+        state["_branches"] = list(_BRANCHES)
+        return state
+
+    def __setstate__(self, state):
+        branches = state.pop("_branches")
+        rows = state["_SetOfLines__buf"]
+        if len(rows) > 0:
+            rows["branch"] = _branch_codes(branches)[rows["branch"]]
+        self.__dict__.update(state)
+
     def cut(self, lzero, lfin, jjmax=None):
         """Reduces the number of lines to only the ones whose lmbdam is inside [lzero, lfin]"""
-        l, s, j, b = [], [], [], []
-        for _l, _s, _j, _b in zip(self.lmbdam, self.sj, self.jj, self.branch):
-            if lzero <= _l <= lfin and (jjmax is None or _j <= jjmax):
-                l.append(_l)
-                s.append(_s)
-                j.append(_j)
-                b.append(_b)
-        self.lmbdam, self.sj, self.jj, self.branch = l, s, j, b
+        rows = self.rows
+        mask = (rows["lmbdam"] >= lzero) & (rows["lmbdam"] <= lfin)
+        if jjmax is not None:
+            mask &= rows["jj"] <= jjmax
+        self._set_rows(rows[mask])
 
     def append_line(self, lmbdam, sj, jj, branch):
-        self.lmbdam.append(lmbdam)
-        self.sj.append(sj)
-        self.jj.append(jj)
-        self.branch.append(branch)
+        if self.__n == len(self.__buf):
+            # amortized growth
+            buf = np.zeros(max(8, 2*self.__n), dtype=_DTYPE)
+            buf[:self.__n] = self.__buf[:self.__n]
+            self.__buf = buf
+        self.__buf[self.__n] = (lmbdam, sj, jj, _branch_code(branch))
+        self.__n += 1
+
+    def append_lines(self, lmbdam, sj, jj, branch):
+        """Appends many lines at once. Arguments are sequences of same length; branch may be a
+        single label, which then applies to all lines"""
+        n = len(lmbdam)
+        rows = np.empty(n, dtype=_DTYPE)
+        rows["lmbdam"] = lmbdam
+        rows["sj"] = sj
+        rows["jj"] = jj
+        rows["branch"] = _branch_code(branch) if isinstance(branch, str) else _branch_codes(branch)
+        self._set_rows(np.concatenate((self.rows, rows)) if self.__n > 0 else rows)
 
     def sort(self):
         """Sorts by wavelength **in-place**"""
+        self._set_rows(self.rows[np.argsort(self.rows["lmbdam"], kind="stable")])
 
-        ii = np.argsort(self.lmbdam)
-        self.lmbdam = [self.lmbdam[i] for i in ii]
-        self.sj = [self.sj[i] for i in ii]
-        self.jj = [self.jj[i] for i in ii]
-        self.branch = [self.branch[i] for i in ii]
+    def _set_rows(self, rows):
+        """Replaces the lines table. *rows* is used as-is (may be a view of a larger array)"""
+        assert rows.dtype == _DTYPE
+        self.__buf = rows
+        self.__n = len(rows)
 
 
 @a99.froze_it
@@ -129,19 +223,19 @@ class Molecule(a99.AttrsPart):
 
     @property
     def lmbdam(self):
-        return np.hstack([np.array(x.lmbdam) for x in self.sol])
+        return np.hstack([x.lmbdam for x in self.sol])
 
     @property
     def sj(self):
-        return np.hstack([np.array(x.sj) for x in self.sol])
+        return np.hstack([x.sj for x in self.sol])
 
     @property
     def jj(self):
-        return np.hstack([np.array(x.jj) for x in self.sol])
+        return np.hstack([x.jj for x in self.sol])
 
     @property
     def branch(self):
-        return np.hstack([np.array(x.branch) for x in self.sol])
+        return np.hstack([x.branch for x in self.sol])
 
     @property
     def nv(self):
@@ -227,6 +321,12 @@ class FileMolecules(DataFile):
 
     Rather than as read_molecules() in readers.f90, this class stores
     information for each molecule inside a Molecule object.
+
+    Args:
+        line_filter=None: LineFilter instance. If passed, only the lines accepted by the filter are kept
+                          (wavelength, J" and v criteria apply; sets-of-lines left empty are removed)
+
+    Large files are loaded through the line cache, if enabled (see LineCache)
     """
 
     default_filename = "molecules.dat"
@@ -329,9 +429,11 @@ class FileMolecules(DataFile):
     def s(self):
         return [m.s for m in self.molecules]
 
-    def __init__(self):
+    def __init__(self, line_filter=None):
         DataFile.__init__(self)
 
+        self.line_filter = line_filter
+
         # Array of Molecule objects
         self.molecules = []
 
@@ -358,8 +460,11 @@ class FileMolecules(DataFile):
 
     def _do_load(self, filename):
         """Clears internal lists and loads from file."""
+        load_lines(self, filename)
 
-        with open(filename, "r") as h:
+    def _do_load_uncached(self, filename):
+        with open(filename, "r") as h_:
+            h = _RowReader(h_)
             r = 0 # counts rows of file
             try:
                 number = int(h.readline())  # not used (see below)
@@ -443,34 +548,10 @@ class FileMolecules(DataFile):
                             o.vl, o.v2l = transitions[isol]
                         m.sol.append(o)
 
-                    # Now reads lines
-                    sol_iter = iter(m.sol)  # iterator to change the current set-of-lines with the "numlin" flag
-                    o = next(sol_iter)  # current set-of-lines
-                    # o.lmbdam, o.sj, o.jj, o.branch = [], [], [], []
-                    while True:
-                        # Someone added "*" signs as a 6th column of some lines
-                        # which was causing my reading to crash.
-                        # Therefore I read the line and discard beyond the 5th column before
-                        # converting to float
-                        temp = a99.str_vector(h)
-                        lmbdam = float(temp[0])
-                        sj = float(temp[1])
-                        jj = float(temp[2])
-                        # Alphanumeric now iz = int(temp[3])
-                        iz = temp[3]
-                        numlin = int(temp[4])
-
-                        r += 1
-
-                        o.lmbdam.append(lmbdam)
-                        o.sj.append(sj)
-                        o.jj.append(jj)
-                        o.branch.append(iz)
-
-                        if numlin > 0:
-                            if numlin == 9:
-                                break
-                            o = next(sol_iter)
+                    # Now reads lines, in chunks
+                    r, e = _read_lines(h, m.sol, r)
+                    if e is not None:
+                        raise e
 
                     a99.get_python_logger().info("Loading '{}': {}".format(filename, a99.format_progress(im+1, num_mol)))
 
@@ -482,6 +563,52 @@ class FileMolecules(DataFile):
                 raise type(e)(("Error around %d%s row of file '%s'" %
                     (r+1, a99.ordinal_suffix(r+1), filename))+": "+str(e)).with_traceback(sys.exc_info()[2])
 
+        self._apply_line_filter()
+
+    def _get_cache_data(self):
+        sols = [sol for m in self.molecules for sol in m.sol]
+        rows = np.concatenate([sol.rows for sol in sols]) if sols else np.zeros(0, dtype=_DTYPE)
+        # branch codes are only valid within the process, so the registry goes along
+        meta = {"titm": self.titm, "branches": list(_BRANCHES), "molecules": [
+                {"titulo": m.titulo, "description": m.description, "symbols": m.symbols,
+                 "consts": [m.fe, m.do, m.mm, m.am, m.bm, m.ua, m.ub, m.te, m.cro, m.s],
+                 "sol": [[sol.vl, sol.v2l, sol.qqv, sol.ggv, sol.bbv, sol.ddv, sol.fact, len(sol)]
+                         for sol in m.sol]} for m in self.molecules]}
+        return {"rows": rows}, meta, rows["lmbdam"]
+
+    def _set_from_cache(self, entry):
+        meta = entry.meta
+        rows = entry.arrays["rows"]
+        branches = meta["branches"]
+        if branches != _BRANCHES[:len(branches)] and len(rows) > 0:
+            rows["branch"] = _branch_codes(branches)[rows["branch"]]
+        tables = iter(_split_rows(rows, [x[-1] for mm in meta["molecules"] for x in mm["sol"]],
+                                  entry.find_filter(self.line_filter)))
+        self.titm = meta["titm"]
+        self.molecules = []
+        for mm in meta["molecules"]:
+            m = Molecule()
+            m.titulo, m.description, m.symbols = mm["titulo"], mm["description"], mm["symbols"]
+            m.fe, m.do, m.mm, m.am, m.bm, m.ua, m.ub, m.te, m.cro, m.s = mm["consts"]
+            for vl, v2l, qqv, ggv, bbv, ddv, fact, _ in mm["sol"]:
+                o = SetOfLines(vl, v2l, qqv, ggv, bbv, ddv, fact)
+                o._set_rows(next(tables))
+                m.sol.append(o)
+            self.molecules.append(m)
+        self._apply_line_filter()
+
+    def _apply_line_filter(self):
+        lf = self.line_filter
+        if lf is None:
+            return
+        for m in self.molecules:
+            m.sol = [sol for sol in m.sol if lf.accepts(vl=sol.vl, v2l=sol.v2l)]
+            for sol in m.sol:
+                rows = sol.rows
+                sol._set_rows(rows[lf.get_mask(lambda_=rows["lmbdam"], J2l=rows["jj"])])
+            m.sol = [sol for sol in m.sol if len(sol) > 0]
+        self.molecules = [m for m in self.molecules if len(m) > 0]
+
     def _do_save_as(self, filename):
         with open(filename, "w") as h:
             a99.write_lf(h, str(len(self.molecules)))
@@ -517,11 +644,282 @@ class FileMolecules(DataFile):
 
                 num_sol = len(m.sol)
                 for i, s in enumerate(m.sol):
-                    num_lines = len(s)  # number of lines for current set-of-lines
-                    for j in range(num_lines):
-                        numlin = 0 if j < num_lines-1 else 9 if i == num_sol-1 else 1
-                        a99.write_lf(h, "%.10g %.10g %.10g %s %d" %
-                                     (s.lmbdam[j], s.sj[j], s.jj[j], s.branch[j], numlin))
+                    if len(s) == 0:
+                        continue
+                    values = list(zip(s.lmbdam.tolist(), s.sj.tolist(), s.jj.tolist(),
+                                      s.branch.tolist()))
+                    last = values.pop()
+                    _write_chunked(h, "%.10g %.10g %.10g %s 0\n", values)
+                    # numlin flag: 1 for last line of set-of-lines; 9 for last line of molecule
+                    h.write("%.10g %.10g %.10g %s %d\n" % (last+(9 if i == num_sol-1 else 1,)))
+
+
+# Number of characters parsed in one go by _read_lines()
+_BLOCK_SIZE = 2**22
+
+
+class _RowReader(object):
+    """Wraps text file allowing to read blocks of whole rows and to give text back"""
+
+    def __init__(self, h):
+        self.h = h
+        self.pending = ""
+
+    def readline(self):
+        if not self.pending:
+            return self.h.readline()
+        i = self.pending.find("\n")
+        if i < 0:
+            ret, self.pending = self.pending+self.h.readline(), ""
+        else:
+            ret, self.pending = self.pending[:i+1], self.pending[i+1:]
+        return ret
+
+    def read_block(self, size):
+        """Returns text containing whole rows (at least one unless end of file)"""
+        text, self.pending = self.pending+self.h.read(size), ""
+        if text and not text.endswith("\n"):
+            text += self.h.readline()
+        return text
+
+    def unread(self, text):
+        self.pending = text+self.pending
+
+
+def _read_lines(h, sols, r):
+    """Reads molecular lines of one molecule, distributing them into sols (list of SetOfLines)
+
+    Args:
+        h: _RowReader
+        sols: SetOfLines objects, already created
+        r: number of rows of file read so far
+
+    Returns: (number of rows of file read so far, exception or None). In case of error, the
+             number of rows points to the row where the problem is
+    """
+    i_sol, pieces = 0, []
+    while True:
+        text = h.read_block(_BLOCK_SIZE)
+        if not text:
+            return r, RuntimeError("Unexpected end of file")
+        try:
+            table, numlin, size = _parse_line_rows(text)
+        except Exception:
+            table, numlin, size, e = _parse_line_rows_slow(text)
+            if e is not None:
+                return r+len(table), e
+
+        # numlin > 0 ends a set-of-lines; numlin == 9 ends the molecule
+        i0 = 0
+        for i in np.flatnonzero(numlin > 0).tolist():
+            pieces.append(table[i0:i+1])
+            sols[i_sol]._set_rows(np.concatenate(pieces) if len(pieces) > 1 else pieces[0])
+            if numlin[i] == 9:
+                break
+            i_sol, pieces, i0 = i_sol+1, [], i+1
+            if i_sol >= len(sols):
+                return r+i, RuntimeError("More sets-of-lines than declared ({})".format(len(sols)))
+        h.unread(text[size:])
+        r += len(table)
+        if numlin[-1] == 9:
+            return r, None
+        pieces.append(table[i0:])
+
+
+class MoleculeBlock(object):
+    """
+    Molecule of a PFANT molecular lines file, as text (see iter_molecule_blocks())
+
+    Attributes:
+        description: first part of "titulo" row
+        nv: number of sets-of-lines
+        header: text of the rows of the molecule that precede its lines, ending with newline
+        chunks: iterable of text chunks which, concatenated, give the rows of lines of the molecule
+    """
+
+    def __init__(self, description, nv, header, chunks):
+        self.description = description
+        self.nv = nv
+        self.header = header
+        self.chunks = chunks
+
+
+def read_molecules_header(filename):
+    """Reads first rows of PFANT molecular lines file.
+
+    Returns:
+        (titm, nv): titm is the title, nv is the list of numbers of sets-of-lines, one for each molecule
+    """
+    with open(filename, "r") as h:
+        r = 0
+        try:
+            int(h.readline())
+            r += 1
+            titm = a99.readline_strip(h)
+            r += 1
+            nv = a99.int_vector(h)
+        except Exception as e:
+            raise type(e)(("Error around %d%s row of file '%s'" %
+                (r+1, a99.ordinal_suffix(r+1), filename))+": "+str(e)).with_traceback(sys.exc_info()[2])
+    return titm, nv
+
+
+def iter_molecule_blocks(filename):
+    """Reads PFANT molecular lines file molecule by molecule, without parsing the lines
+
+    Only the headers of the molecules are parsed (enough to find where they end); the rows of lines are
+    passed along in chunks of text, so that memory use does not depend on the size of the file.
+
+    Yields MoleculeBlock objects. Each block's chunks must be consumed before proceeding to the next block
+    (chunks not consumed are skipped).
+    """
+    with open(filename, "r") as h_:
+        h = _RowReader(h_)
+        r = 0  # counts rows of file
+        try:
+            int(h.readline())
+            r += 1
+            a99.readline_strip(h)
+            r += 1
+            nv = a99.int_vector(h)
+            r += 1
+
+            for nvi in nv:
+                # titulo, constants, blank row, s
+                rows = [h.readline() for _ in range(4)]
+                if not rows[-1]:
+                    raise RuntimeError("Unexpected end of file")
+                float(rows[-1])
+                description = rows[0].split("#")[0].strip()
+                r += 4
+                # qqv, ggv, bbv, ddv, fact: nvi values each, possibly spanning several rows
+                for _ in range(5):
+                    n = 0
+                    while n < nvi:
+                        row = h.readline()
+                        if not row:
+                            raise RuntimeError("Unexpected end of file")
+                        n += len(row.split())
+                        rows.append(row)
+                        r += 1
+                    if n != nvi:
+                        raise RuntimeError("Vector should have {} values (has {})".format(nvi, n))
+
+                chunks = _iter_line_chunks(h)
+                yield MoleculeBlock(description, nvi, "".join(rows), chunks)
+                for chunk in chunks:
+                    pass
+                r += chunks.r
+        except Exception as e:
+            raise type(e)(("Error around %d%s row of file '%s'" %
+                (r+1, a99.ordinal_suffix(r+1), filename))+": "+str(e)).with_traceback(sys.exc_info()[2])
+
+
+def write_molecule_blocks(filename, titm, nv, blocks):
+    """Writes PFANT molecular lines file from MoleculeBlock objects (e.g. coming from iter_molecule_blocks())
+
+    Args:
+        filename: output file name
+        titm: title
+        nv: numbers of sets-of-lines, one for each block
+        blocks: iterable of MoleculeBlock
+    """
+    with open(filename, "w") as h:
+        a99.write_lf(h, str(len(nv)))
+        a99.write_lf(h, titm)
+        a99.write_lf(h, " ".join([str(x) for x in nv]))
+        for block in blocks:
+            h.write(block.header)
+            for chunk in block.chunks:
+                h.write(chunk)
+
+
+class _iter_line_chunks(object):
+    """Iterates over text chunks of rows of lines of one molecule, up to the end-of-molecule flag
+
+    Attribute "r" counts the rows passed
+    """
+
+    # end-of-molecule: row whose 5th value is 9
+    _expr = re.compile(r"^[ \t]*(?:\S+[ \t]+){4}9(?:[ \t].*)?$", re.M)
+
+    def __init__(self, h):
+        self.h = h
+        self.r = 0
+        self.flag_end = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.flag_end:
+            raise StopIteration()
+        text = self.h.read_block(_BLOCK_SIZE)
+        if not text:
+            raise RuntimeError("Unexpected end of file")
+        m = self._expr.search(text)
+        if m:
+            size = m.end()+1
+            self.h.unread(text[size:])
+            text = text[:size]
+            if not text.endswith("\n"):
+                text += "\n"
+            self.flag_end = True
+        self.r += text.count("\n")
+        return text
+
+
+def _parse_line_rows(text):
+    """Parses rows "lmbdam sj jj branch numlin" at once up to the end-of-molecule flag (numlin=9).
+
+    Returns: (table, numlin, number of characters of text used)
+    """
+    # rows after the end of the molecule do not follow the format, so finds the end first
+    m = _iter_line_chunks._expr.search(text)
+    size = min(m.end()+1, len(text)) if m else len(text)
+    n = text.count("\n", 0, size)+(not text.endswith("\n", 0, size))
+    tokens = text[:size].split()
+    if len(tokens) != 5*n:
+        raise ValueError("Wrong number of values")
+    numlin = np.array(tokens[4::5], dtype=int)
+    if np.any(numlin[:-1] == 9):
+        raise ValueError("End-of-molecule flag in unexpected position")
+    return _make_table(tokens[0::5], tokens[1::5], tokens[2::5], tokens[3::5]), numlin, size
+
+
+def _parse_line_rows_slow(text):
+    """Row-by-row version of _parse_line_rows(). Stops at first row that cannot be parsed.
+
+    Returns: (table, numlin, number of characters of text used, exception or None)
+    """
+    l, s, j, b, numlin = [], [], [], [], []
+    size, e = 0, None
+    for row in text.splitlines(True):
+        try:
+            # Someone added "*" signs as a 6th column of some lines
+            # which was causing my reading to crash.
+            # Therefore I read the line and discard beyond the 5th column before
+            # converting to float
+            temp = row.split()
+            values = float(temp[0]), float(temp[1]), float(temp[2]), temp[3], int(temp[4])
+        except Exception as e_:
+            e = e_
+            break
+        for v, value in zip((l, s, j, b, numlin), values):
+            v.append(value)
+        size += len(row)
+        if numlin[-1] == 9:
+            break
+    return _make_table(l, s, j, b), np.array(numlin, dtype=int), size, e
+
+
+def _make_table(lmbdam, sj, jj, branch):
+    ret = np.empty(len(lmbdam), dtype=_DTYPE)
+    ret["lmbdam"] = np.array(lmbdam, dtype=float)
+    ret["sj"] = np.array(sj, dtype=float)
+    ret["jj"] = np.array(jj, dtype=float)
+    ret["branch"] = _branch_codes(branch)
+    return ret
 
 
 def molconsts_to_molecule(molconsts):
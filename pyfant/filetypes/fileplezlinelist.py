@@ -97,11 +97,18 @@ class FilePlezLinelist(FilePlezLinelistBase):
     **Note** Load only
 
     Descentands of this class must implement _do_processline()
+
+    Args:
+        line_filter=None: LineFilter instance. v, J and label criteria apply to molecular lines only (label
+                          criteria only where descendant sets from_label/to_label). The isotope criterion is
+                          not applied
     """
 
-    def __init__(self):
+    def __init__(self, line_filter=None):
         DataFile.__init__(self)
 
+        self.line_filter = line_filter
+
         self.molecules = dict()
         self.atoms = dict()
 
@@ -120,6 +127,7 @@ class FilePlezLinelist(FilePlezLinelistBase):
     def _do_load_h(self, h, filename):
         r = 0  # counts rows of file
         ii = 0
+        line_filter = self.line_filter
 
         # states
         EXP_SPECIES = 0  # expecting species definition
@@ -183,10 +191,16 @@ class FilePlezLinelist(FilePlezLinelistBase):
                             line.lambda_, line.chiex, line.loggf, line.fdamp, line.gu, line.raddmp = \
                                 [float(x) for x in s.split()]
 
-                        if not is_atom:
+                        flag_keep = line_filter is None or line_filter.accepts(lambda_=line.lambda_,
+                                                                               loggf=line.loggf)
+                        if flag_keep and not is_atom:
                             self._process_line_molecule(species, line, s)
+                            flag_keep = line_filter is None or line_filter.accepts(
+                                vl=line.vl, v2l=line.v2l, J2l=line.J2l, from_label=getattr(line, "from_label", None),
+                                to_label=getattr(line, "to_label", None))
 
-                        species.lines.append(line)
+                        if flag_keep:
+                            species.lines.append(line)
 
                 if flag_break:
                     break
@@ -203,6 +217,13 @@ class FilePlezLinelist(FilePlezLinelistBase):
             raise RuntimeError("Error around %d%s row of file '%s': \"%s\"" %
                                (r + 1, a99.ordinal_suffix(r + 1), filename, a99.str_exc(e))) from e
 
+        if line_filter is not None:
+            # species whose lines were all filtered out
+            for attr in (self.atoms, self.molecules):
+                for k, v in list(attr.items()):
+                    if len(v) == 0:
+                        del attr[k]
+
     def _get_species(self, is_atom, elstring, ion, name):
         """Returns PlezSpecies instance, creating one if necessary."""
         list_ = self.atoms if is_atom else self.molecules
@@ -387,11 +408,15 @@ class FilePlezLinelistC2(FilePlezLinelist):
 class FilePlezLinelist1(FilePlezLinelistBase):
     """
     Plez molecular lines file having "linelistCN1214V130710.dat" as holotype.
+
+    Args:
+        line_filter=None: LineFilter instance. Label and gf criteria are not applied
     """
 
-    def __init__(self):
+    def __init__(self, line_filter=None):
         DataFile.__init__(self)
 
+        self.line_filter = line_filter
         self.molecules = {}
         self.atoms = {}
 
@@ -433,7 +458,9 @@ class FilePlezLinelist1(FilePlezLinelistBase):
                 line.lambda_ = 1/float(tmp[7])*1e8  # we assume the wavenumber is in 1/cm
                 line.branch = tmp[5]
 
-                species.lines.append(line)
+                if self.line_filter is None or self.line_filter.accepts(lambda_=line.lambda_, vl=line.vl,
+                                                                        v2l=line.v2l, J2l=line.J2l):
+                    species.lines.append(line)
 
                 r += 1
                 ii += 1
@@ -10,6 +10,7 @@ from collections import namedtuple
 import struct
 import os
 import numpy as np
+from .cachedlines import load_lines
 
 #: List of all atomic symbols
 _symbols = [
@@ -53,11 +54,15 @@ class FilePlezTiO(DataFile):
     Because Plez files are too big, they will be ***filtered upon load** (unfiltered files may take up
     several GB of RAM memory if fully loaded). See arguments list
 
+    Large files are loaded through the line cache, if enabled (see LineCache), where they are stored unfiltered
+
     Args:
         min_gf=0: minimum gf
         max_J2l=99999: Maximum J" (J lower)
         max_vl=99999: Maximum v' (v upper)
         max_v2l=99999: Maximum v" (v lower)
+        line_filter=None: LineFilter instance, applied in addition to the criteria above. Labels are
+                          compared with fields state_from (from_label) and state_to (to_label)
 
     Example:
 
@@ -76,13 +81,14 @@ class FilePlezTiO(DataFile):
     def __len__(self):
         return len(self.lines)
 
-    def __init__(self, min_gf=0, max_J2l=99999, max_vl=99999, max_v2l=99999):
+    def __init__(self, min_gf=0, max_J2l=99999, max_vl=99999, max_v2l=99999, line_filter=None):
         DataFile.__init__(self)
         self.lines = []
         self.min_gf = min_gf
         self.max_J2l = max_J2l
         self.max_vl = max_vl
         self.max_v2l = max_v2l
+        self.line_filter = line_filter
 
     def __iter__(self):
         return iter(self.lines)
@@ -132,6 +138,29 @@ class FilePlezTiO(DataFile):
         return dtype
 
     def _do_load(self, filename):
+        load_lines(self, filename)
+
+    def _get_cache_data(self):
+        data = self.get_numpy_array()
+        return {"data": data}, {}, data["lambda_"]
+
+    def _set_from_cache(self, entry):
+        data = entry.arrays["data"]
+        index = entry.find_filter(self.line_filter)
+        if index is not None:
+            data = data[index]
+        mask = (data["gf"] >= self.min_gf) & (data["Jlow"] <= self.max_J2l) & (data["vup"] <= self.max_vl) & \
+               (data["vlow"] <= self.max_v2l)
+        if self.line_filter is not None:
+            mask &= self.line_filter.get_mask(lambda_=data["lambda_"], gf=data["gf"], J2l=data["Jlow"],
+                                              vl=data["vup"], v2l=data["vlow"], from_label=data["state_from"],
+                                              to_label=data["state_to"])
+        # bytes to str
+        dtype = [(name, "U{}".format(t.itemsize) if t.kind == "S" else t) for name, t in
+                 ((name, data.dtype[name]) for name in data.dtype.names)]
+        self.lines = [PlezTiOLine(*x) for x in data[mask].astype(dtype).tolist()]
+
+    def _do_load_uncached(self, filename):
         def strip(s): return s.decode("ascii").strip()
         def I(s): return s.decode("ascii")  # Identity
         my_struct = struct.Struct("14s 13s 12s 4s 6s 6s 3s 12s 4s 6s 6s 3s 13s 2x 3s 1x 1s 1x 1s 6s 2x")
@@ -145,6 +174,7 @@ class FilePlezTiO(DataFile):
             raise RuntimeError("Fractionary number of lines: {}, not a FilePlezTiO".format(num_lines))
         num_lines = int(num_lines)
 
+        line_filter = self.line_filter
         with open(filename, "rb") as h:
             try:
                 r = 0  # counts rows of file
@@ -161,7 +191,7 @@ class FilePlezTiO(DataFile):
                     gf = float(s[14:27])
                     J2l = float(s[43:49])
                     vl = int(s[70:74])
-                    v2l = int(s[49:53])
+                    v2l = int(s[39:43])
 
                     # gf = float(bits[1])
                     # J2l = float(bits[4])
@@ -178,6 +208,12 @@ class FilePlezTiO(DataFile):
                         r +=1
                         continue
 
+                    if line_filter is not None and not line_filter.accepts(
+                            lambda_=float(s[0:14]), gf=gf, J2l=J2l, vl=vl, v2l=v2l,
+                            from_label=chr(s[108]), to_label=chr(s[110])):
+                        r += 1
+                        continue
+
                     bits = my_struct.unpack_from(s)
 
                     args = [func(x) for func, x in zip(func_map, bits)]
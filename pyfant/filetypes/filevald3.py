@@ -94,6 +94,8 @@ class FileVald3(DataFile):
     Args:
         flag_parse_atoms=True: whether or not to parse the atomic lines
         flag_parse_molecules=True: whether or not to parse the molecular lines
+        line_filter=None: LineFilter instance. Labels are compared with sys10 (from_label) and sys00
+                          (to_label). The isotope criterion is not applied
 
 
     Species are encoded as follows.
@@ -126,12 +128,13 @@ class FileVald3(DataFile):
     def __len__(self):
         return len(self.speciess)
 
-    def __init__(self, flag_parse_atoms=True, flag_parse_molecules=True):
+    def __init__(self, flag_parse_atoms=True, flag_parse_molecules=True, line_filter=None):
         DataFile.__init__(self)
 
         # Configuration
         self.flag_parse_atoms = flag_parse_atoms
         self.flag_parse_molecules = flag_parse_molecules
+        self.line_filter = line_filter
 
         self.speciess = {}
 
@@ -154,6 +157,7 @@ class FileVald3(DataFile):
 
         r = 0  # counts rows of file
         self.speciess = defaultdict(lambda: defaultdict(lambda: []))
+        line_filter = self.line_filter
         try:
             # Uses header as "magic characters"
             s = h.readline().strip("\n")
@@ -190,6 +194,14 @@ class FileVald3(DataFile):
                                           )
                 r += 1
 
+                if line_filter is not None and not line_filter.accepts(lambda_=line.lambda_, loggf=line.loggf,
+                                                                       J2l=line.J2l):
+                    # Rejected line, skips next three lines and loops
+                    for _ in range(3):
+                        h.readline()
+                        r += 1
+                    continue
+
                 # Line 2/4 and 3/4
                 # ================
                 #
@@ -203,6 +215,12 @@ class FileVald3(DataFile):
                 r += 1
                 sys10, sys11, sys12, vl = _parse_system(s)
 
+                if line_filter is not None and not line_filter.accepts(from_label=sys10, to_label=sys00, vl=vl,
+                                                                       v2l=v2l):
+                    h.readline()
+                    r += 1
+                    continue
+
                 species_key = (formula, int(s_ioni))
                 sol_key = Vald3SolKey(vl, v2l, sys00, sys01, sys02, sys10, sys11, sys12)
                 self.speciess[species_key][sol_key].append(line)
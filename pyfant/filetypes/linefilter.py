@@ -0,0 +1,146 @@
+"""Selection criteria applied to spectral lines while a line list is being read"""
+
+__all__ = ["LineFilter"]
+
+import math
+import numpy as np
+
+
+class LineFilter(object):
+    """
+    Criteria to select spectral lines while a line list file is being read
+
+    Line list readers (FileKuruczMolecule, FilePlezTiO, FileHITRAN160, FileVald3, FilePlezLinelist) accept a
+    LineFilter as their "line_filter" argument and discard the rejected lines as soon as the fields involved
+    have been parsed, so that lines outside the wanted window are never kept in memory.
+
+    Args:
+        llzero=None: minimum wavelength (angstrom)
+        llfin=None: maximum wavelength (angstrom)
+        iso=None: isotope/isotopologue code (int), or sequence of codes
+        from_label=None: upper state label, e.g. "A"
+        to_label=None: lower state label, e.g. "X"
+        max_vl=None: maximum v' (v upper)
+        max_v2l=None: maximum v" (v lower)
+        max_J2l=None: maximum J" (J lower)
+        min_gf=None: minimum gf (compared with 10**loggf if the file gives loggf)
+
+    Criteria left as None are not applied. A criterion whose field does not exist in some file format is
+    not applied either (e.g., VALD3 and TurboSpectrum lines have no isotope field).
+
+    Example:
+
+        >>> import pyfant
+        >>> f = pyfant.FileKuruczMolecule(line_filter=pyfant.LineFilter(llzero=6000, llfin=6005, iso=16))
+        >>> f.load("oh.asc")
+    """
+
+    # Keyword arguments understood by accepts() and get_mask()
+    names = ("lambda_", "iso", "from_label", "to_label", "vl", "v2l", "J2l", "gf", "loggf")
+
+    def __init__(self, llzero=None, llfin=None, iso=None, from_label=None, to_label=None, max_vl=None,
+                 max_v2l=None, max_J2l=None, min_gf=None):
+        self.llzero = llzero
+        self.llfin = llfin
+        self.iso = iso
+        self.from_label = from_label
+        self.to_label = to_label
+        self.max_vl = max_vl
+        self.max_v2l = max_v2l
+        self.max_J2l = max_J2l
+        self.min_gf = min_gf
+
+    @property
+    def iso(self):
+        return self._iso
+
+    @iso.setter
+    def iso(self, value):
+        self._iso = value
+        self._isos = None if value is None else {value} if isinstance(value, (int, np.integer)) else set(value)
+
+    @property
+    def min_gf(self):
+        return self._min_gf
+
+    @min_gf.setter
+    def min_gf(self, value):
+        self._min_gf = value
+        self._min_loggf = None if value is None else math.log10(value) if value > 0 else -math.inf
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, ", ".join(
+            "{}={!r}".format(name, getattr(self, name)) for name in
+            ("llzero", "llfin", "iso", "from_label", "to_label", "max_vl", "max_v2l", "max_J2l", "min_gf")
+            if getattr(self, name) is not None))
+
+    def uses(self, name):
+        """Returns whether some criterion is applied to given field (one of LineFilter.names)"""
+        if name == "lambda_":
+            return self.llzero is not None or self.llfin is not None
+        if name in ("gf", "loggf"):
+            return self.min_gf is not None
+        return getattr(self, {"vl": "max_vl", "v2l": "max_v2l", "J2l": "max_J2l"}.get(name, name)) is not None
+
+    def accepts(self, lambda_=None, iso=None, from_label=None, to_label=None, vl=None, v2l=None, J2l=None,
+                gf=None, loggf=None):
+        """Returns whether a line passes the criteria. Fields passed as None are not checked"""
+        if lambda_ is not None:
+            if self.llzero is not None and lambda_ < self.llzero:
+                return False
+            if self.llfin is not None and lambda_ > self.llfin:
+                return False
+        if self.min_gf is not None:
+            if gf is not None and not gf >= self.min_gf:
+                return False
+            if loggf is not None and not loggf >= self._min_loggf:
+                return False
+        if iso is not None and self.iso is not None and iso not in self._isos:
+            return False
+        if from_label is not None and self.from_label is not None and from_label.strip() != self.from_label:
+            return False
+        if to_label is not None and self.to_label is not None and to_label.strip() != self.to_label:
+            return False
+        if vl is not None and self.max_vl is not None and vl > self.max_vl:
+            return False
+        if v2l is not None and self.max_v2l is not None and v2l > self.max_v2l:
+            return False
+        if J2l is not None and self.max_J2l is not None and J2l > self.max_J2l:
+            return False
+        return True
+
+    def get_mask(self, **columns):
+        """Vectorized accepts(): takes NumPy arrays as keyword arguments and returns boolean mask"""
+        mask = None
+        for name, value in columns.items():
+            if value is None:
+                continue
+            value = np.asarray(value)
+            if mask is None:
+                mask = np.ones(len(value), dtype=bool)
+            if not self.uses(name):
+                continue
+            if name == "lambda_":
+                m = np.ones(len(value), dtype=bool)
+                if self.llzero is not None:
+                    m &= value >= self.llzero
+                if self.llfin is not None:
+                    m &= value <= self.llfin
+            elif name == "gf":
+                m = value >= self.min_gf
+            elif name == "loggf":
+                m = value >= self._min_loggf
+            elif name == "iso":
+                m = np.isin(value, list(self._isos))
+            elif name in ("from_label", "to_label"):
+                m = np.char.strip(value.astype(str)) == getattr(self, name)
+            elif name == "vl":
+                m = value <= self.max_vl
+            elif name == "v2l":
+                m = value <= self.max_v2l
+            elif name == "J2l":
+                m = value <= self.max_J2l
+            else:
+                raise ValueError("Invalid field name: '{}'".format(name))
+            mask &= m
+        return mask
@@ -0,0 +1,100 @@
+"""Wavelength-sorted index for searching lines of FileMolecules and FileAtoms"""
+
+__all__ = ["LineIndex"]
+
+import numpy as np
+from . import filemolecules, fileatoms
+
+
+class LineIndex(object):
+    """
+    Wavelength-sorted index of all lines of a FileMolecules or FileAtoms object
+
+    The index is built once; each search is then a binary search (numpy.searchsorted).
+
+    Args:
+        f: FileMolecules or FileAtoms object (lines must not change while the index is in use)
+
+    Example:
+
+        >>> import pyfant
+        >>> f = pyfant.FileMolecules()
+        >>> f.load("molecules.dat")
+        >>> index = pyfant.LineIndex(f)
+        >>> iq, rows = index.search([15328.5, 15577.42], 0.5)
+        >>> print(index.get_table(rows))
+    """
+
+    @property
+    def num_lines(self):
+        return len(self.table)
+
+    def __init__(self, f):
+        self.f = f
+        if isinstance(f, filemolecules.FileMolecules):
+            self.flag_molecules = True
+            groups = [(i_m, i_s, sol) for i_m, m in enumerate(f.molecules) for i_s, sol in enumerate(m.sol)]
+            column, dtype = "lmbdam", filemolecules._DTYPE
+        elif isinstance(f, fileatoms.FileAtoms):
+            self.flag_molecules = False
+            groups = [(i_a, 0, a) for i_a, a in enumerate(f.atoms)]
+            column, dtype = "lambda_", fileatoms._DTYPE
+        else:
+            raise TypeError("Cannot index '{}' object".format(f.__class__.__name__))
+
+        counts = [len(x[2]) for x in groups]
+        # table of all lines, plus index of group (molecule or atom) and set-of-lines of each line
+        self.table = np.concatenate([x[2].rows for x in groups]) if groups else np.zeros(0, dtype=dtype)
+        self.i_group = np.repeat([x[0] for x in groups], counts).astype(int)
+        self.i_sol = np.repeat([x[1] for x in groups], counts).astype(int)
+        self.order = np.argsort(self.table[column], kind="stable")
+        self.lambda_ = self.table[column][self.order]
+
+    def find(self, llzero, llfin):
+        """Returns row numbers of lines with llzero <= wavelength <= llfin, in wavelength order"""
+        i0 = np.searchsorted(self.lambda_, llzero, "left")
+        i1 = np.searchsorted(self.lambda_, llfin, "right")
+        return self.order[i0:i1]
+
+    def search(self, central_lambdas, tolerance):
+        """Finds lines within central_lambda-tolerance <= wavelength <= central_lambda+tolerance, many at once
+
+        Args:
+            central_lambdas: sequence of central wavelengths
+            tolerance: scalar or sequence (one per central wavelength)
+
+        Returns:
+            (iq, rows): arrays of same length, where iq are indexes of central_lambdas and rows are row
+            numbers. Results are grouped by query (in order) then sorted by wavelength
+        """
+        c = np.asarray(central_lambdas, dtype=float)
+        tolerance = np.broadcast_to(np.asarray(tolerance, dtype=float), c.shape)
+        i0 = np.searchsorted(self.lambda_, c-tolerance, "left")
+        i1 = np.searchsorted(self.lambda_, c+tolerance, "right")
+        counts = np.maximum(i1-i0, 0)
+        iq = np.repeat(np.arange(len(c)), counts)
+        # positions i0[q], i0[q]+1, ..., i1[q]-1 for every query q
+        starts = np.repeat(i0-np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+        return iq, self.order[starts+np.arange(len(iq))]
+
+    def get_header(self):
+        """Returns column names of get_table() rows"""
+        if self.flag_molecules:
+            return ["Molecule #", "Set-of-lines #", "vl", "v2l", "lmbdam", "sj", "jj", "branch"]
+        return ["Atom", "lambda_", "kiex", "algf", "ch", "gr", "ge", "zinf", "abondr"]
+
+    def get_table(self, rows):
+        """Returns list of rows (lists) describing lines (see get_header())"""
+        ret = []
+        if self.flag_molecules:
+            t = self.table[rows]
+            for i_m, i_s, lmbdam, sj, jj, branch in zip(self.i_group[rows].tolist(), self.i_sol[rows].tolist(),
+                                                        t["lmbdam"].tolist(), t["sj"].tolist(), t["jj"].tolist(),
+                                                        filemolecules._branch_array[t["branch"]].tolist()):
+                sol = self.f.molecules[i_m].sol[i_s]
+                ret.append([i_m+1, i_s+1, sol.vl, sol.v2l, lmbdam, sj, jj, branch])
+        else:
+            for i_a, values in zip(self.i_group[rows].tolist(), self.table[rows].tolist()):
+                a = self.f.atoms[i_a]
+                ret.append(["{}{}".format(a.elem, a.ioni)]+list(values))
+        return ret
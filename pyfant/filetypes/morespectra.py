@@ -1,5 +1,6 @@
 from f311 import FileSpectrum, Spectrum
 import numpy as np
+import re
 
 class FileSpectrumPfant(FileSpectrum):
     """
@@ -54,98 +55,34 @@ class FileSpectrumPfant(FileSpectrum):
 # 0         10        20        30        40        50        60        70        80        90        100       110       120       130       140       150
 
         with open(filename, 'r') as h:
-            # f_header = ff.FortranRecordReader(
-            #     "(i5, a20, 5f15.5, 4f10.1, i10, 4f15.5)")
-            i = 0
-            y = []
-            sp = self.spectrum = Spectrum()
-
-            while True:
-                s = h.readline()
-                if i == 0:
-                    ikeytot = int(s[0:5])
-                    l0 = float(s[100:110])
-                    pas = float(s[150:165])
-
-                    # vars_ = f_header.read(s)  # This is actually quite slow, gotta avoid it
-                    # [ikeytot,
-                    #  _,
-                    #  _,
-                    #  _,
-                    #  _,
-                    #  _,
-                    #  _,
-                    #  l0,
-                    #  _,
-                    #  _,  # lzero,
-                    #  _,  # lfin,
-                    #  _,  # itot
-                    #  pas,
-                    #  _,
-                    #  _,
-                    #  _] = vars_
-                    #
-                    # # [self.ikeytot,
-                    # #  self.tit,
-                    # #  self.tetaef,
-                    # #  self.glog,
-                    # #  self.asalog,
-                    # #  self.modeles_nhe,
-                    # #  self.amg,
-                    # #  self.l0,
-                    # #  self.lf,
-                    # #  _,  # lzero,
-                    # #  _,  # lfin,
-                    # #  _,  # itot
-                    # #  self.pas,
-                    # #  self.echx,
-                    # #  self.echy,
-                    # #  self.fwhm] = vars_
-
-                #itot = vars[11]
-
-                # if False:
-                # # Will have to compile a different formatter depending on itot
-                #     if i == 0 or itot != last_itot:
-                #       f_flux = ff.FortranRecordReader("(%df15.5)" % itot)
-                #
-                #     v = f_flux.read(h.readline())
-                # else:
-                # Will see if can read faster than Fortran formatter
-                s = h.readline()
-
-                # Note: last character of s is "\n"
-                v = [float(s[0 + j:15 + j]) for j in range(0, len(s) - 1, 15)]
-
-                # print len(v)
-                # print "==========================="
-                # print v
-                # print i, self.ikeytot
-
-                # if i < self.ikeytot - 1:
-                if i < ikeytot - 1:
-                    # Last point is discarded because pfant writes reduntantly:
-                    # last point of iteration ikey is the same as first point of
-                    # iteration ikey+1
-                    # y = y + v  # update: taking all points calculated yes [:-1]
-                    y = y + v[:-1]
-                else:
-                    # ...except for in the last calculation interval
-                    # (then the last point is used).
-                    y = y + v
-                    break
-
-                i += 1
-
-                #last_itot = itot
+            text = h.read()
+        sp = self.spectrum = Spectrum()
+
+        # f_header = ff.FortranRecordReader("(i5, a20, 5f15.5, 4f10.1, i10, 4f15.5)")
+        # is quite slow, gotta avoid it. Only ikeytot, l0 and pas are needed
+        rows = text.split("\n")
+        s = rows[0]
+        ikeytot = int(s[0:5])
+        l0 = float(s[100:110])
+        pas = float(s[150:165])
+
+        # Headers and values rows alternate; values are 15-character fields. All values rows are
+        # parsed at once, padded to a whole number of fields
+        v_rows = [s.rstrip("\r") for s in rows[1:2*ikeytot:2]]
+        if len(v_rows) < ikeytot:
+            raise RuntimeError("File '{}' has less than {} calculation intervals".format(filename, ikeytot))
+        counts = np.array([(len(s)+14)//15 for s in v_rows])
+        buffer = "".join([s.ljust(15*n) for s, n in zip(v_rows, counts)]).encode()
+        y = np.frombuffer(buffer, dtype="S15").astype(float)
+
+        # Last point of each calculation interval is discarded because pfant writes reduntantly:
+        # last point of iteration ikey is the same as first point of iteration ikey+1
+        # ...except for in the last calculation interval (then the last point is used).
+        y = np.delete(y, np.cumsum(counts[:-1])-1)
 
         # Lambdas
-
-        # sp.x = np.array([self.l0 + k * self.pas for k in range(0, len(y))])
-
-        sp.x = np.array([l0 + k * pas for k in range(0, len(y))])
-
-        sp.y = np.array(y)
+        sp.x = l0+np.arange(len(y))*pas
+        sp.y = y
 
 #        logging.debug("Just read PFANT Spectrum '%s'" % filename)
 
@@ -199,8 +136,6 @@ class FileSpectrumNulbad(FileSpectrum):
     """
 
     def _do_load(self, filename):
-        x = []
-        y = []
         with open(filename, 'r') as h:
             sp = self.spectrum = Spectrum()
             # -- row 01 --
@@ -211,11 +146,6 @@ class FileSpectrumNulbad(FileSpectrum):
             if not s.startswith("#"):
                 raise RuntimeError("Not a nulbad output file")
 
-            # [sp.tit, sp.tetaef, sp.glog, sp.asalog, sp.amg] = \
-            #     s_header0.unpack_from(s)
-            # [sp.tetaef, sp.glog, sp.asalog, sp.amg] = \
-            #     list(map(float, [sp.tetaef, sp.glog, sp.asalog, sp.amg]))
-
             # -- row 02 --
             # Original format: ('#',I6,2X,'0. 0. 1. 1. Lzero =',F10.2,2x,'Lfin =', &
             # F10.2,2X,'PAS =',F5.2,2x,'FWHM =',F5.2)
@@ -225,35 +155,23 @@ class FileSpectrumNulbad(FileSpectrum):
             if not s.startswith("#"):
                 raise RuntimeError("Not a nulbad output file")
 
-            # [_, sp.l0, sp.lf, sp.pas, sp.fwhm] = \
-            #     s_header1.unpack_from(s)
-            # [sp.l0, sp.lf, sp.pas, sp.fwhm] = \
-            #     list(map(float, [sp.l0, sp.lf, sp.pas, sp.fwhm]))
-            #n = int(n)
-
-
-            # -- rows 03 ... --
+            # -- rows 03 ... -- (up to first blank row)
             #
             # Examples:
             #    4790.0000000000000       0.99463000000000001
             #    4790.0400000000000        2.0321771294932130E-004
-
-            # pattern = re.compile(r"^\s+([0-9.E+-]+)\s+([0-9.E+-]+)")
-            while True:
-                s = h.readline().strip()
-                if not s:
-                  break
-
-                a, b = [float(z) for z in s.split()]
-                # if match is None:
-                #     raise ParseError('Row %d of file %s is invalid' % (i + 3, filename))
-                # a, b = map(float, match.groups())
-
-                x.append(a)
-                y.append(b)
-
-        sp.x = np.array(x)
-        sp.y = np.array(y)
+            text = h.read()
+
+        text = "\n"+text.rstrip()+"\n"
+        m = re.search(r"\n[ \t\r]*\n", text)
+        text = text[1:m.start() if m is not None else -1]
+        v = np.fromstring(text, sep=" ")
+        if len(v) != 2*(text.count("\n")+1 if text else 0):
+            raise ValueError("File '{}': all rows must have two values".format(filename))
+        v = v.reshape(-1, 2)
+
+        sp.x = v[:, 0].copy()
+        sp.y = v[:, 1].copy()
 
 #        logging.debug("Just read NULBAD Spectrum '%s'" % filename)
 
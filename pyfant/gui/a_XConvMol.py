@@ -8,6 +8,7 @@ import datetime
 from collections import OrderedDict
 import f311
 import pyfant
+import numpy as np
 
 
 __all__ = ["XConvMol"]
@@ -532,8 +533,7 @@ class _WKuruczPanel(a99.WBase):
                 if f.__class__  not in (pyfant.FileKuruczMolecule, pyfant.FileKuruczMolecule1):
                     cb.addItem("(all (file is old-format))")
                 else:
-                    self._isotopes = list(set([line.iso for line in f]))
-                    self._isotopes.sort()
+                    self._isotopes = np.unique(f.data["iso"]).tolist()
                     cb.addItem("(all)")
                     cb.addItems([str(x) for x in self._isotopes])
         finally:
@@ -13,10 +13,12 @@ References:
 
 
 import math
+import numpy as np
 import pyfant
+from .basic import LRUCache
 
 
-__all__ = ["kovacs_toolbox", "NoLineStrength", "NO_LINE_STRENGTH"]
+__all__ = ["kovacs_toolbox", "NoLineStrength", "NO_LINE_STRENGTH", "molconsts_fingerprint", "sj_cache"]
 
 
 def kovacs_toolbox(molconsts, flag_normalize=None):
@@ -41,11 +43,37 @@ class NoLineStrength(Exception):
     pass
 
 
+def molconsts_fingerprint(molconsts):
+    """Returns hashable object that identifies the values in molconsts (dict-like)"""
+    return tuple(sorted(molconsts.items()))
+
+
+# Line strengths of all branches, shared by all toolboxes of the process:
+# {(toolbox class name, flag_normalize, molconsts fingerprint, vl, v2l, J): ((branch, sj), ...), ...}
+sj_cache = LRUCache(2**18)
+
+
 # Code to signal that there is no Hönl-London factor for combination (vl, v2l, J, branch)
 # (will be appear instead of HLF)
 NO_LINE_STRENGTH = -999999
 
 
+# The formulas below are evaluated either for a scalar J (get_sj()) or for a NumPy array of J's
+# (get_sj_array()). The following make both cases give identical results (x**2 and x**0.5 would
+# go through C pow() for scalars, but not for arrays)
+
+def _sq(x):
+    """x squared"""
+    return x*x
+
+
+def _sqrt(x):
+    """Square root. Scalar: raises ValueError if x < 0; array: NaN where x < 0"""
+    if isinstance(x, np.ndarray):
+        return np.sqrt(x)
+    return math.sqrt(x)
+
+
 def _quanta_to_branch_singlet(Jl, J2l, spinl=None, spin2l=None):
     """
     Singlet only has branches P/Q/R
@@ -163,10 +191,18 @@ class _LineStrengthToolbox(object):
         #
         self._flag_normalize = flag_normalize
 
+        # Key prefix in sj_cache. molconsts is not supposed to change after this point
+        self._cache_key = (self.__class__.__name__, flag_normalize, molconsts_fingerprint(molconsts))
+
     def populate(self, vl, v2l, J):
         """Populates self.dict_sj with keys (vl, v2l, J, (all branches))"""
-        data = self._get_populate_data(vl, v2l, J)
-        self.__update_with_data(vl, v2l, J, data)
+        key = self._cache_key+(vl, v2l, J)
+        values = sj_cache.get(key)
+        if values is None:
+            data = self._get_populate_data(vl, v2l, J)
+            values = sj_cache[key] = self.__calc_values(J, data)
+        for branch, value in values:
+            self._dict_sj[(vl, v2l, J, branch)] = value
 
     def get_sj(self, vl, v2l, J, branch):
         """
@@ -184,8 +220,7 @@ class _LineStrengthToolbox(object):
         key = (vl, v2l, J, branch)
 
         if key not in self._dict_sj:
-            data = self._get_populate_data(vl, v2l, J)
-            self.__update_with_data(vl, v2l, J, data)
+            self.populate(vl, v2l, J)
 
         value = self._dict_sj[key]
 
@@ -195,14 +230,74 @@ class _LineStrengthToolbox(object):
 
         return value
 
-    def __update_with_data(self, vl, v2l, J, data):
-        normalization_factor = 1.
+    def get_sj_array(self, vl, v2l, J, branch, branches=None):
+        """
+        Vectorized get_sj(): calculates line strengths for many lines at once
+
+        Args:
+            vl: scalar or array
+            v2l: scalar or array
+            J: array (truncated to integer as in get_sj())
+            branch: array of branch labels (e.g. ["P1", "Q1", ...]), or array of integer codes
+                    indexing branches
+            branches: (optional) sequence of branch labels. If passed, branch[i] refers to
+                      label branches[branch[i]]
+
+        Returns:
+            float array with the shape of J broadcast against vl, v2l and branch. Contains
+            NO_LINE_STRENGTH where get_sj() would raise NoLineStrength, and also where vl, v2l or
+            J is not finite, or the branch does not exist for this system
+
+        Values are the same as returned by get_sj(), but are not stored in self.dict_sj
+        """
+
+        if branches is None:
+            branches, branch = np.unique(np.asarray(branch, dtype=str), return_inverse=True)
+        vl, v2l, J, branch = np.broadcast_arrays(np.asarray(vl, dtype=float),
+                                                 np.asarray(v2l, dtype=float),
+                                                 np.asarray(J, dtype=float), np.asarray(branch))
+        shape = J.shape
+        vl, v2l, J, branch = [x.ravel() for x in (vl, v2l, J, branch)]
+
+        ret = np.full(J.size, float(NO_LINE_STRENGTH))
+        idx = np.flatnonzero(np.isfinite(vl) & np.isfinite(v2l) & np.isfinite(J))
+        if len(idx) > 0:
+            # groups lines by (vl, v2l, branch)
+            idx = idx[np.lexsort((branch[idx], v2l[idx], vl[idx]))]
+            vl, v2l, J, branch = vl[idx], v2l[idx], np.trunc(J[idx]), branch[idx]
+            flag_new_vib = np.concatenate(([True], (vl[1:] != vl[:-1]) | (v2l[1:] != v2l[:-1])))
+            starts = np.flatnonzero(flag_new_vib | np.concatenate(([True], branch[1:] != branch[:-1])))
+            ends = np.append(starts[1:], len(idx))
+
+            values = np.full(len(idx), float(NO_LINE_STRENGTH))
+            with np.errstate(all="ignore"):
+                for i0, i1 in zip(starts, ends):
+                    JJ = J[i0:i1]
+                    if flag_new_vib[i0]:
+                        data = dict(self._get_populate_data(float(vl[i0]), float(v2l[i0]), JJ))
+                    function = data.get(str(branches[branch[i0]]))
+                    if function is None:
+                        continue
+                    value = function(JJ)*self._get_normalization_factor(JJ)
+                    values[i0:i1] = np.where(np.isfinite(value), value, NO_LINE_STRENGTH)
+            ret[idx] = values
+
+        return ret.reshape(shape)
+
+    def _get_normalization_factor(self, J):
+        ret = 1.
         if self._flag_normalize:
             cc = self._molconsts
             # TODO 20230415 Was 2, I put 1
-            normalization_factor = 1. / ((2 * cc.get_S2l() + 1) * (2 * J + 1) * (2 - cc.get_deltak()))
-            # normalization_factor = 2. / ((2 * cc.get_S2l() + 1) * (2 * J + 1) * (2 - cc.get_deltak()))
+            ret = 1. / ((2 * cc.get_S2l() + 1) * (2 * J + 1) * (2 - cc.get_deltak()))
+            # ret = 2. / ((2 * cc.get_S2l() + 1) * (2 * J + 1) * (2 - cc.get_deltak()))
+        return ret
 
+    def __calc_values(self, J, data):
+        """Returns ((branch, sj), ...)"""
+        normalization_factor = self._get_normalization_factor(J)
+
+        ret = []
         for branch, function in data:
             try:
                 value = function(J) * normalization_factor
@@ -215,7 +310,8 @@ class _LineStrengthToolbox(object):
                 value = NO_LINE_STRENGTH
             except ZeroDivisionError:
                 value = NO_LINE_STRENGTH
-            self._dict_sj[(vl, v2l, J, branch)]  = value
+            ret.append((branch, value))
+        return tuple(ret)
 
 
     def _get_populate_data(self, vl, v2l, J):
@@ -327,14 +423,14 @@ class _LSTDoublet(_LineStrengthToolbox):
             Y2L = -Y2L
 
         # Kovacs formula 2.1.3-6
-        UPLUSL = lambda J: ((LAML**2.)*YL*(YL-4) + 4*((J+0.5)**2.))**0.5 + LAML*(YL-2)
-        UMINUSL= lambda J: ((LAML**2.)*YL*(YL-4) + 4*((J+0.5)**2.))**0.5 - LAML*(YL-2)
-        CPLUSL = lambda J: 0.5*((UPLUSL(J)**2.) + 4*(((J+0.5)**2.) - LAML**2.))
-        CMINUSL = lambda J: 0.5*((UMINUSL(J)**2.) + 4*(((J+0.5)**2.) - LAML**2.))
-        UPLUS2L = lambda J: ((LAM2L**2.)*Y2L*(Y2L-4) + 4*((J+0.5)**2.))**0.5 + LAM2L*(Y2L-2)
-        UMINUS2L = lambda J: ((LAM2L**2.)*Y2L*(Y2L-4) + 4*((J+0.5)**2.))**0.5 - LAM2L*(Y2L-2)
-        CPLUS2L = lambda J: 0.5*((UPLUS2L(J)**2.) + 4*(((J+0.5)**2.)-LAM2L**2.))
-        CMINUS2L = lambda J: 0.5*((UMINUS2L(J)**2.)+4*(((J+0.5)**2.)-LAM2L**2.))
+        UPLUSL = lambda J: _sqrt((LAML**2.)*YL*(YL-4) + 4*_sq(J+0.5)) + LAML*(YL-2)
+        UMINUSL= lambda J: _sqrt((LAML**2.)*YL*(YL-4) + 4*_sq(J+0.5)) - LAML*(YL-2)
+        CPLUSL = lambda J: 0.5*(_sq(UPLUSL(J)) + 4*(_sq(J+0.5) - LAML**2.))
+        CMINUSL = lambda J: 0.5*(_sq(UMINUSL(J)) + 4*(_sq(J+0.5) - LAML**2.))
+        UPLUS2L = lambda J: _sqrt((LAM2L**2.)*Y2L*(Y2L-4) + 4*_sq(J+0.5)) + LAM2L*(Y2L-2)
+        UMINUS2L = lambda J: _sqrt((LAM2L**2.)*Y2L*(Y2L-4) + 4*_sq(J+0.5)) - LAM2L*(Y2L-2)
+        CPLUS2L = lambda J: 0.5*(_sq(UPLUS2L(J)) + 4*(_sq(J+0.5)-LAM2L**2.))
+        CMINUS2L = lambda J: 0.5*(_sq(UMINUS2L(J))+4*(_sq(J+0.5)-LAM2L**2.))
 
         return self._get_strengths(J, LAML, LAM2L, UPLUSL, UMINUSL, CPLUSL, CMINUSL, UPLUS2L,
                                    UMINUS2L, CPLUS2L, CMINUS2L, YL, Y2L,)
@@ -356,51 +452,51 @@ class _LSTDoublet0(_LSTDoublet):
 
         _P1 = lambda J: \
             (((J-LAM-0.5)*(J+LAM+0.5))/(4*J*CMINUSL(J-1)*CMINUS2L(J)))* \
-            ((UMINUSL(J-1)*UMINUS2L(J) + 4*(J-LAM+0.5)*(J+LAM-0.5))**2.)
+            (_sq(UMINUSL(J-1)*UMINUS2L(J) + 4*(J-LAM+0.5)*(J+LAM-0.5)))
 
         _Q1 = lambda J: \
             ((J+0.5)/(2*J*(J+1)*CMINUSL(J)*CMINUS2L(J)))* \
-            (((LAM+0.5)*UMINUSL(J)*UMINUS2L(J) + 4*(LAM-0.5)*(J-LAM+0.5)*(J+LAM+0.5))**2.)
+            (_sq((LAM+0.5)*UMINUSL(J)*UMINUS2L(J) + 4*(LAM-0.5)*(J-LAM+0.5)*(J+LAM+0.5)))
 
         _R1 = lambda J: \
             (((J-LAM+0.5)*(J+LAM+1.5))/(4*(J+1)*CMINUSL(J+1)*CMINUS2L(J)))* \
-            ((UMINUSL(J+1)*UMINUS2L(J) + 4*(J-LAM+1.5)*(J+LAM+0.5))**2.)
+            (_sq(UMINUSL(J+1)*UMINUS2L(J) + 4*(J-LAM+1.5)*(J+LAM+0.5)))
 
         _P21 = lambda J: \
             (((J-LAM-0.5)*(J+LAM+0.5))/(4*J*CPLUSL(J-1)*CMINUS2L(J)))* \
-            ((UPLUSL(J-1)*UMINUS2L(J) - 4*(J-LAM+0.5)*(J+LAM-0.5))**2)
+            (_sq(UPLUSL(J-1)*UMINUS2L(J) - 4*(J-LAM+0.5)*(J+LAM-0.5)))
 
         _Q21 = lambda J: \
             (((J+0.5))/(2*J*(J+1)*CPLUSL(J)*CMINUS2L(J)))* \
-            ((LAM+0.5)*(UPLUSL(J)*UMINUS2L(J) - 4*(LAM-0.5)*(J-LAM+0.5)*(J+LAM+0.5))**2.)
+            ((LAM+0.5)*_sq(UPLUSL(J)*UMINUS2L(J) - 4*(LAM-0.5)*(J-LAM+0.5)*(J+LAM+0.5)))
 
         _R21 = lambda J: \
             (((J-LAM+0.5)*(J+LAM+1.5))/(4*(J+1)*CPLUSL(J+1)*CMINUS2L(J)))* \
-            ((UPLUSL(J+1)*UMINUS2L(J) - 4*(J-LAM+1.5)*(J+LAM+0.5))**2.)
+            (_sq(UPLUSL(J+1)*UMINUS2L(J) - 4*(J-LAM+1.5)*(J+LAM+0.5)))
 
         _P12 = lambda J: \
             (((J-LAM-0.5)*(J+LAM+0.5))/(4*J*CMINUSL(J-1)*CPLUS2L(J)))* \
-            ((UMINUSL(J-1)*UPLUS2L(J) - 4*(J-LAM+0.5)*(J+LAM-0.5))**2.)
+            (_sq(UMINUSL(J-1)*UPLUS2L(J) - 4*(J-LAM+0.5)*(J+LAM-0.5)))
 
         _Q12 = lambda J: \
             (((J+0.5))/(2*J*(J+1)*CMINUSL(J)*CPLUS2L(J)))*\
-            ((LAM+0.5)*(UMINUSL(J)*UPLUS2L(J) - 4*(LAM-0.5)*(J-LAM+0.5)*(J+LAM+0.5))**2.)
+            ((LAM+0.5)*_sq(UMINUSL(J)*UPLUS2L(J) - 4*(LAM-0.5)*(J-LAM+0.5)*(J+LAM+0.5)))
 
         _R12 = lambda J: \
             (((J-LAM+0.5)*(J+LAM+1.5))/(4*(J+1)*CMINUSL(J+1)*CPLUS2L(J)))* \
-            ((UMINUSL(J+1)*UPLUS2L(J) - 4*(J-LAM+1.5)*(J+LAM+0.5))**2.)
+            (_sq(UMINUSL(J+1)*UPLUS2L(J) - 4*(J-LAM+1.5)*(J+LAM+0.5)))
 
         _P2 = lambda J: \
             (((J-LAM-0.5)*(J+LAM+0.5))/(4*J*CPLUSL(J-1)*CPLUS2L(J)))* \
-            ((UPLUSL(J-1)*UPLUS2L(J) + 4*(J-LAM+0.5)*(J+LAM-0.5))**2.)
+            (_sq(UPLUSL(J-1)*UPLUS2L(J) + 4*(J-LAM+0.5)*(J+LAM-0.5)))
 
         _Q2 = lambda J: \
             (((J+0.5))/(2*J*(J+1)* CPLUSL(J)*CPLUS2L(J)))* \
-            ((LAM+0.5)*(UPLUSL(J)*UPLUS2L(J) + 4*(LAM-0.5)*(J-LAM+0.5)*(J+LAM+0.5))**2.)
+            ((LAM+0.5)*_sq(UPLUSL(J)*UPLUS2L(J) + 4*(LAM-0.5)*(J-LAM+0.5)*(J+LAM+0.5)))
 
         _R2 = lambda J: \
             (((J-LAM+0.5)*(J+LAM+1.5))/(4*(J+1)*CPLUSL(J+1)*CPLUS2L(J)))* \
-            ((UPLUSL(J+1)*UPLUS2L(J) + 4*(J-LAM+1.5)*(J+LAM+0.5))**2.)
+            (_sq(UPLUSL(J+1)*UPLUS2L(J) + 4*(J-LAM+1.5)*(J+LAM+0.5)))
 
         return (
          ("P1", _P1),
@@ -440,71 +536,71 @@ class _LSTDoublet1(_LSTDoublet):
 
         _P1 = lambda J: \
             (((J-LMIN-1.5)*(J-LMIN-0.5))/(8*J*CMINUSL(J-1)*
-            CMINUS2L(J)))*((UMINUSL(J-1)*UMINUS2L(J) +
-            4*(J-LMIN+0.5)*(J+LMIN+0.5))**2.)
+            CMINUS2L(J)))*(_sq(UMINUSL(J-1)*UMINUS2L(J) +
+            4*(J-LMIN+0.5)*(J+LMIN+0.5)))
 
         _Q1 = lambda J: \
             (((J-LMIN-0.5)*(J+0.5)*(J+LMIN+1.5))/(4*J*(J+1)*
-            CMINUSL(J)*CMINUS2L(J)))*((UMINUSL(J)*UMINUS2L(J) +
-            4*(J-LMIN+0.5)*(J+LMIN+0.5))**2.)
+            CMINUSL(J)*CMINUS2L(J)))*(_sq(UMINUSL(J)*UMINUS2L(J) +
+            4*(J-LMIN+0.5)*(J+LMIN+0.5)))
 
 
         _R1 = lambda J: \
             (((J+LMIN+1.5)*(J+LMIN+2.5))/(8*(J+1)*CMINUSL(J+1)*
-            CMINUS2L(J)))*((UMINUSL(J+1)*UMINUS2L(J) +
-            4*(J-LMIN+0.5)*(J+LMIN+0.5))**2.)
+            CMINUS2L(J)))*(_sq(UMINUSL(J+1)*UMINUS2L(J) +
+            4*(J-LMIN+0.5)*(J+LMIN+0.5)))
 
         _P21 = lambda J: \
             (((J-LMIN-1.5)*(J-LMIN-0.5))/(8*J*CPLUSL(J-1)*
-            CMINUS2L(J)))*((UPLUSL(J-1)*UMINUS2L(J) -
-            4*(J-LMIN+0.5)*(J+LMIN+0.5))**2.)
+            CMINUS2L(J)))*(_sq(UPLUSL(J-1)*UMINUS2L(J) -
+            4*(J-LMIN+0.5)*(J+LMIN+0.5)))
 
         _Q21 = lambda J: \
             (((J-LMIN-0.5)*(J+0.5)*(J+LMIN+1.5))/(4*J*(J+1)*
-            CPLUSL(J)*CMINUS2L(J)))*((UPLUSL(J)*UMINUS2L(J) -
-            4*(J-LMIN+0.5)*(J+LMIN+0.5))**2.)
+            CPLUSL(J)*CMINUS2L(J)))*(_sq(UPLUSL(J)*UMINUS2L(J) -
+            4*(J-LMIN+0.5)*(J+LMIN+0.5)))
 
 
         _R21 = lambda J: \
             (((J+LMIN+1.5)*(J+LMIN+2.5))/(8*(J+1)*CPLUSL(J+1)*
-            CMINUS2L(J)))*((UPLUSL(J+1)*UMINUS2L(J) -
-            4*(J-LMIN+0.5)*(J+LMIN+0.5))**2.)
+            CMINUS2L(J)))*(_sq(UPLUSL(J+1)*UMINUS2L(J) -
+            4*(J-LMIN+0.5)*(J+LMIN+0.5)))
 
 
         _P12 = lambda J: \
             (((J-LMIN-1.5)*(J-LMIN-0.5))/
             (8*J*CMINUSL(J-1)*CPLUS2L(J)))*\
-            ((UMINUSL(J-1)*UPLUS2L(J) - 4*(J-LMIN+0.5)*(J+LMIN+0.5))**2.)
+            (_sq(UMINUSL(J-1)*UPLUS2L(J) - 4*(J-LMIN+0.5)*(J+LMIN+0.5)))
 
 
         _Q12 = lambda J: \
             (((J-LMIN-0.5)*(J+0.5)*(J+LMIN+1.5))/(4*J*(J+1)*
-            CMINUSL(J)*CPLUS2L(J)))*((UMINUSL(J)*UPLUS2L(J) -
-            4*(J-LMIN+0.5)*(J+LMIN+0.5))**2.)
+            CMINUSL(J)*CPLUS2L(J)))*(_sq(UMINUSL(J)*UPLUS2L(J) -
+            4*(J-LMIN+0.5)*(J+LMIN+0.5)))
 
 
         _R12 = lambda J: \
             (((J+LMIN+1.5)*(J+LMIN+2.5))/(8*(J+1)*CMINUSL(J+1)*
-            CPLUS2L(J)))*((UMINUSL(J+1)*UPLUS2L(J) -
-            4*(J-LMIN+0.5)*(J+LMIN+0.5))**2.)
+            CPLUS2L(J)))*(_sq(UMINUSL(J+1)*UPLUS2L(J) -
+            4*(J-LMIN+0.5)*(J+LMIN+0.5)))
 
 
         _P2 = lambda J: \
             (((J-LMIN-1.5)*(J-LMIN-0.5))/(8*J*CPLUSL(J-1)*
-            CPLUS2L(J)))*((UPLUSL(J-1)*UPLUS2L(J) +
-            4*(J-LMIN+0.5)*(J+LMIN+0.5))**2.)
+            CPLUS2L(J)))*(_sq(UPLUSL(J-1)*UPLUS2L(J) +
+            4*(J-LMIN+0.5)*(J+LMIN+0.5)))
 
 
         _Q2 = lambda J: \
             (((J-LMIN-0.5)*(J+0.5)*(J+LMIN+1.5))/(4*J*(J+1)*
-            CPLUSL(J)*CPLUS2L(J)))*((UPLUSL(J)*UPLUS2L(J) +
-            4*(J-LMIN+0.5)*(J+LMIN+0.5))**2.)
+            CPLUSL(J)*CPLUS2L(J)))*(_sq(UPLUSL(J)*UPLUS2L(J) +
+            4*(J-LMIN+0.5)*(J+LMIN+0.5)))
 
 
         _R2 = lambda J: \
             (((J+LMIN+1.5)*(J+LMIN+2.5))/(8*(J+1)*CPLUSL(J+1)*
-            CPLUS2L(J)))*((UPLUSL(J+1)*UPLUS2L(J) +
-            4*(J-LMIN+0.5)*(J+LMIN+0.5))**2.)
+            CPLUS2L(J)))*(_sq(UPLUSL(J+1)*UPLUS2L(J) +
+            4*(J-LMIN+0.5)*(J+LMIN+0.5)))
 
 
         # Resolves the Delta Lambda = LAML - LAM2L
@@ -607,18 +703,18 @@ class _LSTTriplet(_LineStrengthToolbox):
         #     - "YL" was replaced by "YL", and "Y2L" was replaced by "Y2L" because, again, "L" and "2L"
         #       are used in other places to denote the superior and inferior levels, respectively
 
-        U1PLUSL = lambda J: math.sqrt(LAML*LAML*YL*(YL-4)+4*J*J)+(LAML*(YL-2))
-        U1MINUSL = lambda J: math.sqrt(LAML*LAML*YL*(YL-4)+4*J*J)-(LAML*(YL-2))
-        U3PLUSL = lambda J: (LAML*LAML*YL*(YL-4)+4*(J+1)*(J+1))**.5+LAML*(YL-2)
-        U3MINUSL = lambda J: ((LAML*LAML*YL*(YL-4)+4*(J+1)*(J+1))**0.5)-LAML*(YL-2)
+        U1PLUSL = lambda J: _sqrt(LAML*LAML*YL*(YL-4)+4*J*J)+(LAML*(YL-2))
+        U1MINUSL = lambda J: _sqrt(LAML*LAML*YL*(YL-4)+4*J*J)-(LAML*(YL-2))
+        U3PLUSL = lambda J: _sqrt(LAML*LAML*YL*(YL-4)+4*(J+1)*(J+1))+LAML*(YL-2)
+        U3MINUSL = lambda J: (_sqrt(LAML*LAML*YL*(YL-4)+4*(J+1)*(J+1)))-LAML*(YL-2)
         C1L = lambda J: LAMLC*LAMLC*YL*(YL-4)*(J-LAMLC+1)*(J+LAMLC)+2*(2*J+1)*(J-LAMLC)*(J+LAMLC)*J
         C2L = lambda J: LAML*LAML*YL*(YL-4)+4*J*(J+1)
         C3L = lambda J: LAMLC*LAMLC*YL*(YL-4)*(J-LAMLC)*(J+LAMLC+1)+2*(2*J+1)*(J-LAMLC+1)*(J+1)*(J+LAMLC+1)
 
-        U1PLUS2L = lambda J: ((LAM2L*LAM2L*Y2L*(Y2L-4)+4*J*J))**.5+LAM2L*(Y2L-2)
-        U1MINUS2L = lambda J: ((LAM2L*LAM2L*Y2L*(Y2L-4)+4*J*J))**.5-LAM2L*(Y2L-2)
-        U3PLUS2L = lambda J: ((LAM2L*LAM2L*Y2L*(Y2L-4)+4*(J+1)*(J+1))**.5)+LAM2L*(Y2L-2)
-        U3MINUS2L = lambda J: ((LAM2L*LAM2L*Y2L*(Y2L-4)+4*(J+1)*(J+1))**.5)-LAM2L*(Y2L-2)
+        U1PLUS2L = lambda J: _sqrt((LAM2L*LAM2L*Y2L*(Y2L-4)+4*J*J))+LAM2L*(Y2L-2)
+        U1MINUS2L = lambda J: _sqrt((LAM2L*LAM2L*Y2L*(Y2L-4)+4*J*J))-LAM2L*(Y2L-2)
+        U3PLUS2L = lambda J: (_sqrt(LAM2L*LAM2L*Y2L*(Y2L-4)+4*(J+1)*(J+1)))+LAM2L*(Y2L-2)
+        U3MINUS2L = lambda J: (_sqrt(LAM2L*LAM2L*Y2L*(Y2L-4)+4*(J+1)*(J+1)))-LAM2L*(Y2L-2)
         C12L = lambda J: LAM2L*LAM2L*Y2L*(Y2L-4)*(J-LAM2L+1)*(J+LAM2L)+2*(2*J+1)*(J-LAM2L)*J*(J+LAM2L)
         C22L = lambda J: LAM2L*LAM2L*Y2L*(Y2L-4)+4*J*(J+1)
         C32L = lambda J: LAM2LC*LAM2LC*Y2L*(Y2L-4)*(J-LAM2LC)*(J+LAM2LC+1)+2*(2*J+1)*(J-LAM2LC+1)*(J+1)*(J+LAM2LC+1)
@@ -651,163 +747,163 @@ class _LSTTriplet0(_LSTTriplet):
 
         _P1 = lambda J: \
          (((J-LAM)*(J+LAM))/(16*J*C1L(J-1)*C12L(J)))* \
-         (((J-LAM+1)*(J+LAM-1)*U1PLUSL(J-1)*U1PLUS2L(J)+
+         (_sq((J-LAM+1)*(J+LAM-1)*U1PLUSL(J-1)*U1PLUS2L(J)+
          (J-LAM-1)*(J+LAM+1)*U1MINUSL(J-1)*U1MINUS2L(J)+
-         8*(J-LAM-1)*(J-LAM)*(J+LAM-1)*(J+LAM))**2)
+         8*(J-LAM-1)*(J-LAM)*(J+LAM-1)*(J+LAM)))
 
         _Q1 = lambda J: \
          ((2*J+1)/(16*J*(J+1)*C1L(J)*C12L(J))) \
-         *(((LAM-1)*(J-LAM+1)*(J+LAM)*U1PLUSL(J)*U1PLUS2L(J)+
+         *(_sq((LAM-1)*(J-LAM+1)*(J+LAM)*U1PLUSL(J)*U1PLUS2L(J)+
          (LAM+1)*(J-LAM)*(J+LAM+1)*U1MINUSL(J)*U1MINUS2L(J)+
-         8*LAM*(J-LAM)*(J-LAM)*(J+LAM)*(J+LAM))**2)
+         8*LAM*(J-LAM)*(J-LAM)*(J+LAM)*(J+LAM)))
 
         _R1 = lambda J: \
          (((J-LAM+1)*(J+LAM+1))/(16*(J+1)*
-         C1L(J+1)*C12L(J)))*(((J-LAM+2)*(J+LAM)*
+         C1L(J+1)*C12L(J)))*(_sq((J-LAM+2)*(J+LAM)*
          U1PLUSL(J+1)*U1PLUS2L(J)+(J-LAM)*(J+LAM+2)*U1MINUSL(J+1)*
-         U1MINUS2L(J)+8*(J-LAM)*(J-LAM+1)*(J+LAM)*(J+LAM+1))**2)
+         U1MINUS2L(J)+8*(J-LAM)*(J-LAM+1)*(J+LAM)*(J+LAM+1)))
 
         _P21 = lambda J: \
          (((J-LAM)*(J+LAM))/(2*J*C2L(J-1)*C12L(J)))* \
-         (((J-LAM+1)*(J+LAM-1)*U1PLUS2L(J)-
+         (_sq((J-LAM+1)*(J+LAM-1)*U1PLUS2L(J)-
          (J-LAM-1)*(J+LAM+1)*U1MINUS2L(J)-
-         2*LAM*(J-LAM)*(J+LAM)*(YL-2))**2)
+         2*LAM*(J-LAM)*(J+LAM)*(YL-2)))
 
         _Q21 = lambda J: \
          ((2*J+1)/(2*J*(J+1)*C2L(J)*C12L(J))) \
-         *(((LAM-1)*(J-LAM+1)*(J+LAM)*U1PLUS2L(J)-
+         *(_sq((LAM-1)*(J-LAM+1)*(J+LAM)*U1PLUS2L(J)-
          (LAM+1)*(J-LAM)*(J+LAM+1)*U1MINUS2L(J)-
-         2*LAM*LAM*(J-LAM)*(J+LAM)*(YL-2))**2)
+         2*LAM*LAM*(J-LAM)*(J+LAM)*(YL-2)))
 
         _R21 = lambda J: \
          (((J-LAM+1)*(J+LAM+1))/(2*(J+1)*
-         C2L(J+1)*C12L(J)))*(((J-LAM+2)*(J+LAM)*
+         C2L(J+1)*C12L(J)))*(_sq((J-LAM+2)*(J+LAM)*
          U1PLUS2L(J)-(J-LAM)*(J+LAM+2)*U1MINUS2L(J)-
-         2*LAM*(J-LAM)*(J+LAM)*(YL-2))**2)
+         2*LAM*(J-LAM)*(J+LAM)*(YL-2)))
 
         _P31 = lambda J: \
          (((J-LAM)*(J+LAM))/(16*J*C3L(J-1)*C12L(J)))* \
-         (((J-LAM+1)*(J+LAM-1)*U3MINUSL(J-1)*U1PLUS2L(J)+
+         (_sq((J-LAM+1)*(J+LAM-1)*U3MINUSL(J-1)*U1PLUS2L(J)+
          (J-LAM-1)*(J+LAM+1)*U1MINUS2L(J)*U3PLUSL(J-1)-
-         8*(J-LAM)*(J+LAM)*(J-LAM)*(J+LAM))**2)
+         8*(J-LAM)*(J+LAM)*(J-LAM)*(J+LAM)))
 
         _Q31 = lambda J: \
          ((2*J+1)/(16*J*(J+1)*C32L(J)*C12L(J))) \
-         *(((LAM-1)*(J-LAM+1)*(J+LAM)*U3MINUSL(J)*U1PLUS2L(J)+
+         *(_sq((LAM-1)*(J-LAM+1)*(J+LAM)*U3MINUSL(J)*U1PLUS2L(J)+
          (LAM+1)*(J-LAM)*(J+LAM+1)*U3PLUSL(J)*U1MINUS2L(J)-
-         8*LAM*(J-LAM)*(J-LAM+1)*(J+LAM)*(J+LAM+1))**2)
+         8*LAM*(J-LAM)*(J-LAM+1)*(J+LAM)*(J+LAM+1)))
 
         _R31 = lambda J: \
          (((J-LAM+1)*(J+LAM+1))/(16*(J+1)*
-         C3L(J+1)*C12L(J)))*(((J-LAM+2)*(J+LAM)*U3MINUSL(J+1)*
+         C3L(J+1)*C12L(J)))*(_sq((J-LAM+2)*(J+LAM)*U3MINUSL(J+1)*
          U1PLUS2L(J)+(J-LAM)*(J+LAM+2)*U3PLUSL(J+1)*U1MINUS2L(J)-
-         8*(J-LAM)*(J-LAM+2)*(J+LAM)*(J+LAM+2))**2)
+         8*(J-LAM)*(J-LAM+2)*(J+LAM)*(J+LAM+2)))
 
         _P12 = lambda J: \
          (((J-LAM)*(J+LAM))/(2*J*C1L(J-1)*C22L(J)))* \
-         (((J-LAM+1)*(J+LAM-1)*U1PLUSL(J-1)-
+         (_sq((J-LAM+1)*(J+LAM-1)*U1PLUSL(J-1)-
          (J-LAM-1)*(J+LAM+1)*U1MINUSL(J-1)-
-         2*LAM*(J-LAM-1)*(J+LAM-1)*(Y2L-2))**2)
+         2*LAM*(J-LAM-1)*(J+LAM-1)*(Y2L-2)))
 
         _Q12 = lambda J: \
          ((2*J+1)/(2*J*(J+1)*C1L(J)*C22L(J))) \
-         *(((LAM-1)*(J-LAM+1)*(J+LAM)*U1PLUSL(J)-
+         *(_sq((LAM-1)*(J-LAM+1)*(J+LAM)*U1PLUSL(J)-
          (LAM+1)*(J-LAM)*(J+LAM+1)*U1MINUSL(J)-
-         2*LAM*LAM*(J-LAM)*(J+LAM)*(Y2L-2))**2)
+         2*LAM*LAM*(J-LAM)*(J+LAM)*(Y2L-2)))
 
         _R12 = lambda J: \
          (((J-LAM+1)*(J+LAM+1))/(2*(J+1)*
-         C1L(J+1)*C22L(J)))*(((J-LAM+2)*(J+LAM)*
+         C1L(J+1)*C22L(J)))*(_sq((J-LAM+2)*(J+LAM)*
          U1PLUSL(J+1)-(J-LAM)*(J+LAM+2)*U1MINUSL(J+1)-
-         2*LAM*(J-LAM+1)*(J+LAM+1)*(Y2L-2))**2)
+         2*LAM*(J-LAM+1)*(J+LAM+1)*(Y2L-2)))
 
         _P2 = lambda J: \
          ((4*(J-LAM)*(J+LAM))/(J*C2L(J-1)*C22L(J)))* \
-         ((.5*LAM*LAM*(YL-2)*(Y2L-2)+(J-LAM-1)*(J+LAM+1)+
-         (J-LAM+1)*(J+LAM-1))**2)
+         (_sq(.5*LAM*LAM*(YL-2)*(Y2L-2)+(J-LAM-1)*(J+LAM+1)+
+         (J-LAM+1)*(J+LAM-1)))
 
         _Q2 = lambda J: \
          ((4*(2*J+1))/(J*(J+1)*C2L(J)*C22L(J)))* \
-         ((.5*LAM*LAM*LAM*(YL-2)*(Y2L-2)+
+         (_sq(.5*LAM*LAM*LAM*(YL-2)*(Y2L-2)+
          (LAM+1)*(J-LAM)*(J+LAM+1)+(LAM-1)*(J-LAM+1)*
-         (J+LAM))**2)
+         (J+LAM)))
 
         _R2 = lambda J: \
          ((4*(J-LAM+1)*(J+LAM+1))/((J+1)*
-         C2L(J+1)*C22L(J)))*((.5*LAM*LAM*(YL-2)*(Y2L-2)+
-         (J-LAM)*(J+LAM+2)+(J-LAM+2)*(J+LAM))**2)
+         C2L(J+1)*C22L(J)))*(_sq(.5*LAM*LAM*(YL-2)*(Y2L-2)+
+         (J-LAM)*(J+LAM+2)+(J-LAM+2)*(J+LAM)))
 
         _P32 = lambda J: \
          (((J-LAM)*(J+LAM))/(2*J*C3L(J-1)*C22L(J)))* \
-         (((J-LAM+1)*(J+LAM-1)*U3MINUSL(J-1)-
+         (_sq((J-LAM+1)*(J+LAM-1)*U3MINUSL(J-1)-
          (J-LAM-1)*(J+LAM+1)*U3PLUSL(J-1)+
-         2*LAM*(J-LAM)*(J+LAM)*(Y2L-2))**2)
+         2*LAM*(J-LAM)*(J+LAM)*(Y2L-2)))
 
         _Q32 = lambda J: \
          ((2*J+1)/(2*J*(J+1)*C3L(J)*C22L(J))) \
-         *(((LAM-1)*(J-LAM+1)*(J+LAM)*U3MINUSL(J)-
+         *(_sq((LAM-1)*(J-LAM+1)*(J+LAM)*U3MINUSL(J)-
          (LAM+1)*(J-LAM)*(J+LAM+1)*U3PLUSL(J)+
-         2*LAM*LAM*(J-LAM+1)*(J+LAM+1)*(Y2L-2))**2)
+         2*LAM*LAM*(J-LAM+1)*(J+LAM+1)*(Y2L-2)))
 
         _R32 = lambda J: \
          (((J-LAM+1)*(J+LAM+1))/(2*(J+1)*
-         C3L(J+1)*C22L(J)))*(((J-LAM+2)*(J+LAM)*
+         C3L(J+1)*C22L(J)))*(_sq((J-LAM+2)*(J+LAM)*
          U3MINUSL(J+1)-(J-LAM)*(J+LAM+2)*U3PLUSL(J+1)+
-         2*LAM*(J-LAM+2)*(J+LAM+2)*(Y2L-2))**2)
+         2*LAM*(J-LAM+2)*(J+LAM+2)*(Y2L-2)))
 
         _P13 = lambda J: \
          (((J-LAM)*(J+LAM))/(16*J*C1L(J-1)*C32L(J)))* \
-         (((J-LAM+1)*(J+LAM-1)*U1PLUSL(J)*U3MINUS2L(J)+
+         (_sq((J-LAM+1)*(J+LAM-1)*U1PLUSL(J)*U3MINUS2L(J)+
          (J-LAM-1)*(J+LAM+1)*U1MINUSL(J-1)*U3PLUS2L(J)-
-         8*(J-LAM-1)*(J-LAM+1)*(J+LAM-1)*(J+LAM+1))**2)
+         8*(J-LAM-1)*(J-LAM+1)*(J+LAM-1)*(J+LAM+1)))
 
         _Q13 = lambda J: \
          ((2*J+1)/(16*J*(J+1)*C1L(J)*C32L(J))) \
-         *(((LAM-1)*(J-LAM+1)*(J+LAM)*U1PLUSL(J)*U3MINUS2L(J)+
+         *(_sq((LAM-1)*(J-LAM+1)*(J+LAM)*U1PLUSL(J)*U3MINUS2L(J)+
          (LAM+1)*(J-LAM)*(J+LAM+1)*U1MINUSL(J)*U3PLUS2L(J)-
-         8*LAM*(J-LAM)*(J-LAM+1)*(J+LAM)*(J+LAM+1))**2)
+         8*LAM*(J-LAM)*(J-LAM+1)*(J+LAM)*(J+LAM+1)))
 
         _R13 = lambda J: \
          (((J-LAM+1)*(J+LAM+1))/(16*(J+1)*
-         C1L(J+1)*C32L(J)))*(((J-LAM+2)*(J+LAM)*
+         C1L(J+1)*C32L(J)))*(_sq((J-LAM+2)*(J+LAM)*
          U1PLUSL(J+1)*U3MINUS2L(J)+(J-LAM)*(J+LAM+2)*U1MINUSL(J+1)*
-         U3PLUS2L(J)-8*(J-LAM+1)*(J-LAM+1)*(J+LAM+1)*(J+LAM+1))**2)
+         U3PLUS2L(J)-8*(J-LAM+1)*(J-LAM+1)*(J+LAM+1)*(J+LAM+1)))
 
         _P23 = lambda J: \
           (((J-LAM)*(J+LAM))/(2*J*C2L(J-1)*C32L(J)))* \
-          (((J-LAM+1)*(J+LAM-1)*U3MINUS2L(J)-
+          (_sq((J-LAM+1)*(J+LAM-1)*U3MINUS2L(J)-
           (J-LAM-1)*(J+LAM+1)*U3PLUS2L(J)+
-          2*LAM*(J-LAM+1)*(J+LAM+1)*(YL-2))**2)
+          2*LAM*(J-LAM+1)*(J+LAM+1)*(YL-2)))
 
         _Q23 = lambda J: \
          ((2*J+1)/(2*J*(J+1)*C2L(J)*C32L(J))) \
-         *(((LAM-1)*(J-LAM+1)*(J+LAM)*U3MINUS2L(J)-
+         *(_sq((LAM-1)*(J-LAM+1)*(J+LAM)*U3MINUS2L(J)-
          (LAM+1)*(J-LAM)*(J+LAM+1)*U3PLUS2L(J)+
-         2*LAM*LAM*(J-LAM+1)*(J+LAM+1)*(YL-2))**2)
+         2*LAM*LAM*(J-LAM+1)*(J+LAM+1)*(YL-2)))
 
         _R23 = lambda J: \
          (((J-LAM+1)*(J+LAM+1))/(2*(J+1)*
-         C2L(J+1)*C32L(J)))*(((J-LAM+2)*(J+LAM)*
+         C2L(J+1)*C32L(J)))*(_sq((J-LAM+2)*(J+LAM)*
          U3MINUS2L(J)-(J-LAM)*(J+LAM+2)*U3PLUS2L(J)+
-         2*LAM*(J-LAM+1)*(J+LAM+1)*(YL-2))**2)
+         2*LAM*(J-LAM+1)*(J+LAM+1)*(YL-2)))
 
         _P3 = lambda J: \
          (((J-LAM)*(J+LAM))/(16*J*C3L(J-1)*
-         C32L(J)))*(((J-LAM+1)*(J+LAM-1)*U3MINUSL(J-1)*
+         C32L(J)))*(_sq((J-LAM+1)*(J+LAM-1)*U3MINUSL(J-1)*
          U3MINUS2L(J)+(J-LAM-1)*(J+LAM+1)*U3PLUSL(J-1)*U3PLUS2L(J)+
-         8*(J-LAM)*(J-LAM+1)*(J+LAM)*(J+LAM+1))**2)
+         8*(J-LAM)*(J-LAM+1)*(J+LAM)*(J+LAM+1)))
 
         _Q3 = lambda J: \
          ((2*J+1)/(16*J*(J+1)*C3L(J)*C32L(J)))* \
-         (((LAM-1)*(J-LAM+1)*(J+LAM)*U3MINUSL(J)*U3MINUS2L(J)+
+         (_sq((LAM-1)*(J-LAM+1)*(J+LAM)*U3MINUSL(J)*U3MINUS2L(J)+
          (LAM+1)*(J-LAM)*(J+LAM+1)*U3PLUSL(J)*U3PLUS2L(J)+
-         8*LAM*(J-LAM+1)*(J-LAM+1)*(J+LAM+1)*(J+LAM+1))**2)
+         8*LAM*(J-LAM+1)*(J-LAM+1)*(J+LAM+1)*(J+LAM+1)))
 
         _R3 = lambda J: \
          (((J-LAM+1)*(J+LAM+1))/(16*(J+1)*
-         C3L(J+1)*C32L(J)))*(((J-LAM+2)*(J+LAM)*U3MINUSL(J+1)
+         C3L(J+1)*C32L(J)))*(_sq((J-LAM+2)*(J+LAM)*U3MINUSL(J+1)
          *U3MINUS2L(J)+(J-LAM)*(J+LAM+2)*U3PLUSL(J+1)*U3PLUS2L(J)+
-         8*(J-LAM+1)*(J-LAM+2)*(J+LAM+1)*(J+LAM+2))**2)
+         8*(J-LAM+1)*(J-LAM+2)*(J+LAM+1)*(J+LAM+2)))
 
         return (
              ("P1", _P1),
@@ -864,163 +960,163 @@ class _LSTTriplet1(_LSTTriplet):
 
         _P1 = lambda J: \
             ((J-LMIN-1)*(J-LMIN))/(32*J*C1L(J-1)*C12L(J))* \
-            (((J-LMIN+1)*(J+LMIN)*U1PLUSL(J-1)*U1PLUS2L(J)+
+            (_sq((J-LMIN+1)*(J+LMIN)*U1PLUSL(J-1)*U1PLUS2L(J)+
             (J-LMIN-2)*(J+LMIN+1)*U1MINUSL(J-1)*U1MINUS2L(J)+
-            8*(J-LMIN-2)*(J-LMIN)*(J+LMIN)*(J+LMIN))**2)
+            8*(J-LMIN-2)*(J-LMIN)*(J+LMIN)*(J+LMIN)))
 
         _Q1 = lambda J: \
             ((J-LMIN)*(J+LMIN+1)*(2*J+1))/(32*J*(J+1)*C1L(J)*C12L(J)) \
-            *(((J-LMIN+1)*(J+LMIN)*U1PLUSL(J)*U1PLUS2L(J)+
+            *(_sq((J-LMIN+1)*(J+LMIN)*U1PLUSL(J)*U1PLUS2L(J)+
             (J-LMIN-1)*(J+LMIN+2)*U1MINUSL(J)*U1MINUS2L(J)+
-            8*(J-LMIN-1)*(J-LMIN)*(J+LMIN)*(J+LMIN+1))**2)
+            8*(J-LMIN-1)*(J-LMIN)*(J+LMIN)*(J+LMIN+1)))
 
         _R1 = lambda J: \
             (((J+LMIN+1)*(J+LMIN+2))/(32*(J+1)*
-            C1L(J+1)*C12L(J)))*(((J-LMIN+1)*(J+LMIN)*
+            C1L(J+1)*C12L(J)))*(_sq((J-LMIN+1)*(J+LMIN)*
             U1PLUSL(J+1)*U1PLUS2L(J)+(J-LMIN)*(J+LMIN+3)*U1MINUSL(J+1)*
-            U1MINUS2L(J)+8*(J-LMIN)*(J-LMIN)*(J+LMIN)*(J+LMIN+2))**2)
+            U1MINUS2L(J)+8*(J-LMIN)*(J-LMIN)*(J+LMIN)*(J+LMIN+2)))
 
 
         _P21 = lambda J: \
             (((J-LMIN-1)*(J-LMIN))/(4*J*C2L(J-1)*C12L(J)))* \
-            (((J-LMIN+1)*(J+LMIN)*U1PLUS2L(J)-
+            (_sq((J-LMIN+1)*(J+LMIN)*U1PLUS2L(J)-
             (J-LMIN-2)*(J+LMIN+1)*U1MINUS2L(J)-
-            2*(LMIN+1)*(J-LMIN)*(J+LMIN)*(YL-2))**2)
+            2*(LMIN+1)*(J-LMIN)*(J+LMIN)*(YL-2)))
 
         _Q21 = lambda J: \
             (((J-LMIN)*(J+LMIN+1)*(2*J+1))/(4*J*(J+1)*C2L(J)*C12L(J)))* \
-            (((J-LMIN+1)*(J+LMIN)*U1PLUS2L(J)-
+            (_sq((J-LMIN+1)*(J+LMIN)*U1PLUS2L(J)-
             (J-LMIN-1)*(J+LMIN+2)*U1MINUS2L(J)-
-            2*(LMIN+1)*(J-LMIN)*(J+LMIN)*(YL-2))**2)
+            2*(LMIN+1)*(J-LMIN)*(J+LMIN)*(YL-2)))
 
         _R21 = lambda J: \
             (((J+LMIN+1)*(J+LMIN+2))/(4*(J+1)*
-            C2L(J+1)*C12L(J)))*(((J-LMIN+1)*(J+LMIN)*
+            C2L(J+1)*C12L(J)))*(_sq((J-LMIN+1)*(J+LMIN)*
             U1PLUS2L(J) - (J-LMIN)*(J+LMIN+3)*U1MINUS2L(J)
-            - 2*(LMIN+1)*(J-LMIN)*(J+LMIN)*(YL-2))**2)
+            - 2*(LMIN+1)*(J-LMIN)*(J+LMIN)*(YL-2)))
 
         _P31 = lambda J: \
             (((J-LMIN-1)*(J-LMIN))/(32*J*C3L(J-1)*C12L(J)))* \
-            (((J-LMIN+1)*(J+LMIN)*U3MINUSL(J-1)*U1PLUS2L(J)+
+            (_sq((J-LMIN+1)*(J+LMIN)*U3MINUSL(J-1)*U1PLUS2L(J)+
             (J-LMIN-2)*(J+LMIN+1)*U3PLUSL(J-1)*U1MINUS2L(J)-
-            8*(J-LMIN-1)*(J-LMIN)*(J+LMIN)*(J+LMIN+1))**2)
+            8*(J-LMIN-1)*(J-LMIN)*(J+LMIN)*(J+LMIN+1)))
 
         _Q31 = lambda J: \
             (((J-LMIN)*(J+LMIN+1)*(2*J+1))/(32*J*(J+1)*C3L(J)*C12L(J))) \
-            *(((J-LMIN+1)*(J+LMIN)*U3MINUSL(J)*U1PLUS2L(J)+
+            *(_sq((J-LMIN+1)*(J+LMIN)*U3MINUSL(J)*U1PLUS2L(J)+
             (J-LMIN-1)*(J+LMIN+2)*U3PLUSL(J)*U1MINUS2L(J)-
-            8*(J-LMIN)*(J-LMIN)*(J+LMIN)*(J+LMIN+2))**2)
+            8*(J-LMIN)*(J-LMIN)*(J+LMIN)*(J+LMIN+2)))
 
         _R31 = lambda J: \
             (((J+LMIN+1)*(J+LMIN+2))/(32*(J+1)*
-            C3L(J+1)*C12L(J)))*(((J-LMIN+1)*(J+LMIN)*
+            C3L(J+1)*C12L(J)))*(_sq((J-LMIN+1)*(J+LMIN)*
             U3MINUSL(J+1)*U1PLUS2L(J)+(J-LMIN)*(J+LMIN+3)*U3PLUSL(J+1)*
-            U1MINUS2L(J)- 8*(J-LMIN)*(J-LMIN+1)*(J+LMIN)*(J+LMIN+3))**2)
+            U1MINUS2L(J)- 8*(J-LMIN)*(J-LMIN+1)*(J+LMIN)*(J+LMIN+3)))
 
         _P12 = lambda J: \
             (((J-LMIN-1)*(J-LMIN))/(4*J*C1L(J-1)*C22L(J)))* \
-            (((J-LMIN+1)*(J+LMIN)*U1PLUSL(J-1)-
+            (_sq((J-LMIN+1)*(J+LMIN)*U1PLUSL(J-1)-
             (J-LMIN-2)*(J+LMIN+1)*U1MINUSL(J-1)-
-            2*LMIN*(J-LMIN-2)*(J+LMIN)*(Y2L-2))**2)
+            2*LMIN*(J-LMIN-2)*(J+LMIN)*(Y2L-2)))
 
         _Q12 = lambda J: \
             (((J-LMIN)*(J+LMIN+1)*(2*J+1))/(4*J*(J+1)*C1L(J)*C22L(J))) \
-            *(((J-LMIN+1)*(J+LMIN)*U1PLUSL(J)-
+            *(_sq((J-LMIN+1)*(J+LMIN)*U1PLUSL(J)-
             (J-LMIN-1)*(J+LMIN+2)*U1MINUSL(J)-
-            2*LMIN*(J-LMIN-1)*(J+LMIN+1)*(Y2L-2))**2)
+            2*LMIN*(J-LMIN-1)*(J+LMIN+1)*(Y2L-2)))
 
         _R12 = lambda J: \
             (((J+LMIN+1)*(J+LMIN+2))/(4*(J+1)*
-            C1L(J+1)*C22L(J)))*(((J-LMIN+1)*(J+LMIN)*
+            C1L(J+1)*C22L(J)))*(_sq((J-LMIN+1)*(J+LMIN)*
             U1PLUSL(J+1) - (J-LMIN)*(J+LMIN+3)*U1MINUSL(J+1)
-            - 2*LMIN*(J-LMIN)*(J+LMIN+2)*(Y2L-2))**2)
+            - 2*LMIN*(J-LMIN)*(J+LMIN+2)*(Y2L-2)))
 
         _P2 = lambda J: \
             ((2*(J-LMIN-1)*(J-LMIN))/(J*C2L(J-1)*C22L(J)))* \
-            ((.5*LMIN*(LMIN+1)*(YL-2)*(Y2L-2)+(J-LMIN+1)*(J+LMIN)+
-            (J-LMIN-2)*(J+LMIN+1))**2)
+            (_sq(.5*LMIN*(LMIN+1)*(YL-2)*(Y2L-2)+(J-LMIN+1)*(J+LMIN)+
+            (J-LMIN-2)*(J+LMIN+1)))
 
         _Q2 = lambda J: \
             ((2*(J-LMIN)*(J+LMIN+1)*(2*J+1))/(J*(J+1)*C2L(J)*C22L(J)))* \
-            ((.5*LMIN*(LMIN+1)*(YL-2)*(Y2L-2)+
-            (J-LMIN+1)*(J+LMIN)+(J-LMIN-1)*(J+LMIN+2))**2)
+            (_sq(.5*LMIN*(LMIN+1)*(YL-2)*(Y2L-2)+
+            (J-LMIN+1)*(J+LMIN)+(J-LMIN-1)*(J+LMIN+2)))
 
         _R2 = lambda J: \
             ((2*(J+LMIN+1)*(J+LMIN+2))/((J+1)*
-            C2L(J+1)*C22L(J)))*((.5*LMIN*(LMIN+1)*(YL-2)*(Y2L-2)+
-            (J-LMIN+1)*(J+LMIN)+(J-LMIN)*(J+LMIN+3))**2)
+            C2L(J+1)*C22L(J)))*(_sq(.5*LMIN*(LMIN+1)*(YL-2)*(Y2L-2)+
+            (J-LMIN+1)*(J+LMIN)+(J-LMIN)*(J+LMIN+3)))
 
         _P32 = lambda J: \
             (((J-LMIN-1)*(J-LMIN))/(4*J*C3L(J-1)*C22L(J)))* \
-            (((J-LMIN+1)*(J+LMIN)*U3MINUSL(J-1)-
+            (_sq((J-LMIN+1)*(J+LMIN)*U3MINUSL(J-1)-
             (J-LMIN-2)*(J+LMIN+1)*U3PLUSL(J-1)+
-            2*LMIN*(J-LMIN-1)*(J+LMIN+1)*(Y2L-2))**2)
+            2*LMIN*(J-LMIN-1)*(J+LMIN+1)*(Y2L-2)))
 
         _Q32 = lambda J: \
             (((J-LMIN)*(J+LMIN+1)*(2*J+1))/(4*J*(J+1)*C3L(J)*C22L(J))) \
-            *(((J-LMIN+1)*(J+LMIN)*U3MINUSL(J)-
+            *(_sq((J-LMIN+1)*(J+LMIN)*U3MINUSL(J)-
             (J-LMIN-1)*(J+LMIN+2)*U3PLUSL(J)+
-            2*LMIN*(J-LMIN)*(J+LMIN+2)*(Y2L-2))**2)
+            2*LMIN*(J-LMIN)*(J+LMIN+2)*(Y2L-2)))
 
         _R32 = lambda J: \
             (((J+LMIN+1)*(J+LMIN+2))/(4*(J+1)*
-            C3L(J+1)*C22L(J)))*(((J-LMIN+1)*(J+LMIN)*
+            C3L(J+1)*C22L(J)))*(_sq((J-LMIN+1)*(J+LMIN)*
             U3MINUSL(J+1) - (J-LMIN)*(J+LMIN+3)*U3PLUSL(J+1)
-            + 2*LMIN*(J-LMIN+1)*(J+LMIN+3)*(Y2L-2))**2)
+            + 2*LMIN*(J-LMIN+1)*(J+LMIN+3)*(Y2L-2)))
 
         _P13 = lambda J: \
             (((J-LMIN-1)*(J-LMIN))/(32*J*C1L(J-1)*
-            C32L(J)))*(((J-LMIN+1)*(J+LMIN)*U1PLUSL(J-1)*
+            C32L(J)))*(_sq((J-LMIN+1)*(J+LMIN)*U1PLUSL(J-1)*
             U3MINUS2L(J)+ (J-LMIN-2)*(J+LMIN+1)*U1MINUSL(J-1)*U3PLUS2L(J)-
-            8*(J-LMIN-2)*(J-LMIN+1)*(J+LMIN)*(J+LMIN+1))**2)
+            8*(J-LMIN-2)*(J-LMIN+1)*(J+LMIN)*(J+LMIN+1)))
 
         _Q13 = lambda J: \
             (((J-LMIN)*(J+LMIN+1)*(2*J+1))/(32*J*(J+1)*C1L(J)*C32L(J)))* \
-            (((J-LMIN+1)*(J+LMIN)*U1PLUSL(J)*U3MINUS2L(J)+
+            (_sq((J-LMIN+1)*(J+LMIN)*U1PLUSL(J)*U3MINUS2L(J)+
             (J-LMIN-1)*(J+LMIN+2)*U1MINUSL(J)*U3PLUS2L(J)-
-            8*(J-LMIN-1)*(J-LMIN+1)*(J+LMIN+1)*(J+LMIN+1))**2)
+            8*(J-LMIN-1)*(J-LMIN+1)*(J+LMIN+1)*(J+LMIN+1)))
 
         _R13 = lambda J: \
             (((J+LMIN+1)*(J+LMIN+2))/(32*(J+1)*
-            C1L(J+1)*C32L(J)))*(((J-LMIN+1)*(J+LMIN)*U1PLUSL(J+1)
+            C1L(J+1)*C32L(J)))*(_sq((J-LMIN+1)*(J+LMIN)*U1PLUSL(J+1)
             *U3MINUS2L(J)+(J-LMIN)*(J+LMIN+3)*U1MINUSL(J+1)*U3PLUS2L(J)-
-            8*(J-LMIN)*(J-LMIN+1)*(J+LMIN+1)*(J+LMIN+2))**2)
+            8*(J-LMIN)*(J-LMIN+1)*(J+LMIN+1)*(J+LMIN+2)))
 
         _P23 = lambda J: \
             (((J-LMIN-1)*(J-LMIN))/(4*J*C2L(J-1)*C32L(J)))* \
-            (((J-LMIN+1)*(J+LMIN)*U3MINUS2L(J)-
+            (_sq((J-LMIN+1)*(J+LMIN)*U3MINUS2L(J)-
             (J-LMIN-2)*(J+LMIN+1)*U3PLUS2L(J)+
-            2*(LMIN+1)*(J-LMIN+1)*(J+LMIN+1)*(YL-2))**2)
+            2*(LMIN+1)*(J-LMIN+1)*(J+LMIN+1)*(YL-2)))
 
         _Q23 = lambda J: \
             (((J-LMIN)*(J+LMIN+1)*(2*J+1))/(4*J*(J+1)*C2L(J)*C32L(J))) \
-            *(((J-LMIN+1)*(J+LMIN)*U3MINUS2L(J)-
+            *(_sq((J-LMIN+1)*(J+LMIN)*U3MINUS2L(J)-
             (J-LMIN-1)*(J+LMIN+2)*U3PLUS2L(J)+
-            2*(LMIN+1)*(J-LMIN+1)*(J+LMIN+1)*(YL-2))**2)
+            2*(LMIN+1)*(J-LMIN+1)*(J+LMIN+1)*(YL-2)))
 
         _R23 = lambda J: \
             (((J+LMIN+1)*(J+LMIN+2))/(4*(J+1)*
-            C2L(J+1)*C32L(J)))*(((J-LMIN+1)*(J+LMIN)*
+            C2L(J+1)*C32L(J)))*(_sq((J-LMIN+1)*(J+LMIN)*
             U3MINUS2L(J) - (J-LMIN)*(J+LMIN+3)*U3PLUS2L(J)
-            + 2*(LMIN+1)*(J-LMIN+1)*(J+LMIN+1)*(YL-2))**2)
+            + 2*(LMIN+1)*(J-LMIN+1)*(J+LMIN+1)*(YL-2)))
 
         _P3 = lambda J: \
             (((J-LMIN-1)*(J-LMIN))/(32*J*C3L(J-1)*
-            C32L(J)))*(((J-LMIN+1)*(J+LMIN)*U3MINUSL(J-1)*
+            C32L(J)))*(_sq((J-LMIN+1)*(J+LMIN)*U3MINUSL(J-1)*
             U3MINUS2L(J)+(J-LMIN-2)*(J+LMIN+1)*U3PLUSL(J-1)*U3PLUS2L(J)+
-            8*(J-LMIN-1)*(J-LMIN+1)*(J+LMIN+1)*(J+LMIN+1))**2)
+            8*(J-LMIN-1)*(J-LMIN+1)*(J+LMIN+1)*(J+LMIN+1)))
 
         _Q3 = lambda J: \
             (((J-LMIN)*(J+LMIN+1)*(2*J+1))/(32*J*(J+1)*C3L(J)*C32L(J)))* \
-            (((J-LMIN+1)*(J+LMIN)*U3MINUSL(J)*U3MINUS2L(J)+
+            (_sq((J-LMIN+1)*(J+LMIN)*U3MINUSL(J)*U3MINUS2L(J)+
             (J-LMIN-1)*(J+LMIN+2)*U3PLUSL(J)*U3PLUS2L(J)+
-            8*(J-LMIN)*(J-LMIN+1)*(J+LMIN+1)*(J+LMIN+2))**2)
+            8*(J-LMIN)*(J-LMIN+1)*(J+LMIN+1)*(J+LMIN+2)))
 
         _R3 = lambda J: \
             (((J+LMIN+1)*(J+LMIN+2))/(32*(J+1)*
-            C3L(J+1)*C32L(J)))*(((J-LMIN+1)*(J+LMIN)*U3MINUSL(J+1)
+            C3L(J+1)*C32L(J)))*(_sq((J-LMIN+1)*(J+LMIN)*U3MINUSL(J+1)
             *U3MINUS2L(J)+(J-LMIN)*(J+LMIN+3)*U3PLUSL(J+1)*U3PLUS2L(J)+
-            8*(J-LMIN+1)*(J-LMIN+1)*(J+LMIN+1)*(J+LMIN+3))**2)
+            8*(J-LMIN+1)*(J-LMIN+1)*(J+LMIN+1)*(J+LMIN+3)))
 
         # Resolves the Delta Lambda
 
@@ -1060,7 +1156,7 @@ class _LSTTriplet1(_LSTTriplet):
              ("P1", lambda J: _R1(J-1)),
              ("Q1", _Q1),
              ("R1", lambda J: _P1(J+1)),
-             ("P21", _R12(J-1)),
+             ("P21", lambda J: _R12(J-1)),
              ("Q21", _Q12),
              ("R21", lambda J: _P12(J+1)),
              ("P31", lambda J: _R13(J-1)),
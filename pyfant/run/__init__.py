@@ -1,5 +1,10 @@
+from .inputstore import *
 from .conf import *
 from .runnables import *
+from .scratch import *
+from .runcache import *
 from .multirunnable import *
+from .executors import *
+from .upstream import *
 from .rm import *
 from .traprbclass import *
\ No newline at end of file
@@ -167,19 +167,33 @@ class IdMaker(object):
         self.__lock_session_id = Lock()
         self.__i_id = 0
 
+    def __getstate__(self):
+        # Locks cannot be pickled (needed to send runnables to worker processes)
+        state = self.__dict__.copy()
+        del state["_IdMaker__lock_session_id"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock_session_id = Lock()
+
     def make_id(self, flag_split_dirs):
         """Makes session id and creates corresponding directory.
 
-        This routine is thread-safe.
+        This routine is thread-safe. It is also safe across processes, because directory
+        creation is atomic: if another process grabs the same directory first, tries the next id.
         """
         with self.__lock_session_id:
             while True:
                 new_dir = self.get_session_dirname(flag_split_dirs)
                 self.__i_id += 1
                 if not os.path.isdir(new_dir):
+                    try:
+                        os.makedirs(new_dir)
+                    except FileExistsError:
+                        continue
                     new_id = "%d" % self.__i_id
                     break
-            os.makedirs(new_dir)
             return new_id, new_dir
 
     def get_session_dirname(self, flag_split_dirs):
@@ -259,12 +273,44 @@ class Conf(object):
     def opt(self, x):
         self.__opt = x
 
+    @property
+    def input_store(self):
+        """InputStore object or None. If set, data files are linked from the store into the
+        session directory instead of being saved there (default=None)"""
+        return self.__input_store
+
+    @input_store.setter
+    def input_store(self, x):
+        self.__input_store = x
+
+    @property
+    def scratch(self):
+        """ScratchSessions object or None (default=None). Set by ScratchSessions.attach()"""
+        return self.__scratch
+
+    @scratch.setter
+    def scratch(self, x):
+        self.__scratch = x
+
+    @property
+    def run_cache(self):
+        """RunCache object or None. If set, executables whose inputs are found in the cache are not
+        run; their outputs are copied from the cache instead (default=None)"""
+        return self.__run_cache
+
+    @run_cache.setter
+    def run_cache(self, x):
+        self.__run_cache = x
+
 
     def __init__(self):
         # # Setup flags
         self.__flag_log_console = True
         self.__flag_log_file = True
         self.__flag_output_to_dir = False
+        self.__input_store = None
+        self.__scratch = None
+        self.__run_cache = None
 
         # # DataFile instances
         # See create_data_files() to see what happens when one or more
@@ -297,6 +343,14 @@ class Conf(object):
         # # Internals
         self.__flag_configured_before = False
 
+    def __getstate__(self):
+        # popen_text_dest is an open file; it is reopened by configure() anyway.
+        # The a99 logger cannot be pickled; property "logger" gets it again when needed
+        state = self.__dict__.copy()
+        state["_Conf__popen_text_dest"] = None
+        state["_Conf__logger"] = None
+        return state
+
     def configure(self, sequence):
         """Series of configuration actions to take before Runnable can run.
 
@@ -476,7 +530,7 @@ class Conf(object):
 
     def __create_data_files(self):
         """
-        Creates files for all self.file_* that are not None.
+        Creates files for all self.file_* that are not None (see also input_store).
 
         Corresponding self.opt.fn_xxxx will be overwritten.
         """
@@ -493,7 +547,10 @@ class Conf(object):
                      else obj.default_filename
                     new_fn = self.__sid.join_with_session_dir(base_fn)
                     # Saves file
-                    obj.save_as(new_fn)
+                    if self.__input_store is not None:
+                        self.__input_store.link(obj, new_fn)
+                    else:
+                        obj.save_as(new_fn)
                     # Overwrites config option
                     self.__opt.__setattr__("fn_"+attr_name[5:], new_fn)
 
@@ -0,0 +1,268 @@
+"""
+Executors: where RunnableManager runs its runnables
+
+RunnableManager keeps a number of _Runner threads to control how many runnables run simultaneously;
+each runner hands its runnable to the manager's executor, whose execute() method blocks until the
+runnable has finished.
+
+The executor does all the work: creation of the input files inside the session directory,
+running of the Fortran executable(s), and (optionally) loading of the results. If the executor runs
+the work in another process, the runnable is pickled, sent to the worker, and its final state is
+copied back onto the original object, so that calling code does not see any difference.
+"""
+
+import a99
+import os
+import collections
+import sys
+import pickle
+import signal
+import threading
+import subprocess
+import concurrent.futures
+import pyfant
+from .runnables import *
+from .conf import *
+from .inputstore import *
+from .scratch import *
+from .runcache import *
+
+
+__all__ = ["BaseExecutor", "ThreadExecutor", "ProcessExecutor", "FakeClusterExecutor"]
+
+
+class BaseExecutor(object):
+    """Executor interface. Descendants must implement execute()"""
+
+    def start(self):
+        """Called by RunnableManager.start()"""
+
+    def shutdown(self):
+        """Called by RunnableManager when exiting"""
+
+    def execute(self, runnable, flag_load_result=False, flag_clean=False):
+        """Runs runnable. Blocking: only returns when runnable has finished.
+
+        Args:
+            runnable: Runnable instance
+            flag_load_result: whether to call runnable.load_result() after successful run
+            flag_clean: whether to load result and then remove the session directory after
+                        successful run
+
+        Exceptions raised by runnable.run() are re-raised (in the calling thread)
+        """
+        raise NotImplementedError()
+
+    def kill(self, runnable):
+        """Attempts to kill runnable, which was passed to execute() and may be running."""
+        runnable.kill()
+
+
+class ThreadExecutor(BaseExecutor):
+    """Runs runnable in the calling thread (the classic RunnableManager behaviour)"""
+
+    def execute(self, runnable, flag_load_result=False, flag_clean=False):
+        _work(runnable, flag_load_result, flag_clean)
+
+
+class ProcessExecutor(BaseExecutor):
+    """
+    Runs runnables on a concurrent.futures.ProcessPoolExecutor
+
+    Args:
+        max_workers: maximum number of worker processes (defaults to number of processors)
+        mp_context: multiprocessing context (see concurrent.futures.ProcessPoolExecutor)
+
+    **Note** a runnable that is already running in a worker process cannot be killed; kill() will
+             only prevent it from starting if it is still queued.
+    """
+
+    def __init__(self, max_workers=None, mp_context=None):
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self.__pool = None
+        self.__futures = {}
+        self.__lock = threading.Lock()
+
+    def start(self):
+        with self.__lock:
+            if self.__pool is None:
+                self.__pool = concurrent.futures.ProcessPoolExecutor(self.max_workers,
+                                                                     self.mp_context)
+
+    def shutdown(self):
+        with self.__lock:
+            if self.__pool is not None:
+                self.__pool.shutdown(wait=False, cancel_futures=True)
+                self.__pool = None
+
+    def execute(self, runnable, flag_load_result=False, flag_clean=False):
+        self.start()
+        with self.__lock:
+            future = self.__pool.submit(_remote_work, runnable, flag_load_result, flag_clean)
+            self.__futures[id(runnable)] = future
+        try:
+            try:
+                remote, e = future.result()
+            except concurrent.futures.CancelledError:
+                runnable._flag_killed = True
+                runnable._flag_finished = True
+                return
+        finally:
+            with self.__lock:
+                del self.__futures[id(runnable)]
+
+        _absorb(runnable, remote)
+        if e is not None:
+            raise e
+
+    def kill(self, runnable):
+        with self.__lock:
+            future = self.__futures.get(id(runnable))
+        if future is not None and not future.cancel():
+            a99.get_python_logger().warning(
+             "Cannot kill '{}': already running in worker process".format(runnable.name))
+
+
+class FakeClusterExecutor(BaseExecutor):
+    """
+    Imitates a cluster: each runnable becomes a "job" that runs as a separate Python process
+
+    Runnable is pickled into a job file inside spool directory; then a new Python interpreter is
+    launched to load the job file, run it, and pickle the runnable back into an output file.
+    Everything goes through the (shared) filesystem, as it would happen on a real cluster.
+
+    Args:
+        spool_dir: directory to store job and output files
+        python: Python interpreter to run the jobs
+        flag_keep_files: if set, will not delete the job/output files
+    """
+
+    def __init__(self, spool_dir="cluster-spool", python=None, flag_keep_files=False):
+        self.spool_dir = spool_dir
+        self.python = python if python is not None else sys.executable
+        self.flag_keep_files = flag_keep_files
+        self.__popens = {}
+        self.__lock = threading.Lock()
+
+    def start(self):
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def execute(self, runnable, flag_load_result=False, flag_clean=False):
+        self.start()
+        job_name = "job-{}".format(a99.random_name())
+        fn_job = os.path.join(self.spool_dir, job_name+".pickle")
+        fn_out = os.path.join(self.spool_dir, job_name+".out.pickle")
+        with open(fn_job, "wb") as h:
+            pickle.dump((runnable, flag_load_result, flag_clean), h, pickle.HIGHEST_PROTOCOL)
+
+        env = os.environ.copy()
+        env["PYTHONPATH"] = os.pathsep.join([x for x in sys.path if x])
+        cmd = [self.python, "-c", "import pyfant.run.executors as x; x._job_main()",
+               fn_job, fn_out]
+        flag_group = hasattr(os, "killpg")
+        with self.__lock:
+            popen = subprocess.Popen(cmd, env=env, start_new_session=flag_group)
+            self.__popens[id(runnable)] = popen
+        try:
+            popen.wait()
+        finally:
+            with self.__lock:
+                del self.__popens[id(runnable)]
+
+        try:
+            if popen.returncode != 0 or not os.path.isfile(fn_out):
+                runnable._flag_finished = True
+                if runnable.flag_killed:
+                    return
+                runnable._flag_error = True
+                runnable._error_message = "Job '{}' failed (returncode={})".format(
+                    job_name, popen.returncode)
+                raise pyfant.FailedError(runnable._error_message)
+
+            with open(fn_out, "rb") as h:
+                remote, e = pickle.load(h)
+        finally:
+            if not self.flag_keep_files:
+                for fn in (fn_job, fn_out):
+                    if os.path.isfile(fn):
+                        os.unlink(fn)
+
+        _absorb(runnable, remote)
+        if e is not None:
+            raise e
+
+    def kill(self, runnable):
+        runnable._flag_killed = True
+        with self.__lock:
+            popen = self.__popens.get(id(runnable))
+        if popen is not None and popen.poll() is None:
+            # kills the whole process group, i.e., the Python job and the Fortran executable
+            if hasattr(os, "killpg"):
+                os.killpg(popen.pid, signal.SIGKILL)
+            else:
+                popen.kill()
+
+
+def _work(runnable, flag_load_result, flag_clean):
+    """Runs runnable, then loads result and/or cleans session directory if successful"""
+    runnable.run()
+    if runnable.flag_success:
+        if flag_load_result or flag_clean:
+            runnable.load_result()
+        if flag_clean:
+            runnable.sid.clean()
+
+
+def _remote_work(runnable, flag_load_result, flag_clean):
+    """Wraps _work() to be called in worker process. Returns (runnable, exception or None)"""
+    e = None
+    try:
+        _work(runnable, flag_load_result, flag_clean)
+    except Exception as e_:
+        e = e_
+    return runnable, e
+
+
+def _job_main():
+    """Entry point of FakeClusterExecutor jobs: sys.argv[1:] is (job filename, output filename)"""
+    fn_job, fn_out = sys.argv[1:3]
+    with open(fn_job, "rb") as h:
+        runnable, flag_load_result, flag_clean = pickle.load(h)
+    ret = _remote_work(runnable, flag_load_result, flag_clean)
+    with open(fn_out, "wb") as h:
+        pickle.dump(ret, h, pickle.HIGHEST_PROTOCOL)
+
+
+# Classes whose state is merged attribute by attribute when copying a runnable back from a worker
+_ABSORBABLE = (Runnable, Conf, SID)
+# Classes kept untouched at the destination (they refer to their owner or are shared among runnables)
+_KEEP = (RunnableStatus, ExecutableStatus, IdMaker, InputStore, ScratchSessions, RunCache)
+
+
+def _absorb(dst, src):
+    """Copies state of src (runnable unpickled from worker) onto dst (original runnable).
+
+    Merges (breadth-first) into contained runnables, Conf and SID objects so that references held by
+    calling code (e.g., to combo.pfant or combo.conf) remain valid. Objects shared within src (e.g.
+    a Combo shares its Conf with its executables) remain shared within dst.
+    """
+    memo = {id(src): dst}
+    paired = {id(dst)}
+    queue = collections.deque([(dst, src)])
+    while queue:
+        d, s = queue.popleft()
+        for name, value in s.__dict__.items():
+            if isinstance(value, _KEEP):
+                continue
+            if isinstance(value, _ABSORBABLE):
+                if id(value) not in memo:
+                    curr = d.__dict__.get(name)
+                    if type(curr) is type(value) and id(curr) not in paired:
+                        memo[id(value)] = curr
+                        paired.add(id(curr))
+                        queue.append((curr, value))
+                    else:
+                        memo[id(value)] = value
+                value = memo[id(value)]
+            d.__dict__[name] = value
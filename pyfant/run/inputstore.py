@@ -0,0 +1,135 @@
+"""
+Content-addressed store of input files shared among sessions
+"""
+
+__all__ = ["InputStore"]
+
+
+import hashlib
+import os
+import shutil
+import threading
+import weakref
+import a99
+import pyfant
+
+
+class InputStore(object):
+    """
+    Directory where each distinct DataFile state is saved only once, to be linked into sessions
+
+    Args:
+        dir_: store directory (created when the first file is saved). Defaults to
+              pyfant.INPUT_STORE_DIR
+        link_mode: how files are put into sessions: "hard" (hard link, default), "symbolic"
+                   (symbolic link) or "copy". Hard links fall back to symbolic links if not
+                   possible (e.g., store and session in different filesystems), and these to copies
+
+    Files in the store are named after a SHA-1 digest of their contents, so that equal objects
+    (e.g., copies of the same FileAbonds, or the same file loaded from different paths) share
+    one file.
+
+    Each object is saved once: its path in the store is memoized, so that linking it into more
+    sessions costs no serialization. Objects must not be changed while in use by sessions; if an
+    object is changed afterwards to be linked again, call invalidate() first.
+
+    Attributes "num_saved" and "num_linked" count files saved into the store and files put
+    into sessions (by this process)
+    """
+
+    def __init__(self, dir_=None, link_mode="hard"):
+        if link_mode not in ("hard", "symbolic", "copy"):
+            raise ValueError("Invalid link_mode: '{}'".format(link_mode))
+        self.dir = dir_ if dir_ is not None else pyfant.INPUT_STORE_DIR
+        self.link_mode = link_mode
+        self.num_saved = 0
+        self.num_linked = 0
+        self.__lock = threading.Lock()
+        # {id(obj): (weak reference to obj, path in store), ...}
+        self.__paths = {}
+
+    def __getstate__(self):
+        # Locks cannot be pickled (needed to send runnables to worker processes);
+        # object ids are meaningless in other processes
+        state = self.__dict__.copy()
+        del state["_InputStore__lock"]
+        state["_InputStore__paths"] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = threading.Lock()
+
+    def get_digest(self, obj):
+        """Returns hexadecimal digest of the contents of the file of obj (see get_path())"""
+        return os.path.splitext(os.path.basename(self.get_path(obj)))[0]
+
+    def get_path(self, obj):
+        """Returns path to file in store containing obj, saving it first if not there yet"""
+        with self.__lock:
+            entry = self.__paths.get(id(obj))
+            if entry is not None and entry[0]() is obj:
+                return entry[1]
+            path = self.__save(obj)
+            try:
+                self.__paths[id(obj)] = (weakref.ref(obj), path)
+            except TypeError:
+                # object does not support weak references: not memoized
+                pass
+        return path
+
+    def invalidate(self, obj):
+        """Forgets path of obj, which has changed since it was last linked"""
+        with self.__lock:
+            self.__paths.pop(id(obj), None)
+
+    def __save(self, obj):
+        """Saves obj into store (if contents are not there yet) and returns path"""
+        os.makedirs(self.dir, exist_ok=True)
+        ext = os.path.splitext(obj.default_filename)[1]
+        # Saves to temporary file first: another process may be looking for the same file
+        temp = os.path.join(self.dir, "tmp-{}-{}{}".format(os.getpid(), threading.get_ident(), ext))
+        filename = obj.filename
+        try:
+            obj.save_as(temp)
+        finally:
+            # save_as() changes obj.filename
+            obj.filename = filename
+        h = hashlib.sha1()
+        with open(temp, "rb") as f:
+            for block in iter(lambda: f.read(2**20), b""):
+                h.update(block)
+        path = os.path.join(self.dir, h.hexdigest()+ext)
+        if os.path.isfile(path):
+            os.unlink(temp)
+        else:
+            os.replace(temp, path)
+            self.num_saved += 1
+        return path
+
+    def link(self, obj, filename):
+        """Creates file with contents of obj (e.g. inside session directory) from file in store"""
+        path = self.get_path(obj)
+        if os.path.lexists(filename):
+            os.unlink(filename)
+        flag_done = False
+        if self.link_mode == "hard":
+            try:
+                os.link(path, filename)
+                flag_done = True
+            except OSError:
+                pass
+        if not flag_done and self.link_mode in ("hard", "symbolic"):
+            try:
+                os.symlink(os.path.abspath(path), filename)
+                flag_done = True
+            except OSError:
+                pass
+        if not flag_done:
+            shutil.copyfile(path, filename)
+        self.num_linked += 1
+
+    def clean(self):
+        """Deletes store directory with all files inside"""
+        a99.get_python_logger().debug("About to remove directory '%s'" % self.dir)
+        shutil.rmtree(self.dir, ignore_errors=True)
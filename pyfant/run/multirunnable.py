@@ -1,16 +1,24 @@
 """
-Miscellanea routines that depend on other pyfant modules.
+Parameter sweeps: pfant and nulbad runs over a grid of parameters (Sweep), and the differential
+abundances X FWHM's sweep (MultiRunnable)
 
 Rule: no pyfant module can import util!!!
 
 """
+import collections
 import copy
+import glob
+import itertools
+import json
 import os
+import shutil
+import numpy as np
 import a99
+import f311
 import pyfant
 from . import runnables
 
-__all__ = ["MultiRunnable"]
+__all__ = ["Sweep", "MultiRunnable", "make_grid", "load_sweep"]
 
 __multi_id_maker = None
 
@@ -23,10 +31,93 @@ def _multi_id_maker():
     return __multi_id_maker
 
 
+# Short sweep parameter names
+_ALIASES = {"teff": "main.teff", "logg": "main.glog", "glog": "main.glog", "asalog": "main.asalog",
+            "vt": "main.vvt", "fwhm": "opt.fwhm", "llzero": "opt.llzero", "llfin": "opt.llfin"}
+
+# Sweep parameters that only affect nulbad
+_NULBAD_PARAMS = ("main.fwhm", "opt.norm", "opt.flam", "opt.convol", "opt.fwhm", "opt.pat")
+
+
+def _get_param_name(name):
+    """Returns full sweep parameter name, e.g., "main.teff" for "teff"; raises if invalid"""
+    ret = _ALIASES.get(name, name)
+    kind, _, attr = ret.partition(".")
+    if kind not in ("main", "opt", "ab") or not attr:
+        raise ValueError("Invalid sweep parameter: '{}'".format(name))
+    return ret
+
+
+def _apply_params(items, file_main=None, file_abonds=None, options=None):
+    """Sets sweep parameters [(name, value), ...] into whichever objects are passed"""
+    for name, value in items:
+        kind, _, attr = _get_param_name(name).partition(".")
+        if kind == "main" and file_main is not None:
+            if attr == "vvt":
+                value = list(value) if isinstance(value, (list, tuple)) else [value]
+                file_main.ivtot = len(value)
+            setattr(file_main, attr, value)
+        elif kind == "opt" and options is not None:
+            setattr(options, attr, value)
+        elif kind == "ab" and file_abonds is not None:
+            try:
+                file_abonds[attr] += value
+            except ValueError:
+                raise RuntimeError("Atom '%s' not found" % attr)
+
+
+def _to_json(x):
+    # NumPy scalars and arrays
+    return x.tolist()
+
+
+def make_grid(params):
+    """Returns Cartesian design, i.e., list of points, for {parameter name: list of values, ...}
+
+    A key may also be a tuple of parameter names, with tuples as values, to vary parameters
+    together, e.g., lambda windows: {("llzero", "llfin"): [(5000, 5100), (6000, 6100)], ...}
+
+    The last parameter varies fastest.
+    """
+    keys = list(params.keys())
+    ret = []
+    for values in itertools.product(*[params[key] for key in keys]):
+        point = collections.OrderedDict()
+        for key, value in zip(keys, values):
+            if isinstance(key, tuple):
+                point.update(zip(key, value))
+            else:
+                point[key] = value
+        ret.append(point)
+    return ret
+
+
+def load_sweep(filename):
+    """Loads consolidated output saved by Sweep
+
+    Returns:
+        list of (name, point, spectrum) tuples, where spectrum is a f311.Spectrum, or None if the
+        point failed
+    """
+    with np.load(filename) as f:
+        names = [str(x) for x in f["names"]]
+        points = json.loads(str(f["points"]))
+        x, y, offsets = f["x"], f["y"], f["offsets"]
+    ret = []
+    for i, (name, point) in enumerate(zip(names, points)):
+        sp = None
+        if offsets[i+1] > offsets[i]:
+            sp = f311.Spectrum()
+            sp.x = x[offsets[i]:offsets[i+1]]
+            sp.y = y[offsets[i]:offsets[i+1]]
+        ret.append((name, point, sp))
+    return ret
+
+
 @a99.froze_it
-class MultiRunnableStatus(object):
+class SweepStatus(object):
     def __init__(self, runnable):
-        assert isinstance(runnable, MultiRunnable)
+        assert isinstance(runnable, Sweep)
         self.runnable = runnable
         self.stage = ""
 
@@ -47,37 +138,115 @@ class MultiRunnableStatus(object):
         return "?"
 
 
-@a99.froze_it
-class MultiRunnable(runnables.Runnable):
+class Sweep(runnables.Runnable):
     """
-    Differential abundances X FWHM's runnable.
+    Parameter sweep: runs pfant and nulbad for each point of a design.
+
+    Args:
+        file_main, file_abonds, options: base inputs
+        points: design, i.e., list of {parameter name: value, ...}; see make_grid() for
+                Cartesian designs
+        names: (optional) name of each point, used in file names. Defaults to "00", "01", ...
+        custom_id: (optional) session id
+        run_cache: (optional) RunCache object to be used by all executables (see Conf.run_cache)
+        max_simultaneous: (optional) maximum number of executables running simultaneously
+        flag_keep_spectra: if set, pfant ("<name>.norm" etc.) and nulbad ("<name>.sp") outputs
+                           are kept in the multi-session directory; otherwise, they are created in
+                           the session directories, which are removed if all points succeed
+
+    Parameter names:
+        "main.<attribute>": FileMain attribute, e.g., "main.teff", "main.vvt"
+        "opt.<option>": command-line option, e.g., "opt.llzero", "opt.fwhm"
+        "ab.<element symbol>": differential abundance, added to the abundance in file_abonds
+        Short names: "teff", "logg", "vt", "fwhm", "llzero", "llfin"
+
+    Points that differ only in nulbad parameters (e.g., FWHM) share one pfant run; points with
+    the same atmosphere share one innewmarcs/hydro2 run (see RunnableManager); hydro2 does not run
+    for points with option "no_h" set. Each nulbad starts as soon as its pfant has finished.
+
+    All convolved spectra are saved into "<multi-session directory>/<pyfant.SWEEP_FILENAME>"
+    (see load_sweep()).
     """
 
-    def __init__(self, file_main, file_abonds, options, file_abxfwhm, custom_id=None):
-        import pyfant as pf
+    @property
+    def num_cache_hits(self):
+        return sum(r.num_cache_hits for r in self.__runnables)
+
+    @property
+    def num_cache_misses(self):
+        return sum(r.num_cache_misses for r in self.__runnables)
+
+    @property
+    def file_main(self):
+        return self.__file_main
+
+    @property
+    def points(self):
+        return self.__points
+
+    @property
+    def names(self):
+        return self.__names
+
+    @property
+    def output_filepath(self):
+        """Path to consolidated output (valid after run() has started)"""
+        return self.__sid.join_with_session_dir(pyfant.SWEEP_FILENAME)
+
+    def __init__(self, file_main, file_abonds, options, points, names=None, custom_id=None,
+                 run_cache=None, max_simultaneous=None, flag_keep_spectra=False):
         pyfant.Runnable.__init__(self)
         assert isinstance(file_main, pyfant.FileMain)
         assert isinstance(file_abonds, pyfant.FileAbonds)
         assert isinstance(options, pyfant.FileOptions)
-        assert isinstance(file_abxfwhm, pyfant.FileAbXFwhm)
+        if len(points) == 0:
+            raise ValueError("Sweep must have at least one point")
+        option_names = options.get_names()
+        for point in points:
+            for name in point:
+                kind, _, attr = _get_param_name(name).partition(".")
+                if (kind == "main" and not hasattr(file_main, attr)) or \
+                        (kind == "opt" and attr not in option_names):
+                    raise ValueError("Invalid sweep parameter: '{}'".format(name))
+        if names is None:
+            width = max(2, len(str(len(points)-1)))
+            names = ["%0*d" % (width, i) for i in range(len(points))]
+        if len(names) != len(points):
+            raise ValueError("There must be one name for each point")
         self.__file_main = file_main
         self.__file_abonds = file_abonds
         self.__options = options
-        self.__file_abxfwhm = file_abxfwhm
+        self.__points = points
+        self.__names = names
         self.__custom_id = custom_id
+        self.__run_cache = run_cache
+        self.__max_simultaneous = max_simultaneous
+        self.__flag_keep_spectra = flag_keep_spectra
 
         # # Protected variables
         # ExecutableStatus instance
-        self.__status = MultiRunnableStatus(self)
+        self.__status = SweepStatus(self)
 
         # # Private variables
         self.__logger = a99.get_python_logger()
         self.__sid = pyfant.SID(_multi_id_maker())
         self.__runnable_manager = None
+        # all runnables run so far
+        self.__runnables = []
+
+    def get_pfant_groups(self):
+        """Returns list of lists of point indexes. Points in the same list share one pfant run"""
+        ret = collections.OrderedDict()
+        for i, point in enumerate(self.__points):
+            items = [(_get_param_name(name), value) for name, value in point.items()]
+            key = repr(sorted([x for x in items if x[0] not in _NULBAD_PARAMS], key=lambda x: x[0]))
+            ret.setdefault(key, []).append(i)
+        return list(ret.values())
 
     def kill(self):
         self._flag_killed = True
         if self._flag_running and self.__runnable_manager:
+            self.__runnable_manager.kill_runnables()
             self.__runnable_manager.exit()
 
     def get_status(self):
@@ -104,6 +273,27 @@ class MultiRunnable(runnables.Runnable):
             self._flag_running = False
             self.__logger.debug(str(self.__status))
 
+    def _get_pfant_name(self, idxs):
+        """Returns name of pfant run for points idxs, used as flprefix"""
+        return self.__names[idxs[0]]
+
+    def _get_fn_cv(self, i, combo):
+        """Returns path to nulbad output for i-th point, whose pfant run is combo"""
+        fn = self.__names[i]+".sp"
+        if self.__flag_keep_spectra:
+            return self.__sid.join_with_session_dir(fn)
+        return combo.sid.join_with_session_dir(fn)
+
+    def _save_outputs(self, spectra):
+        """Saves consolidated output (see load_sweep()). spectra: f311.Spectrum or None for each point"""
+        empty = np.zeros(0)
+        xx = [empty if sp is None else np.asarray(sp.x, dtype=float) for sp in spectra]
+        yy = [empty if sp is None else np.asarray(sp.y, dtype=float) for sp in spectra]
+        np.savez(self.output_filepath, names=np.array(self.__names),
+                 points=np.array(json.dumps(self.__points, default=_to_json)),
+                 x=np.concatenate(xx), y=np.concatenate(yy),
+                 offsets=np.cumsum([0]+[len(x) for x in xx]))
+
     def __run(self):
         # Called from run() to lower one indentation lever.
         # **Note** If something is not right here: *raise*.
@@ -113,6 +303,10 @@ class MultiRunnable(runnables.Runnable):
 
         # # Preparation
         self.__status.stage = "preparing"
+        for point in self.__points:
+            for name, value in point.items():
+                if _get_param_name(name) in ("main.fwhm", "opt.fwhm") and float(value) > 9.99:
+                    raise RuntimeError("fhwm maximum is 9.99")
         if self.__custom_id:
             self.__sid.id = self.__custom_id
         else:
@@ -123,128 +317,154 @@ class MultiRunnable(runnables.Runnable):
         # It will replace the Pfant's default id maker
         custom_id_maker = pyfant.IdMaker()
         custom_id_maker.session_prefix_singular = os.path.join(self.__sid.dir, "session-")
-
-
-        # # Runs innewmarcs and hydro2
-        ih = pyfant.Combo([pyfant.FOR_INNEWMARCS, pyfant.FOR_HYDRO2])
-        ih.conf.flag_output_to_dir = True
-        ih.conf.logger = self.__logger
-        ih.conf.opt = copy.copy(self.__options)
-        ih.conf.sid = self.__sid
-        ih.conf.file_main = copy.copy(self.__file_main)
-        # Runs innewmarcs and hydro2;
-        # it is also expected to create the "multi-session" directory
-        ih.run()
+        # Input files common to several pfant's (e.g. main configuration) are saved only once
+        store = pyfant.InputStore(os.path.join(self.__sid.dir, pyfant.INPUT_STORE_DIR))
+
+        # # Prepares one innewmarcs-hydro2-pfant Combo per group of points.
+        # RunnableManager runs innewmarcs/hydro2 once for all Combos with the same atmosphere
+        groups = self.get_pfant_groups()
+        combos = []
+        for idxs in groups:
+            items = [x for x in self.__points[idxs[0]].items() if _get_param_name(x[0]) not in _NULBAD_PARAMS]
+            opt = copy.copy(self.__options)
+            file_main = copy.copy(self.__file_main)
+            file_abonds = copy.deepcopy(self.__file_abonds)
+            _apply_params(items, file_main, file_abonds, opt)
+            # hydrogen lines profiles are not needed if pfant skips hydrogen lines
+            sequence = [pyfant.FOR_INNEWMARCS, pyfant.FOR_PFANT] if opt.no_h == True else \
+                       [pyfant.FOR_INNEWMARCS, pyfant.FOR_HYDRO2, pyfant.FOR_PFANT]
+            combo = pyfant.Combo(sequence)
+            conf = combo.conf
+            conf.file_main, conf.file_abonds, conf.opt = file_main, file_abonds, opt
+            conf.file_dissoc = conf.file_abonds.get_file_dissoc()
+            conf.sid.id_maker = custom_id_maker
+            conf.input_store = store
+            conf.run_cache = self.__run_cache
+            name = self._get_pfant_name(idxs)
+            if self.__flag_keep_spectra:
+                # only pfant will run in combo, see RunnableManager flag_share_upstream
+                conf.flag_output_to_dir = False
+                conf.opt.flprefix = self.__sid.join_with_session_dir(name)
+            else:
+                conf.flag_output_to_dir = True
+                conf.opt.flprefix = name
+            combos.append(combo)
 
         ####
-        # # Runs pfant, pfant creates several .norm files
-        self.__status.stage = "pfant stage"
-        self.__logger.info("+++ pfant stage...")
-        pfant_list = []
-        symbols = list(self.__file_abxfwhm.ab.keys())
-        abdiffss = list(self.__file_abxfwhm.ab.values())
-        n_abdif = len(abdiffss[0])
-        fwhms = self.__file_abxfwhm.get_fwhms()
-        for fwhm in fwhms:
-            if fwhm > 9.99:
-                raise RuntimeError("fhwm maximum is 9.99")
-        for j in range(n_abdif):
-            file_abonds_ = copy.deepcopy(self.__file_abonds)
-
-            for i, symbol in enumerate(symbols):
-                found = False
-                for k in range(len(file_abonds_.ele)):
-                    if file_abonds_.ele[k] == symbol:
-                        abdif = abdiffss[i][j]
-                        file_abonds_.abol[k] += abdif
-                        self.__logger.debug(j, " - ", symbol, "with abundance", file_abonds_.abol[k])
-                        found = True
-
-                if not found:
-                    raise RuntimeError("Atom '%s' not found" % symbol)
-
-            pfant_name = self.__file_abxfwhm.pfant_names[j] \
-                if self.__file_abxfwhm.pfant_names \
-                else "%02d" % j
-            flprefix = "%s_%s" % (self.__file_main.titrav, pfant_name)
-
-            pfant = pyfant.Pfant()
-            pfant.conf.flag_output_to_dir = False
-            pfant.conf.opt = copy.copy(self.__options)
-            pfant.conf.rename_outputs([pyfant.FOR_INNEWMARCS, pyfant.FOR_HYDRO2], sid=self.sid)
-            pfant.conf.sid.id_maker = custom_id_maker
-            pfant.conf.sid.id = flprefix
-            pfant.conf.opt.flprefix = self.__sid.join_with_session_dir(flprefix)
-            pfant.conf.file_main = copy.copy(self.__file_main)
-            pfant.conf.file_abonds = file_abonds_
-            pfant.conf.file_dissoc = file_abonds_.get_file_dissoc()
-
-            self.__logger.debug("LOOK FLPREFIX "+str(pfant.conf.opt.flprefix))
-
-            pfant_list.append(pfant)
-        rm = self.__runnable_manager = pyfant.RunnableManager()
-        pyfant.run_parallel(pfant_list, flag_console=False, runnable_manager=rm)
+        # # Runs pfant's; nulbad's are added as their pfant's finish
+        self.__status.stage = "pfant/nulbad stage"
+        self.__logger.info("+++ pfant/nulbad stage...")
+        self.__runnables.extend(combos)
+        idxs_by_combo = {id(combo): idxs for combo, idxs in zip(combos, groups)}
+        idx_by_nulbad = {}
+        nulbad_list = []
+        spectra = [None]*len(self.__points)
+        rm = self.__runnable_manager = pyfant.RunnableManager(
+            max_simultaneous=self.__max_simultaneous, flag_share_upstream=True)
+        rm.start()
+        try:
+            rm.add_runnables(combos)
+            for combo in rm.as_completed(combos, flag_load_result=False):
+                new_nulbads = []
+                for i in idxs_by_combo[id(combo)]:
+                    nulbad = pyfant.Nulbad()
+                    conf = nulbad.conf
+                    conf.flag_output_to_dir = False
+                    conf.sid.id_maker = custom_id_maker
+                    conf.file_main = copy.copy(self.__file_main)
+                    conf.opt = copy.copy(self.__options)
+                    _apply_params(self.__points[i].items(), conf.file_main, None, conf.opt)
+                    conf.opt.fn_flux = combo.conf.get_pfant_output_filepath(
+                        "spec" if conf.opt.norm == False else "norm")
+                    conf.opt.fn_cv = self._get_fn_cv(i, combo)
+                    conf.input_store = store
+                    conf.run_cache = self.__run_cache
+                    idx_by_nulbad[id(nulbad)] = i
+                    new_nulbads.append(nulbad)
+                self.__runnables.extend(new_nulbads)
+                nulbad_list.extend(new_nulbads)
+                rm.add_runnables(new_nulbads)
+
+            for nulbad in rm.as_completed(nulbad_list):
+                spectra[idx_by_nulbad[id(nulbad)]] = nulbad.result["convolved"]
+        finally:
+            rm.exit()
         if self._flag_killed:
             return
 
-        if not rm.flag_success:
-            raise RuntimeError("Not all pfant's succeeded running.")
+        self.__status.stage = "saving"
+        self._save_outputs(spectra)
+        num_failed = sum(sp is None for sp in spectra)
+        if num_failed > 0:
+            raise RuntimeError("{} of {} points failed".format(num_failed, len(spectra)))
 
         ####
-        # # Runs nulbad, saves .sp and .spl files
-        # function to convert given FWHM to string to use as part of a file name
-        fmt_fwhm = lambda x: "%03d" % round(x * 100)
+        # # Deletes session-* directories if successful
+        FLAG_CLEAN = True
+        if FLAG_CLEAN:
+            self.__logger.info("+++ Cleaning up...")
+            for dir_ in glob.glob(custom_id_maker.session_prefix_singular+"*"):
+                shutil.rmtree(dir_)
+            store.clean()
+        else:
+            self.__logger.info("+++ NOT cleaning up...")
+
+    def _get_sid(self):
+        return self.__sid
 
-        # ## Prepares nulbad's
-        nulbad_list = []
-        sp_filenames_by_fwhm = {}  # dictionary containing a list of .sp filenames for each FWHM
-        for pfant in pfant_list:
-            # prefix is sth like: multi-session-1/Sun_00
-            prefix = pfant.conf.opt.flprefix
 
+@a99.froze_it
+class MultiRunnable(Sweep):
+    """
+    Differential abundances X FWHM's runnable.
+
+    Args:
+        file_main, file_abonds, options, file_abxfwhm: inputs
+        custom_id: (optional) session id
+        run_cache: (optional) RunCache object to be used by all executables (see Conf.run_cache)
+
+    Sweep over each set of differential abundances X each FWHM. Spectra are kept as
+    "<titrav>_<pfant name>_<FWHM>.sp", and lists of them for lineplot.py as "cv_<FWHM>.spl"
+    """
+
+    def __init__(self, file_main, file_abonds, options, file_abxfwhm, custom_id=None, run_cache=None):
+        assert isinstance(file_abxfwhm, pyfant.FileAbXFwhm)
+        symbols = list(file_abxfwhm.ab.keys())
+        abdiffss = list(file_abxfwhm.ab.values())
+        n_abdif = len(abdiffss[0])
+        fwhms = file_abxfwhm.get_fwhms()
+        points, names = [], []
+        for j in range(n_abdif):
+            pfant_name = file_abxfwhm.pfant_names[j] if file_abxfwhm.pfant_names else "%02d" % j
             for fwhm in fwhms:
-                nulbad = pyfant.Nulbad()
-                nulbad.conf.flag_output_to_dir = False
-                nulbad.conf.sid.id_maker = custom_id_maker
-                nulbad.conf.opt = copy.copy(self.__options)
-                nulbad.conf.opt.fn_flux = pfant.conf.opt.flprefix+".norm"
-                nulbad.conf.opt.fwhm = fwhm
-                nulbad.conf.opt.fn_cv = "%s_%s.sp" % (prefix, fmt_fwhm(fwhm))
-                nulbad_list.append(nulbad)
-
-                if not fwhm in sp_filenames_by_fwhm:
-                    sp_filenames_by_fwhm[fwhm] = []
-                sp_filenames_by_fwhm[fwhm].append(nulbad.conf.opt.fn_cv)
+                point = collections.OrderedDict(("ab."+symbol, abdiffss[i][j])
+                                                for i, symbol in enumerate(symbols))
+                point["opt.fwhm"] = fwhm
+                points.append(point)
+                names.append("%s_%s_%s" % (file_main.titrav, pfant_name, _fmt_fwhm(fwhm)))
+        Sweep.__init__(self, file_main, file_abonds, options, points, names, custom_id=custom_id,
+                       run_cache=run_cache, flag_keep_spectra=True)
+
+    def _get_pfant_name(self, idxs):
+        # e.g. "Sun_00" for "Sun_00_008"
+        return self.names[idxs[0]].rsplit("_", 1)[0]
+
+    def _save_outputs(self, spectra):
+        Sweep._save_outputs(self, spectra)
 
         # ## Saves files for lineplot.py (lists of spectra)
         # Each item of each list is a full path to a spectrum file
-        for fwhm, sp_filenames in list(sp_filenames_by_fwhm.items()):
-            spl_filename = os.path.join(self.__sid.dir, "cv_%s.spl" % fmt_fwhm(fwhm))
+        sp_filenames_by_fwhm = collections.OrderedDict()
+        for point, name in zip(self.points, self.names):
+            fn = self.sid.join_with_session_dir(name+".sp")
+            sp_filenames_by_fwhm.setdefault(point["opt.fwhm"], []).append(fn)
+        for fwhm, sp_filenames in sp_filenames_by_fwhm.items():
+            spl_filename = self.sid.join_with_session_dir("cv_%s.spl" % _fmt_fwhm(fwhm))
             with open(spl_filename, "w") as h:
                 for sp_filename in sp_filenames:
-                    h.write(os.path.abspath(os.path.join(self.__sid.dir, os.path.basename(sp_filename)+"\n")))
+                    h.write(os.path.abspath(sp_filename)+"\n")
 
-        # ## Runs nulbads
-        self.__status.stage = "nulbad stage"
-        self.__logger.info("+++ nulbad stage...")
-        rm = self.__runnable_manager = pyfant.RunnableManager()
-        pyfant.run_parallel(nulbad_list, flag_console=False, runnable_manager=rm)
-        if self._flag_killed:
-            return
-        if not rm.flag_success:
-            raise RuntimeError("Not all nulbad's succeeded running.")
-
-        ####
-        # # Deletes session-* directories if successful
-        FLAG_CLEAN = True
-        if FLAG_CLEAN:
-            self.__logger.info("+++ Cleaning up...")
-            for pfant in pfant_list:
-                pfant.sid.clean()
-            for nulbad in nulbad_list:
-                nulbad.sid.clean()
-        else:
-            self.__logger.info("+++ NOT cleaning up...")
 
-    def _get_sid(self):
-        return self.__sid
+def _fmt_fwhm(x):
+    """Converts FWHM to string to use as part of a file name"""
+    return "%03d" % round(x * 100)
@@ -9,6 +9,8 @@ import time
 from threading import Lock
 import collections
 import pyfant
+from .executors import *
+from .upstream import *
 
 __all__ = ["RunnableManager"]
 
@@ -32,6 +34,17 @@ class RunnableManager(QObject, threading.Thread):
       max_simultaneous=multiprocessing.cpu_count()
       flag_auto_clean=False: if set, will load result and remove the session
        directory as soon as a runnable has finished
+      flag_load_result=False: if set, will load result as soon as a runnable
+       has finished successfully
+      executor=None: BaseExecutor instance; defaults to ThreadExecutor(), i.e.,
+       runnables run in the runner threads. ProcessExecutor or
+       FakeClusterExecutor will also create the input files and load the
+       results in the worker processes
+      flag_share_upstream=False: if set, Combos with identical innewmarcs/hydro2
+       stages (see get_upstream_key()) will share one innewmarcs/hydro2 run, which
+       runs first; then the Combos run only their remaining executables (e.g.
+       pfant, nulbad) using the shared modeles.mod and hydrogen line profiles.
+       **Note** the shared results are not loaded into the Combos
     """
 
     # Emitted when a new thread is added
@@ -63,6 +76,18 @@ class RunnableManager(QObject, threading.Thread):
         with self.__lock:
             return self.__num_failed
 
+    @property
+    def num_cache_hits(self):
+        """Number of executables restored from run cache (see Conf.run_cache)"""
+        with self.__lock:
+            return self.__num_cache_hits
+
+    @property
+    def num_cache_misses(self):
+        """Number of executables that ran with a run cache set (see Conf.run_cache)"""
+        with self.__lock:
+            return self.__num_cache_misses
+
     @property
     def time_started(self):
         with self.__lock:
@@ -108,6 +133,16 @@ class RunnableManager(QObject, threading.Thread):
         with self.__lock:
             return self.__flag_auto_clean
 
+    @property
+    def flag_load_result(self):
+        with self.__lock:
+            return self.__flag_load_result
+
+    @property
+    def executor(self):
+        """BaseExecutor instance"""
+        return self.__executor
+
     @property
     def flag_success(self):
         """Success is defined as nothing left to run and no fails."""
@@ -131,7 +166,7 @@ class RunnableManager(QObject, threading.Thread):
     @property
     def flag_verbose(self):
         """Whether to log progress-related messages"""
-        return self.__max_simultaneous
+        return self.__flag_verbose
 
     @flag_verbose.setter
     def flag_verbose(self, x):
@@ -139,11 +174,15 @@ class RunnableManager(QObject, threading.Thread):
 
 
     def __init__(self, *args, max_simultaneous=None, flag_auto_clean=False, flag_verbose=False,
-                 flag_exit_if_fail=False, **kwargs):
+                 flag_exit_if_fail=False, flag_load_result=False, executor=None,
+                 flag_share_upstream=False, **kwargs):
         self.__max_simultaneous = max_simultaneous
         self.__flag_auto_clean = flag_auto_clean
+        self.__flag_load_result = flag_load_result
+        self.__executor = executor if executor is not None else ThreadExecutor()
         self.__flag_verbose = flag_verbose
         self.__flag_exit_if_fail = flag_exit_if_fail
+        self.__flag_share_upstream = flag_share_upstream
         if self.__max_simultaneous is None: self.__max_simultaneous = multiprocessing.cpu_count()
         QObject.__init__(self)
         threading.Thread.__init__(self, *args, **kwargs)
@@ -154,8 +193,19 @@ class RunnableManager(QObject, threading.Thread):
         self.__num_failed = 0
         # all runnables
         self.__runnables = []
+        # runnables in order of finishing (see as_completed())
+        self.__finished_runnables = []
         # FIFO stack containing indexes of __runnables to run
         self.__idxs_to_run = collections.deque()
+        # # Shared innewmarcs/hydro2 runs (see flag_share_upstream)
+        # {upstream key: SharedUpstream}
+        self.__upstreams = {}
+        # {id(shared Combo): SharedUpstream}, for shared Combos not finished yet
+        self.__upstream_of = {}
+        # {id(dependent runnable): SharedUpstream}, for dependents not finished yet
+        self.__dependent_of = {}
+        # FIFO of SharedUpstream's whose Combos are to run (before anything in __idxs_to_run)
+        self.__upstreams_to_run = collections.deque()
         # flag to exit as soon as possible
         self.__flag_exit = False
         # set to True if explicitly cancelled through calling cancel()
@@ -166,10 +216,15 @@ class RunnableManager(QObject, threading.Thread):
 
         # Runner threads
         self.__runners = []
+        # FIFO of runners waiting for a runnable
+        self.__idle_runners = collections.deque()
 
         # # Locks
         self.__lock = Lock()
         # self.__lock = MyLock("RM Lock", True)
+        # Notified whenever there is something new for the manager thread to do (runnables added,
+        # runner became idle, resume, cancel, exit) or a runnable has finished
+        self.__cond = threading.Condition(self.__lock)
 
         # # Statistics
         # time the thread has started
@@ -178,19 +233,28 @@ class RunnableManager(QObject, threading.Thread):
         self.__time_finished = None
         # average time to run each runnable
         self.__time_per_runnable = 0
+        # executables restored from/stored into run cache (see Conf.run_cache)
+        self.__num_cache_hits = 0
+        self.__num_cache_misses = 0
+        # shared innewmarcs/hydro2 runs and runnables depending on them
+        self.__num_upstreams = 0
+        self.__num_dependents = 0
         
         for i in range(self.__max_simultaneous):
             t = _Runner(self)
             self.__runners.append(t)
+            self.__idle_runners.append(t)
 
     def start(self):
         self.__time_started = time.time()
+        self.__executor.start()
         threading.Thread.start(self)
 
     def cancel(self):
-        with self.__lock:
+        with self.__cond:
             self.__flag_cancelled = True
             self.__flag_exit = True
+            self.__cond.notify_all()
 
     def pause(self):
         """Pauses the delegation of runnables to runners.
@@ -200,8 +264,9 @@ class RunnableManager(QObject, threading.Thread):
             self.__flag_paused = True
 
     def resume(self):
-        with self.__lock:
+        with self.__cond:
             self.__flag_paused = False
+            self.__cond.notify_all()
 
     def get_runnables_copy(self):
         """Returns a copy of self.__runnables.
@@ -217,13 +282,15 @@ class RunnableManager(QObject, threading.Thread):
             return self.__unlocked_get_times()
 
     def add_runnables(self, runnables):
-        with self.__lock:
+        with self.__cond:
             self.__unlocked_add_runnables(runnables)
         self.runnable_added.emit()
 
     def exit(self):
-        self.__flag_exit = True
-        
+        with self.__cond:
+            self.__flag_exit = True
+            self.__cond.notify_all()
+
     def kill_runnables(self):
         with self.__lock:
             for runner in self.__runners:
@@ -242,6 +309,12 @@ class RunnableManager(QObject, threading.Thread):
             l.append("***finished: %d/%d" % (self.__num_finished, len(self.__runnables)))
             if self.__num_failed > 0:
                 l.append("***failed: %d" % (self.__num_failed))
+            num_cached = self.__num_cache_hits+self.__num_cache_misses
+            if num_cached > 0:
+                l.append("***run cache hits: %d/%d executables" % (self.__num_cache_hits, num_cached))
+            if self.__num_upstreams > 0:
+                l.append("***shared innewmarcs/hydro2 runs: %d (for %d runnables)" %
+                         (self.__num_upstreams, self.__num_dependents))
             if self.__time_started:
                 ella, tot, rema = self.__unlocked_get_times()
                 l.append("***time ellapsed: %s" % a99.seconds2str(ella))
@@ -277,19 +350,62 @@ class RunnableManager(QObject, threading.Thread):
     def wait_until_finished(self):
         if not self.is_alive():
             raise RuntimeError("Runnable manager not running")
+        # wakes up when a runnable finishes; times out only to log progress in verbose mode
+        timeout = 1 if self.__flag_verbose else None
         while True:
-            if self.flag_finished:
-                self.exit()
-                break
+            with self.__cond:
+                if self.__num_finished == len(self.__runnables) or self.__flag_exit:
+                    break
+                self.__cond.wait(timeout)
             if self.__flag_verbose:
                 self.__logger.info("\n".join(self.get_summary_report()))
-            time.sleep(1)
+        self.exit()
+
+    def as_completed(self, runnables=None, flag_load_result=True):
+        """Generator that yields runnables as soon as they finish successfully, with results loaded.
+
+        Args:
+            runnables: (optional) restricts to these runnables (e.g., the ones just added)
+            flag_load_result: if False, results are not loaded here (e.g., when only the output
+                file names are needed)
+
+        Stops when all runnables (or all of *runnables*) have finished, or the manager is asked to
+        exit. Failed runnables are not yielded (see num_failed).
+
+        Results are loaded by the runners if flag_load_result or flag_auto_clean is set (which is
+        faster, especially with a ProcessExecutor); otherwise, load_result() is called here.
+
+        Does not exit the manager (unlike wait_until_finished()).
+        """
+        ids = None if runnables is None else set(id(x) for x in runnables)
+        with self.__lock:
+            flag_load = flag_load_result and not (self.__flag_load_result or self.__flag_auto_clean)
+        i = 0
+        while True:
+            with self.__cond:
+                while i >= len(self.__finished_runnables) and not self.__flag_exit and \
+                        (self.__num_finished < len(self.__runnables) if ids is None else ids):
+                    self.__cond.wait()
+                if i >= len(self.__finished_runnables):
+                    break
+                runnable = self.__finished_runnables[i]
+                i += 1
+            if ids is not None:
+                if id(runnable) not in ids:
+                    continue
+                ids.remove(id(runnable))
+            if runnable.flag_success:
+                if flag_load:
+                    runnable.load_result()
+                yield runnable
+            if ids is not None and not ids:
+                break
 
     def retry_failed(self):
         """Retries all failed runnables."""
         if not self.flag_finished:
             raise RuntimeError("Can only retry when finished!")
-        with self.__lock:
+        with self.__cond:
             temp = self.__num_failed
             self.__num_failed = 0
             self.__num_finished -= temp
@@ -308,18 +424,46 @@ class RunnableManager(QObject, threading.Thread):
         """
 
         flag_exit = False
+        # shared innewmarcs/hydro2 sessions no longer needed
+        to_clean = []
+
+        with self.__cond:
+            shared = self.__upstream_of.pop(id(runner.runnable), None)
+            if shared is not None:
+                # Shared Combo is not counted; if it failed, its dependents are finished here
+                finished = self.__unlocked_release_dependents(shared)
+            else:
+                finished = [runner.runnable]
+
+            for runnable in finished:
+                if not runnable.flag_success:
+                    self.__num_failed += 1
+                    if self.__flag_exit_if_fail:
+                        flag_exit = True
+
+                self.__num_finished += 1
+                self.__num_cache_hits += runnable.num_cache_hits
+                self.__num_cache_misses += runnable.num_cache_misses
+                self.__finished_runnables.append(runnable)
+
+                shared = self.__dependent_of.pop(id(runnable), None)
+                if shared is not None:
+                    shared.num_pending -= 1
+                    shared.flag_dependents_ok = shared.flag_dependents_ok and runnable.flag_success
+                    if shared.num_pending == 0 and shared.flag_dependents_ok and \
+                            shared.combo.flag_success and self.__flag_auto_clean:
+                        del self.__upstreams[shared.key]
+                        to_clean.append(shared.combo)
 
-        with self.__lock:
-            if not runner.runnable.flag_success:
-                self.__num_failed += 1
-                if self.__flag_exit_if_fail:
-                    flag_exit = True
-
-            self.__num_finished += 1
             t = time.time()
-            self.__time_per_runnable = (t-self.__time_started)/self.__num_finished
+            if self.__num_finished > 0:
+                self.__time_per_runnable = (t-self.__time_started)/self.__num_finished
             if self.__num_finished == len(self.__runnables):
                 self.__time_finished = t
+            self.__cond.notify_all()
+
+        for combo in to_clean:
+            combo.sid.clean()
 
         self.runnable_changed.emit()
 
@@ -329,74 +473,115 @@ class RunnableManager(QObject, threading.Thread):
         if flag_exit:
             self.exit()
 
+    def _is_shared(self, runnable):
+        """Returns whether runnable is a shared innewmarcs/hydro2 Combo (see flag_share_upstream)"""
+        with self.__lock:
+            return id(runnable) in self.__upstream_of
+
+    def _release(self, runner):
+        """Called by a _Runner to inform that it is ready to receive another runnable."""
+        with self.__cond:
+            self.__idle_runners.append(runner)
+            self.__cond.notify_all()
+
     def run(self):
-        flag_sleep = False
-        it = 0  # thread index
         self.__logger.debug("Will run %d runnables" % len(self.__runnables))
         while True:
-            if self.__flag_exit:
-                for runner in self.__runners:
-                    if runner.runnable and runner.runnable.flag_running:
-                        runner.kill_runnable()
-                    if runner.is_alive():
-                        runner.exit()
-                break
+            with self.__cond:
+                # Sleeps until there is a runnable to run and an idle runner to run it, or exit
+                while not self.__flag_exit and (self.__flag_paused or len(self.__idle_runners) == 0 or
+                        len(self.__idxs_to_run) == 0 and len(self.__upstreams_to_run) == 0):
+                    self.__cond.wait()
+
+                if self.__flag_exit:
+                    for runner in self.__runners:
+                        if runner.runnable and runner.runnable.flag_running:
+                            runner.kill_runnable()
+                        if runner.is_alive():
+                            runner.exit()
+                    self.__executor.shutdown()
+                    break
+
+                if self.__upstreams_to_run:
+                    # shared runs go first, as other runnables are waiting for them
+                    runnable = self.__upstreams_to_run.popleft().combo
+                    s_idx = "shared"
+                else:
+                    idx_to_run = self.__idxs_to_run.popleft()
+                    runnable = self.__runnables[idx_to_run]
+                    s_idx = "#%d" % idx_to_run
+                r = self.__idle_runners.popleft()
+                r.set_runnable(runnable)
+                self.__logger.debug("Assigned %s :%s to %s" % (s_idx, runnable.name, r.name))
+                if not r.is_alive():
+                    r.start()
 
-            if self.__flag_paused:
-                flag_sleep = True
-            else:
-                with self.__lock:
-                    if len(self.__idxs_to_run) == 0:
-                        # No new tasks for the moment
-                        flag_sleep = True
-                    else:
-                        idx_to_run = self.__idxs_to_run[0]
-                        runnable = self.__runnables[idx_to_run]
-                        j = 0
-                        # loop to find idle thread
-                        while True:
-                            if j >= self.__max_simultaneous:
-                                # gave a full turn without finding idle thread
-                                flag_sleep = True
-                                break
-                            r = self.__runners[it]
-
-                            it += 1
-                            if it >= self.__max_simultaneous:
-                                it = 0
-
-                            if r.flag_idle:
-                                r.set_runnable(runnable)
-                                self.__logger.debug("Assigned #%d :%s to %s" %
-                                 (idx_to_run, runnable.name, r.name))
-                                self.__idxs_to_run.popleft()
-
-                                if not r.is_alive():
-                                    r.start()
-                                break
-                            j += 1
-
-            if flag_sleep:
-                T = 0.1
-                time.sleep(T)  # Chilling out for a while
-                flag_sleep = False
-    
         self.__logger.debug("TM exited")
 
     def __unlocked_add_runnables(self, runnables):
         n = len(self.__runnables)
 
         self.__runnables.extend(runnables)
-        self.__idxs_to_run.extend(list(range(n, n + len(runnables))))
+        if not self.__flag_share_upstream:
+            self.__idxs_to_run.extend(list(range(n, n + len(runnables))))
+        else:
+            for i, runnable in enumerate(runnables, n):
+                key = get_upstream_key(runnable)
+                if key is None:
+                    self.__idxs_to_run.append(i)
+                    continue
+                shared = self.__upstreams.get(key)
+                if shared is None:
+                    shared = self.__upstreams[key] = SharedUpstream(runnable)
+                    shared.key = key
+                    self.__upstream_of[id(shared.combo)] = shared
+                    self.__upstreams_to_run.append(shared)
+                    self.__num_upstreams += 1
+                self.__dependent_of[id(runnable)] = shared
+                shared.num_pending += 1
+                self.__num_dependents += 1
+                if shared.flag_released:
+                    # shared Combo has already run successfully
+                    shared.attach(runnable)
+                    self.__idxs_to_run.append(i)
+                else:
+                    shared.dependents.append(i)
+        self.__cond.notify_all()
+
+    def __unlocked_release_dependents(self, shared):
+        """Called when shared Combo has finished: schedules its dependents if successful.
+
+        Returns:
+            list of dependents that failed because shared Combo failed
+        """
+        ret = []
+        combo = shared.combo
+        if combo.flag_success:
+            shared.flag_released = True
+            for i in shared.dependents:
+                shared.attach(self.__runnables[i])
+                self.__idxs_to_run.append(i)
+        else:
+            # next runnables with the same key will get a new shared Combo
+            del self.__upstreams[shared.key]
+            names = "/".join(e.__class__.__name__.lower() for e in combo.get_exes())
+            for i in shared.dependents:
+                runnable = self.__runnables[i]
+                runnable._flag_finished = True
+                runnable._flag_error = True
+                runnable._error_message = "Shared {} ('{}') failed: {}".format(
+                    names, combo.sid.dir, combo.error_message)
+                ret.append(runnable)
+        shared.dependents = []
+        return ret
 
     def __unlocked_kill_runnable(self, runnable):
         flag_found = False
-        with self.__lock:
-            for runner in self.__runners:
-                if runner.runnable == runnable and runner.runnable.flag_running:
-                    flag_found = True
-                    runner.kill_runnable()
-                    break
+        for runner in self.__runners:
+            if runner.runnable == runnable and runner.runnable.flag_running:
+                flag_found = True
+                runner.kill_runnable()
+                break
         if not flag_found:
             raise RunnableManagerError("Runnable '%s' not running!" % runnable)
 
@@ -430,6 +615,8 @@ class RunnableManager(QObject, threading.Thread):
 class _Runner(threading.Thread):
     """
     Thread that runs object of class Runnable.
+
+    Sleeps until the manager hands it a runnable through set_runnable() or asks it to exit.
     """
 
     def __init__(self, manager, *args, **kwargs):
@@ -441,76 +628,80 @@ class _Runner(threading.Thread):
         self.flag_exit = False
         self.flag_idle = True
         self.lock = Lock()
+        # notified by set_runnable() and exit()
+        self.cond = threading.Condition(self.lock)
         self.__logger = None
 
 
     def set_runnable(self, x):
         assert self.flag_idle or x is None
-        with self.lock:
+        with self.cond:
             self.runnable = x
             self.flag_idle = x is None
+            self.cond.notify()
 
     def exit(self):
         """Intention to exit asap."""
-        self.flag_exit = True
-        self.__logger.debug("ok to exit")
+        with self.cond:
+            self.flag_exit = True
+            self.cond.notify()
+        if self.__logger:
+            self.__logger.debug("ok to exit")
 
     def kill_runnable(self):
         """Attempt to kill whatever is running."""
         if self.runnable:
-            self.runnable.kill()
+            self.manager.executor.kill(self.runnable)
 
     def run(self):
         self.__logger = a99.get_python_logger()
         # this was leaving file open after finished add_file_handler(self.__logger, "python.log")
         self.__logger.debug("\\o/ %s is alive \\o/" % (self.name))
-        misses = 0
-        flag_sleep = False
         while True:
-            if self.flag_exit:
-                break
-            with self.lock:
-                if self.runnable:
-                    self.flag_idle = False
-                    try:
-                        self.runnable.run()
-                        if self.manager.flag_auto_clean and self.runnable.flag_success:
-                            self.runnable.load_result()
-                            self.runnable.sid.clean()
-
-                    except pyfant.FailedError as E:
-                        # If runnable fails, the current behaviour is use ErrorCollector and
-                        # critical-log the error if found something; otherwise
-
-                        dir_ = self.runnable.conf.sid.dir
-                        k = a99.ErrorCollector(flag_warnings=False)
-                        k.collect_errors(dir_)
-                        template = "Caught in rm.py::_Runner.run() --- {} failed! See below:\n" \
-                                   "{}"
-                        msg_fortran = "\n".join(["! {}".format(x) for x in k.get_plain_text()])
-                        msg = template.format(self.runnable.__class__.__name__, msg_fortran)
-                        self.__logger.critical(msg)
-
-                        #
-                        # if isinstance(E, IOError):
-                        #   printOpenFiles()
-                        #
-                        # self.__logger.exception("%s failed" % self.runnable.__class__.__name__)
-                        # print "EXITING SO THAT YOU CAN SEE THE ERROR"
-                        # self.manager.exit()
-                        # raise
-
-
-                    self.manager._finish(self)
-                    self.runnable = None
-                    self.flag_idle = True
-                else:
-                    misses += 1
-                    if misses >= 34:
-                        flag_sleep = True
-                        misses = 0
-            if flag_sleep:
-                T = 0.1
-                time.sleep(T)
-                flag_sleep = False
+            with self.cond:
+                while not self.flag_exit and self.runnable is None:
+                    self.cond.wait()
+                if self.flag_exit:
+                    break
 
+            try:
+                # shared innewmarcs/hydro2 runs are cleaned by the manager, results are not loaded
+                flag_dependent = self.manager._is_shared(self.runnable)
+                self.manager.executor.execute(self.runnable,
+                                              self.manager.flag_load_result and not flag_dependent,
+                                              self.manager.flag_auto_clean and not flag_dependent)
+
+            except pyfant.FailedError as E:
+                # If runnable fails, the current behaviour is use ErrorCollector and
+                # critical-log the error if found something; otherwise
+
+                dir_ = self.runnable.conf.sid.dir
+                k = a99.ErrorCollector(flag_warnings=False)
+                k.collect_errors(dir_)
+                template = "Caught in rm.py::_Runner.run() --- {} failed! See below:\n" \
+                           "{}"
+                msg_fortran = "\n".join(["! {}".format(x) for x in k.get_plain_text()])
+                msg = template.format(self.runnable.__class__.__name__, msg_fortran)
+                self.__logger.critical(msg)
+
+                #
+                # if isinstance(E, IOError):
+                #   printOpenFiles()
+                #
+                # self.__logger.exception("%s failed" % self.runnable.__class__.__name__)
+                # print "EXITING SO THAT YOU CAN SEE THE ERROR"
+                # self.manager.exit()
+                # raise
+
+            except Exception as E:
+                # Other errors must not kill the runner, otherwise the manager will never finish
+                self.__logger.exception("Caught in rm.py::_Runner.run() --- {} failed".format(
+                                        self.runnable.__class__.__name__))
+                if not self.runnable.flag_error:
+                    self.runnable._flag_error = True
+                    self.runnable._error_message = a99.str_exc(E)
+                self.runnable._flag_finished = True
+
+            self.manager._finish(self)
+            self.set_runnable(None)
+            self.manager._release(self)
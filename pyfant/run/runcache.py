@@ -0,0 +1,193 @@
+"""
+Cache of executable outputs, to skip runs whose inputs have not changed
+"""
+
+__all__ = ["RunCache", "get_file_digest"]
+
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+import a99
+import pyfant
+from ..basic import LRUCache
+
+
+# {(device, inode, size, modification time): SHA-1 hexadecimal digest, ...}
+_digest_cache = LRUCache(2**12)
+
+
+def get_file_digest(path):
+    """Returns SHA-1 hexadecimal digest of file contents, or None if file does not exist
+
+    Digests are memoized by (device, inode, size, modification time), so that files linked from
+    an InputStore into several sessions are read once."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    ret = _digest_cache.get(key)
+    if ret is None:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(2**20), b""):
+                h.update(block)
+        ret = _digest_cache[key] = h.hexdigest()
+    return ret
+
+
+def _get_hmap_key(path):
+    """Returns hydrogen lines map rows with directories stripped from file names (session
+    directories would change the key of every run), or None if file does not exist"""
+    if not os.path.isfile(path):
+        return None
+    f = pyfant.FileHmap()
+    f.load(path)
+    return [(os.path.basename(row.fn.strip("'\"")), row.na, row.nb, row.clam, row.kiex, row.c1)
+            for row in f.rows]
+
+
+class RunCache(object):
+    """
+    Directory of executable outputs, keyed on everything that the outputs depend on
+
+    Args:
+        dir_: cache directory. Defaults to pyfant.RUN_CACHE_DIR
+        max_size: maximum cache size in bytes (None: unlimited)
+        max_age: entries not used for longer than this number of seconds are evicted (None: never)
+
+    The key of a run is a SHA-1 digest of: executable name, path and modification time;
+    command-line options except the ones that are file names (e.g., "--fn_main", "--flprefix");
+    and the contents of the input files (see PFANTExecutable.get_input_filepaths()).
+
+    Before launching an executable, PFANTExecutable looks up its key; if found, the outputs
+    (see PFANTExecutable.get_output_filepaths()) are copied from the cache instead. After each
+    successful run, the outputs are stored. Entries are evicted (least recently used first) by
+    evict(), which is also called every EVICT_EVERY stores.
+
+    Attributes "num_hits" and "num_stored" count restored and stored runs (by this process)
+    """
+
+    EVICT_EVERY = 100
+
+    def __init__(self, dir_=None, max_size=2**30, max_age=30*86400):
+        self.dir = dir_ if dir_ is not None else pyfant.RUN_CACHE_DIR
+        self.max_size = max_size
+        self.max_age = max_age
+        self.num_hits = 0
+        self.num_stored = 0
+
+    def get_key(self, exe):
+        """Returns key (hexadecimal digest) of run of exe (PFANTExecutable) as currently configured"""
+        exe_path = shutil.which(exe.exe_path) or exe.exe_path
+        try:
+            exe_mtime = os.stat(exe_path).st_mtime_ns
+        except OSError:
+            exe_mtime = None
+
+        args = exe.conf.get_args()
+        options = [(args[i], args[i+1]) for i in range(0, len(args), 2)
+                   if not args[i].startswith(("--fn_", "--flprefix"))]
+
+        inputs = []
+        for name, path in exe.get_input_filepaths().items():
+            digest = _get_hmap_key(path) if name == "fn_hmap" else get_file_digest(path)
+            inputs.append((name, digest))
+
+        parts = [exe.__class__.__name__, os.path.abspath(exe_path), exe_mtime, options, inputs]
+        return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def get_entry_dir(self, key):
+        """Returns path to directory containing the outputs stored under key"""
+        return os.path.join(self.dir, key)
+
+    def restore(self, key, exe):
+        """Copies outputs of exe stored under key (if found) to their current paths
+
+        Returns:
+            True if found, False otherwise
+        """
+        entry = self.get_entry_dir(key)
+        if not os.path.isdir(entry):
+            return False
+        try:
+            for role, path in exe.get_output_filepaths().items():
+                src = os.path.join(entry, role)
+                if os.path.isfile(src):
+                    shutil.copyfile(src, path)
+            # keeps recently used entries from being evicted
+            os.utime(entry)
+        except OSError:
+            # e.g. entry evicted meanwhile
+            a99.get_python_logger().exception("Could not restore run cache entry '{}'".format(entry))
+            return False
+        self.num_hits += 1
+        return True
+
+    def store(self, key, exe):
+        """Copies existing outputs of exe into the cache under key"""
+        entry = self.get_entry_dir(key)
+        if os.path.isdir(entry):
+            return
+        # Copies to temporary directory first: another process may be storing or reading the same key
+        temp = "{}.{}-{}".format(entry, os.getpid(), threading.get_ident())
+        try:
+            os.makedirs(temp)
+            flag_any = False
+            for role, path in exe.get_output_filepaths().items():
+                if os.path.isfile(path):
+                    shutil.copyfile(path, os.path.join(temp, role))
+                    flag_any = True
+            if not flag_any:
+                return
+            try:
+                os.rename(temp, entry)
+            except OSError:
+                # stored by someone else meanwhile
+                return
+        except OSError:
+            a99.get_python_logger().exception("Could not store run cache entry '{}'".format(entry))
+            return
+        finally:
+            if os.path.isdir(temp):
+                shutil.rmtree(temp, ignore_errors=True)
+        self.num_stored += 1
+        if self.num_stored % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """Removes entries older than max_age, then least recently used entries until cache size
+        is not greater than max_size. Returns number of entries removed"""
+        if not os.path.isdir(self.dir):
+            return 0
+        entries = []  # [(last used, size, path), ...]
+        for name in os.listdir(self.dir):
+            path = os.path.join(self.dir, name)
+            if "." in name or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(path, x)) for x in os.listdir(path))
+                entries.append((os.stat(path).st_mtime, size, path))
+            except OSError:
+                pass
+        entries.sort()
+
+        ret = 0
+        total = sum(x[1] for x in entries)
+        t = time.time()
+        for mtime, size, path in entries:
+            if not ((self.max_age is not None and t-mtime > self.max_age) or
+                    (self.max_size is not None and total > self.max_size)):
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            ret += 1
+        return ret
+
+    def clean(self):
+        """Deletes cache directory with all entries inside"""
+        a99.get_python_logger().debug("About to remove directory '%s'" % self.dir)
+        shutil.rmtree(self.dir, ignore_errors=True)
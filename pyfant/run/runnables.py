@@ -105,6 +105,16 @@ class Runnable(object):
     def result(self):
         return self._result
 
+    @property
+    def num_cache_hits(self):
+        """Number of executables whose outputs were restored from the run cache (see Conf.run_cache)"""
+        return self._num_cache_hits
+
+    @property
+    def num_cache_misses(self):
+        """Number of executables that ran and had their outputs stored into the run cache"""
+        return self._num_cache_misses
+
     def __init__(self):
         self.name = a99.random_name()
         # Is running?
@@ -119,6 +129,9 @@ class Runnable(object):
         self._error_message = ""
         # Will contain results DataFile objects (keys vary depending on the Runnable subclass
         self._result = {}
+        # Run cache statistics
+        self._num_cache_hits = 0
+        self._num_cache_misses = 0
 
     def get_status(self):
         raise NotImplementedError()
@@ -147,6 +160,8 @@ class Runnable(object):
         self._flag_killed = False
         self._flag_error = False
         self._error_message = ""
+        self._num_cache_hits = 0
+        self._num_cache_misses = 0
         if self.sid.id:
             self.sid.clean(False)
 
@@ -162,6 +177,9 @@ class PFANTExecutable(Runnable):
     # Set at descendant class with a ftpyfant.conf.FOR_* value
     sequence_index = -1
 
+    # Set at descendant class with the names of the FileOptions attributes that point to input files
+    input_options = ()
+
     @property
     def returncode(self):
         return self.__returncode
@@ -208,6 +226,12 @@ class PFANTExecutable(Runnable):
         # Conf instance
         self.__conf = Conf()
 
+    def __getstate__(self):
+        # subprocess.Popen objects cannot be pickled
+        state = self.__dict__.copy()
+        state["_PFANTExecutable__popen"] = None
+        return state
+
     def run(self):
         """Runs executable.
 
@@ -221,6 +245,8 @@ class PFANTExecutable(Runnable):
             self.__run()
         finally:
             self.conf.close_popen_text_dest()
+            if self.conf.scratch is not None:
+                self.conf.scratch.copy_back(self.conf, [self.sequence_index], self.flag_success)
 
     def clean(self):
         """Deletes session directory"""
@@ -244,6 +270,20 @@ class PFANTExecutable(Runnable):
     def get_status(self):
         return self._status
 
+    def get_input_filepaths(self):
+        """Returns OrderedDict {option name: path} of input files (default file names for options
+        not set). Used to make run cache keys"""
+        ret = OrderedDict()
+        for name in self.input_options:
+            path = self.conf.opt.__getattribute__(name)
+            ret[name] = path if path is not None else _get_default_filename(name)
+        return ret
+
+    def get_output_filepaths(self):
+        """Returns OrderedDict {name: path} of main output files. Used to store/restore runs in the
+        run cache. Names must be valid file names"""
+        return OrderedDict()
+
     def _get_sid(self):
         return self.__conf.sid
 
@@ -257,9 +297,25 @@ class PFANTExecutable(Runnable):
 
         s = " ".join(cmd_words)
         self.conf.logger.debug(s)
+
+        run_cache, key, flag_restored = self.conf.run_cache, None, False
+        if run_cache is not None:
+            key = run_cache.get_key(self)
+            flag_restored = run_cache.restore(key, self)
+            if flag_restored:
+                s += "\n# outputs restored from run cache entry '{}'".format(run_cache.get_entry_dir(key))
+
         # logs command-line to file and closes it.
         with open(self.conf.sid.join_with_session_dir("commands.log"), "a") as h:
             h.write(s+"\n\n")
+
+        if flag_restored:
+            self._num_cache_hits += 1
+            self.__returncode = 0
+            self._flag_finished = True
+            self.conf.logger.debug(str(self._status)+" (restored from run cache)")
+            return
+
         emsg = ""
         try:
             self.__popen = subprocess.Popen(cmd_words, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
@@ -306,12 +362,17 @@ class PFANTExecutable(Runnable):
                 self.__returncode = self.__popen.returncode
             self.conf.logger.debug(str(self._status))
 
+        if run_cache is not None and self.__returncode == 0:
+            run_cache.store(key, self)
+            self._num_cache_misses += 1
+
 
 @a99.froze_it
 class Innewmarcs(PFANTExecutable):
     """Class representing the innewmarcs executable."""
 
     sequence_index = FOR_INNEWMARCS
+    input_options = ("fn_main", "fn_modgrid", "fn_moo")
 
     def __init__(self):
         PFANTExecutable.__init__(self)
@@ -320,6 +381,18 @@ class Innewmarcs(PFANTExecutable):
         # FileModBin object
         self.modeles = None
 
+    def get_input_filepaths(self):
+        ret = PFANTExecutable.get_input_filepaths(self)
+        if self.conf.opt.opa == False:
+            del ret["fn_moo"]
+        return ret
+
+    def get_output_filepaths(self):
+        ret = OrderedDict([("modeles", self.conf.get_fn_modeles())])
+        if self.conf.opt.opa != False:
+            ret["opa"] = self.conf.opt.fn_opa or pyfant.FileOpa.default_filename
+        return ret
+
     def load_result(self):
         file_mod = pyfant.FileModBin()
         filepath = self.conf.get_fn_modeles()
@@ -333,11 +406,17 @@ class Hydro2(PFANTExecutable):
     """Class representing the hydro2 executable."""
 
     sequence_index = FOR_HYDRO2
+    input_options = ("fn_main", "fn_modeles", "fn_absoru2", "fn_hmap")
 
     def __init__(self):
         PFANTExecutable.__init__(self)
         self._exe_path = "hydro2"
 
+    def get_output_filepaths(self):
+        """Returns the hydrogen line profiles listed in the hydrogen lines map file"""
+        fn_hmap = self.conf.opt.fn_hmap or pyfant.FileHmap.default_filename
+        return OrderedDict([("th-"+os.path.basename(path), path) for path in _get_hmap_filepaths(fn_hmap)])
+
     def load_result(self):
         """
         Makes self._result["profiles"] = {filename0: FileToH0, filename1: FileToH1, ...}
@@ -367,6 +446,8 @@ class Pfant(PFANTExecutable):
     """Class representing the pfant executable."""
 
     sequence_index = FOR_PFANT
+    input_options = ("fn_main", "fn_modeles", "fn_opa", "fn_absoru2", "fn_hmap", "fn_dissoc",
+                     "fn_partit", "fn_abonds", "fn_atoms", "fn_molecules", "fn_mollist")
 
     def __init__(self):
         PFANTExecutable.__init__(self)
@@ -405,6 +486,27 @@ class Pfant(PFANTExecutable):
                     pass
         return ret
 
+    def get_input_filepaths(self):
+        """Also includes hydrogen line profiles listed in the hydrogen lines map file"""
+        ret = PFANTExecutable.get_input_filepaths(self)
+        opt = self.conf.opt
+        if opt.opa == False:
+            del ret["fn_opa"]
+        if opt.no_atoms:
+            del ret["fn_atoms"]
+        if opt.no_molecules:
+            del ret["fn_molecules"]
+        if opt.no_h:
+            del ret["fn_hmap"]
+        else:
+            for path in _get_hmap_filepaths(ret["fn_hmap"]):
+                ret["th-"+os.path.basename(path)] = path
+        return ret
+
+    def get_output_filepaths(self):
+        return OrderedDict([(type_, self.conf.get_pfant_output_filepath(type_))
+                            for type_ in ("spec", "cont", "norm")])
+
     def load_result(self):
 
         for type_ in ("norm", "cont", "spec"):
@@ -420,6 +522,7 @@ class Nulbad(PFANTExecutable):
     """Class representing the nulbad executable."""
 
     sequence_index = FOR_NULBAD
+    input_options = ("fn_main", "fn_flux")
 
     def __init__(self):
         PFANTExecutable.__init__(self)
@@ -428,6 +531,16 @@ class Nulbad(PFANTExecutable):
         # nulbad output
         self.convolved = None
 
+    def get_input_filepaths(self):
+        ret = PFANTExecutable.get_input_filepaths(self)
+        if self.conf.opt.fn_flux is None:
+            # nulbad reads pfant output
+            ret["fn_flux"] = self.conf.get_pfant_output_filepath("spec" if self.conf.opt.norm == False else "norm")
+        return ret
+
+    def get_output_filepaths(self):
+        return OrderedDict([("convolved", self.conf.get_nulbad_output_filepath())])
+
     def load_result(self):
         file_sp = pyfant.FileSpectrumNulbad()
         filepath = self.conf.get_nulbad_output_filepath()
@@ -499,6 +612,14 @@ class Combo(Runnable):
     def conf(self, x):
         self.__conf = x
 
+    @property
+    def num_cache_hits(self):
+        return sum(e.num_cache_hits for e in self.get_exes())
+
+    @property
+    def num_cache_misses(self):
+        return sum(e.num_cache_misses for e in self.get_exes())
+
     def __init__(self, sequence=None):
         Runnable.__init__(self)
         # # Configuration
@@ -521,20 +642,23 @@ class Combo(Runnable):
 
         # ** Internal variables
         self.__running_exe = None  # PFANTExecutable object currently running
+        # UpstreamOutputs if innewmarcs/hydro2 outputs are taken from a shared Combo
+        # (see RunnableManager flag_share_upstream); set by the manager, cleared by reset()
+        self._upstream = None
         # ComboStatus instance
         self.__status = RunnableStatus(self)
         # Conf instance
         self.__conf = Conf()
 
     def get_exes(self):
-        """Returns exe objects in a list according with self.sequence."""
+        """Returns exe objects in a list according with self.sequence, except the stages whose
+        outputs are taken from a shared Combo"""
 
         map = [(FOR_INNEWMARCS, self.__innewmarcs), (FOR_HYDRO2, self.__hydro2), (FOR_PFANT, self.__pfant),
                (FOR_NULBAD, self.__nulbad)]
         res = []
         ii, ee = list(zip(*map))
-        self.__sequence.sort()
-        for i_exe in self.__sequence:
+        for i_exe in self.__get_sequence_to_run():
             if i_exe in ii:
                 res.append(ee[ii.index(i_exe)])
         return res
@@ -543,8 +667,11 @@ class Combo(Runnable):
         assert not self._flag_running, "Already running"
         assert not self._flag_finished, "Already finished"
         self._flag_running = True
+        sequence = self.__get_sequence_to_run()
+        upstream = self._upstream
+        saved = upstream.apply(self.conf) if upstream is not None else None
         try:
-            self.conf.configure(self.__sequence)
+            self.conf.configure(sequence)
             self.conf.logger.debug("Running %s '%s'" % (self.__class__.__name__.lower(), self.name))
             for e in self.get_exes():
                 self.__running_exe = e
@@ -558,6 +685,10 @@ class Combo(Runnable):
             self.conf.close_popen_text_dest()
             self._flag_running = False
             self._flag_finished = True
+            if self.conf.scratch is not None:
+                self.conf.scratch.copy_back(self.conf, sequence, self.flag_success)
+            if upstream is not None:
+                upstream.restore(self.conf, saved)
 
     def load_result(self):
         """Calls load_result() for all contained executables, then collects all into self._result"""
@@ -590,6 +721,34 @@ class Combo(Runnable):
         ee = self.get_exes()
         for e in ee:
             e.reset()
+        self._upstream = None
+
+    def __get_sequence_to_run(self):
+        self.__sequence.sort()
+        if self._upstream is None:
+            return self.__sequence
+        return [x for x in self.__sequence if x not in self._upstream.stages]
 
     def _get_sid(self):
         return self.__conf.sid
+
+
+def _get_default_filename(option_name):
+    """Returns default file name for FileOptions attribute "fn_<something>" pointing to input file"""
+    name = option_name[3:]
+    if name == "modgrid":
+        return "grid.mod"
+    cls = {"modeles": pyfant.FileModBin, "opa": pyfant.FileOpa}.get(name)
+    if cls is None:
+        cls = getattr(pyfant, "File"+name.capitalize())
+    return cls.default_filename
+
+
+def _get_hmap_filepaths(fn_hmap):
+    """Returns list of hydrogen line profile file paths in hydrogen lines map file (if it exists)"""
+    if not os.path.isfile(fn_hmap):
+        return []
+    f = pyfant.FileHmap()
+    f.load(fn_hmap)
+    # directories may be quoted (see Conf.rename_outputs())
+    return [row.fn.strip("'\"") for row in f.rows]
@@ -0,0 +1,97 @@
+"""
+Session directories on fast scratch storage (e.g. tmpfs), removed in bulk
+"""
+
+__all__ = ["ScratchSessions", "get_scratch_root"]
+
+
+import os
+import shutil
+import tempfile
+import a99
+import pyfant
+from .conf import *
+
+
+def get_scratch_root():
+    """Returns pyfant.SCRATCH_ROOT if it is a writable directory, otherwise the system temporary
+    directory"""
+    root = pyfant.SCRATCH_ROOT
+    if root and os.path.isdir(root) and os.access(root, os.W_OK | os.X_OK):
+        return root
+    return tempfile.gettempdir()
+
+
+class ScratchSessions(object):
+    """
+    Creates session directories under a fast scratch root instead of the current directory
+
+    Args:
+        root: directory to create the scratch directory in. Defaults to get_scratch_root()
+        output_dir: (optional) directory to copy the declared outputs to after each run. If not
+                    passed, outputs stay in scratch until clean() (results can be loaded anyway)
+
+    All sessions go into one scratch directory ("<root>/pyfant-XXXXXXXX"), so that clean() removes
+    them with a single call. Runnables (Combo or PFANTExecutable) are put into scratch by attach().
+
+    Declared outputs are: innewmarcs "modeles.mod", pfant ".norm" file and nulbad convolved
+    spectrum. They are copied to output_dir as "<session directory name>-<file name>", e.g.
+    "session-12-flux.norm", so that no directory is created per session. If a run fails, its
+    "commands.log" and "fortran.log" are copied instead. Files written outside scratch (e.g., if
+    Conf.flag_output_to_dir is not set) are already in place and are not copied.
+    """
+
+    def __init__(self, root=None, output_dir=None):
+        self.root = root if root is not None else get_scratch_root()
+        self.output_dir = output_dir
+        self.dir = tempfile.mkdtemp(prefix="pyfant-", dir=self.root)
+        self.id_maker = IdMaker()
+        self.id_maker.session_prefix_singular = os.path.join(self.dir, pyfant.SESSION_PREFIX_SINGULAR)
+        # number of files copied to output_dir (by this process)
+        self.num_copied = 0
+
+    def attach(self, runnable):
+        """Makes runnable create its session directory in scratch. Call before running"""
+        conf = runnable.conf
+        conf.sid.id_maker = self.id_maker
+        conf.sid.flag_split_dirs = False
+        conf.scratch = self
+
+    def get_outputs(self, conf, sequence, flag_success=True):
+        """Returns list of paths to files to be copied back after conf's session has run sequence"""
+        if not flag_success:
+            return [conf.sid.join_with_session_dir(x) for x in ("commands.log", "fortran.log")]
+        ret = []
+        if FOR_INNEWMARCS in sequence:
+            ret.append(conf.get_fn_modeles())
+        if FOR_PFANT in sequence:
+            ret.append(conf.get_pfant_output_filepath("norm"))
+        if FOR_NULBAD in sequence:
+            ret.append(conf.get_nulbad_output_filepath())
+        return ret
+
+    def copy_back(self, conf, sequence, flag_success=True):
+        """Copies outputs of conf's session to output_dir (see get_outputs()). Returns list of new paths"""
+        ret = []
+        if self.output_dir is None or conf.sid.dir is None:
+            return ret
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.basename(conf.sid.dir)+"-"
+        dir_ = os.path.abspath(self.dir)+os.sep
+        for path in self.get_outputs(conf, sequence, flag_success):
+            if not os.path.abspath(path).startswith(dir_):
+                continue
+            if not os.path.isfile(path):
+                if flag_success:
+                    a99.get_python_logger().warning("Output file '{}' not found".format(path))
+                continue
+            new_path = os.path.join(self.output_dir, prefix+os.path.basename(path))
+            shutil.copyfile(path, new_path)
+            ret.append(new_path)
+        self.num_copied += len(ret)
+        return ret
+
+    def clean(self):
+        """Deletes scratch directory with all sessions inside"""
+        a99.get_python_logger().debug("About to remove directory '%s'" % self.dir)
+        shutil.rmtree(self.dir, ignore_errors=True)
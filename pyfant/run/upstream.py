@@ -0,0 +1,140 @@
+"""
+innewmarcs/hydro2 runs shared among Combos with identical atmospheres (see RunnableManager)
+"""
+
+__all__ = ["get_upstream_key", "SharedUpstream", "UpstreamOutputs"]
+
+
+import copy
+import os
+import pyfant
+from .conf import *
+from .runnables import *
+
+
+# Executables whose results can be shared, i.e., do not depend on abundances, atomic or molecular lines
+UPSTREAM_SEQUENCE = (FOR_INNEWMARCS, FOR_HYDRO2)
+
+# Main configuration attributes that innewmarcs/hydro2 results depend on
+_MAIN_ATTRS = ("teff", "glog", "asalog", "nhe", "inum", "ptdisk", "mu", "llzero", "llfin")
+
+# Command-line options that innewmarcs/hydro2 results depend on
+_OPTIONS = ("fn_modgrid", "fn_moo", "allow", "opa", "fn_absoru2", "llzero", "llfin", "zph",
+            "kik", "amores", "kq")
+
+
+def get_upstream_key(combo):
+    """Returns key identifying the innewmarcs/hydro2 part of combo's sequence, or None if combo
+    does not run any of these, or only these
+
+    Combos with equal keys (e.g., differing only in abundances or lines) will have the same
+    atmospheric model and hydrogen line profiles.
+    """
+    if not isinstance(combo, Combo) or combo.flag_finished:
+        return None
+    stages = tuple(x for x in UPSTREAM_SEQUENCE if x in combo.sequence)
+    if not stages or len(stages) == len(combo.sequence):
+        return None
+
+    conf, opt = combo.conf, combo.conf.opt
+    file_main = conf.get_file_main()
+    ret = [stages, combo.innewmarcs.exe_path, combo.hydro2.exe_path,
+           [(name, getattr(file_main, name)) for name in _MAIN_ATTRS],
+           [(name, getattr(opt, name)) for name in _OPTIONS]]
+    if FOR_INNEWMARCS not in stages:
+        ret.append(os.path.abspath(conf.get_fn_modeles()))
+    if FOR_HYDRO2 in stages:
+        if conf.file_hmap is not None:
+            ret.append([(os.path.basename(row.fn.strip("'\"")), row.na, row.nb, row.clam, row.kiex, row.c1)
+                        for row in conf.file_hmap.rows])
+        else:
+            ret.append(os.path.abspath(opt.fn_hmap or pyfant.FileHmap.default_filename))
+    return repr(ret)
+
+
+class SharedUpstream(object):
+    """
+    Combo running innewmarcs and/or hydro2 once for several dependent Combos
+
+    Args:
+        combo: first dependent Combo, whose configuration is copied
+
+    The shared Combo creates its outputs inside its own session directory. When it has finished,
+    attach() makes each dependent skip innewmarcs/hydro2 and use these outputs instead, while it runs.
+    """
+
+    def __init__(self, combo):
+        self.stages = [x for x in UPSTREAM_SEQUENCE if x in combo.sequence]
+        self.combo = up = Combo(self.stages)
+        up.name = "upstream-"+up.name
+        up.exe_dir = combo.exe_dir
+        up.innewmarcs.exe_path = combo.innewmarcs.exe_path
+        up.hydro2.exe_path = combo.hydro2.exe_path
+        conf = combo.conf
+        up.conf.opt = copy.copy(conf.opt)
+        up.conf.file_main = conf.file_main
+        # rows will have session directory added (see Conf.rename_outputs())
+        up.conf.file_hmap = copy.deepcopy(conf.file_hmap)
+        up.conf.flag_output_to_dir = True
+        up.conf.flag_log_console = conf.flag_log_console
+        up.conf.flag_log_file = conf.flag_log_file
+        up.conf.sid.id_maker = conf.sid.id_maker
+        up.conf.sid.flag_split_dirs = conf.sid.flag_split_dirs
+        up.conf.input_store = conf.input_store
+        up.conf.scratch = conf.scratch
+        up.conf.run_cache = conf.run_cache
+        # key returned by get_upstream_key()
+        self.key = None
+        # whether the shared Combo has finished successfully and dependents can be attached
+        self.flag_released = False
+        # indexes (in RunnableManager) of the dependent Combos waiting for the shared Combo
+        self.dependents = []
+        # number of dependents not finished yet
+        self.num_pending = 0
+        # whether all dependents have succeeded so far
+        self.flag_dependents_ok = True
+        # UpstreamOutputs, created when first dependent is attached
+        self.outputs = None
+
+    def attach(self, combo):
+        """Makes combo use the outputs of the shared Combo (which must have finished successfully)
+
+        combo's configuration is not changed (see UpstreamOutputs)
+        """
+        if self.outputs is None:
+            self.outputs = UpstreamOutputs(self.combo, self.stages)
+        combo._upstream = self.outputs
+
+
+class UpstreamOutputs(object):
+    """
+    Outputs of a shared innewmarcs/hydro2 Combo, taken by a dependent Combo instead of running these
+    stages itself
+
+    Args:
+        up: shared Combo, finished
+        stages: stages of up
+
+    Combo.run() skips the stages, applies the outputs to the configuration, and restores the
+    original values when it has finished
+    """
+
+    def __init__(self, up, stages):
+        self.stages = list(stages)
+        self.fn_modeles = up.conf.opt.fn_modeles
+        self.fn_opa = up.conf.opt.fn_opa
+        # rows with session directory of up
+        self.file_hmap = up.conf.file_hmap
+
+    def apply(self, conf):
+        """Points conf to the outputs. Returns values to pass to restore()"""
+        ret = conf.opt.fn_modeles, conf.opt.fn_opa, conf.file_hmap
+        if FOR_INNEWMARCS in self.stages:
+            conf.opt.fn_modeles = self.fn_modeles
+            conf.opt.fn_opa = self.fn_opa
+        if FOR_HYDRO2 in self.stages:
+            conf.file_hmap = copy.deepcopy(self.file_hmap)
+        return ret
+
+    def restore(self, conf, saved):
+        conf.opt.fn_modeles, conf.opt.fn_opa, conf.file_hmap = saved
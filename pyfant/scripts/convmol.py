@@ -1,19 +1,64 @@
 #!/usr/bin/env python
 
-"""Conversion of molecular lines data to PFANT format"""
+"""Conversion of molecular lines data to PFANT format
+
+Opens the conversion GUI, unless option "--manifest" is used, in which case the conversions listed in the
+manifest file are run in parallel, without GUI.
+
+The manifest is a Python file defining a list named "jobs", each item being a dict with the arguments of
+pyfant.ConvJob, for example:
+
+    jobs = [
+        {"fn_input": "ohax.asc", "system_str": "OH [A 2 Sigma - X 2 Pi]", "converter": "kurucz",
+         "options": {"iso": 16, "flag_spinl": True}},
+        {"fn_input": "cnax.dat", "system_str": "CN [A 2 Pi - X 2 Sigma]", "converter": "plez",
+         "fn_output": "cn-pfant.dat", "options": {"species": "Sneden web"}},
+    ]
+
+Converters available: kurucz, plez, hitran160, brooke2014
+"""
 
 import sys
 import argparse
 import a99
 import logging
 import os
+import runpy
 import pyfant
+import tabulate
 
 
 a99.logging_level = logging.INFO
 a99.flag_log_file = True
 
 
+def run_manifest(fn_manifest, max_workers, fn_moldb, fn_report, fn_cache):
+    jobs = [pyfant.ConvJob(**kwargs) for kwargs in runpy.run_path(fn_manifest)["jobs"]]
+    print("{} conversion{} in manifest '{}'".format(len(jobs), "s" if len(jobs) != 1 else "", fn_manifest))
+
+    results = pyfant.convert_many(jobs, max_workers, fn_moldb, fn_cache)
+
+    rows, lines = [], []
+    for job, log, error in results:
+        status = error if error is not None else "ok" if log.flag_ok else "not possible"
+        rows.append((job.fn_input, job.system_str, job.fn_output,
+                     "" if log is None else "{}/{}".format(log.cnt_in, log.num_lines), status))
+        lines.extend(a99.format_box("{} ({})".format(job.fn_input, job.system_str)))
+        if log is not None:
+            lines.append(str(log))
+        if error is not None:
+            lines.append("Conversion failed: {}".format(error))
+        lines.append("")
+    lines.extend(a99.format_box("Total"))
+    lines.append(str(pyfant.sum_conversion_logs([x[1] for x in results])))
+
+    with open(fn_report, "w") as h:
+        h.write("\n".join(lines)+"\n")
+
+    print(tabulate.tabulate(rows, ["Input", "System", "Output", "Lines converted", "Status"]))
+    print("Saved report '{}'".format(fn_report))
+
+
 if __name__ == "__main__":
 
     deffn = pyfant.FileMolDB.default_filename
@@ -26,8 +71,25 @@ if __name__ == "__main__":
                         default=pyfant.FileMolConsts.default_filename, nargs='?')
     parser.add_argument('--fn_config', type=str, help='File name for {}'.format(pyfant.FileConfigConvMol.description),
                         default=pyfant.FileConfigConvMol.default_filename, nargs='?')
+    parser.add_argument('--manifest', type=str, help='manifest file name: runs conversions listed therein without GUI')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+                        help='(with --manifest) number of worker processes (default: number of processors)')
+    parser.add_argument('--fn_moldb', type=str, default=None,
+                        help='(with --manifest) File name for {} (default: creates default database)'.format(
+                        pyfant.FileMolDB.description))
+    parser.add_argument('--fn_report', type=str, default="convmol-report.txt",
+                        help='(with --manifest) File name for conversion report')
+    parser.add_argument('--fn_cache', type=str, default=None,
+                        help='File name for line strengths cache, loaded at start and (without --manifest) saved at exit')
     args = parser.parse_args()
 
+    if args.manifest:
+        run_manifest(args.manifest, args.processes, args.fn_moldb, args.fn_report, args.fn_cache)
+        sys.exit()
+
+    if args.fn_cache and os.path.isfile(args.fn_cache):
+        pyfant.sj_cache.load(args.fn_cache)
+
     _fnfn = [args.fn_molconsts, args.fn_config]
     fnfn = [None if fn is None or not os.path.isfile(fn) else fn for fn in _fnfn]
 
@@ -35,6 +97,10 @@ if __name__ == "__main__":
     form = pyfant.XConvMol()
     form.load_many(fnfn)
     form.show()
-    sys.exit(app.exec_())
+    ret = app.exec_()
+    if args.fn_cache:
+        pyfant.sj_cache.save(args.fn_cache)
+        a99.get_python_logger().info("Line strengths cache: {}".format(pyfant.sj_cache.get_info()))
+    sys.exit(ret)
 
 
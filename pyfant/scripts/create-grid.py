@@ -30,6 +30,9 @@ References:
 """
 
 import argparse
+import collections
+import concurrent.futures
+import itertools
 import logging
 import glob
 import os
@@ -42,6 +45,62 @@ a99.logging_level = logging.INFO
 a99.flag_log_file = True
 
 
+def _sort_key(r):
+    return r.asalog*1e10+r.teff*100+r.glog
+
+
+def _load_records(filename, mode):
+    """Loads model(s) from file(s). Returns (list of records, error message or None)
+
+    Modes as in command line, plus "modtxt-header" (MARCS ".mod" text file, used to sort the models
+    before loading their ".opa" files).
+    """
+    try:
+        if mode == "opa":
+            name = os.path.splitext(filename)[0]
+            print("Considering files '{0!s}'+('.mod', '.opa') ...".format(os.path.basename(name)))
+            f = pyfant.FileModTxt()
+            f.load(filename)
+            g = pyfant.FileOpa()
+            g.load(name+".opa")
+            r = pyfant.MooRecord()
+            r.from_marcs_files(f, g)
+            return [r], None
+        if mode != "modtxt-header":
+            print("Considering file '{0!s}' ...".format(os.path.basename(filename)))
+        if mode in ("modtxt", "modtxt-header"):
+            f = pyfant.FileModTxt()
+            f.load(filename)
+            return [f.record], None
+        else:
+            f = pyfant.FileModBin()
+            f.load(filename)
+            return f.records, None
+    except Exception as e:
+        a99.get_python_logger().exception("Error loading '{0!s}', skipping...".format(filename))
+        return [], str(e)
+
+
+def _iter_opa_records(executor, filenames, skipped, reasons, window):
+    """Yields MooRecord objects in the order of filenames, loading them in parallel
+
+    At most window files are submitted to executor and not yet yielded at a time; the next file is
+    submitted as each one is yielded, so that memory use does not grow with the number of files
+    """
+    filenames = iter(filenames)
+    pending = collections.deque((filename, executor.submit(_load_records, filename, "opa"))
+                                for filename in itertools.islice(filenames, window))
+    while pending:
+        filename, future = pending.popleft()
+        records, error = future.result()
+        for filename_ in itertools.islice(filenames, 1):
+            pending.append((filename_, executor.submit(_load_records, filename_, "opa")))
+        if error is not None:
+            skipped.append(os.path.splitext(os.path.basename(filename))[0])
+            reasons.append(error)
+        yield from records
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
      description=__doc__,
@@ -52,6 +111,8 @@ if __name__ == "__main__":
     parser.add_argument('-m', '--mode', type=str, nargs="?", default="opa",
      choices=["opa", "modtxt", "modbin"],
      help='working mode (see description above)')
+    parser.add_argument('-p', '--processes', type=int, default=None,
+     help='number of worker processes to load the files (default: number of processors)')
     VDOM = "\"grid.moo\" or \"grid.mod\", depending on mode"
     parser.add_argument('fn_output', type=str, help='output file name', nargs="?",
      default=VDOM)
@@ -68,58 +129,41 @@ if __name__ == "__main__":
     n = len(filenames)
     print("{0:d} file{1!s} matching pattern '{2!s}'".format(n, "s" if n != 1 else "", args.pattern))
 
-    records = []
     skipped, reasons = [], []
-    for filename in filenames:
+    with concurrent.futures.ProcessPoolExecutor(args.processes) as executor:
+        # In "opa" mode, first reads the ".mod" files only, to sort the models; then the models
+        # with their opacities are loaded in parallel (a bounded number of them ahead) and written
+        # as they arrive, in order, so that the grid is never whole in memory
+        records = []
+        for filename, (records_, error) in zip(filenames, executor.map(
+          _load_records, filenames, ["modtxt-header" if args.mode == "opa" else args.mode]*n)):
+            if error is not None:
+                skipped.append(os.path.splitext(os.path.basename(filename))[0]
+                               if args.mode == "opa" else filename)
+                reasons.append(error)
+            records.extend((r, filename) for r in records_)
+
+        if len(records) == 0:
+            print("No valid models found, nothing to save.")
+            sys.exit()
+
+        records.sort(key=lambda x: _sort_key(x[0]))
+
+        num_skipped = len(skipped)
         if args.mode == "opa":
-            name = os.path.splitext(os.path.basename(filename))[0]
-            print("Considering files '{0!s}'+('.mod', '.opa') ...".format(name))
-            try:
-                f = pyfant.FileModTxt()
-                f.load(filename)
-                g = pyfant.FileOpa()
-                g.load(name+".opa")
-                r = pyfant.MooRecord()
-                r.from_marcs_files(f, g)
-                records.append(r)
-            except BaseException as e:
-                logger.exception("Error loading '{0!s}', skipping...".format(name))
-                skipped.append(name)
-                reasons.append(str(e))
+            g = pyfant.FileMoo()
+            window = 2*(args.processes or os.cpu_count() or 1)
+            g.records = _iter_opa_records(executor, [x[1] for x in records], skipped, reasons, window)
         else:
-            nameext = os.path.basename(filename)
-            print("Considering file '{0!s}'+('.mod', '.opa') ...".format(nameext))
-            try:
-                if args.mode == "modtxt":
-                    f = pyfant.FileModTxt()
-                    f.load(filename)
-                    records.append(f.record)
-                else:
-                    f = pyfant.FileModBin()
-                    f.load(filename)
-                    records.extend(f.records)
-            except BaseException as e:
-                logger.exception("Error loading file '{0!s}', skipping...".format(filename))
-                skipped.append(filename)
-                reasons.append(str(e))
-
-    if len(records) == 0:
-        print("No valid models found, nothing to save.")
-        sys.exit()
-
-    records.sort(key=lambda r: r.asalog*1e10+r.teff*100+r.glog)
-
-    if args.mode == "opa":
-        g = pyfant.FileMoo()
-    else:
-        g = pyfant.FileModBin()
-    g.records = records
-    g.save_as(args.fn_output)
+            g = pyfant.FileModBin()
+            g.records = [x[0] for x in records]
+        g.save_as(args.fn_output)
+        num_records = len(records)-(len(skipped)-num_skipped)
 
     if skipped:
         logger.info("\n".join(a99.format_box(f"Files skipped ({len(skipped)})")))
         logger.info(tabulate.tabulate(zip(skipped, reasons), ["Name", "Reason"]))
 
-    logger.info(f"Final number of records: {len(records)}")
+    logger.info(f"Final number of records: {num_records}")
 
     print("Successfully created file '{0!s}'".format(args.fn_output))
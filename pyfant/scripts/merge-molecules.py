@@ -22,36 +22,46 @@ _PREFIX = "molecules-merged-"
 
 
 def main(fns_input, fn_output):
-    ffmol = []
+    # Files are read through without parsing the lines, to skip the ones that cannot be copied;
+    # molecules are then copied from input to output by write_molecule_blocks()
+    fns, nv = [], []
     for fn in fns_input:
-        fmol = pyfant.FileMolecules()
         try:
-            fmol.load(fn)
+            _, nv_ = pyfant.read_molecules_header(fn)
+            for _ in pyfant.iter_molecule_blocks(fn):
+                pass
             print("File '{}': {} molecule{}".format(
                 fn,
-                len(fmol),
-                "" if len(fmol) == 1 else "s"
+                len(nv_),
+                "" if len(nv_) == 1 else "s"
             ))
-            ffmol.append(fmol)
+            fns.append(fn)
+            nv.extend(nv_)
         except:
             a99.get_python_logger().exception("Skipping file '{}'".format(fn))
 
-    n = len(ffmol)
+    n = len(fns)
 
-    fout = pyfant.FileMolecules()
-    fout.titm = "Merge of {} file{}: {}".format(
+    titm = "Merge of {} file{}: {}".format(
         n,
         "s" if n != 1 else "",
-        ", ".join([os.path.split(fmol.filename)[1] for fmol in ffmol]))
+        ", ".join([os.path.split(fn)[1] for fn in fns]))
 
-    for fmol in ffmol:
-        fout.molecules.extend(fmol.molecules)
-    print("Number of molecules in output: {}".format(len(fout)))
+    print("Number of molecules in output: {}".format(len(nv)))
 
     if fn_output is None:
         fn_output = a99.new_filename(_PREFIX, ".dat")
 
-    fout.save_as(fn_output)
+    # Writes to temporary file first, so that an error does not leave a truncated output file
+    blocks = (block for fn in fns for block in pyfant.iter_molecule_blocks(fn))
+    fn_temp = "{}.tmp{}".format(fn_output, os.getpid())
+    try:
+        pyfant.write_molecule_blocks(fn_temp, titm, nv, blocks)
+        os.replace(fn_temp, fn_output)
+    except:
+        if os.path.isfile(fn_temp):
+            os.remove(fn_temp)
+        raise
     print("Saved file '{}'".format(fn_output))
 
 if __name__ == "__main__":
@@ -33,6 +33,10 @@ if __name__ == "__main__":
                         help="Name of file specifying different abundances and FWHM's")
     parser.add_argument("-s", "--custom_session_id", type=str, default=DEFAULT_SESSION_ID,
                         help="Name of directory where output files will be saved")
+    parser.add_argument("--run_cache", type=str, nargs="?", const=pyfant.RUN_CACHE_DIR, default=None,
+                        help="Skips executables whose inputs have not changed since they last ran, "
+                             "copying their outputs from cache directory RUN_CACHE instead "
+                             "(default: '%s')" % pyfant.RUN_CACHE_DIR)
     args = parser.parse_args()
 
     # Makes FileOptions object
@@ -49,7 +53,8 @@ if __name__ == "__main__":
     oabxfwhm = pyfant.FileAbXFwhm()
     oabxfwhm.load(args.fn_abxfwhm)
 
-    r = pyfant.MultiRunnable(omain, oabonds, oopt, oabxfwhm)
+    run_cache = pyfant.RunCache(args.run_cache) if args.run_cache is not None else None
+    r = pyfant.MultiRunnable(omain, oabonds, oopt, oabxfwhm, run_cache=run_cache)
     if args.custom_session_id != DEFAULT_SESSION_ID:
         custom_id = args.custom_session_id
         if pyfant.get_custom_multisession_dirname(custom_id) == custom_id:
@@ -60,3 +65,6 @@ if __name__ == "__main__":
     r.run()
 
     logger.info("Session directory: {}".format(r.sid.dir))
+    if run_cache is not None:
+        logger.info("Executables restored from run cache: {}/{}".format(
+                    r.num_cache_hits, r.num_cache_hits+r.num_cache_misses))
@@ -26,6 +26,10 @@ if __name__ == "__main__":
     for name in names:
         # name = name.replace('_', '-')
         parser.add_argument("--"+name, type=str, help='')
+    parser.add_argument("--run_cache", type=str, nargs="?", const=pyfant.RUN_CACHE_DIR, default=None,
+                        help="Skips executables whose inputs have not changed since they last ran, "
+                             "copying their outputs from cache directory RUN_CACHE instead "
+                             "(default: '%s')" % pyfant.RUN_CACHE_DIR)
 
     args = parser.parse_args()
 
@@ -43,5 +47,10 @@ if __name__ == "__main__":
         if x is not None:
             c.conf.opt.__setattr__(name, x)
 
+    if args.run_cache is not None:
+        c.conf.run_cache = pyfant.RunCache(args.run_cache)
+
     c.run()
     logger.info("Session directory: %s" % c.conf.sid.dir)
+    if args.run_cache is not None:
+        logger.info("Executables restored from run cache: %d/%d" % (c.num_cache_hits, len(c.get_exes())))
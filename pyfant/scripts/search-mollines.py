@@ -1,7 +1,10 @@
 """
-Searches molecular lines around given wavelength interval
+Searches molecular (or atomic) lines around given wavelength(s)
 
 Included inverval will be central_lambda-tolerance <= line_wavelength <= central_lambra+tolerance.
+
+Many central wavelengths may be given at once, in the command line and/or in a text file (first column),
+e.g., to identify the features of an observed spectrum. Results are shown in a single table.
 """
 
 import argparse, logging, a99, pyfant, tabulate
@@ -12,7 +15,7 @@ a99.flag_log_file = False
 
 
 # Searching which molecule and (v', v'') has line with given wavelength
-import pyfant, f311, a99, a107
+import f311
 
 # FILENAME = "molecules.dat"
 # FILENAME = "CO_dV11_stable.PFANT.dat"
@@ -32,36 +35,46 @@ def pprint(s):
 
 
 def main(args):
-    central_lambda = args.central_lambda
-    tolerance = args.tolerance
-    l0 = central_lambda-tolerance
-    l1 = central_lambda+tolerance
-
-    f = pyfant.FileMolecules()
-    f.load(args.fn_input)
-
-    mols = []
-    rows = []
-    header = ["Molecule #", "Set-of-lines #", "vl", "v2l", "lmbdam", "sj", "jj", "branch"]
-    floatfmts = ["", "", "", "", ".4f", "", "", ""]
-
-    for i_m, mol in enumerate(f.molecules):
-        found = False
-        for i_s, sol_ in enumerate(mol.sol):
-            for i, (lmbdam, sj, jj, branch) in enumerate(zip(sol_.lmbdam, sol_.sj, sol_.jj, sol_.branch)):
-                if l0 <= lmbdam <= l1:
-                    rows.append([i_m+1, i_s+1, sol_.vl, sol_.v2l, lmbdam, sj, jj, branch])
-
-                    if not found:
-                        mols.append([i_m+1, mol.description])
-                        found = True
+    central_lambdas = list(args.central_lambda)
+    if args.input_list:
+        central_lambdas.extend(_read_lambdas(args.input_list))
+    if len(central_lambdas) == 0:
+        raise RuntimeError("No central wavelength given")
+
+    f = f311.load_with_classes(args.fn_input, [pyfant.FileMolecules, pyfant.FileAtoms])
+    if f is None:
+        raise RuntimeError("Could not load '{}' as molecular or atomic lines file".format(args.fn_input))
+
+    index = pyfant.LineIndex(f)
+    iq, rows = index.search(central_lambdas, args.tolerance)
+
+    header = ["Query #", "Central lambda"]+index.get_header()
+    floatfmts = [".4f" if name in ("Central lambda", "lmbdam", "lambda_") else "g" for name in header]
+    table = [[i+1, central_lambdas[i]]+row for i, row in zip(iq.tolist(), index.get_table(rows))]
 
     pprint("\n"+"\n".join(a99.format_box("Lines found")))
-    pprint(tabulate.tabulate(rows, header, floatfmt=floatfmts))
-    pprint("\n"+"\n".join(a99.format_box("Molecules indexes from table above")))
-    pprint(tabulate.tabulate(mols, ["Molecule #", "Description"]))
+    pprint(tabulate.tabulate(table, header, floatfmt=floatfmts))
+
+    if index.flag_molecules:
+        mols = [[i_m+1, f.molecules[i_m].description] for i_m in sorted(set(index.i_group[rows].tolist()))]
+        pprint("\n"+"\n".join(a99.format_box("Molecules indexes from table above")))
+        pprint(tabulate.tabulate(mols, ["Molecule #", "Description"]))
+
+    missing = sorted(set(range(len(central_lambdas)))-set(iq.tolist()))
+    if missing:
+        pprint("\nNo lines found for {} central wavelength(s): {}".format(
+            len(missing), ", ".join(str(central_lambdas[i]) for i in missing)))
 
 
+def _read_lambdas(filename):
+    """Reads central wavelengths from first column of text file, skipping blank and "#" rows"""
+    ret = []
+    with open(filename, "r") as h:
+        for s in h:
+            s = s.strip()
+            if s and not s.startswith("#"):
+                ret.append(float(s.split()[0]))
+    return ret
 
 
 if __name__ == "__main__":
@@ -69,11 +82,13 @@ if __name__ == "__main__":
      description=__doc__,
      formatter_class=a99.SmartFormatter
      )
-    parser.add_argument('central_lambda', type=float,
-     help='Central wavelength (angstrom)')
-    parser.add_argument('fn_input', type=str, help='input file name')
+    parser.add_argument('central_lambda', type=float, nargs="*",
+     help='Central wavelength(s) (angstrom)')
+    parser.add_argument('fn_input', type=str, help='input file name (molecular or atomic lines)')
     parser.add_argument('-t', "--tolerance", type=float, default=0.5,
                         help='Wavelength tolerance around central wavelength (left and right)')
+    parser.add_argument('-i', "--input-list", type=str,
+                        help='Text file containing central wavelengths in its first column')
 
     args = parser.parse_args()
 
@@ -40,19 +40,14 @@ def slugify(s):
     return ret
 
 def main(fn_input):
-    f = pyfant.FileMolecules()
-    f.load(fn_input)
-
     prefix = os.path.splitext(fn_input)[0]
+    titm = f"Generated by split-molecules.py from '{fn_input}'"
 
     basenames = []
-    for mol in f.molecules:
-        fo = pyfant.FileMolecules()
-        fo.molecules = [mol]
-        fo.titm = f"Generated by split-molecules.py from '{fn_input}'"
-
+    # Molecules are copied as text, one at a time, without parsing the lines
+    for block in pyfant.iter_molecule_blocks(fn_input):
         # Makes filename, caring for repeating descriptions
-        slug = slugify(mol.description)
+        slug = slugify(block.description)
         _basename = basename = f"{prefix}-split-{slug}"
         n = 0
         while basename in basenames:
@@ -67,7 +62,7 @@ def main(fn_input):
         if os.path.isfile(fn_output):
             a99.get_python_logger().warning(f"Overwritting file '{fn_output}'")
 
-        fo.save_as(fn_output)
+        pyfant.write_molecule_blocks(fn_output, titm, [block.nv], [block])
         pprint(f"Saved file '{fn_output}'")
 
 
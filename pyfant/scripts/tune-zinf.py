@@ -18,13 +18,21 @@ Note: the precision in the zinf found depends on the calculation step ("pas")
 specified in main.dat. A higher "pas" means lower precision and a tendency to
 get higher zinf's. This is really not critical. pas=0.02 or pas=0.04 should do.
 
+Batched mode (option "--batch"): instead of one pfant run per line, packs up
+to BATCH lines into each pfant run. Lines in the same run are at least
+2*MAX angstrom apart, so that no line reaches the [lambda-MAX, lambda]
+calculation window of another. Then the normalized spectrum is split back
+into the per-line windows. Option "--check" re-runs some lines one by one
+and compares the results.
+
 """
 
 import argparse
 import logging
-import copy
 import numpy as np
 import os.path
+import threading
+import bisect
 import a99
 import pyfant
 
@@ -38,28 +46,145 @@ EPSILON = 1e-4
 
 DEFOUT = "<made-up filename>"
 
+# Output of _check_batched()
+CHECK_FILENAME = "tune-zinf-check.log"
+
 
-def _get_zinf(lambda_centre, norm):
+def _get_zinf(lambda_centre, norm, zinf_max=None):
     """Returns zinf given *normalized* spectrum, or 0 if line if flat.
 
     Args:
       lambda_centre: centre of line
       norm: Spectrum instance
+      zinf_max: if passed, only the [lambda_centre-zinf_max, lambda_centre]
+                window of the spectrum is considered
 
-    Spectrum is expected to contain one line only.
+    Spectrum (or window) is expected to contain one line only.
     """
 
-    y = norm.y  # normalized spectrum: values between 0 and 1
-    if np.all(np.diff(y) == 0):
+    x, y = norm.x, norm.y  # normalized spectrum: values between 0 and 1
+    if zinf_max is not None:
+        i0, i1 = np.searchsorted(x, [lambda_centre-zinf_max-1e-6, lambda_centre+1e-6])
+        x, y = x[i0:i1], y[i0:i1]
+    if len(y) == 0 or np.all(np.diff(y) == 0):
         # flat line
         return 0
     ymax = 1
     ymin = min(y)
-    i_zinf = np.argmax(norm.y < ymax-(ymax-ymin)*EPSILON)
-    zinf = lambda_centre-norm.x[i_zinf]
+    i_zinf = np.argmax(y < ymax-(ymax-ymin)*EPSILON)
+    zinf = lambda_centre-x[i_zinf]
     return zinf
 
 
+def _pack_lines(lambdas, zinf_max, max_per_batch):
+    """Packs lines into batches of lines at least 2*zinf_max apart
+
+    Args:
+      lambdas: sequence of line centres
+      zinf_max: maximum zinf
+      max_per_batch: maximum number of lines per batch
+
+    Returns: list of lists of indexes of lambdas, each list sorted by lambda
+
+    Best fit: each line goes into the batch whose last line is the closest
+    one that is still far enough, so that the batches are as tight as
+    possible (i.e., pfant calculates as little continuum as possible).
+    """
+
+    batches = []
+    # (last lambda, batch index) of batches that are not full, sorted
+    lasts = []
+    for i in np.argsort(lambdas, kind="stable"):
+        lambda_ = lambdas[i]
+        k = bisect.bisect_left(lasts, (lambda_-2*zinf_max, -1))
+        if k > 0:
+            _, j = lasts.pop(k-1)
+        else:
+            j = len(batches)
+            batches.append([])
+        batches[j].append(i)
+        if len(batches[j]) < max_per_batch:
+            bisect.insort(lasts, (lambda_, j))
+    return batches
+
+
+def _make_combo(atoms, zinf_max, fa, store, scratch=None):
+    """Creates Combo to run pfant for the [lambda-zinf_max, lambda] windows of single-line atoms
+
+    fa is the same for all combos, so it is saved once into store and linked into the sessions.
+    If scratch (ScratchSessions) is passed, the session directory is created there"""
+    f = pyfant.FileAtoms()
+    f.atoms = atoms
+    lambdas = [a.lines[0].lambda_ for a in atoms]
+    combo = pyfant.Combo([pyfant.FOR_PFANT])
+    # Fortran messages will not be displayed in terminal
+    combo.conf.flag_log_console = False
+    combo.conf.sid.flag_split_dirs = True
+    # Forces pfant to run one single iteration per line (ikeytot will be =1 for single line)
+    combo.conf.opt.aint = zinf_max+10
+    combo.conf.file_atoms = f
+    combo.conf.file_abonds = fa
+    combo.conf.input_store = store
+    combo.conf.opt.logging_level = "warning"
+    combo.conf.opt.pas = PAS
+    combo.conf.flag_output_to_dir = True
+    combo.conf.opt.zinf = zinf_max
+    combo.conf.opt.no_molecules = True
+    combo.conf.opt.opa = False
+    combo.conf.opt.no_h = True
+    # Note that half of the line (needs to)/(will be) calculated
+    combo.conf.opt.llzero = min(lambdas)-zinf_max
+    combo.conf.opt.llfin = max(lambdas)
+    if scratch is not None:
+        scratch.attach(combo)
+    return combo
+
+
+def _check_batched(ll, zinfs, args, fa, store, scratch):
+    """Re-runs some lines one per pfant run and compares with the batched zinf's.
+
+    Differences up to 2*PAS are expected, because the calculation grid starts
+    at a different lambda in the batched and single-line runs.
+    """
+    logger = a99.get_python_logger()
+    n = len(ll)
+    idxs = np.sort(np.random.RandomState(0).choice(n, min(args.check, n), replace=False))
+    logger.info("Checking %d line(s) against one-line-per-run zinf's..." % len(idxs))
+    combos = [_make_combo([ll[i]], args.max, fa, store, scratch) for i in idxs]
+    pyfant.run_parallel(combos, callback=lambda combo: None)
+
+    tol = 2*PAS
+    rows, num_bad = [], 0
+    for i, combo in zip(idxs, combos):
+        line = ll[i].lines[0]
+        if not combo.flag_success:
+            rows.append("%10.3f %10s %10.4f %10s *failed*" % (line.lambda_, "", zinfs[i], ""))
+            num_bad += 1
+            continue
+        zinf_single = _get_zinf(line.lambda_, combo.pfant.norm, args.max)
+        diff = abs(zinf_single-zinfs[i])
+        flag_bad = diff > tol
+        num_bad += flag_bad
+        rows.append("%10.3f %10.4f %10.4f %10.4f%s" % (line.lambda_, zinf_single, zinfs[i], diff,
+                                                       " *DIFFERENT*" if flag_bad else ""))
+        if not args.no_clean:
+            combo.sid.clean()
+
+    with open(CHECK_FILENAME, "w") as h:
+        h.write("%10s %10s %10s %10s\n" % ("lambda", "single", "batched", "|diff|"))
+        h.write("\n".join(rows)+"\n")
+    if num_bad > 0:
+        logger.warning("%d/%d line(s) differ by more than %g angstrom (see '%s')" %
+                       (num_bad, len(idxs), tol, CHECK_FILENAME))
+    else:
+        logger.info("Check passed: all differences <= %g angstrom (see '%s')" %
+                    (tol, CHECK_FILENAME))
+
+
+# Calculation step
+PAS = 0.04
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
      description=__doc__,
@@ -84,6 +209,16 @@ if __name__ == "__main__":
      nargs="?", default=DEFOUT)
     parser.add_argument('--no_clean', action="store_true",
     help='If set, will not remove the session directories.')
+    parser.add_argument('--batch', type=int, nargs='?', default=1,
+     help='Maximum number of lines per pfant run (batched mode). '
+          'Default is 1 (one pfant run per line)')
+    parser.add_argument('--check', type=int, nargs='?', default=0,
+     help='(batched mode only) Number of lines (randomly chosen) to re-run '
+          'one per pfant run in order to check the batched zinf\'s')
+    parser.add_argument('--scratch', type=str, nargs='?', const="", default=None,
+     help='Creates the session directories inside a temporary directory under '
+          'SCRATCH, which should be a fast (e.g. RAM-backed) filesystem. If '
+          'SCRATCH is not given, uses "%s" if available' % pyfant.SCRATCH_ROOT)
 
     args = parser.parse_args()
     logger = a99.get_python_logger()
@@ -132,6 +267,11 @@ if __name__ == "__main__":
            fa.abol[i] += K_ADD
            cnt += 1
     logger.info("%d abundance(s) changed" % cnt)
+    store = pyfant.InputStore()
+    scratch = None
+    if args.scratch is not None:
+        scratch = pyfant.ScratchSessions(args.scratch or None)
+        logger.info("Session directories will be created inside '%s'" % scratch.dir)
 
 
     # This is old code, with a minimum value for the abundances but I don't think it is very reallistic
@@ -148,71 +288,70 @@ if __name__ == "__main__":
 
 
     # ## Creates the Runnable instances
-    PAS = 0.04
     logger.info("Calculation step will be set to %g" % PAS)
     logger.info("Preparing pfant's...")
-    combos, ll, i = [], [], 0
-    ii = 0
-    n = file_atoms.num_lines
+    # ll: single-line atoms, one per line in file_atoms
+    # lines: the corresponding lines of file_atoms (views), whose zinf's will be tuned
+    ll, lines = [], []
     for atom in file_atoms.atoms:
         for line in atom.lines:
-            a = copy.copy(atom)  # shallow copy
+            a = pyfant.Atom()
+            a.elem, a.ioni = atom.elem, atom.ioni
             a.lines = [line]
-            f = pyfant.FileAtoms()
-            f.atoms = [a]
-            combo = pyfant.Combo([pyfant.FOR_PFANT])
-            # Fortran messages will not be displayed in terminal
-            combo.conf.flag_log_console = False
-            combo.conf.sid.flag_split_dirs = True
-            # Forces pfant to run one single iteration (ikeytot will be =1)
-            combo.conf.opt.aint = args.max+10
-            combo.conf.file_atoms = f
-            combo.conf.file_abonds = fa
-            combo.conf.opt.logging_level = "warning"
-            combo.conf.opt.pas = PAS
-            combo.conf.flag_output_to_dir = True
-            combo.conf.opt.zinf = args.max
-            combo.conf.opt.no_molecules = True
-            combo.conf.opt.opa = False
-            combo.conf.opt.no_h = True
-            # Note that half of the line (needs to)/(will be) calculated
-            combo.conf.opt.llzero = line.lambda_-args.max
-            combo.conf.opt.llfin = line.lambda_
-            combos.append(combo)
             ll.append(a)
+            lines.append(line)
+    n = len(ll)
 
-            i += 1
-            ii += 1
-            if ii == 1000:
-                print(a99.format_progress(i, n))
-                ii = 0
-
-    # # Runs pfant
-    logger.info("Running pfant's...")
-
+    if args.batch > 1:
+        batches = _pack_lines([a.lines[0].lambda_ for a in ll], args.max, args.batch)
+        logger.info("Packed %d lines into %d pfant runs" % (n, len(batches)))
+    else:
+        batches = [[i] for i in range(n)]
 
+    combos = []
+    batch_of = [None]*n  # index of combo for each line
+    ii = 0
+    for j, batch in enumerate(batches):
+        combos.append(_make_combo([ll[i] for i in batch], args.max, fa, store, scratch))
+        for i in batch:
+            batch_of[i] = j
 
+        ii += 1
+        if ii == 1000:
+            print(a99.format_progress(j+1, len(batches)))
+            ii = 0
 
+    # # Runs pfant
+    logger.info("Running pfant's...")
 
 
     # FLAG_CLEAN = True
     # rm = RunnableManager(flag_auto_clean=FLAG_CLEAN)
 
 
+    # pfant results are loaded by the runners as soon as each pfant finishes
+    rm = pyfant.RunnableManager(flag_load_result=True)
+    rm.add_runnables(combos)
 
+    # Finds zinf's while the remaining pfant's are still running
+    zinfs = [None]*n  # uninflated, unclipped
+    idx_map = dict((id(combo), j) for j, combo in enumerate(combos))
+    def _harvest():
+        for combo in rm.as_completed():
+            for i in batches[idx_map[id(combo)]]:
+                zinfs[i] = _get_zinf(ll[i].lines[0].lambda_, combo.pfant.norm, args.max)
+    harvester = threading.Thread(target=_harvest)
 
-
-
-    rm = pyfant.RunnableManager()
-    rm.add_runnables(combos)
     app = a99.get_QApplication([])
     form = pyfant.XRunnableManager(None, rm)
     form.show()
     # it is good to start the manager as late as possible, otherwise
     # the program will hang if, for example, the form fails to be created.
     rm.start()
+    harvester.start()
     app.exec_()
     rm.exit()
+    harvester.join()
 
     # # Saves log
     LOG_FILENAME = "tune-zinf-status.log"
@@ -229,28 +368,25 @@ if __name__ == "__main__":
         logger.info("Please check log files inside directories of sessions that failed")
         logger.info("(session directories will not be removed).")
     else:
-        logger.info("Finding zinf's, please wait...")
+        if args.batch > 1 and args.check > 0:
+            _check_batched(ll, zinfs, args, fa, store, scratch)
+
+        logger.info("Adjusting zinf's, please wait...")
         # # Calculates zinf and save new atomic lines file
-        n = len(combos)
-        X = np.zeros((n, 3))  # [algf, kiex, zinf], ...]
+        n = len(ll)
         ii = 0
         print(a99.format_progress(0, n))
         cnt_min = 0
         cnt_max = 0
-        for i, (a, combo) in enumerate(zip(ll, combos)):
-            combo.pfant.load_result()
-
-
-            # if not FLAG_CLEAN:
-            #     combo.pfant.load_result()
-            # else:
-            #     pass  # result will be already loaded
-
-
-
-            norm = combo.pfant.norm  # normalized spectrum
-            line = a.lines[0]  # a is single-line FileAtoms object
-            zinf = _get_zinf(line.lambda_, norm)
+        for i, a in enumerate(ll):
+            combo = combos[batch_of[i]]
+            line = lines[i]  # line in file_atoms; a is the corresponding single-line Atom
+            zinf = zinfs[i]
+            if zinf is None:
+                # not harvested yet (should not happen)
+                if combo.pfant.norm is None:
+                    combo.pfant.load_result()
+                zinf = _get_zinf(line.lambda_, combo.pfant.norm, args.max)
             zinf *= args.inflate
             if zinf == 0:
                 # Note that some lines don't appear at all, so there is no way
@@ -289,11 +425,16 @@ if __name__ == "__main__":
         # this part removes sessionxxxx/sessionyyyy
         logger.info("Cleaning...")
 
-        for i, combo in enumerate(combos):
-            try:
-                combo.sid.clean()
-            except Exception as E:
-                logger.info("Error cleaning session for %s: %s" % (combo.name, str(E)))
+        if scratch is not None:
+            # all sessions at once
+            scratch.clean()
+        else:
+            for i, combo in enumerate(combos):
+                try:
+                    combo.sid.clean()
+                except Exception as E:
+                    logger.info("Error cleaning session for %s: %s" % (combo.name, str(E)))
+        store.clean()
         # this part removes sessionxxxxx
         # but also removes previous sessions
         # not gonna do it dd = glob.glob("session*")
@@ -22,7 +22,8 @@ __all__ = ["run_parallel", "setup_inputs", "copy_star", "link_to_data",
 
 
 def run_parallel(rr, max_simultaneous=None, flag_console=False, runnable_manager=None,
-                 flag_verbose=False, flag_exit_if_fail=False):
+                 flag_verbose=False, flag_exit_if_fail=False, executor=None, callback=None,
+                 flag_share_upstream=False):
     """
     Args:
         rr: list of Runnable instances
@@ -32,6 +33,12 @@ def run_parallel(rr, max_simultaneous=None, flag_console=False, runnable_manager
         runnable_manager: if passed, will use passed; if not, will create new.
         flag_verbose: whether of not to log any messages (besides console) **Note** if runnable_manager is passed, it will keep its own
         flag_exit_if_fail: exit as soon as possible if any runnable fails? **Note** ineffective if runnable_manager is passed
+        executor: BaseExecutor instance (defaults to threads). **Note** ineffective if runnable_manager is passed
+        callback: function(runnable) to be called as soon as each runnable finishes successfully,
+            with its result already loaded (see RunnableManager.as_completed()).
+            **Note** ineffective if flag_console
+        flag_share_upstream: whether Combos with identical atmospheres share their innewmarcs/hydro2
+            run (see RunnableManager). **Note** ineffective if runnable_manager is passed
 
     Returns: the RunnableManager object
     """
@@ -44,7 +51,9 @@ def run_parallel(rr, max_simultaneous=None, flag_console=False, runnable_manager
         rm = runnable_manager
     else:
         rm = pyfant.RunnableManager(max_simultaneous=max_simultaneous, flag_verbose=flag_verbose,
-                                flag_exit_if_fail=flag_exit_if_fail)
+                                flag_exit_if_fail=flag_exit_if_fail, executor=executor,
+                                flag_load_result=callback is not None,
+                                flag_share_upstream=flag_share_upstream)
     flag_had_to_start = False
     if not rm.flag_start_called:
         rm.start()
@@ -75,6 +84,11 @@ def run_parallel(rr, max_simultaneous=None, flag_console=False, runnable_manager
                     logger.exception("Error trying to exit")
             if s.lower() == "k":
                 rm.kill_runnables()
+    elif callback is not None:
+        for runnable in rm.as_completed(rr):
+            callback(runnable)
+        if flag_had_to_start:
+            rm.exit()
     else:
         rm.wait_until_finished()
         if flag_had_to_start:
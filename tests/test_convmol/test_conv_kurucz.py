@@ -49,4 +49,53 @@ def test_conv_kurucz(tmpdir):
     f, log = conv.make_file_molecules(fileobj)
 
     assert f.num_lines == 5
-    assert f[0].s == 0.5
\ No newline at end of file
+    assert f[0].s == 0.5
+
+def test_conv_kurucz_log(tmpdir):
+    os.chdir(str(tmpdir))
+
+    db = pyfant.FileMolDB()
+    db.init_default()
+    molconsts = pyfant.MolConsts()
+    molconsts.populate_all_using_str(db, "OH [A 2 Sigma - X 2 Pi]")
+    molconsts.None_to_zero()
+
+    fileobj = pyfant.FileKuruczMolecule()
+    fileobj._do_load_h(_fake_file(), "_fake_file")
+
+    conv = pyfant.ConvKurucz(molconsts=molconsts, iso=18)
+    f = conv.make_file_molecules(fileobj)
+    assert conv.log.skip_reasons == {"Isotope 16": 5}
+    assert f.num_lines == 0
+
+    conv = pyfant.ConvKurucz(molconsts=molconsts, iso=16)
+    f = conv.make_file_molecules(fileobj)
+    assert conv.log.cnt_in == 5
+    assert f.num_lines == 5
+    assert [(sol.vl, sol.v2l) for sol in f.molecules[0].sol] == [(7, 0)]
+    # lines are grouped in their original order
+    assert list(f.molecules[0].sol[0].lmbdam) == [line.lambda_ for line in fileobj.lines]
+
+
+def test_convert_many(tmpdir):
+    os.chdir(str(tmpdir))
+    with open("ohax.asc", "w") as h:
+        h.write(_fake_file().getvalue())
+
+    jobs = [pyfant.ConvJob("ohax.asc", "OH [A 2 Sigma - X 2 Pi]", "kurucz", options={"iso": 16}),
+            pyfant.ConvJob("ohax.asc", "OH [A 2 Sigma - X 2 Pi]", "kurucz", "oh18.dat", {"iso": 18}),
+            pyfant.ConvJob("missing.asc", "OH [A 2 Sigma - X 2 Pi]", "kurucz")]
+    results = pyfant.convert_many(jobs, max_workers=2)
+
+    assert [x[0] for x in results] == jobs
+    assert results[0][1].cnt_in == 5 and results[0][2] is None
+    assert results[1][1].skip_reasons == {"Isotope 16": 5}
+    assert results[2][2] is not None
+
+    f = pyfant.FileMolecules()
+    f.load("ohax-pfant.dat")
+    assert f.num_lines == 5
+
+    log = pyfant.sum_conversion_logs([x[1] for x in results])
+    assert log.cnt_in == 5
+    assert log.num_lines == 10
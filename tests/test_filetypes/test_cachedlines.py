@@ -0,0 +1,90 @@
+import pyfant
+import os
+import numpy as np
+from pyfant.filetypes.filekuruczmol import _fake_file
+
+
+def _some_file_molecules():
+    f = pyfant.FileMolecules()
+    f.titm = "Cache test"
+    for description, nv in (("CN [A2Pi-X2Sigma+]", 2), ("OH [A2Sigma-X2Pi]", 1)):
+        m = pyfant.Molecule()
+        m.description = description
+        m.symbols = description[:2].split()
+        m.fe, m.s = 0.0055, 0.5
+        for vl in range(nv):
+            sol = pyfant.SetOfLines(vl, vl, .5, 1000., 1.9, 6e-6, 1.)
+            sol.append_lines([3000.+vl, 5000.5, 4000.25+vl], [.5, 1.5, 2.5], [10.5, 20.5, 30.5], ["P1", "Q2", "R12"])
+            m.sol.append(sol)
+        f.molecules.append(m)
+    return f
+
+
+def _some_file_atoms():
+    f = pyfant.FileAtoms()
+    for elem, lambdas in (("FE", [5000., 4000., 6000.]), ("NI", [4500.])):
+        a = pyfant.Atom()
+        a.elem = elem
+        a.ioni = 1
+        a._set_rows(np.array([(x, 1., -x/1000, 0., 0., 0., 0., 0.) for x in lambdas], dtype=a.rows.dtype))
+        f.atoms.append(a)
+    return f
+
+
+def _dump(f):
+    if isinstance(f, pyfant.FileAtoms):
+        return [(a.elem, a.ioni, a.rows.tolist()) for a in f]
+    if isinstance(f, pyfant.FileMolecules):
+        return [(m.description, m.symbols, m.fe, [(sol.vl, sol.qqv, sol.rows.tolist(), sol.branch.tolist())
+                                                  for sol in m]) for m in f]
+    if isinstance(f, pyfant.FilePlezTiO):
+        return list(f.lines)
+    return f.data.tolist()
+
+
+def test_line_cache(tmpdir):
+    os.chdir(str(tmpdir))
+    k = pyfant.FileKuruczMolecule()
+    k._do_load_h(_fake_file(), "_fake_file")
+    t = pyfant.FilePlezTiO()
+    t.lines = [pyfant.PlezTiOLine(3000.+i, 1e-3*(i+1), 100., i, 5., 5., 0, 200., i, 6., 6., 0, 1e7, "TiO", "a", "f", "R")
+               for i in range(5)]
+    files = {"molecules.dat": _some_file_molecules(), "atoms.dat": _some_file_atoms(), "kurucz.asc": k,
+             "tio.dat": t}
+    for filename, f in files.items():
+        f.save_as(filename)
+
+    old = pyfant.get_line_cache()
+    cache = pyfant.LineCache(str(tmpdir.join("cache")), min_size=0)
+    try:
+        # filtered cache miss does not create entry
+        pyfant.set_line_cache(cache)
+        pyfant.FileAtoms(line_filter=pyfant.LineFilter(llzero=3000.5, llfin=4001)).load("atoms.dat")
+        assert cache.get("atoms.dat", pyfant.FileAtoms) is None
+
+        for line_filter in (None, pyfant.LineFilter(llzero=3000.5, llfin=4001), pyfant.LineFilter(max_J2l=20)):
+            for filename, f in files.items():
+                class_ = f.__class__
+                pyfant.set_line_cache(None)
+                expected = class_(line_filter=line_filter)
+                expected.load(filename)
+                pyfant.set_line_cache(cache)
+                for _ in range(2):  # cache miss then cache hit
+                    g = class_(line_filter=line_filter)
+                    g.load(filename)
+                    assert _dump(g) == _dump(expected)
+                assert cache.get(filename, class_) is not None
+    finally:
+        pyfant.set_line_cache(old)
+
+    # stale entry
+    entry = cache.get("kurucz.asc", pyfant.FileKuruczMolecule)
+    assert entry.find(2047, 2050.1).tolist() == [1, 2, 3]
+    with open("kurucz.asc", "a") as h:
+        h.write(" ")
+    assert cache.get("kurucz.asc", pyfant.FileKuruczMolecule) is None
+
+    # entry with missing arrays
+    dirname = cache.get_entry_dirname("atoms.dat", pyfant.FileAtoms)
+    os.remove(os.path.join(dirname, "rows.npy"))
+    assert cache.get("atoms.dat", pyfant.FileAtoms) is None
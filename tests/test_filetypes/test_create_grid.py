@@ -0,0 +1,75 @@
+import pyfant
+import os
+import shutil
+import importlib.util
+import concurrent.futures
+
+
+def _load_script():
+    # script file name is not a valid module name
+    filename = os.path.join(os.path.dirname(pyfant.__file__), "scripts", "create-grid.py")
+    spec = importlib.util.spec_from_file_location("create_grid", filename)
+    ret = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(ret)
+    return ret
+
+
+class _CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    """Records the maximum number of submitted futures not yet consumed by the caller"""
+
+    def __init__(self):
+        concurrent.futures.ThreadPoolExecutor.__init__(self, 2)
+        self.num_submitted = 0
+        self.max_ahead = 0
+        self.num_consumed = 0
+
+    def submit(self, *args, **kwargs):
+        self.num_submitted += 1
+        self.max_ahead = max(self.max_ahead, self.num_submitted-self.num_consumed)
+        return concurrent.futures.ThreadPoolExecutor.submit(self, *args, **kwargs)
+
+
+def test_load_records(request, tmpdir):
+    os.chdir(str(tmpdir))
+    cg = _load_script()
+    fn_mod = os.path.join(os.path.split(request.module.__file__)[0], "sun.mod")
+
+    # ".opa" is loaded from the directory of the ".mod" file
+    records, error = cg._load_records(fn_mod, "opa")
+    assert error is None and len(records) == 1
+    f = pyfant.FileModTxt()
+    f.load(fn_mod)
+    assert records[0].teff == f.record.teff
+
+    records, error = cg._load_records(fn_mod, "modtxt-header")
+    assert error is None and records[0].teff == f.record.teff
+
+    # ".mod" without ".opa"
+    shutil.copyfile(fn_mod, "noopa.mod")
+    records, error = cg._load_records("noopa.mod", "opa")
+    assert records == [] and error is not None
+
+
+def test_iter_opa_records(request, tmpdir):
+    os.chdir(str(tmpdir))
+    cg = _load_script()
+    dir_ = str(tmpdir)
+    src = os.path.split(request.module.__file__)[0]
+    filenames = []
+    for i in range(6):
+        name = os.path.join(dir_, "sun{}".format(i))
+        shutil.copyfile(os.path.join(src, "sun.mod"), name+".mod")
+        if i != 3:
+            shutil.copyfile(os.path.join(src, "sun.opa"), name+".opa")
+        filenames.append(name+".mod")
+
+    skipped, reasons = [], []
+    with _CountingExecutor() as executor:
+        records = []
+        for r in cg._iter_opa_records(executor, filenames, skipped, reasons, 2):
+            executor.num_consumed += 1
+            records.append(r)
+        assert executor.num_submitted == 6
+        assert executor.max_ahead <= 3
+    assert len(records) == 5
+    assert skipped == ["sun3"] and len(reasons) == 1
@@ -0,0 +1,87 @@
+import pyfant
+import copy
+
+
+def _some_file_atoms():
+    f = pyfant.FileAtoms()
+    for elem, lambdas in (("FE", [5000., 4000., 6000.]), ("NI", [4500.])):
+        a = pyfant.Atom()
+        a.elem = elem
+        a.ioni = 1
+        for lambda_ in lambdas:
+            line = pyfant.AtomicLine()
+            a.lines.append(line)
+            # line is now a view of the table row, so setting after appending works
+            line.lambda_ = lambda_
+            line.algf = -lambda_/1000
+        f.atoms.append(a)
+    return f
+
+
+def test_Atom():
+    f = _some_file_atoms()
+    a = f.atoms[0]
+    assert len(a) == 3
+    assert list(a.lambda_) == [5000., 4000., 6000.]
+    assert a.llzero == 4000. and a.llfin == 6000.
+
+    a.lines[0].zinf = 1.5
+    assert a.zinf[0] == 1.5
+
+    b = copy.copy(a)
+    b.lines = [a.lines[1]]
+    assert len(b) == 1 and b.lambda_[0] == 4000.
+    assert len(a) == 3
+
+    a.sort()
+    assert list(a.lambda_) == [4000., 5000., 6000.]
+
+
+def test_FileAtoms_cut_filter():
+    f = _some_file_atoms()
+    assert f.num_lines == 4
+    assert list(f.lambda_) == [5000., 4000., 6000., 4500.]
+
+    f.cut(4200, 5500)
+    assert list(f.lambda_) == [5000., 4500.]
+
+    f.filter(lambda line: line.algf < -4.7)
+    assert list(f.lambda_) == [5000.]
+    assert len(f) == 1
+
+    f = _some_file_atoms()
+    f.filter(lambda rows: rows["lambda_"] > 4800, True)
+    assert list(f.lambda_) == [5000., 6000.]
+
+
+def test_FileAtoms_round_trip(tmpdir):
+    f = _some_file_atoms()
+    a = pyfant.Atom()
+    a.elem = "C"
+    a.ioni = 2
+    a.lines.append(pyfant.AtomicLine())
+    a.lines[0].lambda_ = 4300.123
+    a.lines[0].kiex = 1.25
+    f.atoms.append(a)
+
+    # reference: line-by-line formatting
+    expected = ""
+    for i, atom in enumerate(f.atoms):
+        for j, line in enumerate(atom.lines):
+            finrai = 1 if i == len(f.atoms)-1 and j == len(atom)-1 else 0
+            expected += "%2s%1d %10.3f\n" % (atom.elem, atom.ioni, line.lambda_)
+            expected += "%.7g %.7g %.7g %.7g %.7g %.7g %.7g %1d\n" % \
+                        (line.kiex, line.algf, line.ch, line.gr, line.ge, line.zinf,
+                         line.abondr, finrai)
+
+    fn0, fn1 = str(tmpdir.join("atoms0.dat")), str(tmpdir.join("atoms1.dat"))
+    f.save_as(fn0)
+    with open(fn0) as h:
+        assert h.read() == expected
+
+    g = pyfant.FileAtoms()
+    g.load(fn0)
+    assert [(x.elem, x.ioni, len(x)) for x in g.atoms] == [("FE", 1, 3), ("NI", 1, 1), (" C", 2, 1)]
+    g.save_as(fn1)
+    with open(fn1) as h:
+        assert h.read() == expected
@@ -0,0 +1,68 @@
+import pyfant
+import os
+import io
+import pytest
+import numpy as np
+from pyfant.filetypes.filekuruczmol import _fake_file
+
+
+_ROWS_OLD = """  3001.028 16.5 17.5 106X02F2   C03F2
+  3001.153 22.5 23.5 106X12E1   C14E1
+"""
+
+_ROWS_OLD1 = """ 3601.583 149.5 150.5 X00 2 B00 2
+ 3601.612  12.5  11.5 X03 1 B04 1
+"""
+
+
+def test_load_kurucz():
+    f = pyfant.FileKuruczMolecule()
+    f._do_load_h(_fake_file(), "_fake_file")
+    assert len(f) == 5
+    assert f.data["lambda_"][0] == 2045.126
+    assert f.data["iso"].tolist() == [16]*5
+    assert f[2] == pyfant.KuruczMolLine(2049.4, -7.883, 5.5, 543.596, 6.5, 49322.74, 1, 8, "X", 0, "e", 1,
+                                        "A", 7, "e", 1, 16, "")
+
+
+def test_load_kurucz_bulk_vs_rows():
+    text = _fake_file().getvalue().replace("   16\n", "   16 617 K BR\n", 1)
+    # blank spin2l
+    text = text.replace("108X00f1", "108X00f ", 1)
+    rows = text.splitlines()
+    data = pyfant.FileKuruczMolecule._parse_bulk(rows)
+    assert data.tolist() == pyfant.FileKuruczMolecule._parse_rows(rows, 0, "x").tolist()
+    assert data["rest"][0] == " 617 K BR"
+    assert data["spin2l"][0] == 0
+
+
+def test_load_kurucz_old():
+    f = pyfant.FileKuruczMoleculeOld()
+    f._do_load_h(io.StringIO(_ROWS_OLD), "x")
+    assert f[1] == pyfant.KuruczMolLineOld(3001.153, 22.5, 23.5, 1, 6, "X", 12, "E", 1, "C", 14, "E", 1)
+
+    f = pyfant.FileKuruczMoleculeOld1()
+    f._do_load_h(io.StringIO(_ROWS_OLD1), "x")
+    assert f[1] == pyfant.KuruczMolLineOld1(3601.612, 12.5, 11.5, "X", 3, 1, "B", 4, 1)
+
+
+def test_load_kurucz_error():
+    text = _fake_file().getvalue().replace("49025.320", "49025.3x0")
+    f = pyfant.FileKuruczMolecule()
+    with pytest.raises(RuntimeError, match="2nd row"):
+        f._do_load_h(io.StringIO(text), "x")
+
+
+def test_iter_chunks(tmpdir):
+    os.chdir(str(tmpdir))
+    f = pyfant.FileKuruczMolecule()
+    f._do_load_h(_fake_file(), "_fake_file")
+    f.save_as("kurucz.asc")
+
+    chunks = list(pyfant.FileKuruczMolecule.iter_chunks("kurucz.asc", 100))
+    assert len(chunks) > 1
+    assert np.concatenate(chunks).tolist() == f.data.tolist()
+
+    g = pyfant.FileKuruczMolecule()
+    g.load("kurucz.asc")
+    assert g.data.tolist() == f.data.tolist()
@@ -0,0 +1,103 @@
+import os
+import copy
+import numpy as np
+import pyfant
+import f311
+from pyfant.filetypes.filemod import _parse_opa_rows
+
+
+def _make_grid(request, filename, glogs=(4., 4.5)):
+    """Saves FileMoo with the Sun model replicated on a 2x2x2 (teff, glog, asalog) grid"""
+    dir_with_file = os.path.split(request.module.__file__)[0]
+    f = pyfant.FileModTxt()
+    f.load(os.path.join(dir_with_file, "sun.mod"))
+    g = pyfant.FileOpa()
+    g.load(os.path.join(dir_with_file, "sun.opa"))
+    records = []
+    for asalog in (-1., 0.):
+        for teff in (5000., 6000.):
+            for glog in glogs:
+                r = pyfant.MooRecord()
+                r.from_marcs_files(f, g)
+                r.teff, r.glog, r.asalog = teff, glog, asalog
+                r.teta = copy.copy(r.teta)*5777/teff
+                records.append(r)
+    moo = pyfant.FileMoo()
+    moo.records = records
+    moo.save_as(filename)
+
+
+def test_FileMoo_lazy(request, tmpdir):
+    fn = str(tmpdir.join("grid.moo"))
+    _make_grid(request, fn)
+
+    eager = pyfant.FileMoo()
+    eager.load(fn)
+    lazy = pyfant.FileMoo(flag_lazy=True)
+    lazy.load(fn)
+
+    assert len(lazy) == len(eager) == 8
+    for r0, r1 in zip(eager.records, lazy.records):
+        for name in ["ntot", "teff", "glog", "asalog", "asalalf", "nhe", "swave", "nwav"]:
+            assert getattr(r0, name) == getattr(r1, name)
+        for name in ["nh", "teta", "pe", "pg", "log_tau_ross", "ops", "wav", "abs", "sca", "abund"]:
+            assert np.all(getattr(r0, name) == getattr(r1, name))
+    # zero-copy
+    assert np.shares_memory(lazy.records[3].abs, lazy.rows)
+
+    assert lazy.find_record(6000, 4, -1) == 2
+    assert lazy.find_bracket(5500, 4.5, -1) == [1, 3]
+    assert sorted(lazy.find_bracket(5500, 4.2, -.5)) == list(range(8))
+    assert lazy.find_bracket(5500, 4.2, -.5) == eager.find_bracket(5500, 4.2, -.5)
+    try:
+        lazy.find_bracket(7000, 4.2, -.5)
+        assert False
+    except ValueError:
+        pass
+
+
+def test_find_bracket_on_grid(request, tmpdir):
+    # glog values not representable in binary are stored as float32
+    fn = str(tmpdir.join("grid.moo"))
+    _make_grid(request, fn, (.1, .6))
+    f = pyfant.FileMoo(flag_lazy=True)
+    f.load(fn)
+    assert f.find_bracket(5000, .1, 0.) == [4]
+    assert f.find_bracket(5000, .6, 0.) == [5]
+    assert f.find_bracket(5500, .6, -1.) == [1, 3]
+    assert f.find_bracket(5000, .3, 0.) == [4, 5]
+
+
+def test_FileModBin_lazy(tmpdir):
+    fn = f311.get_default_data_path("modeles.mod", class_=pyfant.FileModBin)
+    eager = pyfant.FileModBin()
+    eager.load(fn)
+    lazy = pyfant.FileModBin(flag_lazy=True)
+    lazy.load(fn)
+    assert len(lazy) == len(eager) == 1
+    r0, r1 = eager.records[0], lazy.records[0]
+    assert (r0.ntot, r0.teff, r0.glog, r0.asalog) == (r1.ntot, r1.teff, r1.glog, r1.asalog)
+    assert np.all(r0.log_tau_ross == r1.log_tau_ross)
+    assert lazy.find_record(r0.teff, r0.glog, r0.asalog) == 0
+
+    # saving from lazy records reproduces the file
+    fn1 = str(tmpdir.join("modeles.mod"))
+    lazy.save_as(fn1)
+    with open(fn, "rb") as h0, open(fn1, "rb") as h1:
+        assert h0.read()[64:] == h1.read()[64:]
+
+
+def test_FileOpa_bulk_equals_rows(request):
+    fn = os.path.join(os.path.split(request.module.__file__)[0], "sun.opa")
+    f = pyfant.FileOpa()
+    f.load(fn)
+
+    g = pyfant.FileOpa()
+    g.ndp, g.nwav = f.ndp, f.nwav
+    with open(fn, "rb") as h:
+        h.readline()
+        h.readline()
+        _parse_opa_rows(g, h)
+    for name in ["wav", "rad", "tau", "t", "pe", "pg", "rho", "xi", "ops", "abs", "sca", "abund"]:
+        assert np.array_equal(getattr(f, name), getattr(g, name))
+    assert f.abs.shape == (f.nwav, f.ndp)
@@ -1,5 +1,6 @@
 import pyfant
 import os
+import pickle
 
 
 
@@ -128,3 +129,122 @@ def test_molconsts_to_molecule(tmpdir):
     mc = pyfant.some_molconsts(db)
 
     mm = pyfant.molconsts_to_molecule(mc)
+
+
+_MOLECULES_DAT = """2
+Test molecules
+2 1
+CN [A2Pi-X2Sigma+] # C N # 0,0|1,0
+0.005 7.76 26 12 14 4.2 2 9000 0
+
+0.5
+0.9 0.1
+1000.00 1100.00
+1.90000 1.80000
+0.00 0.00
+1 1
+3000.123 0.25 10.5 P1 0
+3001.5 1.25 11.5 Q21 1
+3002.25 0.5 12.5 NEW9 0 *
+4000 2 3.5 R12 9
+OH [A2Sigma-X2Pi] # O H # 0,0
+0.001 4.39 17 16 1 3.8 2 32000 0
+
+0.5
+1
+3000.00
+17.00000
+0.00
+1
+5000.5 3 1.5 P 9
+"""
+
+
+def test_FileMolecules_load_save(tmpdir):
+    os.chdir(str(tmpdir))
+    with open("molecules.dat", "w") as h:
+        h.write(_MOLECULES_DAT)
+    f = pyfant.FileMolecules()
+    f.load("molecules.dat")
+
+    assert f.num_lines == 5
+    assert f.num_sols == 3
+    sol = f.molecules[0].sol[1]
+    assert (sol.vl, sol.v2l) == (1, 0)
+    assert list(sol.lmbdam) == [3002.25, 4000.]
+    assert list(sol.branch) == ["NEW9", "R12"]
+    assert list(f.branch) == ["P1", "Q21", "NEW9", "R12", "P"]
+
+    # branch codes are process-specific; labels survive pickling
+    sol2 = pickle.loads(pickle.dumps(sol))
+    assert list(sol2.branch) == ["NEW9", "R12"]
+
+    # the "*" column is not saved, the rest of the file is reproduced
+    f.save_as("molecules2.dat")
+    with open("molecules2.dat") as h:
+        s = h.read()
+    assert s.split("\n", 3)[3] == _MOLECULES_DAT.replace(" 0 *", " 0").split("\n", 3)[3]
+
+
+def test_FileMolecules_load_error(tmpdir):
+    os.chdir(str(tmpdir))
+    with open("molecules.dat", "w") as h:
+        h.write(_MOLECULES_DAT.replace("3001.5", "3001.x"))
+    f = pyfant.FileMolecules()
+    try:
+        f.load("molecules.dat")
+        assert False
+    except ValueError as e:
+        assert "Error around 14th row" in str(e)
+
+
+def test_iter_molecule_blocks(tmpdir):
+    os.chdir(str(tmpdir))
+    with open("molecules.dat", "w") as h:
+        h.write(_MOLECULES_DAT)
+    titm, nv = pyfant.read_molecules_header("molecules.dat")
+    assert titm == "Test molecules"
+    assert nv == [2, 1]
+
+    blocks = list(pyfant.iter_molecule_blocks("molecules.dat"))
+    assert [b.description for b in blocks] == ["CN [A2Pi-X2Sigma+]", "OH [A2Sigma-X2Pi]"]
+    assert [b.nv for b in blocks] == [2, 1]
+
+    # streaming both molecules twice gives the same lines as loading them
+    blocks = (b for _ in range(2) for b in pyfant.iter_molecule_blocks("molecules.dat"))
+    pyfant.write_molecule_blocks("merged.dat", "Merged", nv*2, blocks)
+    f = pyfant.FileMolecules()
+    f.load("merged.dat")
+    assert len(f) == 4
+    assert f.num_sols == 6
+    assert list(f.lmbdam) == [3000.123, 3001.5, 3002.25, 4000., 5000.5]*2
+
+
+def test_parse_line_rows():
+    from pyfant.filetypes.filemolecules import _parse_line_rows
+    # end-of-molecule row with trailing blanks, followed by the header of the next molecule
+    rows = "3000.5 1.5 10.5 P1 0\n3001.5 2.5 11.5 Q2 9  \n"
+    table, numlin, size = _parse_line_rows(rows+"OH [A2Sigma-X2Pi]\n")
+    assert size == len(rows)
+    assert list(numlin) == [0, 9]
+    assert list(table["lmbdam"]) == [3000.5, 3001.5]
+
+
+def test_merge_molecules(tmpdir):
+    import importlib.util
+    os.chdir(str(tmpdir))
+    spec = importlib.util.spec_from_file_location(
+        "merge_molecules", os.path.join(os.path.dirname(pyfant.__file__), "scripts", "merge-molecules.py"))
+    mm = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mm)
+
+    with open("molecules.dat", "w") as h:
+        h.write(_MOLECULES_DAT)
+    # valid header, body ends before the end-of-molecule flag
+    with open("truncated.dat", "w") as h:
+        h.write(_MOLECULES_DAT[:_MOLECULES_DAT.index("4000 2 3.5")])
+    mm.main(["molecules.dat", "truncated.dat", "molecules.dat"], "merged.dat")
+    assert sorted(os.listdir(".")) == ["merged.dat", "molecules.dat", "truncated.dat"]
+    f = pyfant.FileMolecules()
+    f.load("merged.dat")
+    assert len(f) == 4
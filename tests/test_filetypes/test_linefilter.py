@@ -0,0 +1,49 @@
+import pyfant
+import os
+import numpy as np
+from pyfant.filetypes.filekuruczmol import _fake_file
+from pyfant.filetypes import filevald3
+
+
+def test_line_filter():
+    lf = pyfant.LineFilter(llzero=2047, llfin=2051, iso=[16, 18], to_label="X", max_J2l=5, min_gf=10**-7.9)
+    assert lf.accepts(lambda_=2049, iso=16, to_label="X ", J2l=5, loggf=-7.8)
+    assert not lf.accepts(lambda_=2052)
+    assert not lf.accepts(iso=17)
+    assert not lf.accepts(loggf=-8)
+    assert not lf.accepts(gf=10**-8)
+    assert lf.accepts(from_label="B", vl=99)
+    mask = lf.get_mask(lambda_=[2049, 2052, 2050], iso=[16, 16, 17], vl=[0, 0, 0])
+    assert mask.tolist() == [True, False, False]
+
+
+def test_filter_kurucz(tmpdir):
+    os.chdir(str(tmpdir))
+    f = pyfant.FileKuruczMolecule()
+    f._do_load_h(_fake_file(), "_fake_file")
+    f.save_as("kurucz.asc")
+
+    for lf in (pyfant.LineFilter(llzero=2047, llfin=2051),
+               pyfant.LineFilter(min_gf=10**-7.9, max_J2l=4),
+               pyfant.LineFilter(iso=18),
+               pyfant.LineFilter(from_label="A", to_label="X")):
+        g = pyfant.FileKuruczMolecule(line_filter=lf)
+        g.load("kurucz.asc")
+        d = f.data
+        mask = lf.get_mask(lambda_=d["lambda_"], loggf=d["loggf"], J2l=d["J2l"], iso=d["iso"],
+                           from_label=d["statel"], to_label=d["state2l"])
+        assert g.data.tolist() == d[mask].tolist()
+        chunks = list(pyfant.FileKuruczMolecule.iter_chunks("kurucz.asc", 100, lf))
+        assert np.concatenate(chunks).tolist() == d[mask].tolist()
+
+
+def test_filter_vald3():
+    f = pyfant.FileVald3(line_filter=pyfant.LineFilter(llfin=16400.07))
+    f._do_load_h(filevald3._fake_file(), "_fake_file")
+    (lines,) = f.speciess[("CO", 1)].values()
+    assert [x.lambda_ for x in lines] == [16400.058]
+
+    f = pyfant.FileVald3(line_filter=pyfant.LineFilter(max_v2l=3))
+    f._do_load_h(filevald3._fake_file(), "_fake_file")
+    (lines,) = f.speciess[("CO", 1)].values()
+    assert [x.lambda_ for x in lines] == [16400.090]
@@ -0,0 +1,28 @@
+import pyfant
+import numpy as np
+
+
+def test_line_index():
+    rng = np.random.RandomState(0)
+    f = pyfant.FileMolecules()
+    for _ in range(2):
+        m = pyfant.Molecule()
+        for vl in range(3):
+            sol = pyfant.SetOfLines(vl, 0)
+            sol.append_lines(rng.uniform(3000, 3100, 50).round(1), np.ones(50), np.ones(50), "P")
+            m.sol.append(sol)
+        f.molecules.append(m)
+
+    index = pyfant.LineIndex(f)
+    central_lambdas, tolerance = [3000., 3050.05, 3020.5, 5000.], 0.5
+    iq, rows = index.search(central_lambdas, tolerance)
+    assert index.num_lines == 300
+
+    expected = []
+    for i, c in enumerate(central_lambdas):
+        found = [(lmbdam, i_m, i_s) for i_m, m in enumerate(f) for i_s, sol in enumerate(m)
+                 for lmbdam in sol.lmbdam if c-tolerance <= lmbdam <= c+tolerance]
+        expected.extend((i, i_m+1, i_s+1, lmbdam) for lmbdam, i_m, i_s in sorted(found))
+    table = index.get_table(rows)
+    assert [(i, row[0], row[1], row[4]) for i, row in zip(iq.tolist(), table)] == expected
+    assert len(expected) > 3
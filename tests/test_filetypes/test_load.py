@@ -14,3 +14,30 @@ def test_FileOpa(request):
     dir_with_file = os.path.split(request.module.__file__)[0]
     f = pyfant.FileOpa()
     f.load(os.path.join(dir_with_file, "sun.opa"))
+
+
+def test_FileSpectrumPfant(tmpdir):
+    os.chdir(str(tmpdir))
+    header = "{:5d}{:20s}{:75s}{:10.1f}{:40s}{:15.5f}\n"
+    with open("flux.norm", "w") as h:
+        h.write(header.format(2, "sun", "", 5000., "", .5))
+        h.write("        0.10000        0.20000        0.30000\n")
+        h.write(header.format(2, "sun", "", 5001., "", .5))
+        h.write("        0.30000        0.40000\n")
+    f = pyfant.FileSpectrumPfant()
+    f.load("flux.norm")
+    assert list(f.spectrum.y) == [.1, .2, .3, .4]
+    assert list(f.spectrum.x) == [5000., 5000.5, 5001., 5001.5]
+
+
+def test_FileSpectrumNulbad(tmpdir):
+    os.chdir(str(tmpdir))
+    with open("flux.sp", "w") as h:
+        h.write("#sun\n#     3\n")
+        h.write("   5000.0000000000000       0.99463000000000001\n"
+                "   5000.0400000000000        2.0321771294932130E-004\n"
+                "   5000.0800000000000        1.0000000000000000\n\n")
+    f = pyfant.FileSpectrumNulbad()
+    f.load("flux.sp")
+    assert list(f.spectrum.x) == [5000., 5000.04, 5000.08]
+    assert list(f.spectrum.y) == [.99463000000000001, 2.0321771294932130E-004, 1.]
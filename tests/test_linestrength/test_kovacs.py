@@ -0,0 +1,63 @@
+import pyfant
+import os
+import numpy as np
+
+
+_SYSTEMS = ["CO [X 1 SIGMA - X 1 SIGMA]", "TiO [b 1 PI - a 1 DELTA]", "CN [B 2 SIGMA - X 2 SIGMA]",
+            "OH [A 2 SIGMA - X 2 PI]", "C2 [d 3 PI - a 3 PI]", "NH [A 3 PI - X 3 SIGMA]",
+            "TiO [B 3 PI - X 3 DELTA]"]
+
+
+def test_get_sj_array(tmpdir):
+    os.chdir(str(tmpdir))
+    db = pyfant.FileMolDB()
+    db.init_default()
+
+    for s in _SYSTEMS:
+        consts = pyfant.MolConsts()
+        consts.populate_all_using_str(db, s)
+        consts.None_to_zero()
+
+        for flag_normalize in (False, True):
+            mtools = pyfant.kovacs_toolbox(consts, flag_normalize)
+            branches = [branch for branch, _ in mtools._get_populate_data(0, 0, 0)]
+
+            vl, v2l, J, branch, sj = [], [], [], [], []
+            for vl_ in range(3):
+                for J_ in range(40):
+                    for branch_ in branches:
+                        try:
+                            sj_ = mtools.get_sj(vl_, 0, J_+.5, branch_)
+                        except pyfant.NoLineStrength:
+                            sj_ = pyfant.NO_LINE_STRENGTH
+                        vl.append(vl_); v2l.append(0); J.append(J_+.5); branch.append(branch_)
+                        sj.append(sj_)
+
+            assert pyfant.NO_LINE_STRENGTH in sj
+            assert np.array_equal(mtools.get_sj_array(vl, v2l, J, branch), sj)
+            # branches passed as codes
+            codes = [branches.index(x) for x in branch]
+            assert np.array_equal(mtools.get_sj_array(vl, 0, J, codes, branches), sj)
+
+    # invalid input gets masked
+    sj = mtools.get_sj_array(0, 0, [np.nan, 10, 10], ["P1", "P1", "XX"])
+    assert sj[0] == pyfant.NO_LINE_STRENGTH and sj[2] == pyfant.NO_LINE_STRENGTH
+    assert sj[1] == mtools.get_sj(0, 0, 10, "P1")
+
+
+def test_sj_cache(tmpdir):
+    os.chdir(str(tmpdir))
+    db = pyfant.FileMolDB()
+    db.init_default()
+    consts = pyfant.MolConsts()
+    consts.populate_all_using_str(db, "OH [A 2 SIGMA - X 2 PI]")
+    consts.None_to_zero()
+
+    pyfant.sj_cache.clear()
+    sj = pyfant.kovacs_toolbox(consts).get_sj(0, 0, 10, "P1")
+    assert pyfant.sj_cache.misses == 1
+    # another toolbox for the same system takes the values from the cache
+    mtools = pyfant.kovacs_toolbox(consts)
+    assert mtools.get_sj(0, 0, 10, "P1") == sj
+    assert pyfant.sj_cache.hits == 1
+    assert len(mtools.dict_sj) > 1
@@ -0,0 +1,46 @@
+import pyfant
+import os
+import pickle
+import threading
+
+
+def test_LRUCache(tmpdir):
+    os.chdir(str(tmpdir))
+    cache = pyfant.LRUCache(2)
+    cache["a"], cache["b"] = 1, 2
+    assert cache.get("a") == 1
+    cache["c"] = 3
+    assert "b" not in cache and len(cache) == 2
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.save("cache.pickle")
+    cache2 = pyfant.LRUCache(2)
+    cache2.load("cache.pickle")
+    assert cache2.get("c") == 3
+
+    cache3 = pickle.loads(pickle.dumps(cache))
+    assert cache3.get("a") == 1 and cache3.get("c") == 3
+
+
+def test_LRUCache_threads():
+    cache = pyfant.LRUCache(8)
+    errors = []
+
+    def work(i):
+        try:
+            for j in range(20000):
+                key = (i+j) % 16
+                if cache.get(key) is None:
+                    cache[key] = j
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert cache.hits+cache.misses == 8*20000
+    assert len(cache) == 8
@@ -0,0 +1,12 @@
+import os
+import pytest
+from fakeexes import FakeExes
+
+
+@pytest.fixture
+def fake_exes(tmpdir, monkeypatch):
+    """Changes into tmpdir and puts fake innewmarcs, pfant and nulbad in PATH; returns FakeExes"""
+    os.chdir(str(tmpdir))
+    ret = FakeExes(str(tmpdir.join("fake-bin")))
+    monkeypatch.setenv("PATH", ret.dir+os.pathsep+os.environ["PATH"])
+    return ret
@@ -0,0 +1,93 @@
+"""
+Fake PFANT executables (shell scripts) for tests and benchmarks
+
+Used by conftest.py (fixture fake_exes) and by some scripts in work/benchmarks
+"""
+
+__all__ = ["FakeExes"]
+
+
+import os
+import stat
+
+
+# Each script appends a line to "<dir>/<name>_runs" and sleeps SLEEP seconds before creating its
+# outputs
+_HEADER = """#!/bin/sh
+echo x >> "{dir}/{name}_runs"
+sleep {sleep}
+"""
+
+# Creates the "--fn_modeles" and "--fn_opa" files
+_INNEWMARCS = """while [ $# -gt 0 ]; do
+    if [ "$1" = "--fn_modeles" -o "$1" = "--fn_opa" ]; then
+        echo 1 > "$2"
+    fi
+    shift
+done
+"""
+
+# Creates "<flprefix>.{spec,cont,norm}" (contents: extension); fails if there is no "--flprefix",
+# or if the "--fn_modeles" file does not exist
+_PFANT = """while [ $# -gt 0 ]; do
+    case "$1" in
+        --pas) pas="$2";;
+        --fn_modeles) modeles="$2";;
+        --flprefix) flprefix="$2";;
+    esac
+    shift
+done
+[ -n "{sleep_pas}" ] && sleep "$pas"
+[ -n "$flprefix" ] || exit 1
+[ -z "$modeles" -o -f "$modeles" ] || exit 1
+for ext in spec cont norm; do echo $ext > "$flprefix.$ext"; done
+"""
+
+# Creates "--fn_cv" as a two-point spectrum whose fluxes are the FWHM
+_NULBAD = """fwhm=0
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --fwhm) fwhm="$2";;
+        --fn_cv) fn_cv="$2";;
+    esac
+    shift
+done
+printf "# fake\\n# fake\\n5000 $fwhm\\n5001 $fwhm\\n" > "$fn_cv"
+"""
+
+
+class FakeExes(object):
+    """
+    Writes fake innewmarcs, pfant and nulbad into a directory
+
+    Args:
+        dirname: directory (created if needed), to be prepended to PATH by the caller
+        sleep=0: running time of each executable (s)
+        flag_sleep_pas=False: pfant sleeps additionally for the value of its "--pas" option (s),
+                              so that running times can differ among pfant's
+
+    Run counts are kept in the same directory (see get_num_runs())
+    """
+
+    def __init__(self, dirname, sleep=0, flag_sleep_pas=False):
+        self.dir = os.path.abspath(dirname)
+        os.makedirs(self.dir, exist_ok=True)
+        for name, body in (("innewmarcs", _INNEWMARCS), ("pfant", _PFANT), ("nulbad", _NULBAD)):
+            text = _HEADER.format(dir=self.dir, name=name, sleep=sleep)+body
+            if name == "pfant":
+                text = text.replace("{sleep_pas}", "1" if flag_sleep_pas else "")
+            path = self.get_exe_path(name)
+            with open(path, "w") as h:
+                h.write(text)
+            os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+
+    def get_exe_path(self, name):
+        return os.path.join(self.dir, name)
+
+    def get_num_runs(self, name):
+        """Returns number of times executable has run"""
+        filename = os.path.join(self.dir, name+"_runs")
+        if not os.path.isfile(filename):
+            return 0
+        with open(filename) as h:
+            return len(h.readlines())
@@ -0,0 +1,74 @@
+import pyfant
+import copy
+import os
+
+
+def _make_file_abonds():
+    f = pyfant.FileAbonds()
+    f.ele = ["FE", "CA"]
+    f.abol = [7.5, 6.36]
+    f.notes_per_ele = ["", ""]
+    return f
+
+
+def test_InputStore(tmpdir):
+    os.chdir(str(tmpdir))
+    store = pyfant.InputStore("store")
+    f = _make_file_abonds()
+    g = copy.deepcopy(f)
+    os.mkdir("a")
+    os.mkdir("b")
+    store.link(f, os.path.join("a", "abonds.dat"))
+    store.link(g, os.path.join("b", "abonds.dat"))
+    assert (store.num_saved, store.num_linked) == (1, 2)
+    assert len(os.listdir("store")) == 1
+
+    g.abol[0] += .5
+    store.invalidate(g)
+    store.link(g, os.path.join("b", "abonds.dat"))
+    assert store.num_saved == 2
+    h = pyfant.FileAbonds()
+    h.load(os.path.join("b", "abonds.dat"))
+    assert h.abol == [8., 6.36]
+    h = pyfant.FileAbonds()
+    h.load(os.path.join("a", "abonds.dat"))
+    assert h.abol == [7.5, 6.36]
+
+    store.clean()
+    assert not os.path.exists("store")
+    assert os.path.isfile(os.path.join("a", "abonds.dat"))
+
+
+def test_InputStore_memoized(tmpdir, monkeypatch):
+    os.chdir(str(tmpdir))
+    store = pyfant.InputStore("store")
+    f = _make_file_abonds()
+    path = store.get_path(f)
+
+    def save_as(*args):
+        raise AssertionError("object saved twice")
+    monkeypatch.setattr(f, "save_as", save_as)
+    assert store.get_path(f) == path
+
+    # same contents, different file name
+    g = _make_file_abonds()
+    g.filename = "other.dat"
+    assert store.get_path(g) == path
+    assert store.num_saved == 1
+
+
+def test_Conf_input_store(tmpdir):
+    os.chdir(str(tmpdir))
+    store = pyfant.InputStore()
+    f = _make_file_abonds()
+    confs = []
+    for _ in range(3):
+        conf = pyfant.Conf()
+        conf.file_abonds = f
+        conf.input_store = store
+        conf.flag_log_file = False
+        conf.flag_log_console = False
+        conf.configure([pyfant.FOR_PFANT])
+        confs.append(conf)
+    assert store.num_saved == 1
+    assert all(os.path.isfile(conf.opt.fn_abonds) for conf in confs)
@@ -0,0 +1,112 @@
+import pyfant
+import time
+import os
+
+
+class _FakeRunnable(pyfant.Runnable):
+    """Runnable that does not run any executable; fails if flag_fail"""
+
+    def __init__(self, flag_fail=False):
+        pyfant.Runnable.__init__(self)
+        self.flag_fail = flag_fail
+        self.__sid = pyfant.SID(pyfant.IdMaker())
+
+    def _get_sid(self):
+        return self.__sid
+
+    def get_status(self):
+        return "?"
+
+    def kill(self):
+        self._flag_killed = True
+
+    def run(self):
+        self._flag_finished = True
+        self._flag_error = self.flag_fail
+        self._result["pid_run"] = os.getpid()
+
+    def load_result(self):
+        self._result["pid_load"] = os.getpid()
+
+
+def test_run_parallel_no_executables():
+    rr = [_FakeRunnable() for _ in range(100)]
+    rm = pyfant.run_parallel(rr, max_simultaneous=3)
+    assert rm.num_finished == 100
+    assert rm.flag_success
+    assert all(r.flag_success for r in rr)
+
+
+def _wait_finished(rm):
+    # like rm.wait_until_finished() but without exiting the manager
+    while not rm.flag_finished:
+        time.sleep(0.01)
+
+
+def test_pause_resume():
+    rm = pyfant.RunnableManager(max_simultaneous=2)
+    rm.pause()
+    rm.start()
+    rm.add_runnables([_FakeRunnable() for _ in range(10)])
+    time.sleep(0.1)
+    assert rm.num_finished == 0
+    rm.resume()
+    rm.wait_until_finished()
+    rm.join()
+    assert rm.num_finished == 10
+
+
+def test_retry_failed():
+    rr = [_FakeRunnable(i % 2 == 0) for i in range(10)]
+    rm = pyfant.RunnableManager(max_simultaneous=2)
+    rm.start()
+    rm.add_runnables(rr)
+    _wait_finished(rm)
+    assert rm.num_failed == 5
+
+    for r in rr:
+        r.flag_fail = False
+    rm.retry_failed()
+    rm.wait_until_finished()
+    rm.join()
+    assert rm.num_failed == 0
+    assert rm.num_finished == 10
+
+
+def _test_executor(executor):
+    rr = [_FakeRunnable() for _ in range(6)]
+    rm = pyfant.RunnableManager(max_simultaneous=3, executor=executor, flag_load_result=True)
+    pyfant.run_parallel(rr, runnable_manager=rm)
+    rm.exit()
+    rm.join()
+    assert rm.num_finished == 6 and rm.flag_success
+    for r in rr:
+        assert r.flag_success
+        assert r.result["pid_run"] == r.result["pid_load"] != os.getpid()
+
+
+def test_process_executor():
+    _test_executor(pyfant.ProcessExecutor(2))
+
+
+def test_process_executor_combos(fake_exes):
+    # Conf must be picklable, including its logger
+    rr = [pyfant.Combo([pyfant.FOR_INNEWMARCS]) for _ in range(2)]
+    for r in rr:
+        r.conf.flag_log_console = False
+    rm = pyfant.run_parallel(rr, executor=pyfant.ProcessExecutor(2))
+    assert rm.num_finished == 2 and rm.flag_success
+    assert fake_exes.get_num_runs("innewmarcs") == 2
+
+
+def test_fake_cluster_executor(tmpdir):
+    _test_executor(pyfant.FakeClusterExecutor(str(tmpdir)))
+
+
+def test_as_completed():
+    rr = [_FakeRunnable(i == 3) for i in range(10)]
+    got = []
+    rm = pyfant.run_parallel(rr, max_simultaneous=3, callback=got.append)
+    rm.join()
+    assert len(got) == 9 and rr[3] not in got
+    assert all("pid_load" in r.result for r in got)
@@ -0,0 +1,46 @@
+import pyfant
+import os
+
+
+def _run_pfant(run_cache, pas):
+    pfant = pyfant.Pfant()
+    pfant.conf.flag_log_console = False
+    pfant.conf.flag_output_to_dir = True
+    pfant.conf.opt.flprefix = "flux"
+    pfant.conf.opt.pas = pas
+    pfant.conf.run_cache = run_cache
+    pfant.run()
+    assert pfant.flag_success
+    with open(pfant.conf.get_pfant_output_filepath("norm")) as h:
+        assert h.read() == "norm\n"
+    return pfant
+
+
+def test_RunCache(fake_exes):
+    with open("abonds.dat", "w") as h:
+        h.write("1\n")
+
+    run_cache = pyfant.RunCache("cache")
+    pfant = _run_pfant(run_cache, .02)
+    assert (pfant.num_cache_hits, pfant.num_cache_misses) == (0, 1)
+
+    # same inputs, different session directory
+    pfant = _run_pfant(run_cache, .02)
+    assert (pfant.num_cache_hits, pfant.num_cache_misses) == (1, 0)
+    assert fake_exes.get_num_runs("pfant") == 1
+
+    # different option
+    _run_pfant(run_cache, .04)
+    assert fake_exes.get_num_runs("pfant") == 2
+
+    # different input file contents
+    with open("abonds.dat", "w") as h:
+        h.write("2\n")
+    pfant = _run_pfant(run_cache, .02)
+    assert pfant.num_cache_misses == 1
+    assert fake_exes.get_num_runs("pfant") == 3
+    assert run_cache.num_stored == 3
+
+    run_cache.max_size = 0
+    assert run_cache.evict() == 3
+    assert os.listdir("cache") == []
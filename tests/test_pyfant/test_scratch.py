@@ -0,0 +1,26 @@
+import pyfant
+import os
+
+
+def _make_pfant(scratch):
+    pfant = pyfant.Pfant()
+    pfant.conf.flag_log_console = False
+    pfant.conf.flag_output_to_dir = True
+    pfant.conf.opt.flprefix = "flux"
+    scratch.attach(pfant)
+    return pfant
+
+
+def test_ScratchSessions(fake_exes):
+    scratch = pyfant.ScratchSessions(root=".", output_dir="outputs")
+    pfants = [_make_pfant(scratch) for _ in range(3)]
+    for pfant in pfants:
+        pfant.run()
+        assert os.path.dirname(pfant.sid.dir) == scratch.dir
+
+    assert sorted(os.listdir("outputs")) == ["session-{}-flux.norm".format(i) for i in range(3)]
+    assert scratch.num_copied == 3
+
+    scratch.clean()
+    assert not os.path.exists(scratch.dir)
+    assert len(os.listdir("outputs")) == 3
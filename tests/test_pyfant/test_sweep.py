@@ -0,0 +1,34 @@
+import pyfant
+import os
+
+
+def test_make_grid():
+    points = pyfant.make_grid({"teff": [5000, 6000], ("llzero", "llfin"): [(5000, 5100), (6000, 6100)]})
+    assert [list(x.items()) for x in points] == [
+        [("teff", 5000), ("llzero", 5000), ("llfin", 5100)],
+        [("teff", 5000), ("llzero", 6000), ("llfin", 6100)],
+        [("teff", 6000), ("llzero", 5000), ("llfin", 5100)],
+        [("teff", 6000), ("llzero", 6000), ("llfin", 6100)]]
+
+
+def test_Sweep(fake_exes):
+    file_main = pyfant.FileMain()
+    file_main.init_default()
+    file_abonds = pyfant.FileAbonds()
+    file_abonds.init_default()
+    options = pyfant.FileOptions()
+    options.no_h = True
+    points = pyfant.make_grid({"teff": [5000, 6000], "ab.Ca": [0, .3], "fwhm": [.1, .2]})
+    sweep = pyfant.Sweep(file_main, file_abonds, options, points)
+    sweep.run()
+    assert sweep.flag_success
+
+    # one innewmarcs per atmosphere, one pfant per (atmosphere, abundance), one nulbad per point
+    assert [fake_exes.get_num_runs(x) for x in ("innewmarcs", "pfant", "nulbad")] == [2, 4, 8]
+    result = pyfant.load_sweep(sweep.output_filepath)
+    assert [x[0] for x in result] == sweep.names
+    for (name, point, sp), point_ in zip(result, points):
+        assert point == dict(point_)
+        assert list(sp.x) == [5000, 5001] and list(sp.y) == [point["fwhm"]]*2
+    # session directories removed
+    assert sorted(os.listdir(sweep.sid.dir)) == [pyfant.SWEEP_FILENAME]
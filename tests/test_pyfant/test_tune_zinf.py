@@ -0,0 +1,79 @@
+import pyfant
+import os
+import argparse
+import importlib.util
+import numpy as np
+import f311
+
+
+def _load_script():
+    # script file name is not a valid module name
+    filename = os.path.join(os.path.dirname(pyfant.__file__), "scripts", "tune-zinf.py")
+    spec = importlib.util.spec_from_file_location("tune_zinf", filename)
+    ret = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(ret)
+    return ret
+
+
+def _make_norm(llzero, llfin, lambdas, pas):
+    """Normalized spectrum with one gaussian line (sigma=.3) at each of lambdas"""
+    ret = f311.Spectrum()
+    ret.x = np.arange(llzero, llfin+pas/2, pas)
+    ret.y = np.ones(len(ret.x))
+    for lambda_ in lambdas:
+        ret.y -= .5*np.exp(-.5*((ret.x-lambda_)/.3)**2)
+    return ret
+
+
+def test_pack_lines():
+    tz = _load_script()
+    lambdas = [5000., 5001., 5030., 5002., 5100., 5061., 5000.5]
+    batches = tz._pack_lines(lambdas, 10., 2)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lambdas)))
+    for batch in batches:
+        assert len(batch) <= 2
+        ll = [lambdas[i] for i in batch]
+        assert ll == sorted(ll)
+        assert all(b-a >= 20. for a, b in zip(ll, ll[1:]))
+    # lines closer than 2*zinf_max go into different batches
+    assert len(tz._pack_lines(lambdas, 10., 100)) == 4
+    assert tz._pack_lines(lambdas, 10., 1) == [[i] for i in np.argsort(lambdas, kind="stable")]
+
+
+def test_check_batched(tmpdir, monkeypatch):
+    os.chdir(str(tmpdir))
+    tz = _load_script()
+    lambdas = [5000., 5030., 5060.]
+    ll = []
+    for lambda_ in lambdas:
+        a = pyfant.Atom()
+        a.elem, a.ioni = "FE", 1
+        line = pyfant.AtomicLine()
+        line.lambda_ = lambda_
+        a.lines = [line]
+        ll.append(a)
+    args = argparse.Namespace(max=10., check=3, no_clean=True)
+
+    # instead of running pfant, makes normalized spectrum over each combo's calculation interval;
+    # the line at 5060 "fails"
+    def run_parallel(combos, callback=None):
+        for combo in combos:
+            lambda_ = combo.conf.file_atoms.atoms[0].lines[0].lambda_
+            if lambda_ == 5060.:
+                continue
+            combo.pfant.norm = _make_norm(combo.conf.opt.llzero, combo.conf.opt.llfin, [lambda_], tz.PAS)
+            combo._flag_finished = True
+    monkeypatch.setattr(pyfant, "run_parallel", run_parallel)
+
+    # batched zinf's as found from one run with all lines, plus a wrong one
+    norm = _make_norm(min(lambdas)-args.max, max(lambdas), lambdas, tz.PAS)
+    zinfs = [tz._get_zinf(x, norm, args.max) for x in lambdas]
+    zinfs[1] += 1.
+    tz._check_batched(ll, zinfs, args, pyfant.FileAbonds(), None, None)
+
+    with open("tune-zinf-check.log") as h:
+        rows = h.readlines()[1:]
+    assert len(rows) == 3
+    assert "*" not in rows[0]
+    assert "*DIFFERENT*" in rows[1]
+    assert "*failed*" in rows[2]
@@ -0,0 +1,42 @@
+import pyfant
+import os
+
+
+def _make_combo(teff, pas):
+    combo = pyfant.Combo([pyfant.FOR_INNEWMARCS, pyfant.FOR_PFANT])
+    combo.conf.flag_log_console = False
+    combo.conf.flag_output_to_dir = True
+    combo.conf.file_main = pyfant.FileMain()
+    combo.conf.file_main.init_default()
+    combo.conf.file_main.teff = teff
+    combo.conf.opt.pas = pas
+    return combo
+
+
+def test_get_upstream_key(tmpdir):
+    os.chdir(str(tmpdir))
+    key = pyfant.get_upstream_key(_make_combo(5777, .02))
+    assert key is not None
+    assert pyfant.get_upstream_key(_make_combo(5777, .04)) == key
+    assert pyfant.get_upstream_key(_make_combo(4000, .02)) != key
+    assert pyfant.get_upstream_key(pyfant.Combo([pyfant.FOR_PFANT])) is None
+    assert pyfant.get_upstream_key(pyfant.Combo([pyfant.FOR_INNEWMARCS])) is None
+
+
+def test_flag_share_upstream(fake_exes):
+    combos = [_make_combo(teff, pas) for teff in (5777, 4000) for pas in (.02, .04, .06)]
+    rm = pyfant.run_parallel(combos, flag_share_upstream=True)
+    assert rm.num_finished == len(combos) and rm.num_failed == 0
+    fns_modeles = set()
+    for combo in combos:
+        assert combo.flag_success
+        assert os.path.isfile(combo.conf.get_pfant_output_filepath("norm"))
+        # configuration is not changed
+        assert combo.sequence == [pyfant.FOR_INNEWMARCS, pyfant.FOR_PFANT]
+        assert combo.conf.opt.fn_modeles is None
+        # pfant used the model created by the shared innewmarcs
+        with open(combo.sid.join_with_session_dir("commands.log")) as h:
+            words = h.read().split()
+        fns_modeles.add(words[words.index("--fn_modeles")+1])
+    assert fake_exes.get_num_runs("innewmarcs") == 2
+    assert len(fns_modeles) == 2 and all(os.path.isfile(x) for x in fns_modeles)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Measures FileAtoms load/save times on a synthetic atomic lines file
+
+Creates a file with NUM_LINES random atomic lines (default: 1 million), then
+loads it and saves it again, checking that the saved file is identical to the
+original.
+"""
+
+import argparse
+import filecmp
+import os
+import time
+import numpy as np
+import a99
+import pyfant
+
+
+def make_file_atoms(num_lines, seed=0):
+    """Returns FileAtoms with num_lines random atomic lines"""
+    rng = np.random.RandomState(seed)
+    symbols = ["FE", "NI", "CA", "TI", "C", "O", "MG", "SI", "CR", "V"]
+    f = pyfant.FileAtoms()
+    for symbol in symbols:
+        for ioni in (1, 2):
+            a = pyfant.Atom()
+            a.elem = pyfant.adjust_atomic_symbol(symbol)
+            a.ioni = ioni
+            f.atoms.append(a)
+    which = rng.randint(len(f.atoms), size=num_lines)
+    for i, a in enumerate(f.atoms):
+        n = int(np.sum(which == i))
+        rows = np.zeros(n, dtype=a.rows.dtype)
+        rows["lambda_"] = np.round(np.sort(rng.uniform(3000, 9000, n)), 3)
+        rows["kiex"] = np.round(rng.uniform(0, 10, n), 3)
+        rows["algf"] = np.round(rng.uniform(-9, 1, n), 3)
+        rows["ch"] = 10**rng.uniform(-33, -29, n)
+        rows["gr"] = np.where(rng.rand(n) < .5, 0., 1e8*rng.rand(n))
+        rows["zinf"] = rng.choice([0.5, 1.2, 50.], n)
+        rows["abondr"] = 1
+        a._set_rows(rows)
+    return f
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_lines", type=int, default=1000000, help="number of lines")
+    parser.add_argument("-k", "--keep", action="store_true", help="keep the files created")
+    args = parser.parse_args()
+
+    fn0, fn1 = "bench-atoms-0.dat", "bench-atoms-1.dat"
+    make_file_atoms(args.num_lines).save_as(fn0)
+    print("Created '{}' ({:.1f} MB)".format(fn0, os.path.getsize(fn0)/2**20))
+
+    t = time.time()
+    f = pyfant.FileAtoms()
+    f.load(fn0)
+    t_load = time.time()-t
+
+    t = time.time()
+    f.save_as(fn1)
+    t_save = time.time()-t
+
+    flag_identical = filecmp.cmp(fn0, fn1, shallow=False)
+    print("{} lines: load {:.2f} s, save {:.2f} s, round-trip identical: {}".format(
+          f.num_lines, t_load, t_save, flag_identical))
+
+    if not args.keep:
+        os.unlink(fn0)
+        os.unlink(fn1)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Measures repeated loads of line lists through the line cache (see pyfant.LineCache)
+
+Creates synthetic Kurucz and PFANT molecular lines files with NUM_LINES lines each, then times: parsing
+without cache; first load with cache (parses file and writes cache entry); second load (cache hit);
+and second load with a LineFilter selecting a 5-angstrom window (binary search in wavelength index).
+"""
+
+import argparse
+import os
+import time
+import shutil
+import logging
+import tempfile
+import numpy as np
+import a99
+import pyfant
+
+
+def write_kurucz(filename, num_lines, rng):
+    """Writes Kurucz molecular lines file with random contents"""
+    f = pyfant.FileKuruczMolecule()
+    n = num_lines
+    data = np.zeros(n, dtype=f.data.dtype)
+    data["lambda_"] = np.sort(rng.uniform(2000, 15000, n)).round(3)
+    data["loggf"] = rng.uniform(-9, 0, n).round(3)
+    data["J2l"] = rng.randint(0, 99, n)+.5
+    data["Jl"] = data["J2l"]+rng.randint(-1, 2, n)
+    data["E2l"] = rng.uniform(-40000, 40000, n).round(3)
+    data["El"] = rng.uniform(-40000, 40000, n).round(3)
+    data["atomn0"], data["atomn1"] = 6, 7
+    data["state2l"], data["statel"] = "X", "A"
+    data["v2l"], data["vl"] = rng.randint(0, 30, n), rng.randint(0, 30, n)
+    data["lambda_doubling2l"] = data["lambda_doublingl"] = rng.choice(["e", "f"], n)
+    data["spin2l"], data["spinl"] = rng.randint(1, 3, n), rng.randint(1, 3, n)
+    data["iso"] = rng.choice([12, 13], n)
+    data["rest"] = " 617 K"
+    f.data = data
+    f.save_as(filename)
+
+
+def write_molecules(filename, num_lines, rng):
+    """Writes PFANT molecular lines file with random contents, 4 molecules with 10 sets-of-lines each"""
+    f = pyfant.FileMolecules()
+    f.titm = "Synthetic molecular lines"
+    branches = np.array(["P1", "P12", "Q1", "Q2", "R1", "R21"])
+    k = num_lines//40
+    for description in ("CN [A2Pi-X2Sigma+]", "TiO [A3Phi-X3Delta]", "C2 [d3Pi-a3Pi]", "OH [A2Sigma-X2Pi]"):
+        m = pyfant.Molecule()
+        m.description = description
+        m.symbols = ["C", "N"]
+        for vl in range(10):
+            sol = pyfant.SetOfLines(vl, vl, .5, 1000., 1.9, 6e-6, 1.)
+            sol.append_lines(np.sort(rng.uniform(3000, 9000, k)).round(3), rng.uniform(0, 20, k).round(4),
+                             rng.randint(1, 120, k)+.5, branches[rng.randint(len(branches), size=k)])
+            m.sol.append(sol)
+        f.molecules.append(m)
+    f.save_as(filename)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_lines", type=int, default=1000000, help="number of lines")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = np.random.RandomState(0)
+    dirname = tempfile.mkdtemp()
+    old = pyfant.get_line_cache()
+    try:
+        fn_kurucz, fn_molecules = os.path.join(dirname, "kurucz.asc"), os.path.join(dirname, "molecules.dat")
+        write_kurucz(fn_kurucz, args.num_lines, rng)
+        write_molecules(fn_molecules, args.num_lines, rng)
+        cache = pyfant.LineCache(os.path.join(dirname, "cache"), min_size=0)
+        line_filter = pyfant.LineFilter(llzero=6000, llfin=6005)
+
+        for title, filename, class_ in (("Kurucz", fn_kurucz, pyfant.FileKuruczMolecule),
+                                        ("PFANT molecules", fn_molecules, pyfant.FileMolecules)):
+            times = []
+            for cache_, lf in ((None, None), (cache, None), (cache, None), (cache, line_filter)):
+                pyfant.set_line_cache(cache_)
+                t = time.time()
+                f = class_(line_filter=lf)
+                f.load(filename)
+                times.append(time.time()-t)
+            print("{} ({:.0f} MB): no cache {:.2f} s; first load {:.2f} s; cache hit {:.4f} s; "
+                  "cache hit, 5-angstrom window {:.4f} s".format(title, os.path.getsize(filename)/2**20, *times))
+    finally:
+        pyfant.set_line_cache(old)
+        shutil.rmtree(dirname)
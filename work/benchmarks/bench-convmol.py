@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Measures ConvKurucz.make_file_molecules() on a synthetic Kurucz OH line list
+
+Creates NUM_LINES random lines of the OH [A 2 Sigma - X 2 Pi] system (10% of them of another
+isotope) and converts them into a FileMolecules using Hönl-London factors.
+"""
+
+import argparse
+import time
+import numpy as np
+import a99
+import pyfant
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_lines", type=int, default=1000000, help="number of lines")
+    args = parser.parse_args()
+    n = args.num_lines
+
+    db = pyfant.FileMolDB()
+    db.init_default()
+    molconsts = pyfant.MolConsts()
+    molconsts.populate_all_using_str(db, "OH [A 2 Sigma - X 2 Pi]")
+    molconsts.None_to_zero()
+
+    rng = np.random.RandomState(0)
+    J2l = rng.randint(0, 60, n)+.5
+    columns = zip(np.round(rng.uniform(3000, 4000, n), 4).tolist(), J2l.tolist(),
+                  (J2l+rng.randint(-1, 2, n)).tolist(), rng.randint(0, 5, n).tolist(),
+                  rng.randint(1, 3, n).tolist(), rng.randint(0, 5, n).tolist(),
+                  rng.choice([16, 18], n, p=[.9, .1]).tolist())
+    fileobj = pyfant.FileKuruczMolecule()
+    fileobj.lines = [pyfant.KuruczMolLine(lambda_=lambda_, loggf=-1., J2l=J2l_, E2l=0., Jl=Jl, El=0.,
+                                          atomn0=1, atomn1=8, state2l="X", v2l=v2l, lambda_doubling2l="f",
+                                          spin2l=spin2l, statel="A", vl=vl, lambda_doublingl="e",
+                                          spinl=1, iso=iso, rest="")
+                     for lambda_, J2l_, Jl, v2l, spin2l, vl, iso in columns]
+
+    conv = pyfant.ConvKurucz(molconsts=molconsts, iso=16)
+    t = time.time()
+    f = conv.make_file_molecules(fileobj)
+    print("{} lines: make_file_molecules() {:.2f} s ({} lines in, {} skipped)".format(
+          n, time.time()-t, conv.log.cnt_in, sum(conv.log.skip_reasons.values())))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Compares loading line lists with a LineFilter against loading everything and cutting afterwards
+
+Creates synthetic Kurucz (NUM_LINES lines) and Plez TiO (NUM_LINES/5 lines) files covering 2000-15000
+angstrom, then selects a WIDTH-angstrom window (default: 5) either by passing a LineFilter to the reader
+or by loading the whole file and keeping the lines inside the window. Times and peak memory allocated
+during each load (measured in a separate run with tracemalloc) are reported.
+"""
+
+import argparse
+import os
+import time
+import logging
+import tracemalloc
+import numpy as np
+import a99
+import pyfant
+
+
+def write_kurucz(filename, num_lines, rng):
+    """Writes Kurucz molecular lines file with random contents"""
+    f = pyfant.FileKuruczMolecule()
+    n = num_lines
+    data = np.zeros(n, dtype=f.data.dtype)
+    data["lambda_"] = np.sort(rng.uniform(2000, 15000, n)).round(3)
+    data["loggf"] = rng.uniform(-9, 0, n).round(3)
+    data["J2l"] = rng.randint(0, 99, n)+.5
+    data["Jl"] = data["J2l"]+rng.randint(-1, 2, n)
+    data["E2l"] = rng.uniform(-40000, 40000, n).round(3)
+    data["El"] = rng.uniform(-40000, 40000, n).round(3)
+    data["atomn0"], data["atomn1"] = 6, 7
+    data["state2l"], data["statel"] = "X", "A"
+    data["v2l"], data["vl"] = rng.randint(0, 30, n), rng.randint(0, 30, n)
+    data["lambda_doubling2l"] = data["lambda_doublingl"] = rng.choice(["e", "f"], n)
+    data["spin2l"], data["spinl"] = rng.randint(1, 3, n), rng.randint(1, 3, n)
+    data["iso"] = rng.choice([12, 13], n)
+    data["rest"] = " 617 K"
+    f.data = data
+    f.save_as(filename)
+
+
+def write_pleztio(filename, num_lines, rng):
+    """Writes Plez TiO lines file with random contents"""
+    f = pyfant.FilePlezTiO()
+    n = num_lines
+    f.lines = [pyfant.PlezTiOLine(*x) for x in zip(
+        np.sort(rng.uniform(2000, 15000, n)).round(4).tolist(), (10**rng.uniform(-12, -2, n)).tolist(),
+        rng.uniform(0, 20000, n).round(4).tolist(), rng.randint(0, 20, n).tolist(),
+        (rng.randint(0, 150, n)+.0).tolist(), (rng.randint(0, 150, n)+.0).tolist(), [0]*n,
+        rng.uniform(10000, 40000, n).round(4).tolist(), rng.randint(0, 20, n).tolist(),
+        (rng.randint(0, 150, n)+.0).tolist(), (rng.randint(0, 150, n)+.0).tolist(), [0]*n,
+        rng.uniform(1e7, 2e7, n).tolist(), ["TiO"]*n, rng.choice(["a", "b"], n).tolist(), ["f"]*n,
+        rng.choice(["P", "Q", "R"], n).tolist())]
+    f.save_as(filename)
+
+
+def measure(load):
+    """Returns (time, peak allocated memory in MB, number of lines) for load()"""
+    t = time.time()
+    num_lines = load()
+    t = time.time()-t
+    tracemalloc.start()
+    load()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return t, peak/2**20, num_lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_lines", type=int, default=1000000, help="number of Kurucz lines")
+    parser.add_argument("-w", "--width", type=float, default=5., help="width of wavelength window (angstrom)")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    llzero, llfin = 6000., 6000.+args.width
+    line_filter = pyfant.LineFilter(llzero=llzero, llfin=llfin)
+    rng = np.random.RandomState(0)
+    fn_kurucz, fn_tio = "bench-filter.asc", "bench-filter-tio.dat"
+    write_kurucz(fn_kurucz, args.num_lines, rng)
+    write_pleztio(fn_tio, args.num_lines//5, rng)
+    try:
+        def kurucz_cut():
+            f = pyfant.FileKuruczMolecule()
+            f.load(fn_kurucz)
+            f.data = f.data[(f.data["lambda_"] >= llzero) & (f.data["lambda_"] <= llfin)]
+            return len(f)
+
+        def kurucz_filter():
+            f = pyfant.FileKuruczMolecule(line_filter=line_filter)
+            f.load(fn_kurucz)
+            return len(f)
+
+        def tio_cut():
+            f = pyfant.FilePlezTiO()
+            f.load(fn_tio)
+            f.lines = [x for x in f.lines if llzero <= x.lambda_ <= llfin]
+            return len(f)
+
+        def tio_filter():
+            f = pyfant.FilePlezTiO(line_filter=line_filter)
+            f.load(fn_tio)
+            return len(f)
+
+        for title, load in (("Kurucz, load-then-cut", kurucz_cut), ("Kurucz, LineFilter", kurucz_filter),
+                            ("Plez TiO, load-then-cut", tio_cut), ("Plez TiO, LineFilter", tio_filter)):
+            t, peak, num_lines = measure(load)
+            print("{:<24} {:7.2f} s {:9.1f} MB peak {:8} lines kept".format(title, t, peak, num_lines))
+    finally:
+        os.unlink(fn_kurucz)
+        os.unlink(fn_tio)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Measures session set-up times with and without an InputStore
+
+Configures NUM_SESSIONS pfant sessions sharing the same (large) synthetic FileMolecules
+and FileAbonds, first saving the files into every session directory, then linking them
+from an InputStore. Reports wall time and bytes written in each case.
+"""
+
+import argparse
+import importlib.util
+import os
+import time
+import a99
+import pyfant
+
+
+def _load_bench_molecules():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench-molecules.py")
+    spec = importlib.util.spec_from_file_location("bench_molecules", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _disk_usage(dirs):
+    """Returns bytes used by files in dirs (hard-linked files counted once)"""
+    inodes = {}
+    for dir_ in dirs:
+        for root, _, filenames in os.walk(dir_):
+            for filename in filenames:
+                st = os.lstat(os.path.join(root, filename))
+                inodes[(st.st_dev, st.st_ino)] = st.st_size
+    return sum(inodes.values())
+
+
+def _bench(fm, fa, num_sessions, store):
+    confs = []
+    t = time.time()
+    for _ in range(num_sessions):
+        conf = pyfant.Conf()
+        conf.file_molecules = fm
+        conf.file_abonds = fa
+        conf.input_store = store
+        conf.flag_log_file = False
+        conf.flag_log_console = False
+        conf.configure([pyfant.FOR_PFANT])
+        confs.append(conf)
+    ret = time.time()-t
+    dirs = [conf.sid.dir for conf in confs]+([store.dir] if store is not None else [])
+    size = _disk_usage(dirs)
+    for conf in confs:
+        conf.sid.clean()
+    if store is not None:
+        store.clean()
+    return ret, size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_sessions", type=int, default=50, help="number of sessions")
+    parser.add_argument("-l", "--num_lines", type=int, default=200000, help="number of molecular lines")
+    parser.add_argument("-m", "--link_mode", type=str, default="hard", choices=["hard", "symbolic", "copy"],
+                        help="InputStore link mode")
+    args = parser.parse_args()
+
+    fm = _load_bench_molecules().make_file_molecules(args.num_lines)
+    fa = pyfant.FileAbonds()
+    fa.ele, fa.abol, fa.notes_per_ele = ["FE", "CA", "MG"], [7.50, 6.36, 7.58], ["", "", ""]
+
+    for name, store in [("save into sessions", None),
+                        ("input store ({})".format(args.link_mode),
+                         pyfant.InputStore("bench-inputstore", args.link_mode))]:
+        t, size = _bench(fm, fa, args.num_sessions, store)
+        print("{}: {} sessions in {:.2f} s, {:.1f} MB written".format(name, args.num_sessions, t, size/2**20))
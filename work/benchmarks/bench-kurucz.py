@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Measures FileKuruczMolecule load times on a synthetic Kurucz molecular lines file
+
+Creates a file with NUM_LINES random lines, then loads it with the bulk parser and with the row-by-row
+parser, checking that both give the same values. Finally, reads the file in chunks with iter_chunks(),
+as a program would do to process a file too large to fit in memory.
+"""
+
+import argparse
+import os
+import time
+import logging
+import numpy as np
+import a99
+import pyfant
+
+
+def write_kurucz(filename, num_lines, rng):
+    """Writes Kurucz molecular lines file with random contents"""
+    f = pyfant.FileKuruczMolecule()
+    n = num_lines
+    data = np.zeros(n, dtype=f.data.dtype)
+    data["lambda_"] = np.sort(rng.uniform(2000, 15000, n)).round(3)
+    data["loggf"] = rng.uniform(-9, 0, n).round(3)
+    data["J2l"] = rng.randint(0, 99, n)+.5
+    data["Jl"] = data["J2l"]+rng.randint(-1, 2, n)
+    data["E2l"] = rng.uniform(-40000, 40000, n).round(3)
+    data["El"] = rng.uniform(-40000, 40000, n).round(3)
+    data["atomn0"], data["atomn1"] = 6, 7
+    data["state2l"], data["statel"] = "X", "A"
+    data["v2l"], data["vl"] = rng.randint(0, 30, n), rng.randint(0, 30, n)
+    data["lambda_doubling2l"] = data["lambda_doublingl"] = rng.choice(["e", "f"], n)
+    data["spin2l"], data["spinl"] = rng.randint(1, 3, n), rng.randint(1, 3, n)
+    data["iso"] = rng.choice([12, 13], n)
+    data["rest"] = " 617 K"
+    f.data = data
+    f.save_as(filename)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_lines", type=int, default=1000000, help="number of lines")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    filename = "bench-kurucz.asc"
+    write_kurucz(filename, args.num_lines, np.random.RandomState(0))
+    try:
+        t = time.time()
+        f = pyfant.FileKuruczMolecule()
+        f.load(filename)
+        t_bulk = time.time()-t
+
+        t = time.time()
+        with open(filename) as h:
+            rows = h.read().splitlines()
+        data = pyfant.FileKuruczMolecule._parse_rows(rows, 0, filename)
+        pyfant.FileKuruczMolecule._post_process(data)
+        t_rows = time.time()-t
+        del rows
+
+        t = time.time()
+        counts = {}
+        for chunk in pyfant.FileKuruczMolecule.iter_chunks(filename):
+            for iso, count in zip(*np.unique(chunk["iso"], return_counts=True)):
+                counts[iso] = counts.get(iso, 0)+count
+        t_chunks = time.time()-t
+
+        print("{} lines: bulk {:.2f} s, row-by-row {:.2f} s, identical: {}; "
+              "counting isotopes with iter_chunks() {:.2f} s".format(
+              args.num_lines, t_bulk, t_rows, data.tolist() == f.data.tolist(), t_chunks))
+    finally:
+        os.unlink(filename)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Measures FileMolecules load/save times on a synthetic molecular lines file
+
+Creates a file with NUM_LINES random molecular lines (default: 1 million) split
+among a few molecules, then loads it and saves it again, checking that the saved
+file is identical to the original.
+"""
+
+import argparse
+import filecmp
+import os
+import time
+import numpy as np
+import a99
+import pyfant
+
+
+def make_file_molecules(num_lines, seed=0):
+    """Returns FileMolecules with num_lines random molecular lines"""
+    rng = np.random.RandomState(seed)
+    branches = np.array(["P1", "P12", "P21", "P2", "Q1", "Q12", "Q21", "Q2", "R1", "R12", "R21", "R2"])
+    f = pyfant.FileMolecules()
+    f.titm = "Synthetic molecular lines"
+    descriptions = [("CN [A2Pi-X2Sigma+]", ["C", "N"], 8), ("TiO [A3Phi-X3Delta]", ["TI", "O"], 6),
+                    ("C2 [d3Pi-a3Pi]", ["C", "C"], 5), ("OH [A2Sigma-X2Pi]", ["O", "H"], 3)]
+    which = rng.randint(len(descriptions), size=num_lines)
+    for i, (description, symbols, nv) in enumerate(descriptions):
+        m = pyfant.Molecule()
+        m.description = description
+        m.symbols = symbols
+        m.fe, m.do, m.mm, m.am, m.bm = 0.0055, 7.76, 26.0, 12.0, 14.0
+        m.ua, m.ub, m.te, m.cro = 4.2, 2.0, 9000.0, 0.0
+        m.s = 0.5
+        n = int(np.sum(which == i))
+        which_sol = rng.randint(nv, size=n)
+        for vl in range(nv):
+            sol = pyfant.SetOfLines(vl, vl, round(rng.rand(), 4), 1000., 1.9, 6e-6, 1.)
+            k = int(np.sum(which_sol == vl))
+            sol.append_lines(np.round(np.sort(rng.uniform(3000, 9000, k)), 3),
+                             np.round(rng.uniform(0, 20, k), 4), rng.randint(1, 120, k)+.5,
+                             branches[rng.randint(len(branches), size=k)])
+            m.sol.append(sol)
+        f.molecules.append(m)
+    return f
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_lines", type=int, default=1000000, help="number of lines")
+    parser.add_argument("-k", "--keep", action="store_true", help="keep the files created")
+    args = parser.parse_args()
+
+    fn0, fn1 = "bench-molecules-0.dat", "bench-molecules-1.dat"
+    make_file_molecules(args.num_lines).save_as(fn0)
+    print("Created '{}' ({:.1f} MB)".format(fn0, os.path.getsize(fn0)/2**20))
+
+    t = time.time()
+    f = pyfant.FileMolecules()
+    f.load(fn0)
+    t_load = time.time()-t
+
+    t = time.time()
+    f.save_as(fn1)
+    t_save = time.time()-t
+
+    flag_identical = filecmp.cmp(fn0, fn1, shallow=False)
+    print("{} lines: load {:.2f} s, save {:.2f} s, round-trip identical: {}".format(
+          f.num_lines, t_load, t_save, flag_identical))
+
+    if not args.keep:
+        os.unlink(fn0)
+        os.unlink(fn1)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Measures time to pick the models bracketing a point of a ".moo" grid
+
+Creates a synthetic grid with NUM_RECORDS records (default: 200; the full grid has 4x10x5 points), then compares
+(eager) FileMoo.load() against lazy loading followed by find_bracket() and access to
+the opacities of the models found.
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import a99
+import pyfant
+
+
+def make_file_moo(num_records, seed=0):
+    """Returns FileMoo with num_records records with random contents"""
+    rng = np.random.RandomState(seed)
+    f = pyfant.FileMoo()
+    f.records = []
+    asalogs = [-1.5, -1., -.5, 0.]
+    teffs = np.arange(4000, 6500, 250)
+    glogs = np.arange(3, 5.01, .5)
+    points = [(a, t, g) for a in asalogs for t in teffs for g in glogs][:num_records]
+    for asalog, teff, glog in points:
+        r = pyfant.MooRecord()
+        r.ntot, r.nwav = pyfant.filetypes.filemod.NTOT, pyfant.filetypes.filemod.NWAV
+        r.teff, r.glog, r.asalog, r.asalalf, r.nhe = teff, glog, asalog, 0., .1
+        r.tit, r.tiabs = "synthetic", "synthetic"
+        r.nh, r.teta, r.pe, r.pg, r.log_tau_ross = rng.rand(5, r.ntot)
+        r.swave = 5000.
+        r.ops = rng.rand(r.ntot)
+        r.wav = np.linspace(1000, 100000, r.nwav)
+        r.abs, r.sca = rng.rand(2, r.nwav, r.ntot)
+        r.abund = rng.rand(92)
+        f.records.append(r)
+    return f
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_records", type=int, default=200, help="number of records")
+    parser.add_argument("-k", "--keep", action="store_true", help="keep the file created")
+    args = parser.parse_args()
+
+    fn = "bench-moo.moo"
+    make_file_moo(args.num_records).save_as(fn)
+    print("Created '{}' ({:.1f} MB)".format(fn, os.path.getsize(fn)/2**20))
+    point = (5100., 3.2, -.3)
+
+    t = time.time()
+    f = pyfant.FileMoo()
+    f.load(fn)
+    ii = f.find_bracket(*point)
+    s0 = sum(float(np.sum(f.records[i].abs)) for i in ii)
+    t_eager = time.time()-t
+
+    t = time.time()
+    f = pyfant.FileMoo(flag_lazy=True)
+    f.load(fn)
+    ii = f.find_bracket(*point)
+    s1 = sum(float(np.sum(f.records[i].abs)) for i in ii)
+    t_lazy = time.time()-t
+
+    print("{} records, {} models bracketing {}: eager {:.3f} s, lazy {:.3f} s, same result: {}".
+          format(len(f), len(ii), point, t_eager, t_lazy, s0 == s1))
+
+    if not args.keep:
+        del f
+        os.unlink(fn)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Measures FileOpa load times on a directory of synthetic MARCS ".opa" files
+
+Creates NUM_FILES real-sized (56 depth points x 1071 wavelengths) ".opa" files with
+random contents, then loads them with FileOpa (bulk parser) and with the row-by-row
+parser, checking that both give the same values.
+"""
+
+import argparse
+import io
+import os
+import shutil
+import time
+import numpy as np
+import a99
+import pyfant
+from pyfant.filetypes.filemod import NTOT, NWAV, _parse_opa_rows
+
+
+def _format_rows(values, fmt, per_row):
+    return "".join((fmt*len(values[i:i+per_row]) % tuple(values[i:i+per_row]))+"\n"
+                   for i in range(0, len(values), per_row))
+
+
+def write_opa(filename, rng):
+    """Writes ".opa" file with random contents, formatted like MARCS files"""
+    with open(filename, "w") as h:
+        h.write(" MRXF%5d%10.2f\n" % (NTOT, 5000.))
+        h.write("%6d\n" % NWAV)
+        h.write(_format_rows(np.sort(rng.uniform(900, 200000, NWAV)).tolist(), "%12.2f", 10))
+        for k in range(NTOT):
+            h.write("%8.5f %10.4E %8.1f %10.4E %10.4E %10.4E %5.2f %10.4E\n" %
+                    tuple(rng.uniform(.5, 1.5, 8)))
+            h.write(_format_rows(rng.uniform(0, 50, 2*NWAV).tolist(), " %10.4E", 6))
+        h.write(_format_rows(rng.uniform(-5, 12, 92).tolist(), "%8.3f", 10))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_files", type=int, default=50, help="number of files")
+    parser.add_argument("-k", "--keep", action="store_true", help="keep the files created")
+    args = parser.parse_args()
+
+    dir_ = "bench-opa"
+    os.makedirs(dir_, exist_ok=True)
+    rng = np.random.RandomState(0)
+    filenames = [os.path.join(dir_, "model{:04d}.opa".format(i)) for i in range(args.num_files)]
+    for filename in filenames:
+        write_opa(filename, rng)
+    print("Created {} files in '{}/' ({:.1f} MB each)".format(
+          len(filenames), dir_, os.path.getsize(filenames[0])/2**20))
+
+    t = time.time()
+    ff = []
+    for filename in filenames:
+        f = pyfant.FileOpa()
+        f.load(filename)
+        ff.append(f)
+    t_bulk = time.time()-t
+
+    t = time.time()
+    gg = []
+    for filename in filenames:
+        g = pyfant.FileOpa()
+        with open(filename, "rb") as h:
+            h.readline()
+            g.ndp, g.nwav = NTOT, int(h.readline())
+            _parse_opa_rows(g, io.BytesIO(h.read()))
+        gg.append(g)
+    t_rows = time.time()-t
+
+    names = ["wav", "rad", "tau", "t", "pe", "pg", "rho", "xi", "ops", "abs", "sca", "abund"]
+    flag_equal = all(np.array_equal(getattr(f, name), getattr(g, name))
+                     for f, g in zip(ff, gg) for name in names)
+    print("{} files: bulk {:.3f} s, row-by-row {:.3f} s, equal: {}".format(
+          len(filenames), t_bulk, t_rows, flag_equal))
+
+    if not args.keep:
+        shutil.rmtree(dir_)
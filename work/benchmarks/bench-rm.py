@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Measures RunnableManager dispatch throughput (jobs/sec) using trivial runnables
+
+The runnables do (almost) nothing, so the figure reflects scheduling overhead only.
+"""
+
+import argparse
+import time
+import pyfant
+import a99
+
+
+class _TrivialRunnable(pyfant.Runnable):
+    """Runnable that finishes instantly (or after *duration* seconds)"""
+
+    def __init__(self, duration=0.):
+        pyfant.Runnable.__init__(self)
+        self.duration = duration
+
+    def get_status(self):
+        return "finished" if self._flag_finished else "?"
+
+    def kill(self):
+        self._flag_killed = True
+
+    def run(self):
+        self._flag_running = True
+        if self.duration > 0:
+            time.sleep(self.duration)
+        self._flag_running = False
+        self._flag_finished = True
+
+
+def bench(num_jobs, max_simultaneous, duration):
+    rm = pyfant.RunnableManager(max_simultaneous=max_simultaneous)
+    rm.add_runnables([_TrivialRunnable(duration) for _ in range(num_jobs)])
+    t = time.time()
+    rm.start()
+    # same path as pyfant.run_parallel()
+    rm.wait_until_finished()
+    ret = time.time() - t
+    rm.join()
+    return ret
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_jobs", type=int, default=2000, help="number of runnables")
+    parser.add_argument("-m", "--max_simultaneous", type=int, default=4, help="number of runners")
+    parser.add_argument("-d", "--duration", type=float, default=0.,
+                        help="duration of each job (seconds)")
+    args = parser.parse_args()
+
+    ellapsed = bench(args.num_jobs, args.max_simultaneous, args.duration)
+    print("{} jobs, {} runners, {:g} s/job: {:.3f} s ellapsed, {:.1f} jobs/sec".format(
+          args.num_jobs, args.max_simultaneous, args.duration, ellapsed, args.num_jobs/ellapsed))
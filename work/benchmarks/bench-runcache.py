@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Measures RunCache overhead and savings on re-runs
+
+Runs NUM_JOBS fake pfant's (shell script that sleeps SLEEP seconds, then writes the
+"<flprefix>.{spec,cont,norm}" files) twice with the same inputs, including a large molecular
+lines file linked into the sessions from an InputStore. The first pass fills the cache; the
+second pass restores all outputs from it. Also reports the time to make the run cache keys.
+"""
+
+import argparse
+import importlib.util
+import os
+import shutil
+import sys
+import time
+import a99
+import pyfant
+# FakeExes is kept with the tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tests", "test_pyfant"))
+from fakeexes import FakeExes
+
+
+def _load_bench_molecules():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench-molecules.py")
+    spec = importlib.util.spec_from_file_location("bench_molecules", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _make_pfants(exe_path, num_jobs, fm, store, run_cache):
+    ret = []
+    for i in range(num_jobs):
+        pfant = pyfant.Pfant()
+        pfant.exe_path = exe_path
+        pfant.conf.flag_log_console = False
+        pfant.conf.flag_output_to_dir = True
+        pfant.conf.opt.flprefix = "flux"
+        pfant.conf.opt.llzero = 5000+i
+        pfant.conf.file_molecules = fm
+        pfant.conf.input_store = store
+        pfant.conf.run_cache = run_cache
+        ret.append(pfant)
+    return ret
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_jobs", type=int, default=100, help="number of jobs")
+    parser.add_argument("-s", "--sleep", type=float, default=.5, help="fake pfant running time (s)")
+    parser.add_argument("-l", "--num_lines", type=int, default=200000, help="number of molecular lines")
+    args = parser.parse_args()
+
+    dir_ = "bench-runcache"
+    exe_path = FakeExes(dir_, args.sleep).get_exe_path("pfant")
+
+    fm = _load_bench_molecules().make_file_molecules(args.num_lines)
+    store = pyfant.InputStore(os.path.join(dir_, "input-store"))
+    run_cache = pyfant.RunCache(os.path.join(dir_, "run-cache"))
+
+    all_pfants = []
+    for name in ("first pass (misses)", "second pass (hits)"):
+        pfants = _make_pfants(exe_path, args.num_jobs, fm, store, run_cache)
+        t = time.time()
+        rm = pyfant.run_parallel(pfants)
+        print("{}: {} jobs in {:.2f} s; {}".format(name, args.num_jobs, time.time()-t,
+              [x for x in rm.get_summary_report() if "cache" in x][0]))
+        all_pfants.extend(pfants)
+
+    t = time.time()
+    for pfant in all_pfants:
+        run_cache.get_key(pfant)
+    print("Making {} run cache keys: {:.3f} s".format(len(all_pfants), time.time()-t))
+
+    for pfant in all_pfants:
+        pfant.sid.clean()
+    shutil.rmtree(dir_)
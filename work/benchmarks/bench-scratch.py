@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Measures filesystem metadata operations per job with and without ScratchSessions
+
+Runs NUM_JOBS fake pfant's (shell script that only writes "<flprefix>.{spec,cont,norm}") with session
+directories in the working directory, then with session directories in scratch (see
+pyfant.SCRATCH_ROOT) copying the ".norm" files back. For each case reports wall time (running
+and cleaning) and the number of directory entries created in the working directory per job,
+which are also the number of removals when cleaning.
+
+Run it from the (shared) filesystem to be measured.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+import a99
+import pyfant
+# FakeExes is kept with the tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tests", "test_pyfant"))
+from fakeexes import FakeExes
+
+
+def _count_entries(dir_):
+    ret = 0
+    for _, dirnames, filenames in os.walk(dir_):
+        ret += len(dirnames)+len(filenames)
+    return ret
+
+
+def _bench(exe_path, num_jobs, dir_, scratch):
+    """Returns (time running, time cleaning, entries created in dir_ per job)"""
+    id_maker = pyfant.IdMaker()
+    id_maker.session_prefix_singular = os.path.join(dir_, pyfant.SESSION_PREFIX_SINGULAR)
+    pfants = []
+    for _ in range(num_jobs):
+        pfant = pyfant.Pfant()
+        pfant.exe_path = exe_path
+        pfant.conf.flag_log_console = False
+        pfant.conf.flag_output_to_dir = True
+        pfant.conf.opt.flprefix = "flux"
+        pfant.conf.sid.id_maker = id_maker
+        if scratch is not None:
+            scratch.attach(pfant)
+        pfants.append(pfant)
+
+    t = time.time()
+    pyfant.run_parallel(pfants)
+    t_run = time.time()-t
+    n = _count_entries(dir_)
+
+    t = time.time()
+    if scratch is not None:
+        scratch.clean()
+    else:
+        for pfant in pfants:
+            pfant.sid.clean()
+    t_clean = time.time()-t
+    return t_run, t_clean, n/num_jobs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_jobs", type=int, default=1000, help="number of jobs")
+    parser.add_argument("-r", "--root", type=str, default=None,
+                        help="scratch root (default: pyfant.SCRATCH_ROOT if available)")
+    args = parser.parse_args()
+
+    dir_ = "bench-scratch"
+    exe_path = FakeExes(dir_).get_exe_path("pfant")
+
+    for name, dir_sessions in [("sessions in working directory", "local"), ("scratch sessions", "scratch")]:
+        d = os.path.join(dir_, dir_sessions)
+        os.mkdir(d)
+        scratch = None
+        if dir_sessions == "scratch":
+            scratch = pyfant.ScratchSessions(args.root, output_dir=d)
+            name += " ({})".format(scratch.root)
+        t_run, t_clean, n = _bench(exe_path, args.num_jobs, d, scratch)
+        print("{}: {} jobs: run {:.2f} s, clean {:.2f} s, {:.1f} entries created per job".format(
+              name, args.num_jobs, t_run, t_clean, n))
+
+    shutil.rmtree(dir_)
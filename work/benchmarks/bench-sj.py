@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Measures Hönl-London factor calculation: get_sj() line by line vs. get_sj_array()
+
+Draws NUM_LINES random (vl, v2l, J, branch) combinations for a molecular system, then
+calculates their line strengths calling get_sj() for each line (as the converters do) and
+calling get_sj_array() once, checking that both give the same values.
+"""
+
+import argparse
+import time
+import numpy as np
+import a99
+import pyfant
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_lines", type=int, default=1000000, help="number of lines")
+    parser.add_argument("-s", "--system", type=str, default="NH [A 3 PI - X 3 SIGMA]",
+                        help="formula and system")
+    args = parser.parse_args()
+
+    db = pyfant.FileMolDB()
+    db.init_default()
+    molconsts = pyfant.MolConsts()
+    molconsts.populate_all_using_str(db, args.system)
+    molconsts.None_to_zero()
+
+    mtools = pyfant.kovacs_toolbox(molconsts, flag_normalize=True)
+    labels = [branch for branch, _ in mtools._get_populate_data(0, 0, 0)]
+    rng = np.random.RandomState(0)
+    vl = rng.randint(0, 6, args.num_lines)
+    v2l = rng.randint(0, 6, args.num_lines)
+    J = rng.randint(0, 150, args.num_lines)+.5
+    branch = np.array(labels)[rng.randint(len(labels), size=args.num_lines)]
+
+    t = time.time()
+    sj0 = np.empty(args.num_lines)
+    for i, args_ in enumerate(zip(vl.tolist(), v2l.tolist(), J.tolist(), branch.tolist())):
+        try:
+            sj0[i] = mtools.get_sj(*args_)
+        except pyfant.NoLineStrength:
+            sj0[i] = pyfant.NO_LINE_STRENGTH
+    t_loop = time.time()-t
+
+    mtools = pyfant.kovacs_toolbox(molconsts, flag_normalize=True)
+    t = time.time()
+    sj1 = mtools.get_sj_array(vl, v2l, J, branch)
+    t_array = time.time()-t
+
+    print("{} lines: get_sj() {:.2f} s, get_sj_array() {:.2f} s, identical: {}".format(
+          args.num_lines, t_loop, t_array, np.array_equal(sj0, sj1)))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Measures FileSpectrumPfant and FileSpectrumNulbad load times on large synthetic spectra
+
+Creates pfant ("flux.norm"-like) and nulbad (".sp"-like) files with random fluxes, then
+loads them with the bulk parsers and with the former row-by-row parsers, checking that
+both give the same values.
+"""
+
+import argparse
+import os
+import shutil
+import time
+import numpy as np
+import a99
+import pyfant
+
+
+# pfant writes the spectrum in calculation intervals of (at most) this number of points
+_IKEY_POINTS = 1001
+
+
+def write_pfant(filename, l0, pas, n, rng):
+    """Writes pfant output file with n points, formatted like pfant files"""
+    ikeytot = (n-2)//(_IKEY_POINTS-1)+1
+    y = rng.uniform(0, 1, n)
+    fmt = "{:5d}{:20s}" \
+          "{:15.5f}{:15.5f}{:15.5f}{:15.5f}{:15.5f}" \
+          "{:10.1f}{:10.1f}{:10.1f}{:10.1f}" \
+          "{:10d}" \
+          "{:15.5f}{:15.5f}{:15.5f}{:15.5f}\n"
+    with open(filename, "w") as h:
+        for ikey in range(ikeytot):
+            i0 = ikey*(_IKEY_POINTS-1)
+            v = y[i0:i0+_IKEY_POINTS]
+            l0_ = l0+i0*pas
+            h.write(fmt.format(ikeytot, "synthetic", 1.17895, 4.44, 0., .1, 0., l0_,
+                               l0_+(len(v)-1)*pas, l0, l0+(n-1)*pas, len(v), pas, 1., 1., .12))
+            h.write("".join(["{:15.5f}".format(a) for a in v])+"\n")
+
+
+def write_nulbad(filename, l0, pas, n, rng):
+    """Writes nulbad output file with n points"""
+    with open(filename, "w") as h:
+        h.write("#synthetic           Tef= 5.777 log g= 4.4 [M/H]= 0.00  0.00\n")
+        h.write("#{:6d}  0. 0. 1. 1. Lzero ={:10.2f}  Lfin ={:10.2f}  PAS ={:5.2f}  FWHM ={:5.2f}\n".format(
+                n, l0, l0+(n-1)*pas, pas, .12))
+        for x, y in zip((l0+np.arange(n)*pas).tolist(), rng.uniform(0, 1, n).tolist()):
+            h.write("   {:<24.16f}   {:<24.17g}\n".format(x, y))
+
+
+def load_pfant_rows(filename):
+    """Former row-by-row FileSpectrumPfant parser. Returns (x, y)"""
+    with open(filename, 'r') as h:
+        i = 0
+        y = []
+        while True:
+            s = h.readline()
+            if i == 0:
+                ikeytot = int(s[0:5])
+                l0 = float(s[100:110])
+                pas = float(s[150:165])
+            s = h.readline()
+            v = [float(s[0 + j:15 + j]) for j in range(0, len(s) - 1, 15)]
+            if i < ikeytot - 1:
+                y = y + v[:-1]
+            else:
+                y = y + v
+                break
+            i += 1
+    return np.array([l0 + k * pas for k in range(0, len(y))]), np.array(y)
+
+
+def load_nulbad_rows(filename):
+    """Former row-by-row FileSpectrumNulbad parser. Returns (x, y)"""
+    x, y = [], []
+    with open(filename, 'r') as h:
+        h.readline()
+        h.readline()
+        while True:
+            s = h.readline().strip()
+            if not s:
+                break
+            a, b = [float(z) for z in s.split()]
+            x.append(a)
+            y.append(b)
+    return np.array(x), np.array(y)
+
+
+def _bench(name, cls, load_rows, filenames):
+    t = time.time()
+    ff = []
+    for filename in filenames:
+        f = cls()
+        f.load(filename)
+        ff.append(f)
+    t_bulk = time.time()-t
+
+    t = time.time()
+    gg = [load_rows(filename) for filename in filenames]
+    t_rows = time.time()-t
+
+    flag_equal = all(np.array_equal(f.spectrum.x, x) and np.array_equal(f.spectrum.y, y)
+                     for f, (x, y) in zip(ff, gg))
+    print("{}: {} files: bulk {:.3f} s, row-by-row {:.3f} s, equal: {}".format(
+          name, len(filenames), t_bulk, t_rows, flag_equal))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_files", type=int, default=10, help="number of files of each type")
+    parser.add_argument("-w", "--width", type=float, default=100., help="spectrum width (angstrom)")
+    parser.add_argument("-s", "--step", type=float, default=.001, help="wavelength step (angstrom)")
+    parser.add_argument("-k", "--keep", action="store_true", help="keep the files created")
+    args = parser.parse_args()
+
+    dir_ = "bench-spectrum"
+    os.makedirs(dir_, exist_ok=True)
+    rng = np.random.RandomState(0)
+    n = int(round(args.width/args.step))+1
+    fns_pfant = [os.path.join(dir_, "flux{:04d}.norm".format(i)) for i in range(args.num_files)]
+    fns_nulbad = [os.path.join(dir_, "flux{:04d}.sp".format(i)) for i in range(args.num_files)]
+    for fn_pfant, fn_nulbad in zip(fns_pfant, fns_nulbad):
+        write_pfant(fn_pfant, 5000., args.step, n, rng)
+        write_nulbad(fn_nulbad, 5000., args.step, n, rng)
+    print("Created {} files in '{}/' ({} points each)".format(2*args.num_files, dir_, n))
+
+    _bench("pfant", pyfant.FileSpectrumPfant, load_pfant_rows, fns_pfant)
+    _bench("nulbad", pyfant.FileSpectrumNulbad, load_nulbad_rows, fns_nulbad)
+
+    if not args.keep:
+        shutil.rmtree(dir_)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Measures Sweep pipelining (each nulbad starts as soon as its pfant has finished) against running
+all pfant's, then all nulbad's (barrier between stages)
+
+Uses fake executables (shell scripts in PATH) that sleep SLEEP seconds. Fake pfant sleeps
+additionally SLEEP, 2*SLEEP or 3*SLEEP seconds (passed as option "pas") depending on the point, so
+that pfant's finish at different times.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+import a99
+import pyfant
+# FakeExes is kept with the tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tests", "test_pyfant"))
+from fakeexes import FakeExes
+
+
+def _make_inputs():
+    file_main = pyfant.FileMain()
+    file_main.init_default()
+    file_abonds = pyfant.FileAbonds()
+    file_abonds.init_default()
+    options = pyfant.FileOptions()
+    options.no_h = True
+    return file_main, file_abonds, options
+
+
+def _run_barrier(points):
+    """Runs pfant's, then nulbad's, like MultiRunnable used to"""
+    file_main, file_abonds, options = _make_inputs()
+    # also holds the shared innewmarcs session
+    scratch = pyfant.ScratchSessions()
+    combos = []
+    for point in points:
+        combo = pyfant.Combo([pyfant.FOR_INNEWMARCS, pyfant.FOR_PFANT])
+        combo.conf.flag_output_to_dir = True
+        combo.conf.flag_log_console = False
+        combo.conf.file_main, combo.conf.file_abonds = file_main, file_abonds
+        combo.conf.opt.no_h = True
+        combo.conf.opt.pas = point["opt.pas"]
+        scratch.attach(combo)
+        combos.append(combo)
+    pyfant.run_parallel(combos, flag_share_upstream=True)
+    nulbads = []
+    for combo in combos:
+        nulbad = pyfant.Nulbad()
+        nulbad.conf.flag_log_console = False
+        nulbad.conf.opt.fn_flux = combo.conf.get_pfant_output_filepath("norm")
+        nulbad.conf.opt.fn_cv = combo.sid.join_with_session_dir("flux.sp")
+        scratch.attach(nulbad)
+        nulbads.append(nulbad)
+    pyfant.run_parallel(nulbads)
+    scratch.clean()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_points", type=int, default=24, help="number of points")
+    parser.add_argument("-s", "--sleep", type=float, default=.2, help="time unit (s)")
+    args = parser.parse_args()
+
+    fake_exes = FakeExes("bench-sweep", args.sleep, flag_sleep_pas=True)
+    os.environ["PATH"] = fake_exes.dir+os.pathsep+os.environ["PATH"]
+
+    # fake pfant sleeps additionally "pas" seconds
+    points = [{"opt.pas": args.sleep*(1+i % 3)} for i in range(args.num_points)]
+
+    t = time.time()
+    _run_barrier(points)
+    print("pfant stage, then nulbad stage: {} points in {:.2f} s".format(len(points), time.time()-t))
+
+    t = time.time()
+    sweep = pyfant.Sweep(*_make_inputs(), points=points)
+    sweep.run()
+    print("Sweep (pipelined): {} points in {:.2f} s".format(len(points), time.time()-t))
+    shutil.rmtree(sweep.sid.dir)
+
+    shutil.rmtree(fake_exes.dir)
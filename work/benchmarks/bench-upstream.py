@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Measures savings of sharing innewmarcs runs among Combos (RunnableManager flag_share_upstream)
+
+Runs NUM_JOBS Combos (innewmarcs + pfant) that differ only in pfant's "--pas" option, using fake
+executables (shell scripts that sleep SLEEP seconds, then write their output files), without and
+with flag_share_upstream. Sessions go into ScratchSessions, which also removes the shared ones.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+import a99
+import pyfant
+# FakeExes is kept with the tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tests", "test_pyfant"))
+from fakeexes import FakeExes
+
+
+def _make_combos(fake_exes, num_jobs, scratch):
+    ret = []
+    for i in range(num_jobs):
+        combo = pyfant.Combo([pyfant.FOR_INNEWMARCS, pyfant.FOR_PFANT])
+        combo.innewmarcs.exe_path = fake_exes.get_exe_path("innewmarcs")
+        combo.pfant.exe_path = fake_exes.get_exe_path("pfant")
+        combo.conf.flag_log_console = False
+        combo.conf.flag_output_to_dir = True
+        combo.conf.file_main = pyfant.FileMain()
+        combo.conf.file_main.init_default()
+        combo.conf.opt.pas = .01*(i+1)
+        scratch.attach(combo)
+        ret.append(combo)
+    return ret
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=a99.SmartFormatter)
+    parser.add_argument("-n", "--num_jobs", type=int, default=32, help="number of jobs")
+    parser.add_argument("-s", "--sleep", type=float, default=.5, help="fake executables running time (s)")
+    args = parser.parse_args()
+
+    fake_exes = FakeExes("bench-upstream", args.sleep)
+
+    for flag in (False, True):
+        scratch = pyfant.ScratchSessions()
+        combos = _make_combos(fake_exes, args.num_jobs, scratch)
+        t = time.time()
+        rm = pyfant.run_parallel(combos, flag_share_upstream=flag)
+        print("flag_share_upstream={}: {} jobs in {:.2f} s, {} failed".format(
+              flag, args.num_jobs, time.time()-t, rm.num_failed))
+        # removes shared sessions as well
+        scratch.clean()
+
+    shutil.rmtree(fake_exes.dir)